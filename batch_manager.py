@@ -10,7 +10,32 @@ import logging.handlers
 from tkinter import messagebox
 from tkinter import filedialog
 import time
+import signal
 import base64 # For embedding icons
+import sys
+import socket
+import socketserver
+import select
+import struct
+import argparse
+import collections
+import http.server
+import bisect
+import functools
+import re
+import math
+import heapq
+import itertools
+import shlex
+import random
+import datetime
+from array import array
+import urllib.request
+import sqlite3
+import zlib
+import gzip
+import ctypes
+import glob
 
 try:
     from plyer import notification
@@ -24,6 +49,11 @@ try:
 except ImportError:
     PSUTIL_AVAILABLE = False
 
+try:
+    import resource # POSIX only; used for per-script open-file limits
+except ImportError:
+    resource = None
+
 # --- Base64 encoded icons (GIF format) ---
 # Simple 1x1 pixel colored GIFs for compatibility with tk.PhotoImage(data=...)
 # These are placeholders. For better icons, generate 16x16 or 20x20 GIF images
@@ -138,9 +168,3294 @@ class Switch(ttk.Frame):
         self._draw_switch(self.variable.get())
 
 
+def _sample_process_tree(process_cache, root_pid, pids=None, per_process=None):
+    """
+    Refreshes a {pid: psutil.Process} cache for the tree below root_pid (or for the
+    given pids, e.g. from a ProcessTable) and returns (cpu_percent, rss_bytes); fills
+    per_process with pid -> (cpu_percent, rss_bytes) if given. Raises
+    psutil.NoSuchProcess if the root is gone.
+    """
+    root_proc = process_cache.get(root_pid)
+    if root_proc is None:
+        root_proc = psutil.Process(root_pid)
+        root_proc.cpu_percent(interval=None)
+        process_cache[root_pid] = root_proc
+
+    if pids is None:
+        all_current_pids = {child.pid for child in root_proc.children(recursive=True)}
+    else:
+        all_current_pids = set(pids)
+    all_current_pids.add(root_pid)
+
+    for pid in set(process_cache.keys()) - all_current_pids:
+        del process_cache[pid]
+
+    for pid in all_current_pids:
+        if pid not in process_cache:
+            try:
+                new_proc = psutil.Process(pid)
+                new_proc.cpu_percent(interval=None)
+                process_cache[pid] = new_proc
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+
+    total_cpu = 0.0
+    total_rss = 0
+    for pid, proc in list(process_cache.items()):
+        try:
+            cpu = proc.cpu_percent(interval=None)
+            rss = proc.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            del process_cache[pid]
+            continue
+        total_cpu += cpu
+        total_rss += rss
+        if per_process is not None:
+            per_process[pid] = (cpu, rss)
+    return total_cpu, total_rss
+
+
+class ProcessTable:
+    """
+    Snapshot of the system process table (pid -> parent, start time), taken once per
+    sampling tick and shared by all scripts instead of one children(recursive=True)
+    scan per script. The parent/child links are updated from the difference to the
+    previous snapshot; command lines are read once per process.
+    """
+    def __init__(self):
+        self.parents = {} # pid -> ppid
+        self.create_times = {} # pid -> start time; tells a reused PID from the old process
+        self.children = collections.defaultdict(set) # ppid -> child pids
+        self.descriptions = {} # pid -> (name, command line), read on first use
+        self.added = set()
+        self.removed = set()
+        self.reparented = set()
+
+    def refresh(self):
+        parents = {}
+        create_times = {}
+        for process in psutil.process_iter(['ppid', 'create_time']):
+            parents[process.pid] = process.info['ppid']
+            create_times[process.pid] = process.info['create_time']
+        old_parents, old_times = self.parents, self.create_times
+        removed = {pid for pid, created in old_times.items() if create_times.get(pid) != created}
+        added = {pid for pid, created in create_times.items() if old_times.get(pid) != created}
+        reparented = {pid for pid, ppid in parents.items() if pid not in added and old_parents.get(pid) != ppid}
+        for pid in removed | reparented:
+            siblings = self.children.get(old_parents.get(pid))
+            if siblings is not None:
+                siblings.discard(pid)
+                if not siblings:
+                    del self.children[old_parents[pid]]
+        for pid in removed:
+            self.descriptions.pop(pid, None)
+        for pid in added | reparented:
+            self.children[parents[pid]].add(pid)
+        self.parents, self.create_times = parents, create_times
+        self.added, self.removed, self.reparented = added, removed, reparented
+
+    def descendants(self, root):
+        """PIDs below root, each listed after its parent."""
+        result = []
+        stack = [root]
+        while stack:
+            for child in self.children.get(stack.pop(), ()):
+                result.append(child)
+                stack.append(child)
+        return result
+
+    def is_alive(self, pid, create_time):
+        return self.create_times.get(pid) == create_time
+
+    def describe(self, pid):
+        """(process name, command line) of a process."""
+        description = self.descriptions.get(pid)
+        if description is None:
+            try:
+                process = psutil.Process(pid)
+                name = process.name()
+                description = (name, " ".join(process.cmdline()) or name)
+            except psutil.Error:
+                description = (str(pid), "")
+            self.descriptions[pid] = description
+        return description
+
+    def command_line(self, pid):
+        return self.describe(pid)[1]
+
+
+# --- Replica sets (N instances of one script definition) ---
+REPLICA_SEPARATOR = "#" # Instance names: "<name>#<index>"; index 0 keeps the plain name
+REPLICA_INDEX_ENV = "BATCH_MANAGER_REPLICA_INDEX"
+REPLICA_COUNT_ENV = "BATCH_MANAGER_REPLICAS"
+SCRIPT_PORT_ENV = "BATCH_MANAGER_PORT" # Port the instance (or on-demand script) should listen on
+MAX_REPLICAS = 100
+
+
+def replica_name(name, index):
+    return name if index == 0 else f"{name}{REPLICA_SEPARATOR}{index}"
+
+
+def replica_entry(name, data, index):
+    """Script entry of instance `index` of the replica set `name`: the definition with its own index and port."""
+    entry = {key: value for key, value in data.items() if key != 'replicas'}
+    entry['replica_of'] = name
+    entry['replica_index'] = index
+    if data.get('port'):
+        entry['port'] = int(data['port']) + index
+    if isinstance(data.get('activation'), dict) and data['activation'].get('backend_port'):
+        entry['activation'] = {**data['activation'], 'backend_port': int(data['activation']['backend_port']) + index}
+    return entry
+
+
+# --- On-demand activation (the manager holds the script's port and starts it on the first connection) ---
+DEFAULT_ACTIVATION_IDLE_SECONDS = 300 # Stopped again after this long without connections or output
+DEFAULT_ACTIVATION_READY_SECONDS = 30 # How long a connection waits for the starting script's backend port
+ACTIVATION_RETRY_SECONDS = 0.05 # Pause between connection attempts to a starting script
+ACTIVATION_CHECK_MS = 1000 # Idle check interval
+PROXY_BUFFER_SIZE = 65536
+
+
+class _ActivationRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.server.activation.serve(self.request)
+
+
+class _ActivationTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class ActivationProxy:
+    """
+    Listens on a script's public port while the script may be stopped. A connection to a
+    stopped script requests its start and waits until the script's backend port accepts;
+    the bytes are then relayed in both directions until either side closes.
+    """
+    def __init__(self, name, port, config, request_start, is_running, logger):
+        self.name = name
+        self.port = int(port)
+        self.host = config.get('host', "127.0.0.1")
+        self.backend_port = int(config['backend_port'])
+        self.idle_seconds = float(config.get('idle_seconds', DEFAULT_ACTIVATION_IDLE_SECONDS))
+        self.ready_seconds = float(config.get('ready_seconds', DEFAULT_ACTIVATION_READY_SECONDS))
+        self.request_start = request_start # Thread-safe; starts the script on the main loop
+        self.is_running = is_running
+        self.logger = logger
+        self.lock = threading.Lock()
+        self.active = 0 # Open client connections
+        self.connections = 0
+        self.failures = 0 # Connections dropped because the script did not accept in time
+        self.activations = 0 # Starts requested by a connection
+        self.idle_stops = 0
+        self.first_request = Histogram() # Connection accepted -> backend accepted, for connections that started the script
+        self.last_first_request = None
+        self.last_activity = time.monotonic()
+        self.output_lines = 0 # Output line count at the last idle check
+        self._start_requested = None # monotonic time of a start requested by a connection, until the backend accepts
+        self._server = None
+
+    def start(self):
+        self._server = _ActivationTCPServer((self.host, self.port), _ActivationRequestHandler)
+        self._server.activation = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def script_exited(self):
+        """The next connection starts the script again, even if a requested start never became ready."""
+        with self.lock:
+            self._start_requested = None
+            self.last_activity = time.monotonic()
+
+    def idle_for(self, output_lines, now):
+        """Seconds without connections or new output; output_lines is the script's current line count."""
+        with self.lock:
+            if self.active or output_lines != self.output_lines or self._start_requested is not None:
+                self.output_lines = output_lines
+                self.last_activity = now
+            return now - self.last_activity
+
+    def serve(self, client):
+        accepted = time.monotonic()
+        with self.lock:
+            self.active += 1
+            self.connections += 1
+            if self._start_requested is None and not self.is_running():
+                self._start_requested = accepted
+                self.activations += 1
+                self.request_start()
+        try:
+            backend = self._connect_backend(accepted + self.ready_seconds)
+            if backend is None:
+                with self.lock:
+                    self.failures += 1
+                    if self._start_requested is not None and self._start_requested <= accepted:
+                        self._start_requested = None # Not ready within a full wait; the next connection requests a start again
+                self.logger.warning(f"Bei Bedarf: '{self.name}' hat Port {self.backend_port} nicht innerhalb von "
+                                    f"{self.ready_seconds:g} s geöffnet, Verbindung wird geschlossen.")
+                return
+            with self.lock:
+                started = self._start_requested
+                self._start_requested = None
+                if started is not None:
+                    latency = time.monotonic() - started
+                    self.first_request.observe(latency)
+                    self.last_first_request = latency
+            if started is not None:
+                self.logger.info(f"Bei Bedarf: '{self.name}' gestartet, erste Verbindung nach {latency:.2f} s weitergeleitet.")
+            with backend:
+                self._relay(client, backend)
+        finally:
+            with self.lock:
+                self.active -= 1
+                self.last_activity = time.monotonic()
+
+    def _connect_backend(self, deadline):
+        while True:
+            try:
+                return socket.create_connection(("127.0.0.1", self.backend_port), timeout=self.ready_seconds)
+            except OSError:
+                if time.monotonic() + ACTIVATION_RETRY_SECONDS >= deadline:
+                    return None
+                time.sleep(ACTIVATION_RETRY_SECONDS)
+
+    @staticmethod
+    def _relay(client, backend):
+        """Copies bytes both ways; a side that reaches EOF half-closes the other, so replies still arrive."""
+        client.settimeout(None)
+        backend.settimeout(None)
+        peers = {client: backend, backend: client}
+        reading = [client, backend]
+        try:
+            while reading:
+                readable, _, _ = select.select(reading, [], [])
+                for sock in readable:
+                    data = sock.recv(PROXY_BUFFER_SIZE)
+                    if data:
+                        peers[sock].sendall(data)
+                        continue
+                    reading.remove(sock)
+                    try:
+                        peers[sock].shutdown(socket.SHUT_WR)
+                    except OSError:
+                        pass
+        except OSError:
+            pass # Reset by either side
+
+
+# --- Resource limits (applied at spawn, enforced by the CPU sampling watchdog) ---
+DEFAULT_CGROUP_ROOT = "/sys/fs/cgroup/batch_manager" # Must be a delegated, writable cgroup v2 directory
+CGROUP_REMOVE_RETRY_MS = 100 # First retry of removing a group whose processes are still being reaped; doubles each time
+CGROUP_REMOVE_ATTEMPTS = 8 # About 25 s in total
+LIMIT_ACTIONS = ("warn", "throttle", "restart", "kill")
+# POSIX nice values and the matching Windows priority classes (psutil constant names)
+PRIORITY_NICE = {'idle': 19, 'below_normal': 10, 'normal': 0, 'above_normal': -5, 'high': -10}
+PRIORITY_CLASSES = {
+    'idle': "IDLE_PRIORITY_CLASS", 'below_normal': "BELOW_NORMAL_PRIORITY_CLASS", 'normal': "NORMAL_PRIORITY_CLASS",
+    'above_normal': "ABOVE_NORMAL_PRIORITY_CLASS", 'high': "HIGH_PRIORITY_CLASS",
+}
+
+
+class ResourceLimits:
+    """Parsed "limits" entry of a script."""
+    __slots__ = ('cpu_affinity', 'priority', 'max_rss', 'max_cpu_percent', 'max_open_files',
+                 'cgroup_cpu_percent', 'cgroup_memory', 'on_breach', 'breach_seconds')
+
+    def __init__(self, config):
+        affinity = config.get('cpu_affinity')
+        self.cpu_affinity = [int(cpu) for cpu in affinity] if affinity else None
+        self.priority = priority = config.get('priority')
+        valid = priority in PRIORITY_NICE if isinstance(priority, str) else type(priority) is int and -20 <= priority <= 19
+        if priority is not None and not valid:
+            raise ValueError(f"Unbekannte Priorität '{priority}' (erlaubt: {', '.join(PRIORITY_NICE)} oder ein nice-Wert von -20 bis 19)")
+        self.max_rss = int(float(config['max_rss_mb']) * 1024 * 1024) if config.get('max_rss_mb') else None
+        self.max_cpu_percent = float(config['max_cpu_percent']) if config.get('max_cpu_percent') else None
+        self.max_open_files = int(config['max_open_files']) if config.get('max_open_files') else None
+        cgroup = config.get('cgroup') or {}
+        self.cgroup_cpu_percent = float(cgroup['cpu_max_percent']) if cgroup.get('cpu_max_percent') else None
+        self.cgroup_memory = int(float(cgroup['memory_max_mb']) * 1024 * 1024) if cgroup.get('memory_max_mb') else None
+        self.on_breach = config.get('on_breach', "warn")
+        if self.on_breach not in LIMIT_ACTIONS:
+            raise ValueError(f"Unbekannte Aktion '{self.on_breach}' (erlaubt: {', '.join(LIMIT_ACTIONS)})")
+        self.breach_seconds = float(config.get('breach_seconds', 10))
+
+    @property
+    def watched(self):
+        return self.max_rss is not None or self.max_cpu_percent is not None
+
+    def nice_value(self, priority=None):
+        priority = self.priority if priority is None else priority
+        return priority if isinstance(priority, int) else PRIORITY_NICE[priority]
+
+
+def set_process_priority(pid, priority):
+    """Sets a nice value (POSIX) or the matching priority class (Windows, needs psutil)."""
+    if os.name != 'nt':
+        os.setpriority(os.PRIO_PROCESS, pid, priority if isinstance(priority, int) else PRIORITY_NICE[priority])
+        return
+    if not PSUTIL_AVAILABLE:
+        raise OSError("psutil nicht verfügbar")
+    if isinstance(priority, int): # Map a nice value to the closest class
+        priority = min(PRIORITY_NICE, key=lambda name: abs(PRIORITY_NICE[name] - priority))
+    psutil.Process(pid).nice(getattr(psutil, PRIORITY_CLASSES[priority]))
+
+
+def apply_spawn_limits(pid, limits, cgroup_root=DEFAULT_CGROUP_ROOT, name=""):
+    """Applies affinity, priority, open-file limit and cgroup quota to a new process; returns warnings."""
+    warnings = []
+    if limits.cpu_affinity:
+        try:
+            if hasattr(os, 'sched_setaffinity'):
+                os.sched_setaffinity(pid, limits.cpu_affinity)
+            elif PSUTIL_AVAILABLE:
+                psutil.Process(pid).cpu_affinity(limits.cpu_affinity)
+            else:
+                warnings.append("CPU-Affinität braucht psutil auf diesem System")
+        except (OSError, ValueError) as e:
+            warnings.append(f"CPU-Affinität {limits.cpu_affinity} nicht gesetzt: {e}")
+    if limits.priority is not None:
+        try:
+            set_process_priority(pid, limits.priority)
+        except (OSError, ValueError) as e:
+            warnings.append(f"Priorität '{limits.priority}' nicht gesetzt: {e}")
+    if limits.max_open_files:
+        if resource is not None and hasattr(resource, 'prlimit'):
+            try:
+                resource.prlimit(pid, resource.RLIMIT_NOFILE, (limits.max_open_files, limits.max_open_files))
+            except (OSError, ValueError) as e:
+                warnings.append(f"Limit für offene Dateien nicht gesetzt: {e}")
+        else:
+            warnings.append("max_open_files wird nur unter Linux unterstützt")
+    if limits.cgroup_cpu_percent or limits.cgroup_memory:
+        if not sys.platform.startswith('linux'):
+            warnings.append("cgroup-Limits werden nur unter Linux unterstützt")
+        else:
+            try:
+                _attach_cgroup(cgroup_root, name, pid, limits)
+            except OSError as e:
+                warnings.append(f"cgroup unter '{cgroup_root}' nicht eingerichtet: {e}")
+    return warnings
+
+
+def _cgroup_path(cgroup_root, name):
+    return os.path.join(cgroup_root, re.sub(r'[^A-Za-z0-9_.-]', '_', name) or "script")
+
+
+def _attach_cgroup(cgroup_root, name, pid, limits):
+    os.makedirs(cgroup_root, exist_ok=True)
+    try:
+        with open(os.path.join(cgroup_root, "cgroup.subtree_control"), 'w') as f:
+            f.write("+cpu +memory")
+    except OSError:
+        pass # Already enabled, or managed by whoever delegated the root
+    path = _cgroup_path(cgroup_root, name)
+    os.makedirs(path, exist_ok=True)
+    if limits.cgroup_cpu_percent:
+        period = 100000
+        with open(os.path.join(path, "cpu.max"), 'w') as f:
+            f.write(f"{int(period * limits.cgroup_cpu_percent / 100)} {period}")
+    if limits.cgroup_memory:
+        with open(os.path.join(path, "memory.max"), 'w') as f:
+            f.write(str(limits.cgroup_memory))
+    with open(os.path.join(path, "cgroup.procs"), 'w') as f:
+        f.write(str(pid))
+
+
+def _remove_cgroup(cgroup_root, name):
+    """Returns False while the group still has processes (e.g. a killed script that has not exited yet)."""
+    try:
+        os.rmdir(_cgroup_path(cgroup_root, name)) # Only succeeds once the group is empty
+    except FileNotFoundError:
+        pass
+    except OSError:
+        return False
+    return True
+
+
+# --- Memory trend (rolling RSS regression per script, early warning for leaks) ---
+MEMORY_TREND_BUCKET_SECONDS = 60 # Samples are averaged per minute; the fit runs over these points
+DEFAULT_MEMORY_WINDOW_HOURS = 6
+DEFAULT_MEMORY_GROWTH_MB_PER_HOUR = 50
+DEFAULT_MEMORY_MIN_R2 = 0.8 # Goodness of fit required, so a single step up is not taken for a leak
+
+
+def parse_time_window(text):
+    """'HH:MM-HH:MM' -> (start minute, end minute) of the day; the window may wrap past midnight."""
+    try:
+        start, end = (datetime.datetime.strptime(part.strip(), "%H:%M") for part in text.split('-'))
+    except (ValueError, AttributeError):
+        raise ValueError(f"Ungültiges Zeitfenster '{text}' (Format: HH:MM-HH:MM)")
+    return start.hour * 60 + start.minute, end.hour * 60 + end.minute
+
+
+def in_time_window(window, moment):
+    start, end = window
+    minute = moment.hour * 60 + moment.minute
+    return start <= minute < end if start <= end else minute >= start or minute < end
+
+
+class MemoryTrend:
+    """
+    Least-squares line through a script's RSS over a sliding window of per-minute means.
+    Points entering and leaving the window update running sums, so every sample is O(1);
+    the sums are rebuilt from the window once per window length to shed rounding drift.
+    """
+    __slots__ = ('window_hours', 'growth_mb_per_hour', 'min_r2', 'restart_window', 'points',
+                 'n', 'sx', 'sy', 'sxx', 'sxy', 'syy', 'pushes', 'origin', 'bucket_start', 'bucket_sum', 'bucket_count',
+                 'suspected', 'restart_pending')
+
+    def __init__(self, config):
+        self.window_hours = float(config.get('window_hours', DEFAULT_MEMORY_WINDOW_HOURS))
+        self.growth_mb_per_hour = float(config.get('growth_mb_per_hour', DEFAULT_MEMORY_GROWTH_MB_PER_HOUR))
+        self.min_r2 = float(config.get('min_r2', DEFAULT_MEMORY_MIN_R2))
+        self.restart_window = parse_time_window(config['restart_window']) if config.get('restart_window') else None
+        if self.window_hours <= 0 or self.growth_mb_per_hour <= 0:
+            raise ValueError("window_hours und growth_mb_per_hour müssen größer als 0 sein")
+        self.points = collections.deque() # (hours since origin, MB)
+        self.n = 0
+        self.sx = self.sy = self.sxx = self.sxy = self.syy = 0.0
+        self.pushes = 0
+        self.origin = None
+        self.bucket_start = None
+        self.bucket_sum = 0.0
+        self.bucket_count = 0
+        self.suspected = False # A leak warning was raised and growth has not dropped below half the threshold since
+        self.restart_pending = False
+
+    def add(self, timestamp, rss):
+        """Adds an RSS sample; returns True when it completed a per-minute point, i.e. the fit changed."""
+        if self.bucket_start is None:
+            self.origin = self.bucket_start = timestamp
+        completed = False
+        if timestamp - self.bucket_start >= MEMORY_TREND_BUCKET_SECONDS and self.bucket_count:
+            middle = (self.bucket_start + timestamp) / 2
+            self._push((middle - self.origin) / 3600.0, self.bucket_sum / self.bucket_count / (1024 * 1024))
+            self.bucket_start = timestamp
+            self.bucket_sum = 0.0
+            self.bucket_count = 0
+            completed = True
+        self.bucket_sum += rss
+        self.bucket_count += 1
+        return completed
+
+    def _push(self, x, y):
+        points = self.points
+        points.append((x, y))
+        self.n += 1
+        self.sx += x
+        self.sy += y
+        self.sxx += x * x
+        self.sxy += x * y
+        self.syy += y * y
+        while x - points[0][0] > self.window_hours:
+            old_x, old_y = points.popleft()
+            self.n -= 1
+            self.sx -= old_x
+            self.sy -= old_y
+            self.sxx -= old_x * old_x
+            self.sxy -= old_x * old_y
+            self.syy -= old_y * old_y
+        self.pushes += 1
+        if self.pushes >= len(points): # Amortized O(1): one rebuild per window's worth of points
+            self.pushes = 0
+            self.sx = sum(p[0] for p in points)
+            self.sy = sum(p[1] for p in points)
+            self.sxx = sum(p[0] * p[0] for p in points)
+            self.sxy = sum(p[0] * p[1] for p in points)
+            self.syy = sum(p[1] * p[1] for p in points)
+
+    @property
+    def span_hours(self):
+        return self.points[-1][0] - self.points[0][0] if self.n > 1 else 0.0
+
+    def slope(self):
+        """Growth in MB per hour over the window (0 with fewer than two points)."""
+        denominator = self.n * self.sxx - self.sx * self.sx
+        return (self.n * self.sxy - self.sx * self.sy) / denominator if self.n > 1 and denominator > 0 else 0.0
+
+    def r2(self):
+        var_x = self.n * self.sxx - self.sx * self.sx
+        var_y = self.n * self.syy - self.sy * self.sy
+        if self.n < 3 or var_x <= 0 or var_y <= 0:
+            return 0.0
+        covariance = self.n * self.sxy - self.sx * self.sy
+        return min(1.0, covariance * covariance / (var_x * var_y))
+
+    def growing(self):
+        """Sustained growth: the window is full and its line rises steeply and fits the samples well."""
+        return (self.span_hours >= self.window_hours - 2 * MEMORY_TREND_BUCKET_SECONDS / 3600.0
+                and self.slope() >= self.growth_mb_per_hour and self.r2() >= self.min_r2)
+
+
+# --- Output ingest: log line parsing and the per-script line store ---
+LEVEL_NONE, LEVEL_TRACE, LEVEL_DEBUG, LEVEL_INFO, LEVEL_WARNING, LEVEL_ERROR, LEVEL_FATAL = range(7)
+LEVEL_NAMES = ("none", "trace", "debug", "info", "warning", "error", "fatal")
+LEVEL_ALIASES = {
+    'trace': LEVEL_TRACE, 'verbose': LEVEL_TRACE,
+    'debug': LEVEL_DEBUG, 'dbg': LEVEL_DEBUG, 'fine': LEVEL_DEBUG,
+    'info': LEVEL_INFO, 'information': LEVEL_INFO, 'notice': LEVEL_INFO,
+    'warn': LEVEL_WARNING, 'warning': LEVEL_WARNING,
+    'err': LEVEL_ERROR, 'error': LEVEL_ERROR, 'severe': LEVEL_ERROR,
+    'fatal': LEVEL_FATAL, 'critical': LEVEL_FATAL, 'crit': LEVEL_FATAL, 'panic': LEVEL_FATAL, 'emerg': LEVEL_FATAL,
+}
+# Level filter choices of the script tabs (label -> minimum level)
+LEVEL_FILTERS = {"Alle": LEVEL_NONE, "Debug+": LEVEL_DEBUG, "Info+": LEVEL_INFO, "Warnung+": LEVEL_WARNING, "Fehler+": LEVEL_ERROR}
+
+# Explicit level tokens: upper-case words ("ERROR", "WARN") or bracketed/colon-terminated in any case ("[info]", "warning:");
+# bare words are case-sensitive so that prose like "no error occurred" carries no level
+LEVEL_TOKEN_PATTERN = re.compile(
+    r"\b(TRACE|VERBOSE|DEBUG|DBG|INFO|NOTICE|WARN|WARNING|ERROR|ERR|SEVERE|FATAL|CRITICAL|CRIT|PANIC)\b"
+    r"|[\[(<|](?i:(trace|debug|info|notice|warn|warning|error|err|fatal|critical))[\])>|:]"
+    r"|^(?i:(trace|debug|info|warn|warning|error|fatal|critical)):"
+)
+# Prose fallback when a line carries no explicit level ("Exception in thread", "Build failed")
+LEVEL_KEYWORD_PATTERN = re.compile(r"\b(?:(exception|traceback|failed|failure|fatal)|(warn|warning|deprecated))\b", re.IGNORECASE)
+LOGFMT_LEVEL_PATTERN = re.compile(r'(?:^|\s)(?:level|lvl|severity|loglevel)="?([A-Za-z]+)')
+LOGFMT_TIME_PATTERN = re.compile(r'(?:^|\s)(?:ts|time|timestamp)="?([^\s"]+(?: [0-9:.,]+)?)')
+TIMESTAMP_PATTERN = re.compile(
+    r"(?P<iso>\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?)"
+    r"|(?P<de>\d{1,2}\.\d{1,2}\.\d{4}[ ,]+\d{1,2}:\d{2}:\d{2}(?:[.,]\d+)?)"
+    r"|(?P<time>\b\d{1,2}:\d{2}:\d{2}(?:[.,]\d+)?\b)"
+)
+JSON_LEVEL_KEYS = ('level', 'lvl', 'severity', 'levelname', 'levelno', 'loglevel', 'log.level')
+# Numeric levels: Python logging (DEBUG 10, INFO 20, WARNING 30, ERROR 40, CRITICAL 50) unless the
+# record is from bunyan/pino (recognised by "v" or "hostname"), which count from TRACE 10 to FATAL 60
+PYTHON_NUMERIC_LEVELS = (10, 20, 30, 40, 50) # Lower bounds of DEBUG .. FATAL
+BUNYAN_NUMERIC_LEVELS = (20, 30, 40, 50, 60)
+JSON_TIME_KEYS = ('timestamp', 'ts', 'time', '@timestamp', 'asctime', 'date')
+
+
+def _parse_timestamp(text):
+    """Converts common log timestamp notations to epoch seconds; returns NaN if unparseable."""
+    text = text.strip()
+    try:
+        value = float(text)
+        return value / 1000.0 if value > 1e12 else value # Epoch milliseconds or seconds
+    except ValueError:
+        pass
+    match = TIMESTAMP_PATTERN.search(text)
+    if not match:
+        return math.nan
+    try:
+        if match.group('iso'):
+            iso = match.group('iso').replace(',', '.').replace(' ', 'T', 1)
+            if iso.endswith('Z'):
+                iso = iso[:-1] + '+00:00'
+            return datetime.datetime.fromisoformat(iso).timestamp()
+        if match.group('de'):
+            date_part, time_part = re.split(r"[ ,]+", match.group('de'), maxsplit=1)
+            day, month, year = (int(part) for part in date_part.split('.'))
+            hours, minutes, seconds = time_part.replace(',', '.').split(':')
+            return datetime.datetime(year, month, day, int(hours), int(minutes)).timestamp() + float(seconds)
+        hours, minutes, seconds = match.group('time').replace(',', '.').split(':')
+        today = datetime.date.today()
+        return datetime.datetime(today.year, today.month, today.day, int(hours), int(minutes)).timestamp() + float(seconds)
+    except ValueError:
+        return math.nan
+
+
+def parse_log_line(line):
+    """
+    Extracts (level, timestamp) from one output line. Understands JSON lines, logfmt
+    and plain text with level tokens; timestamp is epoch seconds or NaN.
+    """
+    stripped = line.strip()
+    if stripped.startswith('{') and stripped.endswith('}'):
+        try:
+            record = json.loads(stripped)
+        except ValueError:
+            record = None
+        if isinstance(record, dict):
+            level = LEVEL_NONE
+            for key in JSON_LEVEL_KEYS:
+                value = record.get(key)
+                if isinstance(value, str):
+                    level = LEVEL_ALIASES.get(value.lower(), LEVEL_NONE)
+                    break
+                if isinstance(value, int) and not isinstance(value, bool):
+                    bounds = BUNYAN_NUMERIC_LEVELS if 'v' in record or 'hostname' in record else PYTHON_NUMERIC_LEVELS
+                    level = LEVEL_TRACE + bisect.bisect_right(bounds, value)
+                    break
+            timestamp = math.nan
+            for key in JSON_TIME_KEYS:
+                value = record.get(key)
+                if isinstance(value, (int, float, str)):
+                    timestamp = _parse_timestamp(str(value))
+                    break
+            return level, timestamp
+
+    if '=' in stripped:
+        match = LOGFMT_LEVEL_PATTERN.search(stripped)
+        if match:
+            time_match = LOGFMT_TIME_PATTERN.search(stripped)
+            return (LEVEL_ALIASES.get(match.group(1).lower(), LEVEL_NONE),
+                    _parse_timestamp(time_match.group(1)) if time_match else math.nan)
+
+    level = LEVEL_NONE
+    match = LEVEL_TOKEN_PATTERN.search(stripped)
+    if match:
+        level = LEVEL_ALIASES.get((match.group(1) or match.group(2) or match.group(3)).lower(), LEVEL_NONE)
+    else:
+        match = LEVEL_KEYWORD_PATTERN.search(stripped)
+        if match:
+            level = LEVEL_ERROR if match.group(1) else LEVEL_WARNING
+    # Timestamps are only looked for near the start of the line
+    return level, _parse_timestamp(stripped[:40]) if stripped[:1].isdigit() or stripped[:1] == '[' else math.nan
+
+
+def parse_jump_time(text, now):
+    """
+    Converts the jump-to-time field ("03:12", "03:12:45", "2024-05-01 03:12") to epoch
+    seconds, or None. A bare time of day later than `now` means yesterday.
+    """
+    text = text.strip()
+    if re.search(r"(?:^|[ T])\d{1,2}:\d{2}$", text):
+        text += ":00"
+    when = _parse_timestamp(text) if text else math.nan
+    if math.isnan(when):
+        return None
+    if re.fullmatch(r"\d{1,2}:\d{2}:\d{2}(?:[.,]\d+)?", text) and when > now:
+        when -= 86400
+    return when
+
+
+OUTPUT_BLOCK_CHARS = 64 * 1024 # Characters per compressed block of older output lines
+OUTPUT_HOT_CHARS = 256 * 1024 # Newest output kept uncompressed per script
+OUTPUT_COMPRESSION_LEVEL = 6
+OUTPUT_CACHED_BLOCKS = 4 # Decompressed blocks kept per script for scrolling and filtering
+STDOUT_SOURCE = "stdout" # Source label of a script's own output
+ALL_SOURCES = "Alle"
+TIME_INDEX_LINES = 4096 # Lines per entry of the sparse ingest-time index
+TIME_GUTTER_MODES = ("Aus", "Uhrzeit", "Delta")
+FOLD_DIGITS_PATTERN = re.compile(r"\d+") # Lines that differ only in numbers (counters, timestamps, IDs) count as repeats
+FOLD_UPDATE_SECONDS = 0.5 # How often a growing run of repeats refreshes its marker
+
+
+class RepeatFolder:
+    """
+    Reader-side folding of consecutive repeated lines: only the first line of a run is
+    queued, the repeats are reported as (repeats, first seen, last seen, last line)
+    summaries at most every FOLD_UPDATE_SECONDS and when the run ends.
+    """
+    __slots__ = ('key', 'repeats', 'reported', 'first_seen', 'last_seen', 'last_line', 'reported_at')
+
+    def __init__(self):
+        self.key = None
+        self.repeats = self.reported = 0
+        self.first_seen = self.last_seen = self.reported_at = 0.0
+        self.last_line = None
+
+    def push(self, line, now):
+        """
+        Returns (repeat, final): repeat is True if the line continues the current run and must
+        not be queued itself; final is the last unreported summary of a run the line ends.
+        """
+        key = FOLD_DIGITS_PATTERN.sub('#', line)
+        if key == self.key:
+            self.repeats += 1
+            self.last_seen = now
+            self.last_line = line
+            return True, None
+        final = self.summary(now) if self.pending else None
+        self.key = key
+        self.repeats = self.reported = 0
+        self.first_seen = self.last_seen = self.reported_at = now
+        self.last_line = line
+        return False, final
+
+    def due(self, now):
+        return self.repeats != self.reported and now - self.reported_at >= FOLD_UPDATE_SECONDS
+
+    @property
+    def pending(self):
+        return self.repeats != self.reported
+
+    def summary(self, now):
+        self.reported = self.repeats
+        self.reported_at = now
+        return (self.repeats, self.first_seen, self.last_seen, self.last_line)
+
+
+def fold_marker(fold):
+    """Text appended to a folded line, e.g. "  ⟳ ×12.345 (12:00:01–12:00:09)"."""
+    repeats, first_seen, last_seen, _ = fold
+    span = time.strftime('%H:%M:%S', time.localtime(first_seen)) + "–" + time.strftime('%H:%M:%S', time.localtime(last_seen))
+    return f"  ⟳ ×{repeats + 1:,} ({span})".replace(",", ".")
+
+
+# ANSI escape sequences: CSI (SGR "m" is interpreted, all others are dropped), OSC and the short
+# escapes, including charset designations like tput's "ESC ( B" and cursor save/restore "ESC 7"
+ANSI_ESCAPE_PATTERN = re.compile(r"\x1b(?:\[([0-9;:?<=>]*)[ -/]*([@-~])|\][^\x07\x1b]*(?:\x07|\x1b\\)|[ -/]*[0-~])")
+# Packed SGR attributes: foreground and background as palette index + 1 (0 = default), then flags
+ANSI_FG_MASK = 0x1FF
+ANSI_BG_SHIFT = 9
+ANSI_BOLD = 1 << 18
+ANSI_ITALIC = 1 << 19
+ANSI_UNDERLINE = 1 << 20
+ANSI_INVERSE = 1 << 21
+ANSI_SGR_FLAGS = {1: ANSI_BOLD, 3: ANSI_ITALIC, 4: ANSI_UNDERLINE, 7: ANSI_INVERSE}
+ANSI_SGR_RESETS = {22: ANSI_BOLD, 23: ANSI_ITALIC, 24: ANSI_UNDERLINE, 27: ANSI_INVERSE}
+# The 16 base colours tuned for the light output background, then the xterm 6x6x6 cube and grey ramp
+ANSI_PALETTE = (
+    "#000000", "#c91b00", "#00a600", "#a68b00", "#0a4fd8", "#b200b2", "#0097a7", "#707070",
+    "#555555", "#e83030", "#16b816", "#c4a000", "#3b78ff", "#d23bd2", "#00b7c3", "#909090",
+) + tuple(f"#{r:02x}{g:02x}{b:02x}" for r in (0, 95, 135, 175, 215, 255) for g in (0, 95, 135, 175, 215, 255)
+          for b in (0, 95, 135, 175, 215, 255)) + tuple(f"#{v:02x}{v:02x}{v:02x}" for v in range(8, 248, 10))
+
+
+def _ansi_rgb_index(r, g, b):
+    """Nearest colour of the 6x6x6 cube, so 24-bit colours share the same few tags."""
+    steps = (0, 95, 135, 175, 215, 255)
+    r, g, b = (min(range(6), key=lambda i: abs(steps[i] - value)) for value in (r, g, b))
+    return 16 + 36 * r + 6 * g + b
+
+
+@functools.lru_cache(maxsize=4096) # Programs repeat the same few sequences
+def _apply_sgr(attr, params):
+    """New packed attributes after an SGR sequence with the given parameter string."""
+    codes = [int(code) if code.isdigit() else 0 for code in params.replace(':', ';').split(';')] if params else [0]
+    position = 0
+    while position < len(codes):
+        code = codes[position]
+        position += 1
+        if code == 0:
+            attr = 0
+        elif code in ANSI_SGR_FLAGS:
+            attr |= ANSI_SGR_FLAGS[code]
+        elif code in ANSI_SGR_RESETS:
+            attr &= ~ANSI_SGR_RESETS[code]
+        elif 30 <= code <= 37 or 90 <= code <= 97 or code == 39:
+            attr = (attr & ~ANSI_FG_MASK) | (0 if code == 39 else code - 29 if code < 90 else code - 81)
+        elif 40 <= code <= 47 or 100 <= code <= 107 or code == 49:
+            attr = (attr & ~(ANSI_FG_MASK << ANSI_BG_SHIFT)) | ((0 if code == 49 else code - 39 if code < 100 else code - 91) << ANSI_BG_SHIFT)
+        elif code in (38, 48) and position < len(codes):
+            if codes[position] == 5 and position + 1 < len(codes):
+                index = min(codes[position + 1], 255)
+                position += 2
+            elif codes[position] == 2 and position + 3 < len(codes):
+                index = _ansi_rgb_index(*(min(value, 255) for value in codes[position + 1:position + 4]))
+                position += 4
+            else:
+                break
+            if code == 38:
+                attr = (attr & ~ANSI_FG_MASK) | (index + 1)
+            else:
+                attr = (attr & ~(ANSI_FG_MASK << ANSI_BG_SHIFT)) | ((index + 1) << ANSI_BG_SHIFT)
+    return attr
+
+
+class AnsiParser:
+    """
+    Stateful ANSI parser of one output stream (colours carry over line ends). Strips escape
+    sequences and returns the styled parts of a line as flat (start, end, attr) runs.
+    """
+    __slots__ = ('attr',)
+
+    def __init__(self):
+        self.attr = 0
+
+    def parse(self, line):
+        """Returns (text without escapes, array of start/end/attr triples or None for unstyled text)."""
+        if '\x1b' not in line:
+            return line, (array('I', (0, len(line), self.attr)) if self.attr and line else None)
+        attr = self.attr
+        parts = []
+        runs = array('I')
+        length = 0
+        position = 0
+        for match in itertools.chain(ANSI_ESCAPE_PATTERN.finditer(line), (None,)):
+            end = len(line) if match is None else match.start()
+            if end > position:
+                chunk = line[position:end]
+                if attr:
+                    if runs and runs[-1] == attr and runs[-2] == length: # Extend the previous run
+                        runs[-2] = length + len(chunk)
+                    else:
+                        runs.extend((length, length + len(chunk), attr))
+                parts.append(chunk)
+                length += len(chunk)
+            if match is None:
+                break
+            if match.group(2) == 'm':
+                attr = _apply_sgr(attr, match.group(1))
+            position = match.end()
+        self.attr = attr
+        return ''.join(parts), runs or None
+
+
+class OutputStore:
+    """
+    Output lines of one script with compact per-line metadata: a level byte, the parsed
+    timestamp (NaN if none) and per-level sorted line indexes for counts and jumps.
+
+    The newest lines stay as strings ("hot"); older ones are packed into zlib blocks of
+    about OUTPUT_BLOCK_CHARS characters with a start-index table and are decompressed on
+    access, keeping a few recently used blocks unpacked for scrolling and filtering.
+
+    Every line also carries its ingest time: 4 bytes of milliseconds since the base time
+    of its chunk of TIME_INDEX_LINES lines. The chunk bases form a sparse index, and since
+    ingest times never decrease, a time is found with two binary searches.
+    """
+    def __init__(self):
+        self.hot = [] # Newest lines, starting at line index hot_start
+        self.hot_start = 0
+        self.hot_chars = 0
+        self.blocks = [] # (zlib data, array of line end offsets)
+        self.block_starts = array('l') # First line index of each block
+        self.compressed_bytes = 0
+        self._cache = collections.OrderedDict() # block number -> list of lines
+        self._lock = threading.Lock() # Compaction vs. tail() from the control server threads
+        self.levels = array('B')
+        self.timestamps = array('d')
+        self.level_index = [array('l') for _ in LEVEL_NAMES] # level -> line indexes, ascending
+        self.level_counts = [0] * len(LEVEL_NAMES)
+        self.folds = {} # line index -> (repeats, first seen, last seen, last line) of the run it starts
+        self.styles = {} # line index -> ANSI runs (start, end, attr triples) of styled lines
+        self.sources = [STDOUT_SOURCE] # Source labels; line_sources holds positions in this list
+        self.source_ids = {STDOUT_SOURCE: 0}
+        self.line_sources = array('H')
+        self.last_index = {} # source id -> index of its newest line
+        self.time_bases = array('d') # Ingest time of the first line of each TIME_INDEX_LINES chunk
+        self.received = array('I') # Per line: milliseconds since its chunk's base time
+        self.last_received = 0.0
+
+    def append(self, line, level=LEVEL_NONE, timestamp=math.nan, styles=None, source=STDOUT_SOURCE, received=None):
+        index = len(self.levels)
+        if styles is not None:
+            self.styles[index] = styles
+        # Lines of several reader threads may arrive slightly out of order; keep the times sorted
+        if received is None:
+            received = time.time()
+        if received < self.last_received:
+            received = self.last_received
+        self.last_received = received
+        if index % TIME_INDEX_LINES == 0:
+            self.time_bases.append(received)
+        offset = round((received - self.time_bases[-1]) * 1000)
+        self.received.append(offset if offset <= 0xFFFFFFFF else 0xFFFFFFFF)
+        source_id = self.source_ids.get(source)
+        if source_id is None:
+            source_id = self.source_id(source)
+        self.line_sources.append(source_id)
+        self.last_index[source_id] = index
+        self.hot.append(line)
+        self.hot_chars += len(line)
+        self.levels.append(level)
+        self.timestamps.append(timestamp)
+        self.level_index[level].append(index)
+        self.level_counts[level] += 1
+        if self.hot_chars > OUTPUT_HOT_CHARS + OUTPUT_BLOCK_CHARS:
+            self._compact()
+        return index
+
+    def source_id(self, source):
+        source_id = self.source_ids.get(source)
+        if source_id is None:
+            source_id = self.source_ids[source] = len(self.sources)
+            self.sources.append(source)
+        return source_id
+
+    def source_of(self, index):
+        return self.sources[self.line_sources[index]]
+
+    def received_at(self, index):
+        """Ingest time of a line (epoch seconds, millisecond resolution)."""
+        return self.time_bases[index // TIME_INDEX_LINES] + self.received[index] / 1000.0
+
+    def index_at_time(self, when):
+        """Index of the first line ingested at or after `when`; len(self) if there is none."""
+        chunk = bisect.bisect_right(self.time_bases, when) - 1
+        if chunk < 0:
+            return 0
+        start = chunk * TIME_INDEX_LINES
+        end = min(start + TIME_INDEX_LINES, len(self.received))
+        return bisect.bisect_left(self.received, math.ceil(round((when - self.time_bases[chunk]) * 1000, 3)), start, end)
+
+    def set_fold(self, index, fold):
+        self.folds[index] = fold
+
+    def display_line(self, index):
+        """The line as shown in the output tabs, with the repeat marker of a folded run."""
+        line = self[index]
+        fold = self.folds.get(index)
+        if fold is None:
+            return line
+        return line[:-1] + fold_marker(fold) + "\n" if line.endswith("\n") else line + fold_marker(fold)
+
+    def _compact(self):
+        """Packs the oldest hot lines into one compressed block."""
+        hot = self.hot
+        chars = 0
+        count = 0
+        offsets = array('I')
+        while count < len(hot) and chars < OUTPUT_BLOCK_CHARS:
+            chars += len(hot[count])
+            offsets.append(chars)
+            count += 1
+        data = zlib.compress(''.join(hot[:count]).encode('utf-8', 'surrogatepass'), OUTPUT_COMPRESSION_LEVEL)
+        with self._lock:
+            self.blocks.append((data, offsets))
+            self.block_starts.append(self.hot_start)
+            self.hot = hot[count:]
+            self.hot_start += count
+        self.hot_chars -= chars
+        self.compressed_bytes += len(data)
+
+    def _block_lines(self, number):
+        lines = self._cache.get(number)
+        if lines is not None:
+            self._cache.move_to_end(number)
+            return lines
+        lines = self._unpack(number)
+        self._cache[number] = lines
+        if len(self._cache) > OUTPUT_CACHED_BLOCKS:
+            self._cache.popitem(last=False)
+        return lines
+
+    def _unpack(self, number):
+        data, offsets = self.blocks[number]
+        text = zlib.decompress(data).decode('utf-8', 'surrogatepass')
+        return [text[start:end] for start, end in zip(itertools.chain((0,), offsets), offsets)]
+
+    def clear(self):
+        self.__init__()
+
+    def __len__(self):
+        return len(self.levels)
+
+    def __iter__(self):
+        return self.lines()
+
+    def lines(self, start=0, stop=None):
+        """Lines start..stop-1 in order; full scans decompress each block once and do not evict the cache."""
+        stop = len(self.levels) if stop is None else stop
+        index = start
+        number = max(bisect.bisect_right(self.block_starts, start) - 1, 0)
+        while index < min(stop, self.hot_start) and number < len(self.blocks):
+            lines = self._cache.get(number) or self._unpack(number)
+            end = self.block_starts[number] + len(lines)
+            yield from itertools.islice(lines, index - self.block_starts[number], min(stop, end) - self.block_starts[number])
+            index = end
+            number += 1
+        if index < stop:
+            yield from itertools.islice(self.hot, index - self.hot_start, stop - self.hot_start)
+
+    def snapshot(self):
+        """
+        Frozen copy for reading on another thread; call on the thread that appends. The
+        compressed blocks are immutable and shared, the hot lines and metadata are copied.
+        """
+        copy = object.__new__(OutputStore)
+        copy.__dict__.update(self.__dict__)
+        copy.hot = list(self.hot)
+        copy.blocks = list(self.blocks)
+        copy._cache = collections.OrderedDict()
+        copy._lock = threading.Lock()
+        for attribute in ('block_starts', 'levels', 'timestamps', 'line_sources', 'time_bases', 'received'):
+            setattr(copy, attribute, array(getattr(self, attribute).typecode, getattr(self, attribute)))
+        copy.level_index = [array('l', indexes) for indexes in self.level_index]
+        copy.level_counts = list(self.level_counts)
+        copy.folds = dict(self.folds)
+        copy.styles = dict(self.styles)
+        copy.sources = list(self.sources)
+        copy.source_ids = dict(self.source_ids)
+        copy.last_index = dict(self.last_index)
+        return copy
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.levels)
+        if index >= self.hot_start:
+            return self.hot[index - self.hot_start]
+        if index < 0:
+            raise IndexError(index)
+        number = bisect.bisect_right(self.block_starts, index) - 1
+        return self._block_lines(number)[index - self.block_starts[number]]
+
+    def tail(self, count):
+        """The newest `count` lines; safe to call from other threads."""
+        with self._lock:
+            hot = self.hot
+            blocks = len(self.blocks)
+        lines = hot[-count:] if count > 0 else []
+        while len(lines) < count and blocks:
+            blocks -= 1
+            lines = self._unpack(blocks)[-(count - len(lines)):] + lines
+        return lines
+
+    @property
+    def memory_bytes(self):
+        """Approximate size of the stored text: hot strings plus compressed blocks and their offset tables."""
+        return (sum(map(sys.getsizeof, self.hot)) + sys.getsizeof(self.hot) + self.compressed_bytes
+                + sum(offsets.itemsize * len(offsets) for _, offsets in self.blocks))
+
+    def count_at_least(self, level):
+        return sum(self.level_counts[level:])
+
+    def indexes_at_least(self, level):
+        """Ascending line indexes with at least the given level (all lines for LEVEL_NONE)."""
+        if level <= LEVEL_NONE:
+            return range(len(self.levels))
+        return heapq.merge(*self.level_index[level:])
+
+    def next_at_least(self, level, start):
+        """First line index >= start with at least the given level, or None."""
+        candidates = []
+        for indexes in self.level_index[level:]:
+            position = bisect.bisect_left(indexes, start)
+            if position < len(indexes):
+                candidates.append(indexes[position])
+        return min(candidates) if candidates else None
+
+    def previous_at_least(self, level, start):
+        """Last line index <= start with at least the given level, or None."""
+        candidates = []
+        for indexes in self.level_index[level:]:
+            position = bisect.bisect_right(indexes, start)
+            if position:
+                candidates.append(indexes[position - 1])
+        return max(candidates) if candidates else None
+
+
+# --- Output export (streamed to a file from a background thread) ---
+EXPORT_FORMATS = {"Text": ".log", "gzip": ".log.gz", "JSON Lines": ".jsonl"} # Format -> file extension
+EXPORT_BATCH_LINES = 4096 # Lines scanned between writes, progress reports and cancel checks
+EXPORT_PROGRESS_SECONDS = 0.2
+
+
+def write_output_export(store, path, export_format, start=0, stop=None, min_level=LEVEL_NONE, source=None, search="",
+                        progress=None, cancel=None):
+    """
+    Streams lines start..stop-1 of an OutputStore snapshot that pass the level, source
+    and search filters to `path` as plain text, gzip-compressed text or JSON lines.
+    Calls progress(scanned, total) now and then and stops early once cancel is set.
+    Returns the number of lines written.
+    """
+    stop = len(store) if stop is None else stop
+    total = max(stop - start, 0)
+    source_id = store.source_ids.get(source, -1) if source is not None else None
+    search = search.lower()
+    levels, line_sources, folds = store.levels, store.line_sources, store.folds
+    as_json = export_format == "JSON Lines"
+    written = 0
+    next_progress = time.monotonic() + EXPORT_PROGRESS_SECONDS
+    with (gzip.open if export_format == "gzip" else open)(path, 'wt', encoding='utf-8', newline='') as f:
+        batch = []
+        for index, line in enumerate(store.lines(start, stop), start):
+            if (index - start) % EXPORT_BATCH_LINES == EXPORT_BATCH_LINES - 1:
+                f.write(''.join(batch))
+                batch.clear()
+                if cancel is not None and cancel.is_set():
+                    break
+                if progress is not None and time.monotonic() >= next_progress:
+                    progress(index - start, total)
+                    next_progress = time.monotonic() + EXPORT_PROGRESS_SECONDS
+            if (levels[index] < min_level or (source_id is not None and line_sources[index] != source_id)
+                    or (search and search not in line.lower())):
+                continue
+            fold = folds.get(index)
+            if as_json:
+                record = {
+                    'time': datetime.datetime.fromtimestamp(store.received_at(index)).astimezone().isoformat(timespec='milliseconds'),
+                    'source': store.sources[line_sources[index]],
+                    'level': LEVEL_NAMES[levels[index]] if levels[index] != LEVEL_NONE else None,
+                    'line': line.rstrip('\r\n'),
+                }
+                if not math.isnan(store.timestamps[index]):
+                    record['log_time'] = store.timestamps[index]
+                if fold is not None:
+                    record['repeats'] = fold[0] + 1
+                batch.append(json.dumps(record, ensure_ascii=False) + '\n')
+            else:
+                line = line.rstrip('\n')
+                batch.append(line + fold_marker(fold) + '\n' if fold is not None else line + '\n')
+            written += 1
+        f.write(''.join(batch))
+    if progress is not None and not (cancel is not None and cancel.is_set()):
+        progress(total, total)
+    return written
+
+
+# Whole-word keyword highlighting of the output tabs (group name = Tk tag)
+KEYWORD_HIGHLIGHT_PATTERN = re.compile(
+    r"\b(?:(?P<error>error|exception|failed|fatal)|(?P<warning>warn|warning)"
+    r"|(?P<success>success|completed|finished)|(?P<info>info|starting|running))\b",
+    re.IGNORECASE
+)
+KEYWORD_TAGS = {'error': 'error', 'warning': 'warning', 'success': 'success', 'info': 'info'}
+
+
+# --- Self-instrumentation of the manager's hot paths ---
+# Upper bucket bounds in seconds; the last bucket catches everything slower.
+HISTOGRAM_BOUNDS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+RATE_WINDOW_SAMPLES = 11 # Rate samples (one per Diagnostics refresh) kept for lines/s
+
+
+class Histogram:
+    """Fixed-bucket timing histogram; observe() is a bisect and four additions."""
+    __slots__ = ('counts', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(HISTOGRAM_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket containing the given fraction of observations."""
+        if not self.count:
+            return 0.0
+        threshold = fraction * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= threshold:
+                return HISTOGRAM_BOUNDS[i] if i < len(HISTOGRAM_BOUNDS) else self.max
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'mean_ms': round(self.sum / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(0.5) * 1000, 3),
+            'p95_ms': round(self.percentile(0.95) * 1000, 3),
+            'p99_ms': round(self.percentile(0.99) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+            'total_s': round(self.sum, 3),
+        }
+
+
+class SamplingProfiler:
+    """Statistical profiler for one thread; samples its stack via sys._current_frames()."""
+    def __init__(self, thread_id, interval=0.005, max_depth=40):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = collections.Counter() # tuple of function keys (outermost first) -> samples
+        self.sample_count = 0
+        self.started_at = None
+        self.stopped_at = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self.stacks.clear()
+        self.sample_count = 0
+        self.started_at = time.time()
+        self.stopped_at = None
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(1.0)
+        self.stopped_at = time.time()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[tuple(stack)] += 1
+            self.sample_count += 1
+
+    def top(self, limit=25):
+        """Returns [(function, self_samples, cumulative_samples)] sorted by cumulative samples."""
+        own = collections.Counter()
+        cumulative = collections.Counter()
+        for stack, samples in list(self.stacks.items()):
+            own[stack[-1]] += samples
+            for function in set(stack):
+                cumulative[function] += samples
+        return [(function, own[function], samples) for function, samples in cumulative.most_common(limit)]
+
+
+class Instrumentation:
+    """Timing histograms, gauges and counters for the manager's own hot paths."""
+    def __init__(self):
+        self.timings = collections.defaultdict(Histogram) # hot path -> Histogram
+        self.after_lag = collections.defaultdict(Histogram) # periodic callback -> lateness Histogram
+        self.gauges = {} # name -> (current, maximum)
+        self.counters = collections.defaultdict(int)
+        self._rate_samples = collections.deque(maxlen=RATE_WINDOW_SAMPLES) # (monotonic time, counters copy)
+        self.profiler = None
+
+    def observe(self, path, seconds):
+        self.timings[path].observe(seconds)
+
+    def set_gauge(self, name, value):
+        previous = self.gauges.get(name)
+        self.gauges[name] = (value, max(value, previous[1]) if previous else value)
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def schedule(self, widget, delay_ms, callback):
+        """widget.after() that records how late the callback actually runs."""
+        due = time.perf_counter() + delay_ms / 1000.0
+        widget.after(delay_ms, self._fire, callback, due)
+
+    def _fire(self, callback, due):
+        self.after_lag[callback.__name__].observe(max(0.0, time.perf_counter() - due))
+        callback()
+
+    def sample_rates(self):
+        self._rate_samples.append((time.monotonic(), dict(self.counters)))
+
+    def rates(self):
+        """Per-second rates of all counters over the rate window."""
+        if len(self._rate_samples) < 2:
+            return {}
+        (t0, first), (t1, last) = self._rate_samples[0], self._rate_samples[-1]
+        elapsed = t1 - t0
+        if elapsed <= 0:
+            return {}
+        return {name: round((value - first.get(name, 0)) / elapsed, 1) for name, value in last.items()}
+
+    def snapshot(self):
+        data = {
+            'timestamp': time.time(),
+            'timings': {path: histogram.snapshot() for path, histogram in list(self.timings.items())},
+            'after_lag': {name: histogram.snapshot() for name, histogram in list(self.after_lag.items())},
+            'gauges': {name: {'current': value, 'max': maximum} for name, (value, maximum) in list(self.gauges.items())},
+            'counters': dict(self.counters),
+            'rates_per_second': self.rates(),
+        }
+        if self.profiler and self.profiler.sample_count:
+            data['profile'] = {
+                'samples': self.profiler.sample_count,
+                'interval_ms': self.profiler.interval * 1000,
+                'running': self.profiler.running,
+                'top': [{'function': f, 'self': own, 'cumulative': cum} for f, own, cum in self.profiler.top(50)],
+            }
+        return data
+
+
+def instrumented(path):
+    """Decorator for BatchManager methods that feeds their run time into self.instrumentation."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                self.instrumentation.observe(path, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+# --- UI bus (typed events from worker threads to the Tk main loop) ---
+UI_FRAME_MS = 16 # Events posted within one frame are handled together
+UI_EVENT_KINDS = ("output", "log", "alert", "exited", "start", "call") # Dispatch order within a frame
+UI_PROMPT_KINDS = frozenset(("alert", "exited", "start", "call")) # Rare events that wake the loop without the frame delay
+
+
+class UIBus:
+    """
+    Worker threads post events here instead of touching Tk. post() only appends to a deque;
+    the first post after a drain schedules the next drain (one frame later for output and
+    log streams), so a burst costs a single wakeup and an idle manager runs no polling timer.
+    """
+    def __init__(self, schedule, lag=None, logger=None):
+        self.schedule = schedule # (delay ms, callback) -> None, i.e. Tk's after()
+        self.lag = lag # Histogram of how late a drain runs after its first event was posted
+        self.logger = logger
+        self.handlers = {}
+        self._queues = {kind: collections.deque() for kind in UI_EVENT_KINDS}
+        self._wake_lock = threading.Lock()
+        self._wake_pending = False
+        self._wake_due = 0.0
+        self.subscribe('call', lambda func, *args: func(*args))
+
+    def subscribe(self, kind, handler, batched=False):
+        """handler(*payload) per event, or handler(payloads) once per frame if `batched`."""
+        self.handlers[kind] = (handler, batched)
+
+    def post(self, kind, payload=()):
+        """Thread-safe; `payload` is a tuple of handler arguments."""
+        self._queues[kind].append(payload)
+        prompt = kind in UI_PROMPT_KINDS
+        if self._wake_pending and not (prompt and self._wake_due > time.perf_counter()):
+            return
+        delay_ms = 0 if prompt else UI_FRAME_MS
+        with self._wake_lock:
+            due = time.perf_counter() + delay_ms / 1000.0
+            if self._wake_pending and self._wake_due <= due:
+                return
+            self._wake_pending = True # A prompt event overtakes a pending frame wakeup; the late drain finds little left
+            self._wake_due = due
+        self.schedule(delay_ms, self.drain)
+
+    def call(self, func, *args):
+        """Runs func(*args) on the main loop."""
+        self.post('call', (func,) + args)
+
+    def pending(self, kind=None):
+        if kind is not None:
+            return len(self._queues[kind])
+        return sum(len(events) for events in self._queues.values())
+
+    def drain(self):
+        """Main loop: handles everything posted before this call, kind by kind in UI_EVENT_KINDS order."""
+        if self.lag is not None:
+            self.lag.observe(max(0.0, time.perf_counter() - self._wake_due))
+        self._wake_pending = False # Events posted from here on schedule the next frame
+        # Counted in reverse order: a worker posts e.g. its last output before "exited", so every
+        # output line that precedes a counted "exited" event is counted as well.
+        counts = [(kind, len(self._queues[kind])) for kind in reversed(UI_EVENT_KINDS)]
+        for kind, count in reversed(counts):
+            if not count:
+                continue
+            events = self._queues[kind]
+            payloads = [events.popleft() for _ in range(count)]
+            handler, batched = self.handlers[kind]
+            for args in ([(payloads,)] if batched else payloads):
+                try:
+                    handler(*args)
+                except Exception as e:
+                    if self.logger:
+                        self.logger.error(f"Fehler bei der Verarbeitung eines UI-Ereignisses ({kind}): {e}")
+
+
+class _UIBusLogHandler(logging.handlers.QueueHandler):
+    """QueueHandler that posts the prepared records to the UI bus."""
+    def __init__(self, bus):
+        super().__init__(None)
+        self.bus = bus
+
+    def enqueue(self, record):
+        self.bus.post('log', (record,))
+
+
+# --- Output channels (bounded per-script buffers between the readers and the UI) ---
+DEFAULT_OUTPUT_CHANNEL_LINES = 50000 # Lines a script may have waiting for the UI before its reader drops (or blocks)
+DEFAULT_OUTPUT_RATE_LIMIT = 2000 # Lines per second and script inserted into the widgets; the rest is only stored
+OUTPUT_FRAME_LINES = 5000 # Lines taken from one channel per UI frame, so a flood cannot delay the other scripts
+OUTPUT_OVERFLOW_POLICIES = ("drop", "block")
+
+
+class OutputChannel:
+    """
+    Output lines of one script on their way to the UI thread. push() is called by the
+    script's reader threads and only appends; the first line after a drain posts the channel
+    to the UI bus once. A full channel drops new lines (counted) or, with the "block" policy,
+    makes the reader wait, which stalls the script on its own output pipe.
+    """
+    def __init__(self, name, bus, capacity=DEFAULT_OUTPUT_CHANNEL_LINES, overflow="drop", rate_limit=DEFAULT_OUTPUT_RATE_LIMIT):
+        self.name = name
+        self.bus = bus
+        self.items = collections.deque()
+        self.capacity = max(1, int(capacity))
+        self.block = overflow == "block"
+        self.bucket = _TokenBucket(rate_limit * 60, rate_limit) if rate_limit else None # Burst of one second
+        self.space = threading.Condition()
+        self.signalled = False
+        self.dropped = 0 # Since the last reset(): lines lost to a full channel
+        self.hidden = 0 # Since the last reset(): lines stored but not shown because of the rate limit
+
+    def push(self, item):
+        items = self.items
+        if len(items) >= self.capacity and item[1] is not None: # Repeat summaries are never dropped
+            if not self.block:
+                self.dropped += 1
+                return False
+            with self.space:
+                while len(items) >= self.capacity and self.block:
+                    self.space.wait(0.5)
+        items.append(item)
+        if not self.signalled:
+            self.signalled = True
+            self.bus.post('output', (self,))
+        return True
+
+    def take(self, limit=OUTPUT_FRAME_LINES):
+        """UI thread: up to `limit` waiting items. If some remain, the channel is posted again for the next frame."""
+        items = self.items
+        batch = [items.popleft() for _ in range(min(limit, len(items)))]
+        if self.block:
+            with self.space:
+                self.space.notify_all()
+        self.signalled = False
+        if items: # Also catches lines pushed while signalled was still set
+            self.signalled = True
+            self.bus.post('output', (self,))
+        return batch
+
+    def reset(self):
+        self.items.clear()
+        self.dropped = self.hidden = 0
+
+    def close(self):
+        """Releases readers blocked on a full channel (the script is being removed)."""
+        self.block = False
+        with self.space:
+            self.space.notify_all()
+
+
+# --- Metrics (Prometheus/OpenMetrics exporter) ---
+DEFAULT_METRICS_PORT = 9464
+METRICS_RING_SIZE = 300 # Samples kept per script (10 minutes at the 2 s sampling interval)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class ScriptStats:
+    """Counters and the metric ring of one script. Written by the UI and reader threads."""
+    __slots__ = ('starts', 'restarts', 'exits', 'last_exit_code', 'output_lines', 'output_bytes', 'output_dropped', 'output_hidden', 'samples')
+
+    def __init__(self):
+        self.starts = 0
+        self.restarts = 0
+        self.exits = 0
+        self.last_exit_code = None
+        self.output_lines = 0
+        self.output_bytes = 0
+        self.output_dropped = 0 # Lost to a full output channel
+        self.output_hidden = 0 # Stored but not shown because of the output rate limit
+        self.samples = collections.deque(maxlen=METRICS_RING_SIZE) # (timestamp, cpu_percent, rss_bytes)
+
+
+class MetricsRegistry:
+    """In-memory metrics of the manager and its scripts, rendered as Prometheus/OpenMetrics text."""
+    def __init__(self, manager, cache_seconds=1.0):
+        self.manager = manager
+        self.cache_seconds = cache_seconds
+        self.scripts = {} # name -> ScriptStats
+        self._cache = {} # openmetrics flag -> (monotonic time, encoded text)
+        self._render_lock = threading.Lock()
+
+    def script(self, name):
+        stats = self.scripts.get(name)
+        if stats is None:
+            stats = self.scripts[name] = ScriptStats()
+        return stats
+
+    def prune(self, names):
+        for name in list(self.scripts):
+            if name not in names:
+                del self.scripts[name]
+
+    def remove(self, name):
+        """Drops the series of a removed script (e.g. a replica instance after scaling down)."""
+        self.scripts.pop(name, None)
+
+    def render(self, openmetrics=False):
+        """Returns the encoded exposition text, re-rendered at most once per cache_seconds."""
+        with self._render_lock:
+            cached = self._cache.get(openmetrics)
+            now = time.monotonic()
+            if cached and now - cached[0] < self.cache_seconds:
+                return cached[1]
+            text = self._render_text(openmetrics).encode('utf-8')
+            self._cache[openmetrics] = (now, text)
+            return text
+
+    def _render_text(self, openmetrics):
+        manager = self.manager
+        snapshots = manager.script_snapshots()
+        out = []
+
+        def family(name, metric_type, help_text, samples):
+            # OpenMetrics names counter families without the _total suffix
+            family_name = name[:-6] if openmetrics and metric_type == 'counter' else name
+            out.append(f"# HELP {family_name} {help_text}")
+            out.append(f"# TYPE {family_name} {metric_type}")
+            for labels, value in samples:
+                out.append(f"{name}{labels} {value}")
+
+        rows = []
+        for script_name in list(manager.scripts):
+            stats = self.scripts.get(script_name) or ScriptStats()
+            snapshot = snapshots.get(script_name)
+            running = snapshot is not None and snapshot.running
+            last_sample = stats.samples[-1] if running and stats.samples else (0, 0.0, 0)
+            rows.append((f'{{script="{_escape_label(script_name)}"}}', running, stats, last_sample))
+
+        family("batch_manager_script_up", "gauge", "Whether the script is running (1) or stopped (0).",
+               [(labels, int(running)) for labels, running, _, _ in rows])
+        family("batch_manager_script_starts_total", "counter", "Number of times the script was started.",
+               [(labels, stats.starts) for labels, _, stats, _ in rows])
+        family("batch_manager_script_restarts_total", "counter", "Number of restarts of the script.",
+               [(labels, stats.restarts) for labels, _, stats, _ in rows])
+        family("batch_manager_script_exits_total", "counter", "Number of observed process exits.",
+               [(labels, stats.exits) for labels, _, stats, _ in rows])
+        family("batch_manager_script_last_exit_code", "gauge", "Exit code of the last run (absent before the first exit).",
+               [(labels, stats.last_exit_code) for labels, _, stats, _ in rows if stats.last_exit_code is not None])
+        family("batch_manager_script_cpu_percent", "gauge", "CPU usage of the script's process tree in percent.",
+               [(labels, f"{sample[1]:.1f}") for labels, _, _, sample in rows])
+        family("batch_manager_script_resident_memory_bytes", "gauge", "Resident memory of the script's process tree.",
+               [(labels, sample[2]) for labels, _, _, sample in rows])
+        family("batch_manager_script_output_lines_total", "counter", "Output lines read from the script.",
+               [(labels, stats.output_lines) for labels, _, stats, _ in rows])
+        family("batch_manager_script_output_bytes_total", "counter", "Output bytes read from the script.",
+               [(labels, stats.output_bytes) for labels, _, stats, _ in rows])
+        family("batch_manager_script_output_dropped_total", "counter", "Output lines dropped because the script's output channel was full.",
+               [(labels, stats.output_dropped) for labels, _, stats, _ in rows])
+        family("batch_manager_script_output_hidden_total", "counter", "Output lines stored but not shown because of the output rate limit.",
+               [(labels, stats.output_hidden) for labels, _, stats, _ in rows])
+        trends = [(f'{{script="{_escape_label(name)}"}}', snapshot) for name, snapshot in snapshots.items() if snapshot.memory_growth is not None]
+        family("batch_manager_script_memory_growth_bytes_per_hour", "gauge",
+               "Slope of the script's resident memory over its memory trend window.",
+               [(labels, int(snapshot.memory_growth * 1024 * 1024)) for labels, snapshot in trends])
+        family("batch_manager_script_memory_leak_suspected", "gauge", "Whether the script's memory grows steadily beyond its threshold.",
+               [(labels, int(snapshot.leak_suspected)) for labels, snapshot in trends])
+        channels = [(f'{{script="{_escape_label(name)}"}}', snapshot) for name, snapshot in snapshots.items() if snapshot.channel_capacity is not None]
+        family("batch_manager_script_output_channel_lines", "gauge", "Output lines waiting in the script's channel for the UI.",
+               [(labels, snapshot.channel_lines) for labels, snapshot in channels])
+        family("batch_manager_script_output_channel_capacity", "gauge", "Capacity of the script's output channel in lines.",
+               [(labels, snapshot.channel_capacity) for labels, snapshot in channels])
+
+        replica_sets = [(f'{{script="{_escape_label(name)}"}}', count,
+                         sum(1 for index in range(count) if replica_name(name, index) in snapshots
+                             and snapshots[replica_name(name, index)].running))
+                        for name, count in list(manager.replica_counts.items())]
+        family("batch_manager_replicas", "gauge", "Configured number of instances of a replica set.",
+               [(labels, count) for labels, count, _ in replica_sets])
+        family("batch_manager_replicas_running", "gauge", "Running instances of a replica set.",
+               [(labels, running) for labels, _, running in replica_sets])
+
+        activations = [(f'{{script="{_escape_label(name)}"}}', activation) for name, activation in list(manager.activations.items())]
+        family("batch_manager_activation_connections_total", "counter", "Connections accepted on the on-demand port of a script.",
+               [(labels, activation.connections) for labels, activation in activations])
+        family("batch_manager_activation_active_connections", "gauge", "Open connections relayed to an on-demand script.",
+               [(labels, activation.active) for labels, activation in activations])
+        family("batch_manager_activation_starts_total", "counter", "Starts of an on-demand script caused by a connection.",
+               [(labels, activation.activations) for labels, activation in activations])
+        family("batch_manager_activation_idle_stops_total", "counter", "Stops of an on-demand script after its idle period.",
+               [(labels, activation.idle_stops) for labels, activation in activations])
+        family("batch_manager_activation_failures_total", "counter", "Connections closed because the script did not open its port in time.",
+               [(labels, activation.failures) for labels, activation in activations])
+        family("batch_manager_activation_first_request_seconds", "summary",
+               "Time from the connection that started an on-demand script until it was relayed to the script.",
+               [(f'_sum{labels}', f"{activation.first_request.sum:.6f}") for labels, activation in activations]
+               + [(f'_count{labels}', activation.first_request.count) for labels, activation in activations])
+
+        family("batch_manager_output_queue_depth", "gauge", "Output lines waiting for the UI in all output channels.",
+               [("", manager.output_pending())])
+        family("batch_manager_log_queue_depth", "gauge", "Manager log records waiting for the UI.",
+               [("", manager.bus.pending('log'))])
+        family("batch_manager_reader_lines_total", "counter", "Output lines read from all scripts.",
+               [("", sum(stats.output_lines for stats in list(self.scripts.values())))])
+        family("batch_manager_reader_bytes_total", "counter", "Output bytes read from all scripts.",
+               [("", sum(stats.output_bytes for stats in list(self.scripts.values())))])
+        job_stats = manager.jobs.stats()
+        family("batch_manager_job_queue_depth", "gauge", "Jobs waiting for a worker (including retries).",
+               [("", job_stats['queued'])])
+        family("batch_manager_jobs_running", "gauge", "Jobs currently running.", [("", job_stats['running'])])
+        family("batch_manager_job_workers", "gauge", "Size of the job worker pool.", [("", job_stats['workers'])])
+        family("batch_manager_jobs_total", "counter", "Finished jobs by outcome.",
+               [(f'{{outcome="{state}"}}', job_stats[state]) for state in JOB_FINAL_STATES])
+        alert_rows = [(f'{{script="{_escape_label(script_name)}",rule="{_escape_label(rule)}"}}', alerts, rule)
+                      for script_name, alerts in list(manager.alerts.items()) for rule in alerts.matches]
+        family("batch_manager_alert_matches_total", "counter", "Output lines matching an alert rule.",
+               [(labels, alerts.matches[rule]) for labels, alerts, rule in alert_rows])
+        family("batch_manager_alerts_fired_total", "counter", "Times an alert rule fired (threshold reached, outside its cooldown).",
+               [(labels, alerts.fired[rule]) for labels, alerts, rule in alert_rows])
+        notifications = manager.notifications
+        family("batch_manager_notifications_total", "counter", "Notifications by outcome (sent, coalesced into a summary, rate limited).",
+               [('{outcome="sent"}', notifications.sent), ('{outcome="coalesced"}', notifications.coalesced),
+                ('{outcome="suppressed"}', notifications.suppressed)])
+        instrumentation = manager.instrumentation
+        ui_tick = instrumentation.timings.get('process_queue') or Histogram()
+        family("batch_manager_ui_tick_seconds", "summary", "Time spent per output UI tick (process_queue).",
+               [("_sum", f"{ui_tick.sum:.6f}"), ("_count", ui_tick.count)])
+        hot_path_samples = []
+        for path, histogram in sorted(list(instrumentation.timings.items())):
+            cumulative = 0
+            for bound, bucket_count in zip(HISTOGRAM_BOUNDS + ("+Inf",), histogram.counts):
+                cumulative += bucket_count
+                hot_path_samples.append((f'_bucket{{path="{path}",le="{bound}"}}', cumulative))
+            hot_path_samples.append((f'_sum{{path="{path}"}}', f"{histogram.sum:.6f}"))
+            hot_path_samples.append((f'_count{{path="{path}"}}', histogram.count))
+        family("batch_manager_hot_path_seconds", "histogram", "Run time of the manager's hot paths.", hot_path_samples)
+        family("batch_manager_after_lag_seconds", "summary", "Lateness of periodic Tk after() callbacks.",
+               [(f'_sum{{callback="{name}"}}', f"{h.sum:.6f}") for name, h in sorted(list(instrumentation.after_lag.items()))]
+               + [(f'_count{{callback="{name}"}}', h.count) for name, h in sorted(list(instrumentation.after_lag.items()))])
+        if PSUTIL_AVAILABLE:
+            own = psutil.Process()
+            family("batch_manager_process_resident_memory_bytes", "gauge", "Resident memory of the manager itself.",
+                   [("", own.memory_info().rss)])
+
+        if openmetrics:
+            out.append("# EOF")
+        return "\n".join(out) + "\n"
+
+
+class _MetricsRequestHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        openmetrics = 'application/openmetrics-text' in self.headers.get('Accept', '')
+        body = self.server.registry.render(openmetrics)
+        self.send_response(200)
+        self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # Scrapes would otherwise flood stderr every few seconds
+
+
+class MetricsExporter:
+    """Serves MetricsRegistry on http://host:port/metrics from a background thread."""
+    def __init__(self, registry, host="127.0.0.1", port=DEFAULT_METRICS_PORT):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+
+    def start(self):
+        self._server = http.server.ThreadingHTTPServer((self.host, self.port), _MetricsRequestHandler)
+        self._server.daemon_threads = True
+        self._server.registry = self.registry
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# --- Notifications (coalescing, rate-limited dispatcher with pluggable sinks) ---
+NOTIFICATION_SEVERITIES = {"info": 0, "warning": 1, "error": 2}
+# Summary texts for coalesced bursts, keyed by event
+NOTIFICATION_SUMMARIES = {
+    'started': ("Skripte gestartet", "{count} Skripte gestartet"),
+    'start_failed': ("Fehler beim Starten", "{count} Skripte konnten nicht gestartet werden"),
+    'stopping': ("Skripte werden gestoppt", "Stopp-Befehl an {count} Skripte gesendet"),
+    'stopped': ("Skripte gestoppt", "{count} Skripte gestoppt"),
+    'stop_info': ("Skript Stopp-Info", "{count} Skripte waren bereits beendet"),
+    'stop_failed': ("Fehler beim Stoppen", "{count} Skripte konnten nicht gestoppt werden"),
+    'exited': ("Skripte beendet", "{count} Skripte beendet"),
+    'restarting': ("Skripte starten neu", "{count} Skripte werden neu gestartet"),
+    'limit_exceeded': ("Ressourcen-Limits überschritten", "{count} Skripte überschreiten ihre Ressourcen-Limits"),
+    'alert': ("Alarmregeln ausgelöst", "{count} Alarme ausgelöst"),
+}
+NOTIFICATION_SUMMARY_NAMES = 5 # Script names listed in a summary before "+N weitere"
+
+
+class Notification:
+    __slots__ = ('event', 'title', 'message', 'severity', 'script', 'timestamp')
+
+    def __init__(self, event, title, message, severity="info", script=None):
+        self.event = event
+        self.title = title
+        self.message = message
+        self.severity = severity if severity in NOTIFICATION_SEVERITIES else "info"
+        self.script = script
+        self.timestamp = time.time()
+
+    def as_dict(self):
+        return {'event': self.event, 'title': self.title, 'message': self.message,
+                'severity': self.severity, 'script': self.script, 'timestamp': self.timestamp}
+
+
+class DesktopNotificationSink:
+    """Desktop pop-ups via plyer."""
+    def __init__(self, app_name):
+        self.app_name = app_name
+
+    def send(self, item):
+        notification.notify(title=item.title, message=item.message, app_name=self.app_name, timeout=5) # plyer
+
+
+class LogFileNotificationSink:
+    """Appends one line per notification to a text file."""
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, notification):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(notification.timestamp))} "
+                    f"[{notification.severity.upper()}] {notification.title}: {notification.message}\n")
+
+
+class WebhookNotificationSink:
+    """POSTs each notification as JSON to an HTTP endpoint (e.g. a local chat bridge)."""
+    def __init__(self, url, timeout=3.0):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, notification):
+        request = urllib.request.Request(self.url, data=json.dumps(notification.as_dict()).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'}, method='POST')
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class _TokenBucket:
+    def __init__(self, per_minute, capacity=None):
+        self.capacity = max(1.0, float(capacity if capacity is not None else per_minute))
+        self.rate = float(per_minute) / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self):
+        return self.take_up_to(1) == 1
+
+    def take_up_to(self, count):
+        """Takes as many of `count` tokens as are available and returns that number."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        granted = min(count, int(self.tokens))
+        self.tokens -= granted
+        return granted
+
+
+class NotificationDispatcher:
+    """
+    Accepts notifications from any thread without blocking, coalesces bursts of the same
+    event into one summary, applies per-script and global rate limits and fans out to
+    the configured sinks from its own worker thread.
+    """
+    def __init__(self, logger, settings, app_name):
+        self.logger = logger
+        self.coalesce_seconds = float(settings.get('coalesce_seconds', 2.0))
+        self.per_script_per_minute = float(settings.get('per_script_per_minute', 6))
+        self.global_bucket = _TokenBucket(settings.get('global_per_minute', 20))
+        self._script_buckets = {}
+        self.sinks = [] # (sink, min_severity, events or None)
+        self.sent = 0
+        self.coalesced = 0
+        self.suppressed = 0
+        self._queue = queue.Queue()
+        self._thread = None
+
+        for sink_config in settings.get('sinks', [{'type': 'desktop'}]):
+            sink = self._create_sink(sink_config, app_name)
+            if sink is not None:
+                events = sink_config.get('events')
+                self.sinks.append((sink, NOTIFICATION_SEVERITIES.get(sink_config.get('min_severity', 'info'), 0),
+                                   set(events) if events else None))
+
+    def _create_sink(self, sink_config, app_name):
+        sink_type = sink_config.get('type')
+        if sink_type == 'desktop':
+            if not PLYER_AVAILABLE:
+                self.logger.warning("plyer nicht verfügbar, Desktop-Benachrichtigungen sind deaktiviert.")
+                return None
+            return DesktopNotificationSink(app_name)
+        if sink_type == 'log_file' and sink_config.get('path'):
+            return LogFileNotificationSink(sink_config['path'])
+        if sink_type == 'webhook' and sink_config.get('url'):
+            return WebhookNotificationSink(sink_config['url'], float(sink_config.get('timeout', 3.0)))
+        self.logger.warning(f"Unbekannte oder unvollständige Benachrichtigungs-Senke ignoriert: {sink_config}")
+        return None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._queue.put(None)
+
+    def submit(self, notification):
+        """Never blocks; safe to call from the Tk thread and from worker threads."""
+        self._queue.put(notification)
+
+    def _run(self):
+        pending = {} # (event, severity) -> (window end, [notifications])
+        while True:
+            timeout = None
+            if pending:
+                timeout = max(0.0, min(window_end for window_end, _ in pending.values()) - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False
+            if item is None:
+                for key in list(pending):
+                    self._flush(pending.pop(key)[1])
+                return
+            if item:
+                key = (item.event, item.severity)
+                if key not in pending:
+                    pending[key] = (time.monotonic() + self.coalesce_seconds, [])
+                pending[key][1].append(item)
+            now = time.monotonic()
+            for key in [key for key, (window_end, _) in pending.items() if window_end <= now]:
+                self._flush(pending.pop(key)[1])
+
+    def _flush(self, notifications):
+        unique = []
+        seen = set()
+        for notification in notifications:
+            identity = (notification.script, notification.title, notification.message)
+            if identity not in seen:
+                seen.add(identity)
+                unique.append(notification)
+        self.coalesced += len(notifications) - 1
+        if len(unique) == 1:
+            notification = unique[0]
+            if notification.script is not None:
+                bucket = self._script_buckets.get(notification.script)
+                if bucket is None:
+                    bucket = self._script_buckets[notification.script] = _TokenBucket(self.per_script_per_minute)
+                if not bucket.take():
+                    self.suppressed += 1
+                    return
+        else:
+            first = unique[0]
+            title, template = NOTIFICATION_SUMMARIES.get(first.event, ("Benachrichtigungen", "{count} Benachrichtigungen"))
+            names = [n.script for n in unique if n.script]
+            message = template.format(count=len(unique))
+            if names:
+                message += ": " + ", ".join(names[:NOTIFICATION_SUMMARY_NAMES])
+                if len(names) > NOTIFICATION_SUMMARY_NAMES:
+                    message += f" (+{len(names) - NOTIFICATION_SUMMARY_NAMES} weitere)"
+            notification = Notification(first.event, title, message, first.severity)
+        if not self.global_bucket.take():
+            self.suppressed += 1
+            return
+        self.sent += 1
+        severity_rank = NOTIFICATION_SEVERITIES[notification.severity]
+        for sink, min_severity, events in self.sinks:
+            if severity_rank < min_severity or (events is not None and notification.event not in events):
+                continue
+            try:
+                sink.send(notification)
+            except Exception as e:
+                self.logger.error(f"Fehler beim Senden der Benachrichtigung über {type(sink).__name__}: {e}")
+
+
+# --- Alert rules (regex rules on the output stream, pre-filtered by one literal pass per line) ---
+try:
+    from re import _parser as _sre_parse # Python 3.11+
+except ImportError:
+    import sre_parse as _sre_parse
+
+ALERT_ACTIONS = ("notify", "restart", "stop", "count")
+ALERT_MIN_LITERAL = 3 # Rules whose best required literal is shorter are checked against every line
+_REPEAT_OPS = tuple(getattr(_sre_parse, op) for op in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT") if hasattr(_sre_parse, op))
+
+
+def _literal_condition(items):
+    """
+    Best set of ASCII literals of which every match of the parsed pattern contains at least
+    one (casefolded), or None. Only plain sequences, required groups/repeats and
+    alternations whose branches all have a literal are looked at.
+    """
+    best = None
+    run = []
+
+    def consider(condition):
+        nonlocal best
+        if condition and (best is None or min(map(len, condition)) > min(map(len, best))):
+            best = condition
+
+    for op, arg in items:
+        if op is _sre_parse.LITERAL and arg < 128:
+            run.append(chr(arg).casefold())
+            continue
+        consider([''.join(run)] if run else None)
+        run = []
+        if op is _sre_parse.SUBPATTERN:
+            consider(_literal_condition(arg[-1]))
+        elif op in _REPEAT_OPS and arg[0] >= 1:
+            consider(_literal_condition(arg[2]))
+        elif op is _sre_parse.BRANCH:
+            alternatives = [_literal_condition(branch) for branch in arg[1]]
+            if all(alternatives):
+                consider([literal for alternative in alternatives for literal in alternative])
+    consider([''.join(run)] if run else None)
+    return best
+
+
+def _literal_trie_pattern(literals):
+    """One regex matching any of the literals, nested as a trie so each position costs a few steps only."""
+    trie = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[''] = None
+
+    def build(node):
+        if '' in node: # A literal ends here; longer ones sharing the prefix need not be matched
+            return ''
+        alternatives = [re.escape(char) + build(child) for char, child in sorted(node.items())]
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return '(?:' + '|'.join(alternatives) + ')'
+    return re.compile(build(trie))
+
+
+class AlertRule:
+    """Parsed entry of "alert_rules" (global) or of a script's "alerts" list."""
+    __slots__ = ('name', 'regex', 'threshold', 'window_seconds', 'cooldown_seconds', 'actions', 'severity', 'literals')
+
+    def __init__(self, config):
+        pattern = config['pattern']
+        self.name = str(config.get('name') or pattern)
+        try:
+            self.regex = re.compile(pattern, re.IGNORECASE if config.get('ignore_case') else 0)
+        except re.error as e:
+            raise ValueError(f"Ungültiger regulärer Ausdruck '{pattern}': {e}") from None
+        self.threshold = max(1, int(config.get('threshold', 1)))
+        self.window_seconds = float(config.get('window_seconds', 60))
+        self.cooldown_seconds = float(config.get('cooldown_seconds', 60))
+        actions = config.get('action', "notify")
+        self.actions = (actions,) if isinstance(actions, str) else tuple(actions)
+        for action in self.actions:
+            if action not in ALERT_ACTIONS:
+                raise ValueError(f"Unbekannte Aktion '{action}' (erlaubt: {', '.join(ALERT_ACTIONS)})")
+        self.severity = config.get('severity', "warning")
+        if self.severity not in NOTIFICATION_SEVERITIES:
+            raise ValueError(f"Unbekannter Schweregrad '{self.severity}' (erlaubt: {', '.join(NOTIFICATION_SEVERITIES)})")
+        literals = _literal_condition(_sre_parse.parse(pattern, self.regex.flags))
+        self.literals = literals if literals and min(map(len, literals)) >= ALERT_MIN_LITERAL else None
+
+
+class ScriptAlerts:
+    """
+    The alert rules of one script with their match state. Fed by the script's reader threads:
+    a single search of a trie regex over the casefolded line selects the candidate rules,
+    only those run their own regex. Rules without a usable literal are always checked.
+    """
+    def __init__(self, rules):
+        self.rules = rules
+        self.matches = {rule.name: 0 for rule in rules}
+        self.fired = {rule.name: 0 for rule in rules}
+        self._hits = {rule.name: collections.deque() for rule in rules} # Match times inside the threshold window
+        self._last_fired = {}
+        self._lock = threading.Lock() # Stdout reader and log file tailer feed the same script
+        self._unfiltered = [rule for rule in rules if rule.literals is None]
+        by_literal = {}
+        for rule in rules:
+            for literal in rule.literals or ():
+                by_literal.setdefault(literal, []).append(rule)
+        self._by_literal = list(by_literal.items())
+        self._prefilter = _literal_trie_pattern(by_literal) if by_literal else None
+
+    def feed(self, line):
+        """Returns [(rule, matches in window)] for the rules that fire on this line, usually empty."""
+        candidates = self._unfiltered
+        if self._prefilter is not None:
+            # Dotless 'ı' is the one letter that IGNORECASE matches to ASCII but casefold() keeps
+            folded = line.casefold().replace('ı', 'i')
+            if self._prefilter.search(folded) is not None:
+                candidates = list(dict.fromkeys(
+                    self._unfiltered + [rule for literal, rules in self._by_literal if literal in folded for rule in rules]))
+        fired = []
+        now = None
+        for rule in candidates:
+            if rule.regex.search(line) is None:
+                continue
+            now = now or time.monotonic()
+            with self._lock:
+                self.matches[rule.name] += 1
+                hits = self._hits[rule.name]
+                hits.append(now)
+                while now - hits[0] > rule.window_seconds:
+                    hits.popleft()
+                if len(hits) < rule.threshold or now - self._last_fired.get(rule.name, -math.inf) < rule.cooldown_seconds:
+                    continue
+                fired.append((rule, len(hits)))
+                self.fired[rule.name] += 1
+                self._last_fired[rule.name] = now
+                hits.clear()
+        return fired
+
+
+# --- Schedules (cron expressions and fixed intervals, driven by one timer heap) ---
+SCHEDULE_STATE_FILE = "schedule_state.json" # Last run per script, next to config.json, for catch-up after downtime
+SCHEDULE_MAX_TIMER_MS = 60000 # Re-check at least once a minute so clock changes and sleep are noticed
+SCHEDULE_LATE_SECONDS = 60 # A run that fires later than this counts as missed and follows the catch-up rule
+SCHEDULE_MAX_CATCH_UP = 10 # Upper bound for catch_up "all" and for queued runs per script
+SCHEDULE_OVERLAP_POLICIES = ("skip", "queue", "kill")
+SCHEDULE_CATCH_UP_POLICIES = ("skip", "once", "all")
+CRON_MACROS = {
+    '@yearly': "0 0 1 1 *", '@annually': "0 0 1 1 *", '@monthly': "0 0 1 * *",
+    '@weekly': "0 0 * * 0", '@daily': "0 0 * * *", '@midnight': "0 0 * * *", '@hourly': "0 * * * *",
+}
+CRON_MONTH_NAMES = {name: number for number, name in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1)}
+CRON_DAY_NAMES = {name: number for number, name in enumerate(("sun", "mon", "tue", "wed", "thu", "fri", "sat"))}
+
+
+class CronExpression:
+    """Standard 5-field cron expression (minute hour day-of-month month day-of-week) in local time."""
+    FIELDS = ((0, 59, {}), (0, 23, {}), (1, 31, {}), (1, 12, CRON_MONTH_NAMES), (0, 7, CRON_DAY_NAMES))
+
+    def __init__(self, text):
+        self.text = text
+        fields = CRON_MACROS.get(text.strip().lower(), text).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron-Ausdruck braucht 5 Felder: '{text}'")
+        parsed = [self._parse_field(field, low, high, names) for field, (low, high, names) in zip(fields, self.FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = frozenset(day % 7 for day in weekdays) # 7 is Sunday as well
+        # Cron rule: if both day fields are restricted, a day matches if either one does; a field
+        # starting with '*' (also "*/2") does not restrict, so then both have to match
+        self.days_restricted = not fields[2].startswith('*')
+        self.weekdays_restricted = not fields[4].startswith('*')
+
+    @staticmethod
+    def _parse_field(field, low, high, names):
+        values = set()
+        for part in field.lower().split(','):
+            part, _, step = part.partition('/')
+            try:
+                step = int(step) if step else 1
+                if part == '*':
+                    start, end = low, high
+                else:
+                    start, _, end = part.partition('-')
+                    start = int(names.get(start, start))
+                    end = int(names.get(end, end)) if end else (high if step > 1 else start)
+            except ValueError:
+                raise ValueError(f"Ungültiges Cron-Feld '{field}'") from None
+            if not (low <= start <= end <= high) or step < 1:
+                raise ValueError(f"Ungültiges Cron-Feld '{field}' (erlaubt {low}-{high})")
+            values.update(range(start, end + 1, step))
+        return tuple(sorted(values))
+
+    def _day_matches(self, day):
+        in_days = day.day in self.days
+        in_weekdays = (day.weekday() + 1) % 7 in self.weekdays
+        if self.days_restricted and self.weekdays_restricted:
+            return in_days or in_weekdays
+        return in_days and in_weekdays
+
+    def next_after(self, timestamp):
+        """Returns the first matching time strictly after timestamp (seconds since the epoch)."""
+        moment = datetime.datetime.fromtimestamp(timestamp).replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limit = moment.year + 5 # Impossible dates such as 31 February never match
+        while moment.year <= limit:
+            if moment.month not in self.months:
+                index = bisect.bisect_left(self.months, moment.month)
+                year = moment.year + (index == len(self.months))
+                moment = moment.replace(year=year, month=self.months[index % len(self.months)], day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+                continue
+            index = bisect.bisect_left(self.hours, moment.hour)
+            if index == len(self.hours):
+                moment = moment.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+                continue
+            if self.hours[index] != moment.hour:
+                moment = moment.replace(hour=self.hours[index], minute=0)
+            index = bisect.bisect_left(self.minutes, moment.minute)
+            if index == len(self.minutes):
+                moment = moment.replace(minute=0) + datetime.timedelta(hours=1)
+                continue
+            moment = moment.replace(minute=self.minutes[index])
+            result = moment.timestamp()
+            if result > timestamp:
+                return result
+            moment += datetime.timedelta(minutes=1) # Repeated hour after the clocks went back: its first pass is over
+        raise ValueError(f"Cron-Ausdruck '{self.text}' trifft nie zu")
+
+
+class Schedule:
+    """Parsed "schedule" entry of a script: when to run and what to do about overlaps and missed runs."""
+    __slots__ = ('cron', 'interval', 'overlap', 'catch_up', 'jitter')
+
+    def __init__(self, config):
+        self.cron = CronExpression(config['cron']) if config.get('cron') else None
+        self.interval = float(config['interval_seconds']) if config.get('interval_seconds') else None
+        if (self.cron is None) == (self.interval is None):
+            raise ValueError("Zeitplan braucht genau eines von 'cron' oder 'interval_seconds'")
+        if self.interval is not None and self.interval <= 0:
+            raise ValueError("'interval_seconds' muss größer als 0 sein")
+        self.overlap = config.get('overlap', "skip")
+        self.catch_up = config.get('catch_up', "once")
+        if self.overlap not in SCHEDULE_OVERLAP_POLICIES:
+            raise ValueError(f"Unbekannte overlap-Regel '{self.overlap}' (erlaubt: {', '.join(SCHEDULE_OVERLAP_POLICIES)})")
+        if self.catch_up not in SCHEDULE_CATCH_UP_POLICIES:
+            raise ValueError(f"Unbekannte catch_up-Regel '{self.catch_up}' (erlaubt: {', '.join(SCHEDULE_CATCH_UP_POLICIES)})")
+        self.jitter = max(0.0, float(config.get('jitter_seconds', 0)))
+
+    def next_after(self, timestamp):
+        if self.cron is not None:
+            return self.cron.next_after(timestamp)
+        return timestamp + self.interval
+
+    def missed_between(self, nominal, now):
+        """Counts the runs due from nominal up to now, capped at SCHEDULE_MAX_CATCH_UP, and the first one after now."""
+        missed = 0
+        while nominal <= now:
+            missed += 1
+            if missed == SCHEDULE_MAX_CATCH_UP:
+                # Skip the rest of a long downtime without walking every occurrence
+                if self.interval is not None:
+                    return missed, nominal + self.interval * (math.floor((now - nominal) / self.interval) + 1)
+                return missed, self.cron.next_after(now)
+            nominal = self.next_after(nominal)
+        return missed, nominal
+
+
+# --- Job queue (one-shot runs of parameterized templates on a bounded worker pool) ---
+DEFAULT_JOB_HISTORY = 1000 # Finished jobs kept for the Jobs tab and "ctl jobs"
+JOB_OUTPUT_LINES = 2000 # Output lines kept per job (the newest)
+JOB_STAT_WINDOW_SECONDS = 60 # Window for the throughput figure
+JOB_WAIT_SAMPLES = 1000 # Recent queue wait times kept for the percentiles
+JOB_STATE_LABELS = {
+    'queued': "wartend", 'running': "läuft", 'retry_wait': "Wiederholung", 'succeeded': "erfolgreich",
+    'failed': "fehlgeschlagen", 'cancelled': "abgebrochen",
+}
+JOB_FINAL_STATES = ('succeeded', 'failed', 'cancelled')
+# Allowed job parameter values: they come from the control socket and end up in the argv of
+# "cmd /c", where & | < > ^ % ! " ( ) would run further commands or expand variables
+JOB_PARAM_PATTERN = re.compile(r"[\w .,:;/\\@+=~#-]*")
+
+
+def parse_job_params(tokens):
+    """Turns ["key=value", ...] into a dict; raises ValueError for tokens without '='."""
+    params = {}
+    for token in tokens:
+        key, separator, value = token.partition('=')
+        if not separator or not key:
+            raise ValueError(f"Parameter '{token}' muss die Form name=wert haben")
+        params[key] = value
+    return params
+
+
+class JobTemplate:
+    """A "jobs.templates" entry: a script plus argument patterns filled from the job parameters."""
+    __slots__ = ('name', 'path', 'args', 'retries', 'retry_delay', 'priority', 'timeout')
+
+    def __init__(self, name, config):
+        self.name = name
+        self.path = config['path']
+        self.args = [str(arg) for arg in config.get('args', [])]
+        self.retries = int(config.get('retries', 0))
+        self.retry_delay = float(config.get('retry_delay_seconds', 5))
+        self.priority = int(config.get('priority', 0))
+        self.timeout = float(config['timeout_seconds']) if config.get('timeout_seconds') else None
+
+    def command_args(self, params):
+        for key, value in params.items():
+            if not JOB_PARAM_PATTERN.fullmatch(value):
+                raise ValueError(f"Parameter '{key}' enthält unzulässige Zeichen (erlaubt: Buchstaben, Ziffern, Leerzeichen und . , : ; / \\ @ + = ~ # - _)")
+        try:
+            return [arg.format_map(params) for arg in self.args]
+        except KeyError as e:
+            raise ValueError(f"Parameter {e} fehlt für Vorlage '{self.name}'") from None
+
+
+class Job:
+    __slots__ = ('id', 'template', 'params', 'priority', 'state', 'attempts', 'exit_code', 'submitted',
+                 'started', 'finished', 'output', 'pid', 'cancel_requested', 'error')
+
+    def __init__(self, job_id, template, params, priority):
+        self.id = job_id
+        self.template = template
+        self.params = params
+        self.priority = priority
+        self.state = 'queued'
+        self.attempts = 0
+        self.exit_code = None
+        self.submitted = time.time()
+        self.started = None # First start; the wait time is started - submitted
+        self.finished = None
+        self.output = collections.deque(maxlen=JOB_OUTPUT_LINES)
+        self.pid = None
+        self.cancel_requested = False
+        self.error = None
+
+    def as_dict(self):
+        return {
+            'id': self.id, 'template': self.template.name, 'params': self.params, 'priority': self.priority,
+            'state': self.state, 'attempts': self.attempts, 'exit_code': self.exit_code,
+            'submitted': self.submitted, 'started': self.started, 'finished': self.finished, 'error': self.error,
+        }
+
+
+class JobQueue:
+    """
+    Priority queue of jobs run by a fixed number of worker threads, each owning at most one
+    process. Higher priority runs first, equal priorities in submission order. Failed attempts
+    are retried after the template's delay without occupying a worker while they wait.
+    """
+    def __init__(self, spawn, kill, logger):
+        self.spawn = spawn # (path, cwd, args) -> Popen with text stdout
+        self.kill = kill # pid -> None, kills the process tree
+        self.logger = logger
+        self.templates = {}
+        self.workers = 0
+        self.history = DEFAULT_JOB_HISTORY
+        self.jobs = collections.OrderedDict() # id -> Job, oldest first
+        self.counts = collections.Counter() # final state -> number of jobs
+        self._ready = [] # (-priority, sequence, job)
+        self._delayed = [] # (not before, sequence, job) for retries
+        self._sequence = itertools.count()
+        self._ids = itertools.count(1)
+        self._condition = threading.Condition()
+        self._running_workers = 0
+        self._busy = 0
+        self._stopping = False
+        self._changed = set() # Job ids changed since the last drain_changes()
+        self._finished_times = collections.deque()
+        self._wait_times = collections.deque(maxlen=JOB_WAIT_SAMPLES)
+
+    def configure(self, config):
+        """Applies the "jobs" section of config.json; running and queued jobs are kept."""
+        templates = {}
+        for name, template_config in config.get('templates', {}).items():
+            try:
+                templates[name] = JobTemplate(name, template_config)
+            except (KeyError, TypeError, ValueError) as e:
+                self.logger.error(f"Job-Vorlage '{name}' ist ungültig und wird ignoriert: {e}")
+        with self._condition:
+            self.templates = templates
+            self.workers = max(1, int(config.get('workers', os.cpu_count() or 2)))
+            self.history = int(config.get('history', DEFAULT_JOB_HISTORY))
+            self._stopping = False
+            while self._running_workers < (self.workers if templates else 0): # No idle pool without templates
+                self._running_workers += 1
+                threading.Thread(target=self._worker, daemon=True).start()
+            self._condition.notify_all() # Surplus workers exit once idle
+
+    def submit(self, template_name, params, priority=None):
+        """Queues one job; raises ValueError for unknown templates or missing parameters."""
+        params = {str(key): str(value) for key, value in (params or {}).items()}
+        with self._condition:
+            template = self.templates.get(template_name)
+            if template is None:
+                raise ValueError(f"Unbekannte Job-Vorlage '{template_name}'")
+            template.command_args(params) # Validate now rather than when a worker picks it up
+            job = Job(next(self._ids), template, params, template.priority if priority is None else int(priority))
+            self.jobs[job.id] = job
+            heapq.heappush(self._ready, (-job.priority, next(self._sequence), job))
+            self._changed.add(job.id)
+            self._trim_history()
+            self._condition.notify()
+        return job
+
+    def cancel(self, job_id):
+        """Cancels a waiting job or kills a running one; returns False if it already finished."""
+        with self._condition:
+            job = self.jobs.get(job_id)
+            if job is None or job.state in JOB_FINAL_STATES:
+                return False
+            job.cancel_requested = True
+            pid = job.pid if job.state == 'running' else None
+            if job.state != 'running':
+                self._finish(job, 'cancelled') # The heap entry is skipped when popped
+            # A running job is finished by its worker, also if it has no pid yet (killed right after spawning)
+        if pid is not None:
+            try:
+                self.kill(pid)
+            except (subprocess.CalledProcessError, OSError):
+                pass # Exited on its own in the meantime
+        return True
+
+    def stop(self):
+        """Stops the workers; queued jobs are cancelled and running processes killed."""
+        with self._condition:
+            self._stopping = True
+            running = [job.pid for job in self.jobs.values() if job.state == 'running' and job.pid]
+            for job in self.jobs.values():
+                if job.state in ('queued', 'retry_wait'):
+                    self._finish(job, 'cancelled')
+                elif job.state == 'running':
+                    job.cancel_requested = True
+            self._condition.notify_all()
+        for pid in running:
+            try:
+                self.kill(pid)
+            except (subprocess.CalledProcessError, OSError):
+                pass
+
+    def drain_changes(self):
+        """Returns the jobs changed since the last call (for incremental UI updates)."""
+        with self._condition:
+            changed = [self.jobs[job_id] for job_id in self._changed if job_id in self.jobs]
+            removed = [job_id for job_id in self._changed if job_id not in self.jobs]
+            self._changed.clear()
+        return changed, removed
+
+    def stats(self):
+        with self._condition:
+            now = time.monotonic()
+            while self._finished_times and self._finished_times[0] < now - JOB_STAT_WINDOW_SECONDS:
+                self._finished_times.popleft()
+            waits = sorted(self._wait_times)
+            return {
+                'queued': sum(1 for job in self.jobs.values() if job.state in ('queued', 'retry_wait')),
+                'running': self._busy,
+                'workers': self.workers,
+                'succeeded': self.counts['succeeded'],
+                'failed': self.counts['failed'],
+                'cancelled': self.counts['cancelled'],
+                'throughput_per_minute': len(self._finished_times) * 60.0 / JOB_STAT_WINDOW_SECONDS,
+                'wait_p50_seconds': waits[len(waits) // 2] if waits else 0.0,
+                'wait_p95_seconds': waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0,
+            }
+
+    def _finish(self, job, state):
+        job.state = state
+        job.finished = time.time()
+        job.pid = None
+        self.counts[state] += 1
+        self._finished_times.append(time.monotonic())
+        self._changed.add(job.id)
+
+    def _trim_history(self):
+        # Drop the oldest finished jobs; the OrderedDict keeps submission order
+        excess = len(self.jobs) - self.history
+        if excess <= 0:
+            return
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.state in JOB_FINAL_STATES][:excess]:
+            del self.jobs[job_id]
+            self._changed.add(job_id)
+
+    def _next_job(self):
+        """Blocks until a job is runnable; returns None if this worker should exit. Caller holds the lock."""
+        while True:
+            if self._stopping or self._running_workers > self.workers:
+                self._running_workers -= 1
+                return None
+            now = time.time()
+            while self._delayed and self._delayed[0][0] <= now:
+                _, sequence, job = heapq.heappop(self._delayed)
+                if job.state == 'retry_wait':
+                    job.state = 'queued'
+                    self._changed.add(job.id)
+                    heapq.heappush(self._ready, (-job.priority, sequence, job))
+            while self._ready:
+                _, _, job = heapq.heappop(self._ready)
+                if job.state == 'queued':
+                    return job
+            self._condition.wait(self._delayed[0][0] - now if self._delayed else None)
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                job = self._next_job()
+                if job is None:
+                    return
+                job.state = 'running'
+                job.attempts += 1
+                job.error = None
+                if job.started is None:
+                    job.started = time.time()
+                    self._wait_times.append(job.started - job.submitted)
+                self._busy += 1
+                self._changed.add(job.id)
+            try:
+                self._run(job)
+            finally:
+                with self._condition:
+                    self._busy -= 1
+
+    def _run(self, job):
+        template = job.template
+        timer = None
+        try:
+            process = self.spawn(template.path, os.path.dirname(template.path), template.command_args(job.params))
+        except Exception as e:
+            exit_code, job.error = None, str(e)
+        else:
+            with self._condition:
+                job.pid = process.pid
+                cancelled = job.cancel_requested # Cancelled between being picked up and spawning
+            if cancelled:
+                try:
+                    self.kill(process.pid) # Outside the lock: taskkill blocks, and the UI thread submits and cancels
+                except (subprocess.CalledProcessError, OSError):
+                    pass
+            if template.timeout:
+                timer = threading.Timer(template.timeout, self._kill_on_timeout, (job, process.pid))
+                timer.daemon = True
+                timer.start()
+            for line in process.stdout:
+                job.output.append(line)
+            process.stdout.close()
+            with self._condition:
+                job.pid = None # wait() frees the pid for reuse; from now on neither cancel() nor the timeout kills it
+            exit_code = process.wait()
+            if timer:
+                timer.cancel()
+        with self._condition:
+            job.exit_code = exit_code
+            job.pid = None
+            if exit_code == 0:
+                job.error = None # Exited on its own just as the timeout fired
+            if job.cancel_requested:
+                self._finish(job, 'cancelled')
+            elif exit_code == 0:
+                self._finish(job, 'succeeded')
+            elif job.attempts <= template.retries and not self._stopping:
+                job.state = 'retry_wait'
+                self._changed.add(job.id)
+                heapq.heappush(self._delayed, (time.time() + template.retry_delay, next(self._sequence), job))
+                self._condition.notify()
+            else:
+                self._finish(job, 'failed')
+                self.logger.warning(f"Job #{job.id} ({template.name}) fehlgeschlagen nach {job.attempts} Versuch(en), Exit-Code {exit_code}.")
+            self._trim_history()
+
+    def _kill_on_timeout(self, job, pid):
+        with self._condition:
+            if job.pid != pid or job.state != 'running':
+                return # Finished in the meantime
+            job.error = f"Zeitüberschreitung nach {job.template.timeout:g} s"
+        try:
+            self.kill(pid)
+        except (subprocess.CalledProcessError, OSError):
+            pass
+
+
+# --- External log files (tailed with inotify on Linux, polling elsewhere) ---
+LOG_TAIL_READ_BYTES = 1024 * 1024 # Bytes per read() of a growing log file
+LOG_TAIL_POLL_SECONDS = 0.5 # Check interval without inotify
+LOG_TAIL_RESCAN_SECONDS = 5.0 # With inotify: safety re-check of all files and glob patterns
+INOTIFY_MASK = 0x2 | 0x4 | 0x40 | 0x80 | 0x100 | 0x200 # MODIFY, ATTRIB, MOVED_FROM, MOVED_TO, CREATE, DELETE
+INOTIFY_EVENT = struct.Struct("iIII") # wd, mask, cookie, name length
+
+
+class _Inotify:
+    """Minimal inotify binding (ctypes) that watches directories and reports which ones changed."""
+    def __init__(self):
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 fehlgeschlagen")
+        self._directories = {} # watch descriptor -> directory
+
+    def watch(self, directory):
+        if directory in self._directories.values():
+            return
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), INOTIFY_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch fehlgeschlagen: {directory}")
+        self._directories[wd] = directory
+
+    def read(self, timeout):
+        """Waits up to `timeout` seconds; returns the set of watched directories with changes."""
+        changed = set()
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return changed
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(data):
+            wd, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size + length
+            if wd in self._directories:
+                changed.add(self._directories[wd])
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _TailedFile:
+    """Read state of one followed log file, with its own ANSI and repeat-folding state."""
+    __slots__ = ('path', 'source', 'handle', 'identity', 'position', 'partial', 'folder', 'ansi')
+
+    def __init__(self, path, source, fold):
+        self.path = path
+        self.source = source
+        self.handle = None
+        self.identity = None # (st_dev, st_ino) of the file being read
+        self.position = 0
+        self.partial = b'' # Bytes after the last newline
+        self.folder = RepeatFolder() if fold else None
+        self.ansi = AnsiParser()
+
+
+class LogTailer:
+    """
+    Follows the "log_files" of running scripts (paths or glob patterns) from one thread:
+    inotify on the files' directories on Linux, polling elsewhere. Handles rotation (new
+    inode under the same name) and truncation, reads only new bytes in large blocks and
+    hands each complete line to `ingest(name, source, line, folder, ansi)`; line None
+    marks the end of a stream.
+    """
+    def __init__(self, ingest, logger):
+        self.ingest = ingest
+        self.logger = logger
+        self.inotify = None
+        self._commands = queue.Queue()
+        self._scripts = {} # name -> (patterns, base, fold, {path: _TailedFile})
+        self._existing = {} # name -> files that existed when add() was called
+        self._thread = None
+        # Windows does not allow renaming files that are open, so log rotation would fail there
+        self._keep_open = os.name != 'nt'
+
+    def add(self, name, patterns, base, fold=True):
+        """
+        Starts following the files of a script; files that exist now are read from their
+        current end, later ones from the start. Sources are labelled with their path
+        relative to `base`.
+        """
+        existing = {} # path -> (identity, size) at the time of the call
+        for pattern in patterns:
+            for path in (glob.glob(pattern) if glob.has_magic(pattern) else [pattern]):
+                try:
+                    stat = os.stat(path)
+                    existing[path] = ((stat.st_dev, stat.st_ino), stat.st_size)
+                except OSError:
+                    pass
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._commands.put(('add', name, (list(patterns), base, fold, existing)))
+
+    def remove(self, name):
+        """Reads what is left, then stops following the files of a script."""
+        self._commands.put(('remove', name, None))
+
+    def stop(self):
+        self._commands.put(None)
+
+    def _run(self):
+        if sys.platform.startswith('linux'):
+            try:
+                self.inotify = _Inotify()
+            except (OSError, AttributeError) as e:
+                self.logger.warning(f"inotify nicht verfügbar, Log-Dateien werden abgefragt: {e}")
+        next_rescan = 0.0
+        while True:
+            if self.inotify is not None:
+                changed = self.inotify.read(LOG_TAIL_POLL_SECONDS / 2)
+                rescan = time.monotonic() >= next_rescan
+            else:
+                try:
+                    command = self._commands.get(timeout=LOG_TAIL_POLL_SECONDS)
+                    self._commands.put(command) # Handled below, in order with the others
+                except queue.Empty:
+                    pass
+                changed = set()
+                rescan = True
+            while True:
+                try:
+                    command = self._commands.get_nowait()
+                except queue.Empty:
+                    break
+                if command is None:
+                    for name in list(self._scripts):
+                        self._remove(name)
+                    if self.inotify is not None:
+                        self.inotify.close()
+                    return
+                action, name, arguments = command
+                if action == 'add':
+                    self._remove(name)
+                    self._scripts[name] = arguments[:3] + ({},)
+                    self._existing[name] = arguments[3]
+                    self._expand(name)
+                else:
+                    self._remove(name)
+            if rescan:
+                next_rescan = time.monotonic() + LOG_TAIL_RESCAN_SECONDS
+            for name in list(self._scripts):
+                if rescan or any(os.path.dirname(pattern) in changed for pattern in self._scripts[name][0]):
+                    self._expand(name)
+                for tailed in list(self._scripts[name][3].values()):
+                    if rescan or os.path.dirname(tailed.path) in changed:
+                        self._read(name, tailed)
+
+    def _expand(self, name):
+        """Picks up files matching the patterns."""
+        patterns, base, fold, files = self._scripts[name]
+        existing = self._existing[name]
+        for pattern in patterns:
+            paths = glob.glob(pattern) if glob.has_magic(pattern) else [pattern]
+            for path in paths:
+                if path in files or os.path.isdir(path):
+                    continue
+                source = os.path.relpath(path, base) if base and path.startswith(base) else path
+                tailed = files[path] = _TailedFile(path, source, fold)
+                if path in existing:
+                    tailed.identity, tailed.position = existing.pop(path)
+            directory = os.path.dirname(pattern)
+            if self.inotify is not None and not glob.has_magic(directory) and os.path.isdir(directory or "."):
+                try:
+                    self.inotify.watch(directory or ".")
+                except OSError as e:
+                    self.logger.warning(f"'{name}': Verzeichnis {directory} wird abgefragt statt überwacht: {e}")
+
+    def _remove(self, name):
+        entry = self._scripts.pop(name, None)
+        self._existing.pop(name, None)
+        if entry is None:
+            return
+        for tailed in entry[3].values():
+            self._read(name, tailed)
+            if tailed.partial:
+                self._emit(name, tailed, tailed.partial)
+                tailed.partial = b''
+            if tailed.handle is not None:
+                tailed.handle.close()
+                tailed.handle = None
+            self.ingest(name, tailed.source, None, tailed.folder, tailed.ansi)
+
+    def _read(self, name, tailed):
+        try:
+            stat = os.stat(tailed.path)
+        except OSError:
+            stat = None
+        identity = (stat.st_dev, stat.st_ino) if stat is not None else None
+        try:
+            if tailed.handle is not None and identity != tailed.identity:
+                self._drain(name, tailed) # Rotated: finish the old file, then continue with the new one from its start
+                tailed.handle.close()
+                tailed.handle = None
+                tailed.identity = None
+            if stat is None:
+                return
+            if identity != tailed.identity:
+                tailed.identity, tailed.position, tailed.partial = identity, 0, b''
+            elif stat.st_size < tailed.position: # Truncated in place
+                tailed.position, tailed.partial = 0, b''
+            elif stat.st_size == tailed.position and tailed.handle is None:
+                return
+            if tailed.handle is None:
+                tailed.handle = open(tailed.path, 'rb')
+            tailed.handle.seek(tailed.position)
+            self._drain(name, tailed)
+        except OSError as e:
+            self.logger.warning(f"'{name}': Log-Datei {tailed.path} konnte nicht gelesen werden: {e}")
+        if not self._keep_open and tailed.handle is not None:
+            tailed.handle.close()
+            tailed.handle = None
+
+    def _drain(self, name, tailed):
+        while True:
+            chunk = tailed.handle.read(LOG_TAIL_READ_BYTES)
+            if not chunk:
+                return
+            tailed.position += len(chunk)
+            data = tailed.partial + chunk
+            end = data.rfind(b'\n') + 1
+            tailed.partial = data[end:]
+            if end:
+                self._emit(name, tailed, data[:end])
+
+    def _emit(self, name, tailed, data):
+        lines = data.decode('utf-8', 'replace').replace('\r\n', '\n').split('\n')
+        if not lines[-1]:
+            lines.pop() # Empty remainder after the final newline
+        for line in lines:
+            self.ingest(name, tailed.source, line + '\n', tailed.folder, tailed.ansi)
+
+
+# --- Run history (SQLite, written in batches by one writer thread) ---
+DEFAULT_HISTORY_DB = "history.db" # Next to config.json; "" disables the history
+HISTORY_BATCH_SIZE = 500 # Runs per write transaction at most
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    script TEXT NOT NULL,
+    pid INTEGER,
+    started REAL NOT NULL,
+    ended REAL NOT NULL,
+    exit_code INTEGER,
+    peak_cpu REAL,
+    peak_rss INTEGER,
+    output_lines INTEGER,
+    output_bytes INTEGER
+);
+-- Covers the per-script time-range queries (list, failures, runtime) without touching the table
+CREATE INDEX IF NOT EXISTS runs_script_started ON runs (script, started, ended, exit_code);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started);
+-- Running totals so all-time statistics never scan runs
+CREATE TABLE IF NOT EXISTS script_totals (
+    script TEXT PRIMARY KEY,
+    runs INTEGER NOT NULL,
+    failures INTEGER NOT NULL,
+    total_runtime REAL NOT NULL,
+    max_runtime REAL NOT NULL,
+    last_started REAL NOT NULL
+);
+"""
+HISTORY_COLUMNS = ('script', 'pid', 'started', 'ended', 'exit_code', 'peak_cpu', 'peak_rss', 'output_lines', 'output_bytes')
+
+
+class RunRecord:
+    """One run of a script, filled while it runs and written to the history when it ends."""
+    __slots__ = ('script', 'pid', 'started', 'ended', 'exit_code', 'peak_cpu', 'peak_rss',
+                 'output_lines', 'output_bytes', '_lines_at_start', '_bytes_at_start')
+
+    def __init__(self, script, pid, stats):
+        self.script = script
+        self.pid = pid
+        self.started = time.time()
+        self.ended = None
+        self.exit_code = None
+        self.peak_cpu = 0.0
+        self.peak_rss = 0
+        self.output_lines = 0
+        self.output_bytes = 0
+        self._lines_at_start = stats.output_lines
+        self._bytes_at_start = stats.output_bytes
+
+    def sample(self, cpu, rss):
+        if cpu > self.peak_cpu:
+            self.peak_cpu = cpu
+        if rss > self.peak_rss:
+            self.peak_rss = rss
+
+    def finish(self, exit_code, stats):
+        self.ended = time.time()
+        self.exit_code = exit_code
+        self.output_lines = stats.output_lines - self._lines_at_start
+        self.output_bytes = stats.output_bytes - self._bytes_at_start
+
+    def as_row(self):
+        return (self.script, self.pid, self.started, self.ended, self.exit_code, round(self.peak_cpu, 1),
+                self.peak_rss, self.output_lines, self.output_bytes)
+
+
+class RunHistory:
+    """
+    Append-only run history in SQLite (WAL). record() only enqueues; one writer thread
+    inserts whatever has accumulated in a single transaction. Queries use a connection
+    per calling thread, so the UI, the control server and the writer never share one.
+    """
+    def __init__(self, path, logger):
+        self.path = path
+        self.logger = logger
+        self._queue = queue.Queue()
+        self._local = threading.local()
+        self._thread = None
+        self.written = 0
+        connection = self._connect()
+        connection.executescript(HISTORY_SCHEMA)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL") # Durable enough for history, far fewer fsyncs
+        return connection
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Writes everything still queued, then ends the writer thread."""
+        self._queue.put(None)
+        if self._thread:
+            self._thread.join(timeout)
+
+    def record(self, run):
+        self._queue.put(run.as_row())
+
+    def _run(self):
+        connection = self._connect()
+        while True:
+            rows = [self._queue.get()]
+            while len(rows) < HISTORY_BATCH_SIZE:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = None in rows
+            rows = [row for row in rows if row is not None]
+            if rows:
+                try:
+                    self._write(connection, rows)
+                except sqlite3.Error as e:
+                    self.logger.error(f"Verlauf konnte nicht geschrieben werden ({len(rows)} Läufe): {e}")
+            if stopping:
+                connection.close()
+                return
+
+    def _write(self, connection, rows):
+        with connection:
+            connection.executemany(
+                f"INSERT INTO runs ({', '.join(HISTORY_COLUMNS)}) VALUES ({', '.join('?' * len(HISTORY_COLUMNS))})", rows)
+            connection.executemany(
+                """INSERT INTO script_totals (script, runs, failures, total_runtime, max_runtime, last_started)
+                   VALUES (?, 1, ?, ?, ?, ?)
+                   ON CONFLICT (script) DO UPDATE SET
+                       runs = runs + 1,
+                       failures = failures + excluded.failures,
+                       total_runtime = total_runtime + excluded.total_runtime,
+                       max_runtime = max(max_runtime, excluded.max_runtime),
+                       last_started = max(last_started, excluded.last_started)""",
+                [(row[0], int(row[4] not in (None, 0)), row[3] - row[2], row[3] - row[2], row[2]) for row in rows])
+        self.written += len(rows)
+
+    def runs(self, script=None, since=None, failures_only=False, limit=500):
+        """Newest runs first, optionally for one script, since a time and/or only failed ones."""
+        conditions, params = [], []
+        if script:
+            conditions.append("script = ?")
+            params.append(script)
+        if since is not None:
+            conditions.append("started >= ?")
+            params.append(since)
+        if failures_only:
+            conditions.append("exit_code <> 0")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cursor = self._connection().execute(
+            f"SELECT {', '.join(HISTORY_COLUMNS)} FROM runs {where} ORDER BY started DESC LIMIT ?", params + [limit])
+        return [dict(zip(HISTORY_COLUMNS, row)) for row in cursor]
+
+    def failures(self, script, days=7, limit=500):
+        return self.runs(script, time.time() - days * 86400, True, limit)
+
+    def script_stats(self, since=None):
+        """Per script: runs, failures, average and maximum runtime. All-time figures come from script_totals."""
+        if since is None:
+            cursor = self._connection().execute(
+                "SELECT script, runs, failures, total_runtime / runs, max_runtime, last_started FROM script_totals ORDER BY script")
+        else:
+            # One covering-index range scan per script instead of scanning every run since `since`
+            connection = self._connection()
+            scripts = [row[0] for row in connection.execute("SELECT script FROM script_totals ORDER BY script")]
+            cursor = [(script,) + connection.execute(
+                """SELECT count(*), coalesce(sum(exit_code <> 0), 0), avg(ended - started), max(ended - started), max(started)
+                   FROM runs WHERE script = ? AND started >= ?""", (script, since)).fetchone() for script in scripts]
+            cursor = [row for row in cursor if row[1]]
+        return [dict(zip(('script', 'runs', 'failures', 'avg_runtime', 'max_runtime', 'last_started'), row)) for row in cursor]
+
+
+# --- Control protocol (manager <-> "batch_manager.py ctl") ---
+# Every frame is a 5-byte header (payload length, frame kind) followed by the payload.
+# JSON frames carry requests/replies, OUTPUT frames carry raw script output so that
+# "tail -f" never pays for JSON-encoding individual lines.
+DEFAULT_CONTROL_PORT = 47800
+CONTROL_FRAME_HEADER = struct.Struct(">IB")
+CONTROL_NAME_HEADER = struct.Struct(">H")
+FRAME_JSON = 1
+FRAME_OUTPUT = 2
+TAIL_MAX_PENDING_LINES = 100000 # Per subscriber; oldest lines are dropped for clients that cannot keep up
+TAIL_BATCH_LINES = 5000
+TAIL_FOLLOW_BACKLOG_LINES = 1000 # Newest raw lines per script kept as the backlog of "ctl tail -f"
+
+
+def _send_frame(sock, kind, payload):
+    sock.sendall(CONTROL_FRAME_HEADER.pack(len(payload), kind) + payload)
+
+
+def _send_json_frame(sock, obj):
+    _send_frame(sock, FRAME_JSON, json.dumps(obj, separators=(',', ':')).encode('utf-8'))
+
+
+def _send_output_frame(sock, name, lines):
+    encoded_name = name.encode('utf-8')
+    payload = CONTROL_NAME_HEADER.pack(len(encoded_name)) + encoded_name + ''.join(lines).encode('utf-8', 'replace')
+    _send_frame(sock, FRAME_OUTPUT, payload)
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _recv_frame(sock):
+    """Returns (kind, payload) or None when the peer closed the connection."""
+    header = _recv_exact(sock, CONTROL_FRAME_HEADER.size)
+    if header is None:
+        return None
+    length, kind = CONTROL_FRAME_HEADER.unpack(header)
+    payload = _recv_exact(sock, length) if length else b''
+    if payload is None:
+        return None
+    return kind, payload
+
+
+def _decode_output_frame(payload):
+    (name_length,) = CONTROL_NAME_HEADER.unpack_from(payload)
+    start = CONTROL_NAME_HEADER.size
+    name = payload[start:start + name_length].decode('utf-8')
+    return name, payload[start + name_length:].decode('utf-8', 'replace')
+
+
+class _OutputSubscriber:
+    """Bounded per-connection buffer that the output readers push into."""
+    def __init__(self, name):
+        self.name = name
+        self.lines = collections.deque(maxlen=TAIL_MAX_PENDING_LINES)
+        self.event = threading.Event()
+
+    def push(self, line):
+        self.lines.append(line)
+        self.event.set()
+
+    def drain(self, limit=TAIL_BATCH_LINES):
+        batch = []
+        lines = self.lines
+        while lines and len(batch) < limit:
+            batch.append(lines.popleft())
+        return batch
+
+
+class _ControlRequestHandler(socketserver.BaseRequestHandler):
+    """Serves one persistent client connection until it disconnects."""
+    def handle(self):
+        server = self.server.control_server
+        sock = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            try:
+                frame = _recv_frame(sock)
+            except OSError:
+                return
+            if frame is None:
+                return
+            kind, payload = frame
+            if kind != FRAME_JSON:
+                _send_json_frame(sock, {'ok': False, 'error': 'Unbekannter Frame-Typ'})
+                continue
+            try:
+                request = json.loads(payload.decode('utf-8'))
+                op = request.get('op')
+                if op == 'tail':
+                    server.stream_output(sock, request)
+                    return
+                if op == 'top':
+                    server.stream_top(sock, request)
+                    return
+                _send_json_frame(sock, server.handle_request(request))
+            except (OSError, ValueError) as e:
+                try:
+                    _send_json_frame(sock, {'ok': False, 'error': str(e)})
+                except OSError:
+                    return
+
+
+class _ControlTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class ControlServer:
+    """Local socket server that lets "batch_manager.py ctl" talk to the running manager."""
+    def __init__(self, manager, host="127.0.0.1", port=DEFAULT_CONTROL_PORT):
+        self.manager = manager
+        self.host = host
+        self.port = port
+        self._subscribers = {} # script name -> list of _OutputSubscriber
+        self._recent = {} # script name -> deque of its newest raw lines, the backlog of followers
+        self._subscribers_lock = threading.Lock() # Guards both, so a follower's backlog and stream meet exactly
+        self._server = None
+
+    def start(self):
+        self._server = _ControlTCPServer((self.host, self.port), _ControlRequestHandler)
+        self._server.control_server = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def publish(self, name, line):
+        """Called from the output reader threads for every line."""
+        with self._subscribers_lock:
+            recent = self._recent.get(name)
+            if recent is None:
+                recent = self._recent[name] = collections.deque(maxlen=TAIL_FOLLOW_BACKLOG_LINES)
+            recent.append(line)
+            subscribers = self._subscribers.get(name)
+            if subscribers:
+                for subscriber in subscribers:
+                    subscriber.push(line)
+
+    def forget(self, name):
+        """Drops the follow backlog of a script (new run, cleared output or removed script)."""
+        with self._subscribers_lock:
+            self._recent.pop(name, None)
+
+    def _script_rows(self):
+        manager = self.manager
+        rows = []
+        snapshots = manager.script_snapshots()
+        replica_counts = dict(manager.replica_counts)
+        aggregates = {} # Replica set -> its aggregated row
+        for name, data in list(manager.scripts.items()):
+            snapshot = snapshots.get(name)
+            if snapshot is None:
+                continue # Replica instance being added or removed right now
+            running, cpu, rss, started = snapshot.running, snapshot.cpu, snapshot.rss, snapshot.started
+            row = {
+                'name': name,
+                'running': running,
+                'pid': snapshot.pid,
+                'cpu': round(cpu, 1),
+                'rss': rss,
+                'uptime': round(time.time() - started, 1) if running and started else 0,
+                'next_run': manager.schedule_next_run.get(name),
+            }
+            if snapshot.leak_suspected:
+                row['memory_growth_mb_per_hour'] = round(snapshot.memory_growth, 1)
+            activation = manager.activations.get(name)
+            if activation is not None:
+                row['activation'] = {'port': activation.port, 'active': activation.active, 'starts': activation.activations,
+                                     'first_request_ms': round(activation.last_first_request * 1000, 1)
+                                     if activation.last_first_request is not None else None}
+            if name in replica_counts: # The set's aggregated row comes first, then its instances; 'name' is only on instance rows
+                aggregates[name] = {'replica_set': name, 'replicas': replica_counts[name], 'healthy': 0, 'running': False,
+                                    'pid': None, 'cpu': 0.0, 'rss': 0, 'uptime': 0, 'next_run': None}
+                rows.append(aggregates[name])
+            set_name = data.get('replica_of', name)
+            if set_name in aggregates:
+                row['replica_of'] = set_name
+                aggregate = aggregates[set_name]
+                aggregate['healthy'] += running
+                aggregate['running'] = aggregate['running'] or running
+                aggregate['cpu'] = round(aggregate['cpu'] + cpu, 1)
+                aggregate['rss'] += rss
+            rows.append(row)
+        return rows
+
+    def handle_request(self, request):
+        op = request.get('op')
+        manager = self.manager
+        if op == 'status':
+            return {'ok': True, 'scripts': self._script_rows()}
+        if op == 'diagnostics':
+            return {'ok': True, 'diagnostics': manager.instrumentation.snapshot()}
+        if op in ('start', 'stop', 'restart'):
+            name = request.get('name')
+            if name not in manager.scripts:
+                return {'ok': False, 'error': f"Unbekanntes Skript: '{name}'"}
+            action = {'start': manager.start_script, 'stop': manager.stop_script, 'restart': manager.restart_script}[op]
+            manager.bus.call(action, name) # Tk calls must happen on the main thread
+            return {'ok': True}
+        if op == 'scale':
+            name = request.get('name')
+            if name not in manager.replica_counts:
+                return {'ok': False, 'error': f"'{name}' ist kein Replikat-Set (Eintrag 'replicas' fehlt)"}
+            try:
+                count = int(request.get('replicas'))
+            except (TypeError, ValueError):
+                return {'ok': False, 'error': f"Ungültige Anzahl Replikate: {request.get('replicas')!r}"}
+            if not 1 <= count <= MAX_REPLICAS:
+                return {'ok': False, 'error': f"Die Anzahl Replikate muss zwischen 1 und {MAX_REPLICAS} liegen"}
+            manager.bus.call(manager.scale_replicas, name, count)
+            return {'ok': True}
+        if op == 'history':
+            if not manager.history:
+                return {'ok': False, 'error': "Der Verlauf ist deaktiviert (history_db)"}
+            days = request.get('days')
+            since = time.time() - float(days) * 86400 if days else None
+            try:
+                if request.get('stats'):
+                    return {'ok': True, 'stats': manager.history.script_stats(since)}
+                return {'ok': True, 'runs': manager.history.runs(request.get('name'), since, bool(request.get('failures')),
+                                                                 int(request.get('limit', 50)))}
+            except sqlite3.Error as e:
+                return {'ok': False, 'error': f"Verlauf konnte nicht abgefragt werden: {e}"}
+        if op == 'submit':
+            try:
+                job = manager.jobs.submit(request.get('template'), request.get('params') or {}, request.get('priority'))
+            except (ValueError, TypeError) as e:
+                return {'ok': False, 'error': str(e)}
+            return {'ok': True, 'job': job.as_dict()}
+        if op == 'jobs':
+            return {'ok': True, 'jobs': [job.as_dict() for job in list(manager.jobs.jobs.values())], 'stats': manager.jobs.stats()}
+        if op == 'cancel_job':
+            if not manager.jobs.cancel(request.get('id')):
+                return {'ok': False, 'error': f"Job #{request.get('id')} ist unbekannt oder bereits beendet"}
+            return {'ok': True}
+        return {'ok': False, 'error': f"Unbekannte Operation: '{op}'"}
+
+    def stream_output(self, sock, request):
+        name = request.get('name')
+        if name not in self.manager.scripts:
+            _send_json_frame(sock, {'ok': False, 'error': f"Unbekanntes Skript: '{name}'"})
+            return
+        subscriber = _OutputSubscriber(name)
+        follow = bool(request.get('follow'))
+        backlog_size = int(request.get('lines', 10))
+        if follow:
+            # Backlog from the published lines and subscription in one step: no line is sent twice or skipped
+            with self._subscribers_lock:
+                recent = self._recent.get(name, ())
+                backlog = list(itertools.islice(recent, max(0, len(recent) - backlog_size), None)) if backlog_size > 0 else []
+                self._subscribers[name] = self._subscribers.get(name, []) + [subscriber]
+        else:
+            runtime = self.manager.runtimes.get(name)
+            store = runtime.output if runtime is not None else None
+            backlog = store.tail(backlog_size) if store is not None and backlog_size > 0 else []
+        try:
+            _send_json_frame(sock, {'ok': True})
+            if backlog:
+                _send_output_frame(sock, name, backlog)
+            if not follow:
+                return
+            while True:
+                subscriber.event.wait(0.5)
+                subscriber.event.clear()
+                batch = subscriber.drain()
+                while batch:
+                    _send_output_frame(sock, name, batch)
+                    batch = subscriber.drain()
+                if self._peer_closed(sock):
+                    return
+        except OSError:
+            return
+        finally:
+            if follow:
+                with self._subscribers_lock:
+                    remaining = [s for s in self._subscribers.get(name, []) if s is not subscriber]
+                    if remaining:
+                        self._subscribers[name] = remaining
+                    else:
+                        self._subscribers.pop(name, None)
+
+    def stream_top(self, sock, request):
+        interval = max(0.1, float(request.get('interval', 0.5)))
+        caches = {} # name -> {pid: psutil.Process}; own cache so top can sample faster than the UI
+        try:
+            _send_json_frame(sock, {'ok': True, 'psutil': PSUTIL_AVAILABLE})
+            while True:
+                rows = self._script_rows()
+                if PSUTIL_AVAILABLE:
+                    aggregates = [row for row in rows if 'replica_set' in row] # No process of their own
+                    for row in rows:
+                        if 'replica_set' in row:
+                            continue
+                        if not row['running']:
+                            caches.pop(row['name'], None)
+                            continue
+                        cache = caches.setdefault(row['name'], {})
+                        try:
+                            row['cpu'], row['rss'] = _sample_process_tree(cache, row['pid'])
+                            row['cpu'] = round(row['cpu'], 1)
+                        except (psutil.NoSuchProcess, psutil.AccessDenied):
+                            caches.pop(row['name'], None)
+                    for aggregate in aggregates:
+                        instances = [row for row in rows if row.get('replica_of') == aggregate['replica_set']]
+                        aggregate['cpu'] = round(sum(row['cpu'] for row in instances if row['running']), 1)
+                        aggregate['rss'] = sum(row['rss'] for row in instances if row['running'])
+                _send_json_frame(sock, {'top': rows, 'ts': time.time()})
+                if self._peer_closed(sock, interval):
+                    return
+        except OSError:
+            return
+
+    @staticmethod
+    def _peer_closed(sock, timeout=0.0):
+        """Waits up to timeout for the client; any data or EOF from it ends the stream."""
+        readable, _, _ = select.select([sock], [], [], timeout)
+        return bool(readable)
+
+
+# --- Per-script runtime state (one record per script instead of parallel dicts keyed by name) ---
+CPU_HISTORY_LENGTH = 20 # CPU samples shown in the sparklines
+
+# Read-only view of a script for other threads (control server, /metrics); memory_growth in MB/hour, None before two points
+ScriptSnapshot = collections.namedtuple('ScriptSnapshot', ('name', 'status', 'running', 'pid', 'started', 'cpu', 'rss',
+                                                           'memory_growth', 'leak_suspected', 'channel_lines', 'channel_capacity'))
+
+
+class ScriptRuntime:
+    """
+    Everything the manager tracks for one script while the app runs: process handle,
+    status, metric rings, output store and the view bindings of its tab. Created per
+    script on load and replaced as a whole by a reload; only the UI thread writes it.
+    """
+    __slots__ = ('name', 'process', 'thread', 'psutil_processes', 'status', 'started', 'run', 'last_sample',
+                 'cpu_history', 'members', 'samples', 'escaped', 'breach', 'memory_trend', 'output', 'view_index',
+                 'channel', 'autoscroll_var', 'switch_var', 'widgets', 'overview_widgets')
+
+    def __init__(self, name):
+        self.name = name
+        self.process = None # Popen of the current run; kept until its exit has been handled
+        self.thread = None # Output reader of the current run
+        self.psutil_processes = {} # pid -> psutil.Process of the tree, while psutil can sample it
+        self.status = "Gestoppt"
+        self.started = None # time.time() of the last start
+        self.run = None # RunRecord of the current run
+        self.last_sample = (0.0, 0) # (cpu_percent, rss_bytes) of the tree
+        self.cpu_history = collections.deque([0.0] * CPU_HISTORY_LENGTH, maxlen=CPU_HISTORY_LENGTH)
+        self.members = {} # pid -> create time of every process seen in the tree
+        self.samples = {} # pid -> (cpu_percent, rss_bytes) of the last sample
+        self.escaped = set() # pids that left the tree (re-parented) but are still running
+        self.breach = None # [breach start, action taken, throttled] while over a resource limit
+        self.memory_trend = None # MemoryTrend of the current run
+        self.output = OutputStore()
+        self.view_index = array('l') # Store indexes shown in the output tab, in widget line order
+        self.channel = None # OutputChannel, created on the first start
+        self.autoscroll_var = tk.BooleanVar(value=True)
+        self.switch_var = tk.BooleanVar(value=False) # Overview on/off switch
+        self.widgets = {} # Widgets of the script's tab
+        self.overview_widgets = {} # Panel and output of the script in the overview
+
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def reset_samples(self):
+        """Forgets the process tree and its samples once the run has ended."""
+        self.psutil_processes = {}
+        self.last_sample = (0.0, 0)
+        self.cpu_history.extend([0.0] * CPU_HISTORY_LENGTH)
+        self.members = {}
+        self.samples = {}
+        self.escaped = set()
+        self.breach = None
+        self.memory_trend = None
+
+    def snapshot(self):
+        process, trend, channel = self.process, self.memory_trend, self.channel
+        running = process is not None and process.poll() is None
+        cpu, rss = self.last_sample if running else (0.0, 0)
+        return ScriptSnapshot(self.name, self.status, running, process.pid if running else None, self.started, cpu, rss,
+                              trend.slope() if trend is not None and trend.n > 1 else None, trend is not None and trend.suspected,
+                              len(channel.items) if channel is not None else None, channel.capacity if channel is not None else None)
+
+
+# --- Manager log ---
+DEFAULT_MANAGER_LOG_LINES = 5000 # Lines kept in the manager log pane; older lines are trimmed
+LOG_FILE_MAX_BYTES = 1024 * 1024
+LOG_FILE_BACKUP_COUNT = 3
+
+
 class BatchManager(tk.Tk):
     APP_NAME = "Batch Script Manager"
     APP_VERSION = "2.38" # Updated version
+    HISTORY_RANGES = {"24 Stunden": 1, "7 Tage": 7, "30 Tage": 30, "Alle": None} # History tab filter -> days
 
     # --- Styling Constants ---
     # Fonts
@@ -168,36 +3483,14 @@ class BatchManager(tk.Tk):
     OVERVIEW_SPARKLINE_WIDTH = 150  # Width for sparklines in overview
     OVERVIEW_SPARKLINE_HEIGHT = 40 # Height for sparklines in overview
 
-    def __init__(self, scripts, global_start_delay=2, autostart_enabled=True, full_config_path="config.json"):
+    def __init__(self, scripts, global_start_delay=2, autostart_enabled=True, full_config_path="config.json", settings=None):
         super().__init__()
         self.title(self.APP_NAME)
         self.geometry("1200x900") # Start with a larger window for better log visibility
         self.minsize(1000, 700)   # Set a larger minimum size
         self.configure(bg=self.MAIN_BG_COLOR) # Set root window background
 
-        self.full_config_path = full_config_path
-        self.scripts = scripts
-        self.global_start_delay = global_start_delay
-        self.autostart_enabled_var = tk.BooleanVar(value=autostart_enabled)
-        
-        self.processes = {}
-        self.threads = {}
-        self.output_queue = queue.Queue()
-        self.psutil_processes = {}
-        self.log_queue = queue.Queue()
-        self.logger, self.log_formatter = self._setup_logger() # Store formatter
-        self.script_raw_output = {name: [] for name in scripts}
-        self.cpu_history = {name: [0.0] * 20 for name in scripts} # Store last 20 CPU values for sparkline
-
-        # Auto-scroll state for each script output tab
-        self.autoscroll_vars = {name: tk.BooleanVar(value=True) for name in scripts}
-        # Widgets for the overview tab
-        self.overview_script_widgets = {} 
-        # Dictionary to hold UI widgets for each script tab
-        self.script_ui_widgets = {} 
-        # NEW: BooleanVar for overview tab switches
-        self.overview_switch_vars = {name: tk.BooleanVar(value=False) for name in scripts}
-
+        self._init_supervisor_state(scripts, global_start_delay, autostart_enabled, full_config_path, settings)
 
         self.logger.info("Batch Script Manager wird gestartet...")
         if not PLYER_AVAILABLE:
@@ -335,26 +3628,286 @@ class BatchManager(tk.Tk):
         self.style.configure("Autostart.TCheckbutton", indicatoron=True, font=self.DEFAULT_FONT)
 
         self.create_widgets()
-        self.after(100, self.process_queue)
-        self.after(100, self.process_log_queue)
+        self._init_schedules()
+        self.instrumentation.schedule(self, 1000, self.refresh_diagnostics)
+        self.instrumentation.schedule(self, 1000, self.refresh_jobs)
         if self.autostart_enabled_var.get():
             self.autostart_scripts()
         if PSUTIL_AVAILABLE:
             self.update_cpu_usage()
+        self._start_control_server()
+        self._start_metrics_exporter()
+        self._start_activations()
 
-    def _send_notification(self, title, message):
-        if PLYER_AVAILABLE:
+    def _init_supervisor_state(self, scripts, global_start_delay, autostart_enabled, full_config_path, settings):
+        """Initializes all non-widget state; shared with the headless benchmark harness."""
+        self.full_config_path = full_config_path
+        self.scripts = scripts
+        self.global_start_delay = global_start_delay
+        self.autostart_enabled_var = tk.BooleanVar(value=autostart_enabled)
+        self.settings = dict(settings or {}) # Remaining top-level keys of config.json
+        
+        self.instrumentation = Instrumentation()
+        self.instrumentation.profiler = SamplingProfiler(threading.get_ident())
+        self.bus = UIBus(self.after, self.instrumentation.after_lag['ui_bus'])
+        # "output" events: (name, line, level, timestamp, ANSI styles, source, received); line None = repeat summary, fold in the styles field
+        self.bus.subscribe('output', self.process_queue, batched=True) # Payload: an OutputChannel with lines waiting
+        self.bus.subscribe('log', self.process_log_queue, batched=True)
+        self.bus.subscribe('exited', self.handle_process_exit)
+        self.bus.subscribe('alert', self._fire_alerts)
+        self.bus.subscribe('start', self.start_script)
+        self.process_table = ProcessTable() if PSUTIL_AVAILABLE else None # Shared by all scripts, refreshed per CPU sample
+        self.logger, self.log_formatter = self._setup_logger() # Store formatter
+        self.bus.logger = self.logger
+        self.replica_counts = {} # Replica set name -> current number of instances (starts at its 'replicas')
+        self._expand_replicas()
+        self.log_file_listener = self.log_file_handler = None
+        self._start_log_file_listener()
+        self.manager_log_lines = 0 # Lines currently in manager_log_text
+        self.runtimes = {name: ScriptRuntime(name) for name in self.scripts}
+        self.active_folds = set() # Scripts whose last output line is a run of repeats that is still growing
+        self.time_gutter_pending = set() # Scripts with a timestamp gutter redraw scheduled
+        self.ansi_tags = {} # widget path -> ANSI tags already configured on it
+        self.control_server = None
+        self.metrics_exporter = None
+        self.activations = {} # name -> ActivationProxy of scripts started on demand
+        self.activation_check_id = None
+        self.resource_limits = self._load_resource_limits()
+        self.alerts = self._load_alert_rules() # name -> ScriptAlerts
+        self.log_tailer = LogTailer(self._ingest_file_line, self.logger)
+        self.history = None
+        self._open_history()
+        self.schedule_after_id = None
+        self.schedules = {}
+        self.schedule_heap = []
+        self.schedule_pending = {}
+        self.schedule_next_run = {}
+        self.metrics = MetricsRegistry(self, float(self.settings.get('metrics_cache_seconds', 1.0)))
+        self._start_notification_dispatcher()
+        self.jobs = JobQueue(self._spawn_script_process, self._kill_process_tree, self.logger)
+        self.jobs.configure(self.settings.get('jobs', {}))
+
+    def _start_control_server(self):
+        port = self.settings.get('control_port', DEFAULT_CONTROL_PORT)
+        if not port:
+            self.logger.info("Steuerungs-Schnittstelle ist deaktiviert (control_port = 0).")
+            return
+        try:
+            self.control_server = ControlServer(self, self.settings.get('control_host', "127.0.0.1"), int(port))
+            self.control_server.start()
+            self.logger.info(f"Steuerungs-Schnittstelle lauscht auf {self.control_server.host}:{port}.")
+        except OSError as e:
+            self.control_server = None
+            self.logger.error(f"Steuerungs-Schnittstelle konnte nicht gestartet werden (Port {port}): {e}")
+
+    def _start_metrics_exporter(self):
+        port = self.settings.get('metrics_port', DEFAULT_METRICS_PORT)
+        if not port:
+            self.logger.info("Metrik-Endpunkt ist deaktiviert (metrics_port = 0).")
+            return
+        try:
+            self.metrics_exporter = MetricsExporter(self.metrics, self.settings.get('metrics_host', "127.0.0.1"), int(port))
+            self.metrics_exporter.start()
+            self.logger.info(f"Metrik-Endpunkt verfügbar unter http://{self.metrics_exporter.host}:{port}/metrics")
+        except OSError as e:
+            self.metrics_exporter = None
+            self.logger.error(f"Metrik-Endpunkt konnte nicht gestartet werden (Port {port}): {e}")
+
+    def _start_activations(self):
+        """Opens the listeners of all scripts with an 'activation' entry and starts the idle check."""
+        for name in self.scripts:
+            self._start_activation(name)
+        if self.activation_check_id is None:
+            self.activation_check_id = self.after(ACTIVATION_CHECK_MS, self._check_activation_idle)
+
+    def _start_activation(self, name):
+        data = self.scripts[name]
+        config = data.get('activation')
+        if not config or name in self.activations:
+            return
+        try:
+            if not isinstance(config, dict) or not data.get('port') or not config.get('backend_port'):
+                raise ValueError("'activation' braucht 'port' am Skript und 'backend_port'")
+            if int(config['backend_port']) == int(data['port']):
+                raise ValueError("'backend_port' muss sich von 'port' unterscheiden")
+            activation = ActivationProxy(name, data['port'], config, lambda: self.bus.post('start', (name,)),
+                                         lambda: self.is_running(name), self.logger)
+            activation.start()
+        except (ValueError, TypeError, OSError) as e:
+            self.logger.error(f"Bei Bedarf: Listener für '{name}' konnte nicht gestartet werden: {e}")
+            return
+        self.activations[name] = activation
+        if not self.is_running(name):
+            self.update_status(name, "Bei Bedarf", "orange")
+        self.logger.info(f"Bei Bedarf: '{name}' startet bei der ersten Verbindung auf {activation.host}:{activation.port} "
+                         f"(Skript-Port {activation.backend_port}, Stopp nach {activation.idle_seconds:g} s Leerlauf).")
+
+    def _stop_activations(self):
+        for activation in self.activations.values():
+            activation.stop()
+        self.activations = {}
+
+    def _check_activation_idle(self):
+        """Stops on-demand scripts that had no connection and no output for their idle_seconds."""
+        now = time.monotonic()
+        for name, activation in list(self.activations.items()):
+            if not self.is_running(name):
+                continue
+            idle = activation.idle_for(self.metrics.script(name).output_lines, now)
+            if idle >= activation.idle_seconds:
+                self.logger.info(f"Bei Bedarf: '{name}' seit {idle:.0f} s ohne Verbindung und Ausgabe, wird gestoppt.")
+                activation.idle_stops += 1
+                activation.script_exited() # Restarts the idle clock while the stop is in flight
+                self.stop_script(name)
+        self.activation_check_id = self.after(ACTIVATION_CHECK_MS, self._check_activation_idle)
+
+    def _start_notification_dispatcher(self):
+        self.notifications = NotificationDispatcher(self.logger, self.settings.get('notifications', {}), self.APP_NAME)
+        self.notifications.start()
+
+    def _send_notification(self, title, message, event="info", severity="info", script=None):
+        """Hands the notification to the dispatcher thread; never blocks the caller."""
+        self.notifications.submit(Notification(event, title, message, severity, script))
+
+    def _init_schedules(self):
+        """(Re)builds the schedule heap from the 'schedule' entries of the scripts; call after create_widgets()."""
+        if self.schedule_after_id:
+            self.after_cancel(self.schedule_after_id)
+            self.schedule_after_id = None
+        self.schedules = {}
+        self.schedule_heap = [] # (fire time incl. jitter, nominal time, script name)
+        self.schedule_pending = {} # name -> runs waiting for the current one to exit
+        self.schedule_next_run = {}
+        state = self._load_schedule_state()
+        now = time.time()
+        for name, data in self.scripts.items():
+            if not data.get('schedule'):
+                continue
             try:
-                notification.notify(
-                    title=title,
-                    message=message,
-                    app_name=self.APP_NAME,
-                    timeout=5
-                )
-            except Exception as e:
-                self.logger.error(f"Fehler beim Senden der Benachrichtigung: {e}")
+                schedule = Schedule(data['schedule'])
+                saved = state.get(name)
+                if saved and saved.get('schedule') == data['schedule']:
+                    nominal = float(saved['next']) # May lie in the past: the first tick applies catch_up
+                else:
+                    nominal = schedule.next_after(now)
+            except (ValueError, TypeError, KeyError) as e:
+                self.logger.error(f"Zeitplan für '{name}' ist ungültig und wird ignoriert: {e}")
+                continue
+            self.schedules[name] = schedule
+            self._push_schedule(name, nominal)
+        if self.schedules:
+            self.logger.info(f"{len(self.schedules)} Zeitplan/Zeitpläne aktiv.")
+            self._save_schedule_state() # Persist the next due times so downtime from now on can be caught up
+        self._arm_schedule_timer()
+
+    def _rescale_schedules(self, name, old_count, count):
+        """After scale_replicas: schedules for the new instances of the set, none for removed ones; other scripts keep theirs."""
+        removed = {replica_name(name, index) for index in range(count, old_count)}
+        if removed:
+            self.schedule_heap = [entry for entry in self.schedule_heap if entry[2] not in removed]
+            heapq.heapify(self.schedule_heap)
+            for instance in removed:
+                self.schedules.pop(instance, None)
+                self.schedule_pending.pop(instance, None)
+                self.schedule_next_run.pop(instance, None)
+        now = time.time()
+        for index in range(old_count, count):
+            instance = replica_name(name, index)
+            self.schedules[instance] = Schedule(self.scripts[instance]['schedule']) # Same entry as the set, which parsed
+            self._push_schedule(instance, self.schedules[instance].next_after(now))
+        self._save_schedule_state()
+        self._arm_schedule_timer()
+
+    def _schedule_state_path(self):
+        return os.path.join(os.path.dirname(self.full_config_path), SCHEDULE_STATE_FILE)
+
+    def _load_schedule_state(self):
+        try:
+            with open(self._schedule_state_path(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Zeitplan-Status konnte nicht gelesen werden, verpasste Läufe werden nicht nachgeholt: {e}")
+            return {}
+
+    def _save_schedule_state(self):
+        state = {name: {'next': nominal, 'schedule': self.scripts[name]['schedule']}
+                 for _, nominal, name in self.schedule_heap if name in self.schedules}
+        try:
+            with open(self._schedule_state_path(), 'w', encoding='utf-8') as f:
+                json.dump(state, f, indent=4)
+        except OSError as e:
+            self.logger.error(f"Zeitplan-Status konnte nicht gespeichert werden: {e}")
+
+    def _push_schedule(self, name, nominal):
+        schedule = self.schedules[name]
+        fire_time = nominal + (random.uniform(0, schedule.jitter) if schedule.jitter else 0.0)
+        heapq.heappush(self.schedule_heap, (fire_time, nominal, name))
+        self.schedule_next_run[name] = fire_time
+        self._update_schedule_label(name)
+
+    def _arm_schedule_timer(self):
+        """Keeps exactly one after() pending, for the earliest entry of the heap."""
+        if self.schedule_after_id:
+            self.after_cancel(self.schedule_after_id)
+            self.schedule_after_id = None
+        if self.schedule_heap:
+            delay_ms = min(max(self.schedule_heap[0][0] - time.time(), 0.0) * 1000, SCHEDULE_MAX_TIMER_MS)
+            self.schedule_after_id = self.after(math.ceil(delay_ms), self._schedule_tick)
+
+    def _schedule_tick(self):
+        self.schedule_after_id = None
+        now = time.time()
+        fired = False
+        while self.schedule_heap and self.schedule_heap[0][0] <= now:
+            fire_time, nominal, name = heapq.heappop(self.schedule_heap)
+            schedule = self.schedules[name]
+            missed, next_nominal = schedule.missed_between(nominal, now)
+            if now - fire_time <= SCHEDULE_LATE_SECONDS:
+                runs = 1
+            else:
+                runs = {"skip": 0, "once": 1, "all": missed}[schedule.catch_up]
+                self.logger.warning(f"Zeitplan: {missed} Lauf/Läufe von '{name}' verpasst (catch_up={schedule.catch_up}), {runs} werden nachgeholt.")
+            if runs:
+                self._run_scheduled(name, runs)
+            self._push_schedule(name, next_nominal)
+            fired = True
+        if fired:
+            self._save_schedule_state()
+        self._arm_schedule_timer()
+
+    def _run_scheduled(self, name, runs):
+        schedule = self.schedules[name]
+        if not self.is_running(name):
+            self.logger.info(f"Zeitplan: Starte '{name}'.")
+            self.start_script(name)
+            if schedule.overlap != "queue":
+                return # Further catch-up runs would be skipped or kill the run just started
+            runs -= 1
+            if not runs:
+                return
+        if schedule.overlap == "skip":
+            self.logger.info(f"Zeitplan: '{name}' läuft noch, Lauf übersprungen (overlap=skip).")
+        elif schedule.overlap == "kill":
+            self.logger.info(f"Zeitplan: '{name}' läuft noch und wird für den neuen Lauf beendet (overlap=kill).")
+            self.schedule_pending[name] = 1
+            self.stop_script(name)
         else:
-            self.logger.warning("plyer nicht verfügbar, konnte keine Desktop-Benachrichtigung senden.")
+            self.schedule_pending[name] = min(self.schedule_pending.get(name, 0) + runs, SCHEDULE_MAX_CATCH_UP)
+            self.logger.info(f"Zeitplan: '{name}' läuft noch, {self.schedule_pending[name]} Lauf/Läufe warten (overlap=queue).")
+        self._update_schedule_label(name)
+
+    def _update_schedule_label(self, name):
+        label = self.runtimes[name].widgets.get('schedule_label')
+        if label is None:
+            return
+        text = ""
+        if name in self.schedule_next_run:
+            text = "Nächster Lauf: " + time.strftime("%d.%m. %H:%M:%S", time.localtime(self.schedule_next_run[name]))
+        if self.schedule_pending.get(name):
+            text += f" ({self.schedule_pending[name]} wartend)"
+        label.config(text=text)
 
     def _setup_logger(self):
         logger = logging.getLogger("BatchManager")
@@ -364,20 +3917,44 @@ class BatchManager(tk.Tk):
         
         formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
         
-        queue_handler = logging.handlers.QueueHandler(self.log_queue)
-        queue_handler.setFormatter(formatter) # Set formatter on the handler
-
-        logger.addHandler(queue_handler)
+        # No formatter here: QueueHandler only merges msg and args, the UI adds the prefix once
+        logger.addHandler(_UIBusLogHandler(self.bus))
         
         return logger, formatter # Return logger and formatter
 
+    def _start_log_file_listener(self):
+        """Writes manager log records to a rotating file from a QueueListener thread, if 'log_file' is set."""
+        if self.log_file_listener:
+            self.log_file_listener.stop()
+            self.logger.removeHandler(self.log_file_handler)
+            self.log_file_listener = self.log_file_handler = None
+        path = self.settings.get('log_file')
+        if not path:
+            return
+        if not os.path.isabs(path):
+            path = os.path.join(os.path.dirname(self.full_config_path), path)
+        try:
+            file_handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=int(self.settings.get('log_file_max_bytes', LOG_FILE_MAX_BYTES)),
+                backupCount=int(self.settings.get('log_file_backup_count', LOG_FILE_BACKUP_COUNT)), encoding='utf-8')
+        except OSError as e:
+            self.logger.error(f"Log-Datei '{path}' konnte nicht geöffnet werden: {e}")
+            return
+        file_handler.setFormatter(self.log_formatter)
+        file_queue = queue.Queue()
+        self.log_file_handler = logging.handlers.QueueHandler(file_queue)
+        self.log_file_listener = logging.handlers.QueueListener(file_queue, file_handler)
+        self.log_file_listener.start()
+        self.logger.addHandler(self.log_file_handler)
+
     def autostart_scripts(self):
         self.logger.info("Prüfe auf automatisch zu startende Skripte...")
-        autostart_scripts = [name for name, data in self.scripts.items() if data.get('autostart', False)]
+        autostart_scripts = [name for name, data in self.scripts.items()
+                             if data.get('autostart', False) and name not in self.activations] # Those start on their first connection
         def _autostart_thread():
             for i, name in enumerate(autostart_scripts):
                 self.logger.info(f"Autostart: Starte '{name}' in {self.global_start_delay} Sekunden...")
-                self.after(0, lambda n=name: self.start_script(n))
+                self.bus.post('start', (name,))
                 if i < len(autostart_scripts) - 1 and self.global_start_delay > 0:
                     time.sleep(self.global_start_delay)
         thread = threading.Thread(target=_autostart_thread, daemon=True)
@@ -396,59 +3973,44 @@ class BatchManager(tk.Tk):
             return None
         return None
 
+    @instrumented("update_cpu_usage")
     def update_cpu_usage(self):
         total_managed_cpu = 0.0
-        for name in list(self.psutil_processes.keys()):
+        sampled = [runtime for runtime in self.runtimes.values() if runtime.psutil_processes]
+        if sampled:
+            self.process_table.refresh()
+        for runtime in sampled:
+            name = runtime.name
             try:
-                process_cache = self.psutil_processes.get(name, {})
-                if not process_cache:
+                process = runtime.process
+                if not process or process.poll() is not None:
+                    self.handle_process_exit(name, process)
                     continue
 
-                main_popen_process = self.processes.get(name)
-                if not main_popen_process or main_popen_process.poll() is not None:
-                    self.handle_process_exit(name)
+                if process.pid not in runtime.psutil_processes:
                     continue
 
-                root_psutil_proc = process_cache.get(main_popen_process.pid)
-                if not root_psutil_proc:
-                    continue
-
-                all_current_pids = {child.pid for child in root_psutil_proc.children(recursive=True)}
-                all_current_pids.add(root_psutil_proc.pid)
-
-                dead_pids = set(process_cache.keys()) - all_current_pids
-                for pid in dead_pids:
-                    del process_cache[pid]
-
-                for pid in all_current_pids:
-                    if pid not in process_cache:
-                        try:
-                            new_proc = psutil.Process(pid)
-                            new_proc.cpu_percent(interval=None)
-                            process_cache[pid] = new_proc
-                        except (psutil.NoSuchProcess, psutil.AccessDenied):
-                            continue
-                
-                total_cpu = 0
-                for pid, proc in list(process_cache.items()):
-                    try:
-                        total_cpu += proc.cpu_percent(interval=None)
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        del process_cache[pid]
+                total_cpu, total_rss = self._sample_script_tree(runtime)
+                runtime.last_sample = (total_cpu, total_rss)
+                runtime.cpu_history.append(total_cpu)
+                self.metrics.script(name).samples.append((time.time(), total_cpu, total_rss))
+                self._check_resource_limits(name, total_cpu, total_rss)
+                self._check_memory_trend(name, total_rss)
+                if runtime.run is not None:
+                    runtime.run.sample(total_cpu, total_rss)
 
                 # Update individual script tab CPU label and sparkline
-                if name in self.script_ui_widgets and 'cpu_label' in self.script_ui_widgets[name]:
-                    self.script_ui_widgets[name]['cpu_label'].config(text=f"CPU: {total_cpu:.1f}%")
-                    self.cpu_history[name].append(total_cpu)
-                    self.cpu_history[name] = self.cpu_history[name][-20:]
-                    self._draw_sparkline(self.script_ui_widgets[name]['sparkline_canvas'], self.cpu_history[name], 
+                widgets = runtime.widgets
+                if 'cpu_label' in widgets:
+                    widgets['cpu_label'].config(text=f"CPU: {total_cpu:.1f}%")
+                    self._draw_sparkline(widgets['sparkline_canvas'], runtime.cpu_history, 
                                          width=50, height=15, draw_value=False)
 
                 # Update overview tab CPU label and sparkline
-                if name in self.overview_script_widgets:
-                    overview_widgets = self.overview_script_widgets[name]
+                overview_widgets = runtime.overview_widgets
+                if overview_widgets:
                     overview_widgets['cpu_label'].config(text=f"CPU: {total_cpu:.1f}%")
-                    self._draw_sparkline(overview_widgets['sparkline_canvas'], self.cpu_history[name], 
+                    self._draw_sparkline(overview_widgets['sparkline_canvas'], runtime.cpu_history, 
                                          width=self.OVERVIEW_SPARKLINE_WIDTH, height=self.OVERVIEW_SPARKLINE_HEIGHT, 
                                          draw_value=True, line_width=2)
 
@@ -456,15 +4018,47 @@ class BatchManager(tk.Tk):
                 total_managed_cpu += total_cpu
 
             except (psutil.NoSuchProcess, psutil.AccessDenied):
-                self.handle_process_exit(name)
+                self.handle_process_exit(name, process)
             except Exception as e:
                 self.logger.error(f"Fehler beim Aktualisieren der CPU-Auslastung für {name}: {e}")
         
         if PSUTIL_AVAILABLE and hasattr(self, 'total_cpu_label'):
             self.total_cpu_label.config(text=f"Total CPU: {total_managed_cpu:.1f}%")
+        if self.process_tree is not None and self.process_tree.winfo_ismapped(): # Only while the tab is shown
+            self._refresh_process_tree()
 
-        self.after(2000, self.update_cpu_usage)
+        self.instrumentation.schedule(self, 2000, self.update_cpu_usage)
 
+    def _sample_script_tree(self, runtime):
+        """
+        Samples a script's processes from the shared process table. Processes that were
+        part of the tree once but got re-parented (orphans adopted by init or a
+        subreaper) are kept as escaped, with their own children, and still counted.
+        """
+        table = self.process_table
+        name, root_pid, members = runtime.name, runtime.process.pid, runtime.members
+        current = {root_pid}
+        current.update(table.descendants(root_pid))
+        for pid in current:
+            members[pid] = table.create_times.get(pid)
+        escaped = set()
+        for pid, created in list(members.items()):
+            if pid in current or pid in escaped:
+                continue
+            if not table.is_alive(pid, created):
+                del members[pid]
+                continue
+            escaped.add(pid)
+            for child in table.descendants(pid):
+                escaped.add(child)
+                members.setdefault(child, table.create_times.get(child))
+        for pid in escaped - runtime.escaped:
+            self.logger.warning(f"'{name}': Prozess {pid} ({table.command_line(pid)}) hat den Prozessbaum verlassen und läuft weiter.")
+        runtime.escaped = escaped
+        per_process = runtime.samples = {}
+        return _sample_process_tree(runtime.psutil_processes, root_pid, current | escaped, per_process)
+
+    @instrumented("_draw_sparkline")
     def _draw_sparkline(self, canvas, history, width, height, draw_value=False, line_width=1):
         canvas.delete("all")
         
@@ -615,131 +4209,218 @@ class BatchManager(tk.Tk):
         self._create_overview_tab()
 
         # Script-specific frames (each in its own tab)
-        for i, (name, data) in enumerate(self.scripts.items()):
-            script_tab = ttk.Frame(self.notebook, padding="10")
-            self.notebook.add(script_tab, text=name)
+        for name, data in self.scripts.items():
+            self._create_script_tab(name, data)
 
-            # Initialize a dictionary for this script's UI widgets
-            self.script_ui_widgets[name] = {}
+        # Removed the duplicate "Manager Log" tab from here.
+        # It is now integrated into the "_create_overview_tab" method.
 
-            # --- Top control part for each script --- 
-            top_script_frame = ttk.Frame(script_tab)
-            top_script_frame.pack(fill=tk.X, side=tk.TOP, pady=(0, 5))
+        self.jobs_tree = None
+        if self.jobs.templates:
+            self._create_jobs_tab()
+        self.history_tree = None
+        if self.history:
+            self._create_history_tab()
+        self.process_tree = None
+        if PSUTIL_AVAILABLE:
+            self._create_processes_tab()
+        self._create_diagnostics_tab()
 
-            # Labels (path, status, PID, CPU) on the left
-            script_labels_frame = ttk.Frame(top_script_frame)
-            script_labels_frame.pack(side=tk.LEFT, fill=tk.X, expand=True)
+    def _create_script_tab(self, name, data):
+        script_tab = ttk.Frame(self.notebook, padding="10")
+        self.notebook.add(script_tab, text=name)
 
-            path_label = ttk.Label(script_labels_frame, text=os.path.basename(data['path']), font=self.DEFAULT_FONT)
-            path_label.pack(side=tk.LEFT, anchor='w')
-            Tooltip(path_label, data['path'])
-            
-            # Status Indicator (LED-like)
-            status_indicator = tk.Canvas(script_labels_frame, width=10, height=10, bg="red", highlightthickness=0)
-            status_indicator.pack(side=tk.LEFT, padx=(5,0), anchor='w')
-            self.script_ui_widgets[name]['status_indicator'] = status_indicator # Store indicator for updates
-
-            status_label = ttk.Label(script_labels_frame, text="Status: Gestoppt", foreground="red", style="Status.TLabel")
-            status_label.pack(side=tk.LEFT, padx=(2,10), anchor='w')
-            self.script_ui_widgets[name]['status_label'] = status_label
-            
-            if PSUTIL_AVAILABLE:
-                pid_label = ttk.Label(script_labels_frame, text="", font=self.DEFAULT_FONT)
-                pid_label.pack(side=tk.LEFT, padx=5, anchor='w')
-                self.script_ui_widgets[name]['pid_label'] = pid_label
-                
-                cpu_label = ttk.Label(script_labels_frame, text="", font=self.DEFAULT_FONT)
-                cpu_label.pack(side=tk.LEFT, padx=5, anchor='w')
-                self.script_ui_widgets[name]['cpu_label'] = cpu_label
-
-                # Sparkline for CPU usage on individual tab (smaller)
-                sparkline_canvas = tk.Canvas(script_labels_frame, width=50, height=15, bg=self.SPARKLINE_BG_COLOR, highlightthickness=1, highlightbackground="lightgray")
-                sparkline_canvas.pack(side=tk.LEFT, padx=5, anchor='w')
-                self.script_ui_widgets[name]['sparkline_canvas'] = sparkline_canvas
-                Tooltip(sparkline_canvas, "CPU-Auslastungsverlauf (letzte 20 Messungen)")
-
-
-            # Buttons (Start, Stop, Restart, Edit, Delete) on the right
-            script_buttons_frame = ttk.Frame(top_script_frame)
-            script_buttons_frame.pack(side=tk.RIGHT)
-
-            start_button = ttk.Button(script_buttons_frame, text=" Start", image=self.icon_play, compound=tk.LEFT, style="Success.TButton", command=lambda n=name: self.start_script(n))
-            start_button.pack(side=tk.LEFT, padx=2)
-            self.script_ui_widgets[name]['start_button'] = start_button
-            Tooltip(start_button, f"Starte '{name}'")
-
-            stop_button = ttk.Button(script_buttons_frame, text=" Stop", image=self.icon_stop, compound=tk.LEFT, style="Danger.TButton", command=lambda n=name: self.stop_script(n), state=tk.DISABLED)
-            stop_button.pack(side=tk.LEFT, padx=2)
-            self.script_ui_widgets[name]['stop_button'] = stop_button
-            Tooltip(stop_button, f"Stoppe '{name}'")
-            
-            restart_button = ttk.Button(script_buttons_frame, text=" Restart", image=self.icon_reload, compound=tk.LEFT, style="TButton", command=lambda n=name: self.restart_script(n), state=tk.DISABLED)
-            restart_button.pack(side=tk.LEFT, padx=2)
-            self.script_ui_widgets[name]['restart_button'] = restart_button
-            Tooltip(restart_button, f"Starte '{name}' neu")
-
-            edit_button = ttk.Button(script_buttons_frame, text=" Edit", image=self.icon_edit, compound=tk.LEFT, style="Secondary.TButton", command=lambda n=name: self.edit_script_dialog(n))
-            edit_button.pack(side=tk.LEFT, padx=2)
-            Tooltip(edit_button, f"Bearbeite die Details von '{name}'")
-
-            delete_button = ttk.Button(script_buttons_frame, text=" Delete", image=self.icon_delete, compound=tk.LEFT, style="Warning.TButton", command=lambda n=name: self.delete_script(n))
-            delete_button.pack(side=tk.LEFT, padx=2)
-            Tooltip(delete_button, f"Lösche '{name}' dauerhaft")
-            
-            # Search/Filter and highlighting controls
-            search_frame = ttk.Frame(script_tab, padding=(0,5))
-            search_frame.pack(fill=tk.X, side=tk.TOP)
-
-            ttk.Label(search_frame, text="Search/Filter:").pack(side=tk.LEFT, padx=(0,5))
-            search_entry = ttk.Entry(search_frame, font=self.DEFAULT_FONT)
-            search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
-            search_entry.bind("<Return>", lambda event, n=name: self.apply_filter_and_highlight(n))
-            self.script_ui_widgets[name]['search_entry'] = search_entry
-
-            search_button = ttk.Button(search_frame, text="Apply", command=lambda n=name: self.apply_filter_and_highlight(n))
-            search_button.pack(side=tk.LEFT, padx=5)
-            
-            clear_search_button = ttk.Button(search_frame, text="Clear Filter", command=lambda n=name: self.clear_filter(n))
-            clear_search_button.pack(side=tk.LEFT)
+        # Initialize a dictionary for this script's UI widgets
+        runtime = self.runtimes[name]
+        widgets = runtime.widgets = {'tab': script_tab}
 
-            # Auto-scroll checkbox
-            autoscroll_checkbox = ttk.Checkbutton(search_frame, text="Auto-scroll", variable=self.autoscroll_vars[name])
-            autoscroll_checkbox.pack(side=tk.RIGHT, padx=10)
-            Tooltip(autoscroll_checkbox, "Automatische Bildlaufleiste am Ende der Ausgabe ein-/ausschalten")
+        # --- Top control part for each script --- 
+        top_script_frame = ttk.Frame(script_tab)
+        top_script_frame.pack(fill=tk.X, side=tk.TOP, pady=(0, 5))
 
+        # Labels (path, status, PID, CPU) on the left
+        script_labels_frame = ttk.Frame(top_script_frame)
+        script_labels_frame.pack(side=tk.LEFT, fill=tk.X, expand=True)
 
-            # Output text area
-            output_frame = ttk.Frame(script_tab)
-            output_frame.pack(fill=tk.BOTH, expand=True, side=tk.BOTTOM, pady=(5,0))
-            
-            output_area = scrolledtext.ScrolledText(output_frame, wrap=tk.WORD, height=10, 
-                                                    bg=self.LOG_BG_COLOR, fg=self.LOG_FG_COLOR, 
-                                                    font=self.actual_monospace_font, insertbackground=self.LOG_FG_COLOR)
-            output_area.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
-            output_area.configure(state='disabled')
-            self.script_ui_widgets[name]['output_widget'] = output_area
-
-            # Configure tags for highlighting
-            output_area.tag_config('error', foreground='red', font=(self.actual_monospace_font[0], self.actual_monospace_font[1], 'bold'))
-            output_area.tag_config('warning', foreground='orange')
-            output_area.tag_config('success', foreground='green') # Adjusted for light background
-            output_area.tag_config('info', foreground='blue')
-            output_area.tag_config('filter_match', background='#404000', foreground='white')
+        path_label = ttk.Label(script_labels_frame, text=os.path.basename(data['path']), font=self.DEFAULT_FONT)
+        path_label.pack(side=tk.LEFT, anchor='w')
+        Tooltip(path_label, data['path'])
+        
+        # Status Indicator (LED-like)
+        status_indicator = tk.Canvas(script_labels_frame, width=10, height=10, bg="red", highlightthickness=0)
+        status_indicator.pack(side=tk.LEFT, padx=(5,0), anchor='w')
+        widgets['status_indicator'] = status_indicator # Store indicator for updates
+
+        status_label = ttk.Label(script_labels_frame, text="Status: Gestoppt", foreground="red", style="Status.TLabel")
+        status_label.pack(side=tk.LEFT, padx=(2,10), anchor='w')
+        widgets['status_label'] = status_label
+
+        if data.get('schedule'):
+            schedule_label = ttk.Label(script_labels_frame, text="", font=self.DEFAULT_FONT)
+            schedule_label.pack(side=tk.LEFT, padx=5, anchor='w')
+            Tooltip(schedule_label, json.dumps(data['schedule'], ensure_ascii=False))
+            widgets['schedule_label'] = schedule_label
+        
+        if PSUTIL_AVAILABLE:
+            pid_label = ttk.Label(script_labels_frame, text="", font=self.DEFAULT_FONT)
+            pid_label.pack(side=tk.LEFT, padx=5, anchor='w')
+            widgets['pid_label'] = pid_label
             
-            # Output controls (Clear, Copy)
-            output_control_frame = ttk.Frame(output_frame, padding=(5, 0))
-            output_control_frame.pack(side=tk.RIGHT, fill=tk.Y)
+            cpu_label = ttk.Label(script_labels_frame, text="", font=self.DEFAULT_FONT)
+            cpu_label.pack(side=tk.LEFT, padx=5, anchor='w')
+            widgets['cpu_label'] = cpu_label
 
-            clear_button = ttk.Button(output_control_frame, text="Clear", command=lambda n=name: self.clear_output(n))
-            clear_button.pack(pady=2, anchor='n')
-            Tooltip(clear_button, "Dieses Ausgabefenster leeren")
+            # Sparkline for CPU usage on individual tab (smaller)
+            sparkline_canvas = tk.Canvas(script_labels_frame, width=50, height=15, bg=self.SPARKLINE_BG_COLOR, highlightthickness=1, highlightbackground="lightgray")
+            sparkline_canvas.pack(side=tk.LEFT, padx=5, anchor='w')
+            widgets['sparkline_canvas'] = sparkline_canvas
+            Tooltip(sparkline_canvas, "CPU-Auslastungsverlauf (letzte 20 Messungen)")
 
-            copy_button = ttk.Button(output_control_frame, text="Copy", command=lambda n=name: self.copy_output(n))
-            copy_button.pack(pady=2, anchor='n')
-            Tooltip(copy_button, "Gesamten Text aus diesem Ausgabefenster kopieren")
 
-        # Removed the duplicate "Manager Log" tab from here.
-        # It is now integrated into the "_create_overview_tab" method.
+        # Buttons (Start, Stop, Restart, Edit, Delete) on the right
+        script_buttons_frame = ttk.Frame(top_script_frame)
+        script_buttons_frame.pack(side=tk.RIGHT)
+
+        if name in self.replica_counts:
+            ttk.Label(script_buttons_frame, text="Replikate:").pack(side=tk.LEFT, padx=(0, 2))
+            replicas_var = tk.StringVar(value=str(self.replica_counts[name]))
+            replicas_spinbox = ttk.Spinbox(script_buttons_frame, from_=1, to=MAX_REPLICAS, width=4, textvariable=replicas_var,
+                                           command=lambda n=name: self._on_replicas_changed(n))
+            replicas_spinbox.pack(side=tk.LEFT, padx=(0, 10))
+            replicas_spinbox.bind("<Return>", lambda event, n=name: self._on_replicas_changed(n))
+            widgets['replicas_var'] = replicas_var
+            Tooltip(replicas_spinbox, "Anzahl der Instanzen dieses Skripts (gilt bis zum Neuladen der Konfiguration)")
+
+        start_button = ttk.Button(script_buttons_frame, text=" Start", image=self.icon_play, compound=tk.LEFT, style="Success.TButton", command=lambda n=name: self.start_script(n))
+        start_button.pack(side=tk.LEFT, padx=2)
+        widgets['start_button'] = start_button
+        Tooltip(start_button, f"Starte '{name}'")
+
+        stop_button = ttk.Button(script_buttons_frame, text=" Stop", image=self.icon_stop, compound=tk.LEFT, style="Danger.TButton", command=lambda n=name: self.stop_script(n), state=tk.DISABLED)
+        stop_button.pack(side=tk.LEFT, padx=2)
+        widgets['stop_button'] = stop_button
+        Tooltip(stop_button, f"Stoppe '{name}'")
+        
+        restart_button = ttk.Button(script_buttons_frame, text=" Restart", image=self.icon_reload, compound=tk.LEFT, style="TButton", command=lambda n=name: self.restart_script(n), state=tk.DISABLED)
+        restart_button.pack(side=tk.LEFT, padx=2)
+        widgets['restart_button'] = restart_button
+        Tooltip(restart_button, f"Starte '{name}' neu")
+
+        definition = data.get('replica_of', name) # Replica instances are edited and deleted through their set
+        edit_button = ttk.Button(script_buttons_frame, text=" Edit", image=self.icon_edit, compound=tk.LEFT, style="Secondary.TButton", command=lambda n=definition: self.edit_script_dialog(n))
+        edit_button.pack(side=tk.LEFT, padx=2)
+        Tooltip(edit_button, f"Bearbeite die Details von '{definition}'")
+
+        delete_button = ttk.Button(script_buttons_frame, text=" Delete", image=self.icon_delete, compound=tk.LEFT, style="Warning.TButton", command=lambda n=definition: self.delete_script(n))
+        delete_button.pack(side=tk.LEFT, padx=2)
+        Tooltip(delete_button, f"Lösche '{definition}' dauerhaft")
+        
+        # Search/Filter and highlighting controls
+        search_frame = ttk.Frame(script_tab, padding=(0,5))
+        search_frame.pack(fill=tk.X, side=tk.TOP)
+
+        ttk.Label(search_frame, text="Search/Filter:").pack(side=tk.LEFT, padx=(0,5))
+        search_entry = ttk.Entry(search_frame, font=self.DEFAULT_FONT)
+        search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        search_entry.bind("<Return>", lambda event, n=name: self.apply_filter_and_highlight(n))
+        widgets['search_entry'] = search_entry
+
+        search_button = ttk.Button(search_frame, text="Apply", command=lambda n=name: self.apply_filter_and_highlight(n))
+        search_button.pack(side=tk.LEFT, padx=5)
+        
+        clear_search_button = ttk.Button(search_frame, text="Clear Filter", command=lambda n=name: self.clear_filter(n))
+        clear_search_button.pack(side=tk.LEFT)
+
+        ttk.Label(search_frame, text="Level:").pack(side=tk.LEFT, padx=(10, 5))
+        level_filter_var = tk.StringVar(value="Alle")
+        level_filter = ttk.Combobox(search_frame, textvariable=level_filter_var, values=list(LEVEL_FILTERS), width=9, state="readonly")
+        level_filter.pack(side=tk.LEFT)
+        level_filter.bind("<<ComboboxSelected>>", lambda event, n=name: self.apply_filter_and_highlight(n))
+        widgets['level_filter_var'] = level_filter_var
+        Tooltip(level_filter, "Nur Zeilen ab diesem Log-Level anzeigen")
+
+        source_filter_var = tk.StringVar(value=ALL_SOURCES)
+        source_filter = ttk.Combobox(search_frame, textvariable=source_filter_var, values=[ALL_SOURCES, STDOUT_SOURCE], width=14, state="readonly")
+        source_filter.bind("<<ComboboxSelected>>", lambda event, n=name: self.apply_filter_and_highlight(n))
+        if self.scripts[name].get('log_files'): # Only useful with more than one stream
+            ttk.Label(search_frame, text="Quelle:").pack(side=tk.LEFT, padx=(10, 5))
+            source_filter.pack(side=tk.LEFT)
+        widgets['source_filter_var'] = source_filter_var
+        widgets['source_filter'] = source_filter
+        Tooltip(source_filter, "Nur Zeilen dieser Quelle anzeigen (Skriptausgabe oder Log-Datei)")
+
+        previous_error_button = ttk.Button(search_frame, text="◀ Fehler", style="Secondary.TButton", command=lambda n=name: self.jump_to_error(n, forward=False))
+        previous_error_button.pack(side=tk.LEFT, padx=(10, 2))
+        Tooltip(previous_error_button, "Zum vorherigen Fehler springen")
+        next_error_button = ttk.Button(search_frame, text="Fehler ▶", style="Secondary.TButton", command=lambda n=name: self.jump_to_error(n, forward=True))
+        next_error_button.pack(side=tk.LEFT, padx=2)
+        Tooltip(next_error_button, "Zum nächsten Fehler springen")
+
+        ttk.Label(search_frame, text="Zeit:").pack(side=tk.LEFT, padx=(10, 5))
+        time_gutter_var = tk.StringVar(value=TIME_GUTTER_MODES[0])
+        time_gutter_mode = ttk.Combobox(search_frame, textvariable=time_gutter_var, values=TIME_GUTTER_MODES, width=8, state="readonly")
+        time_gutter_mode.pack(side=tk.LEFT)
+        time_gutter_mode.bind("<<ComboboxSelected>>", lambda event, n=name: self.toggle_time_gutter(n))
+        widgets['time_gutter_var'] = time_gutter_var
+        Tooltip(time_gutter_mode, "Empfangszeit jeder Zeile oder Abstand zur vorherigen Zeile am Rand anzeigen")
+        jump_time_entry = ttk.Entry(search_frame, width=9, font=self.DEFAULT_FONT)
+        jump_time_entry.pack(side=tk.LEFT, padx=(5, 2))
+        jump_time_entry.bind("<Return>", lambda event, n=name: self.jump_to_time(n))
+        widgets['jump_time_entry'] = jump_time_entry
+        Tooltip(jump_time_entry, "Uhrzeit (HH:MM[:SS]) oder Datum und Uhrzeit (JJJJ-MM-TT HH:MM[:SS]), Enter springt zur ersten Zeile ab diesem Zeitpunkt")
+
+        level_count_label = ttk.Label(search_frame, text="Fehler: 0  Warnungen: 0", font=self.DEFAULT_FONT)
+        level_count_label.pack(side=tk.LEFT, padx=(10, 0))
+        widgets['level_count_label'] = level_count_label
+
+        # Auto-scroll checkbox
+        autoscroll_checkbox = ttk.Checkbutton(search_frame, text="Auto-scroll", variable=runtime.autoscroll_var)
+        autoscroll_checkbox.pack(side=tk.RIGHT, padx=10)
+        Tooltip(autoscroll_checkbox, "Automatische Bildlaufleiste am Ende der Ausgabe ein-/ausschalten")
+
+
+        # Output text area
+        output_frame = ttk.Frame(script_tab)
+        output_frame.pack(fill=tk.BOTH, expand=True, side=tk.BOTTOM, pady=(5,0))
+        
+        output_area = scrolledtext.ScrolledText(output_frame, wrap=tk.WORD, height=10, 
+                                                bg=self.LOG_BG_COLOR, fg=self.LOG_FG_COLOR, 
+                                                font=self.actual_monospace_font, insertbackground=self.LOG_FG_COLOR)
+        output_area.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+        output_area.configure(state='disabled')
+        widgets['output_widget'] = output_area
+        # Ingest times are drawn for the visible lines only, whenever the view moves
+        time_gutter = tk.Canvas(output_frame, bg=self.MAIN_BG_COLOR, highlightthickness=0,
+                                width=int(self.tk.call('font', 'measure', self.actual_monospace_font, "00:00:00.000")) + 8)
+        widgets['time_gutter'] = time_gutter
+        output_area.configure(yscrollcommand=lambda first, last, n=name, bar=output_area.vbar: (bar.set(first, last), self._schedule_time_gutter(n)))
+        output_area.bind("<Configure>", lambda event, n=name: self._schedule_time_gutter(n), add="+")
+
+        # Configure tags for highlighting
+        output_area.tag_config('error', foreground='red', font=(self.actual_monospace_font[0], self.actual_monospace_font[1], 'bold'))
+        output_area.tag_config('warning', foreground='orange')
+        output_area.tag_config('success', foreground='green') # Adjusted for light background
+        output_area.tag_config('info', foreground='blue')
+        output_area.tag_config('filter_match', background='#404000', foreground='white')
+        output_area.tag_config('jump_target', background='#ffe8e8')
+        output_area.tag_config('fold', foreground=self.ACCENT_SECONDARY, underline=True)
+        output_area.tag_bind('fold', '<Button-1>', lambda event, n=name: self._show_fold_details(n, event))
+        
+        # Output controls (Clear, Copy)
+        output_control_frame = ttk.Frame(output_frame, padding=(5, 0))
+        output_control_frame.pack(side=tk.RIGHT, fill=tk.Y)
+
+        clear_button = ttk.Button(output_control_frame, text="Clear", command=lambda n=name: self.clear_output(n))
+        clear_button.pack(pady=2, anchor='n')
+        Tooltip(clear_button, "Dieses Ausgabefenster leeren")
+
+        copy_button = ttk.Button(output_control_frame, text="Copy", command=lambda n=name: self.copy_output(n))
+        copy_button.pack(pady=2, anchor='n')
+        Tooltip(copy_button, "Markierten Text kopieren (ohne Markierung: den sichtbaren Bereich)")
+
+        export_button = ttk.Button(output_control_frame, text="Export", command=lambda n=name: self.export_output_dialog(n))
+        export_button.pack(pady=2, anchor='n')
+        Tooltip(export_button, "Gesamte Ausgabe (optional gefiltert) als Text, gzip oder JSON Lines speichern")
 
     def _create_overview_tab(self):
         overview_tab = ttk.Frame(self.notebook, padding="5")
@@ -780,64 +4461,6 @@ class BatchManager(tk.Tk):
         script_list_container.bind("<Configure>", _on_left_inner_frame_configure)
         left_canvas.bind('<Configure>', _on_left_canvas_resize)
 
-        self.overview_script_widgets = {} # Clear previous widgets
-
-        for name, data in self.scripts.items():
-            script_panel = ttk.Frame(script_list_container, relief="solid", borderwidth=1, padding=(10,5), style="OverviewPanel.TFrame") 
-            script_panel.pack(fill=tk.X, pady=2, expand=True) 
-            
-            script_panel.grid_columnconfigure(0, weight=1)
-            script_panel.grid_columnconfigure(1, weight=0)
-            script_panel.grid_columnconfigure(2, weight=0)
-            script_panel.grid_rowconfigure(0, weight=1)
-
-            # Frame to hold script name, status, PID, CPU
-            text_labels_subframe = ttk.Frame(script_panel, style="OverviewPanel.TFrame") 
-            text_labels_subframe.grid(row=0, column=0, sticky="ew")
-            text_labels_subframe.grid_columnconfigure(0, weight=1) # Name label takes space
-
-            # Row 0: Name and Status
-            name_label = ttk.Label(text_labels_subframe, text=name, style="OverviewScript.TLabel") 
-            name_label.grid(row=0, column=0, sticky='w', padx=(0,10))
-
-            status_indicator = tk.Canvas(text_labels_subframe, width=10, height=10, bg="red", highlightthickness=0)
-            status_indicator.grid(row=0, column=1, padx=(5,0), sticky='w')
-            
-            status_label = ttk.Label(text_labels_subframe, text="Gestoppt", style="OverviewStatus.TLabel") 
-            status_label.grid(row=0, column=2, padx=(2,10), sticky='w')
-
-            # Row 1: PID and CPU
-            info_labels_frame = ttk.Frame(text_labels_subframe, style="OverviewPanel.TFrame")
-            info_labels_frame.grid(row=1, column=0, columnspan=3, sticky="ew", pady=(5,0))
-            
-            pid_label = ttk.Label(info_labels_frame, text="", style="OverviewInfo.TLabel") 
-            pid_label.pack(side=tk.LEFT, padx=(0,10), anchor='w')
-
-            cpu_label = ttk.Label(info_labels_frame, text="", style="OverviewInfo.TLabel") 
-            cpu_label.pack(side=tk.LEFT, padx=5, anchor='w')
-
-            # --- Controls Subframe (Switch, Restart) ---
-            controls_subframe = ttk.Frame(script_panel, style="OverviewPanel.TFrame")
-            controls_subframe.grid(row=0, column=1, sticky="e")
-
-            restart_button = ttk.Button(controls_subframe, text=" Restart", image=self.icon_reload, compound=tk.LEFT, style="TButton", command=lambda n=name: self.restart_script(n))
-            restart_button.pack(side=tk.TOP, pady=2)
-            Tooltip(restart_button, f"'{name}' neu starten")
-
-            toggle_switch = Switch(controls_subframe, variable=self.overview_switch_vars[name], command=lambda n=name: self.toggle_script_from_overview(n))
-            toggle_switch.pack(side=tk.TOP, pady=2)
-
-
-            sparkline_canvas = tk.Canvas(script_panel, width=self.OVERVIEW_SPARKLINE_WIDTH, height=self.OVERVIEW_SPARKLINE_HEIGHT, 
-                                        bg=self.SPARKLINE_BG_COLOR, highlightthickness=1, highlightbackground="lightgray")
-            sparkline_canvas.grid(row=0, column=2, sticky="e", padx=5, pady=2)
-            Tooltip(sparkline_canvas, "CPU-Auslastungsverlauf (letzte 20 Messungen)")
-
-            self.overview_script_widgets[name] = {
-                'script_panel': script_panel, 'status_indicator': status_indicator, 'status_label': status_label,
-                'pid_label': pid_label, 'cpu_label': cpu_label, 'sparkline_canvas': sparkline_canvas, 'toggle_switch': toggle_switch
-            }
-
         # --- Populate Right Pane (Outputs) ---
         right_header = ttk.Label(right_pane, text="Live Outputs", font=(self.DEFAULT_FONT[0], self.DEFAULT_FONT[1]+2, 'bold'), background=self.MAIN_BG_COLOR)
         right_header.pack(pady=(0, 10), anchor='w')
@@ -859,21 +4482,11 @@ class BatchManager(tk.Tk):
         outputs_container.bind("<Configure>", _on_right_inner_frame_configure)
         right_canvas.bind('<Configure>', _on_right_canvas_resize)
         
-        # Create output widgets for each script
+        # Create the control panel and the output widget of each script
+        self.overview_script_list = script_list_container
+        self.overview_outputs_container = outputs_container
         for name in self.scripts:
-            output_panel_frame = ttk.Frame(outputs_container, padding=(0, 5))
-            output_panel_frame.pack(fill=tk.X, expand=True)
-            
-            label = ttk.Label(output_panel_frame, text=name, font=(self.DEFAULT_FONT[0], self.DEFAULT_FONT[1], 'bold'))
-            label.pack(anchor='w')
-            
-            output_area = scrolledtext.ScrolledText(output_panel_frame, wrap=tk.WORD, height=8,
-                                                    bg=self.LOG_BG_COLOR, fg=self.LOG_FG_COLOR, 
-                                                    font=self.actual_monospace_font, insertbackground=self.LOG_FG_COLOR)
-            output_area.pack(fill=tk.BOTH, expand=True, pady=(2, 10))
-            output_area.configure(state='disabled')
-            
-            self.overview_script_widgets[name]['overview_output_widget'] = output_area
+            self._create_overview_panel(name)
 
         # Add Manager Log at the bottom
         log_header = ttk.Label(outputs_container, text="Manager Log", font=(self.DEFAULT_FONT[0], self.DEFAULT_FONT[1]+2, 'bold'), background=self.MAIN_BG_COLOR)
@@ -885,7 +4498,695 @@ class BatchManager(tk.Tk):
         self.manager_log_text.pack(fill=tk.BOTH, expand=True)
         self.manager_log_text.configure(state='disabled')
 
+    def _create_overview_panel(self, name, after=None):
+        """Controls (left column) and live output (right column) of one script; `after`: script whose widgets precede them."""
+        previous = self.runtimes[after].overview_widgets if after is not None else {}
+        script_panel = ttk.Frame(self.overview_script_list, relief="solid", borderwidth=1, padding=(10,5), style="OverviewPanel.TFrame") 
+        if previous:
+            script_panel.pack(fill=tk.X, pady=2, expand=True, after=previous['script_panel'])
+        else:
+            script_panel.pack(fill=tk.X, pady=2, expand=True) 
+        
+        script_panel.grid_columnconfigure(0, weight=1)
+        script_panel.grid_columnconfigure(1, weight=0)
+        script_panel.grid_columnconfigure(2, weight=0)
+        script_panel.grid_rowconfigure(0, weight=1)
+
+        # Frame to hold script name, status, PID, CPU
+        text_labels_subframe = ttk.Frame(script_panel, style="OverviewPanel.TFrame") 
+        text_labels_subframe.grid(row=0, column=0, sticky="ew")
+        text_labels_subframe.grid_columnconfigure(0, weight=1) # Name label takes space
+
+        # Row 0: Name and Status
+        name_label = ttk.Label(text_labels_subframe, text=name, style="OverviewScript.TLabel") 
+        name_label.grid(row=0, column=0, sticky='w', padx=(0,10))
+
+        status_indicator = tk.Canvas(text_labels_subframe, width=10, height=10, bg="red", highlightthickness=0)
+        status_indicator.grid(row=0, column=1, padx=(5,0), sticky='w')
+        
+        status_label = ttk.Label(text_labels_subframe, text="Gestoppt", style="OverviewStatus.TLabel") 
+        status_label.grid(row=0, column=2, padx=(2,10), sticky='w')
+
+        # Row 1: PID and CPU
+        info_labels_frame = ttk.Frame(text_labels_subframe, style="OverviewPanel.TFrame")
+        info_labels_frame.grid(row=1, column=0, columnspan=3, sticky="ew", pady=(5,0))
+        
+        pid_label = ttk.Label(info_labels_frame, text="", style="OverviewInfo.TLabel") 
+        pid_label.pack(side=tk.LEFT, padx=(0,10), anchor='w')
+
+        cpu_label = ttk.Label(info_labels_frame, text="", style="OverviewInfo.TLabel") 
+        cpu_label.pack(side=tk.LEFT, padx=5, anchor='w')
+
+        # --- Controls Subframe (Switch, Restart) ---
+        controls_subframe = ttk.Frame(script_panel, style="OverviewPanel.TFrame")
+        controls_subframe.grid(row=0, column=1, sticky="e")
+
+        restart_button = ttk.Button(controls_subframe, text=" Restart", image=self.icon_reload, compound=tk.LEFT, style="TButton", command=lambda n=name: self.restart_script(n))
+        restart_button.pack(side=tk.TOP, pady=2)
+        Tooltip(restart_button, f"'{name}' neu starten")
+
+        toggle_switch = Switch(controls_subframe, variable=self.runtimes[name].switch_var, command=lambda n=name: self.toggle_script_from_overview(n))
+        toggle_switch.pack(side=tk.TOP, pady=2)
+
+
+        sparkline_canvas = tk.Canvas(script_panel, width=self.OVERVIEW_SPARKLINE_WIDTH, height=self.OVERVIEW_SPARKLINE_HEIGHT, 
+                                    bg=self.SPARKLINE_BG_COLOR, highlightthickness=1, highlightbackground="lightgray")
+        sparkline_canvas.grid(row=0, column=2, sticky="e", padx=5, pady=2)
+        Tooltip(sparkline_canvas, "CPU-Auslastungsverlauf (letzte 20 Messungen)")
+
+        overview_widgets = self.runtimes[name].overview_widgets = {
+            'script_panel': script_panel, 'status_indicator': status_indicator, 'status_label': status_label,
+            'pid_label': pid_label, 'cpu_label': cpu_label, 'sparkline_canvas': sparkline_canvas, 'toggle_switch': toggle_switch
+        }
+
+        output_panel_frame = ttk.Frame(self.overview_outputs_container, padding=(0, 5))
+        if previous:
+            output_panel_frame.pack(fill=tk.X, expand=True, after=previous['output_panel'])
+        else:
+            output_panel_frame.pack(fill=tk.X, expand=True)
+        
+        label = ttk.Label(output_panel_frame, text=name, font=(self.DEFAULT_FONT[0], self.DEFAULT_FONT[1], 'bold'))
+        label.pack(anchor='w')
+        
+        output_area = scrolledtext.ScrolledText(output_panel_frame, wrap=tk.WORD, height=8,
+                                                bg=self.LOG_BG_COLOR, fg=self.LOG_FG_COLOR, 
+                                                font=self.actual_monospace_font, insertbackground=self.LOG_FG_COLOR)
+        output_area.pack(fill=tk.BOTH, expand=True, pady=(2, 10))
+        output_area.configure(state='disabled')
+        output_area.tag_config('fold', foreground=self.ACCENT_SECONDARY)
+        
+        overview_widgets['overview_output_widget'] = output_area
+        overview_widgets['output_panel'] = output_panel_frame
+
+    def _add_script_widgets(self, name):
+        """Tab and overview widgets of a script added at runtime, placed after the script before it."""
+        names = list(self.scripts)
+        previous = names[names.index(name) - 1]
+        self._create_script_tab(name, self.scripts[name])
+        self.notebook.insert(self.notebook.index(self.runtimes[previous].widgets['tab']) + 1, self.runtimes[name].widgets['tab'])
+        self._create_overview_panel(name, after=previous)
+
+    def _remove_script_widgets(self, name):
+        runtime = self.runtimes[name]
+        if runtime.widgets:
+            runtime.widgets['tab'].destroy()
+        if runtime.overview_widgets:
+            runtime.overview_widgets['script_panel'].destroy()
+            runtime.overview_widgets['output_panel'].destroy()
+        runtime.widgets, runtime.overview_widgets = {}, {}
+        self.time_gutter_pending.discard(name)
+
+    def _history_path(self):
+        path = self.settings.get('history_db', DEFAULT_HISTORY_DB)
+        if path and not os.path.isabs(path):
+            path = os.path.join(os.path.dirname(self.full_config_path), path)
+        return path
+
+    def _open_history(self):
+        """Opens the run history (again, if 'history_db' changed); the database stays open across reloads."""
+        path = self._history_path()
+        if self.history and self.history.path == path:
+            return
+        if self.history:
+            self.history.stop()
+            self.history = None
+        if not path:
+            return
+        try:
+            self.history = RunHistory(path, self.logger)
+            self.history.start()
+        except sqlite3.Error as e:
+            self.logger.error(f"Verlaufsdatenbank '{path}' konnte nicht geöffnet werden: {e}")
+
+    def _record_run_end(self, name, exit_code):
+        runtime = self.runtimes[name]
+        run, runtime.run = runtime.run, None
+        if run is None:
+            return
+        run.finish(exit_code, self.metrics.script(name))
+        if self.history:
+            self.history.record(run)
+
+    def _load_resource_limits(self, names=None):
+        limits = {}
+        for name in self.scripts if names is None else names:
+            data = self.scripts[name]
+            if not data.get('limits'):
+                continue
+            try:
+                limits[name] = ResourceLimits(data['limits'])
+            except (ValueError, TypeError, KeyError, AttributeError) as e:
+                self.logger.error(f"Ressourcen-Limits für '{name}' sind ungültig und werden ignoriert: {e}")
+                continue
+            if limits[name].watched and not PSUTIL_AVAILABLE:
+                self.logger.warning(f"'{name}': max_rss_mb/max_cpu_percent werden ohne psutil nicht überwacht.")
+        return limits
+
+    def _check_resource_limits(self, name, cpu, rss):
+        """Watchdog step, called with every CPU/RAM sample of a running script."""
+        limits = self.resource_limits.get(name)
+        if limits is None or not limits.watched:
+            return
+        reasons = []
+        if limits.max_rss is not None and rss > limits.max_rss:
+            reasons.append(f"RAM {_format_bytes(rss)} > {_format_bytes(limits.max_rss)}")
+        if limits.max_cpu_percent is not None and cpu > limits.max_cpu_percent:
+            reasons.append(f"CPU {cpu:.0f}% > {limits.max_cpu_percent:.0f}%")
+        runtime = self.runtimes[name]
+        breach = runtime.breach
+        if not reasons:
+            if breach is not None:
+                runtime.breach = None
+                if breach[2]:
+                    self._set_tree_priority(name, limits.priority if limits.priority is not None else 'normal')
+                self.logger.info(f"'{name}' ist wieder innerhalb der Ressourcen-Limits.")
+            return
+        now = time.monotonic()
+        if breach is None:
+            breach = runtime.breach = [now, False, False]
+        if breach[1] or now - breach[0] < limits.breach_seconds:
+            return
+        breach[1] = True # Act once per breach episode
+        message = f"'{name}' überschreitet seine Ressourcen-Limits ({', '.join(reasons)}), Aktion: {limits.on_breach}."
+        self.logger.warning(message)
+        self._send_notification(f"Ressourcen-Limit: {name}", message, "limit_exceeded", "warning", name)
+        if limits.on_breach == "throttle":
+            breach[2] = self._set_tree_priority(name, 'idle')
+        elif limits.on_breach == "restart":
+            runtime.breach = None
+            self.restart_script(name)
+        elif limits.on_breach == "kill":
+            runtime.breach = None
+            self.stop_script(name)
+
+    def _new_memory_trend(self, name):
+        """MemoryTrend for a new run from the global "memory_trend" merged with the script's own (false disables it)."""
+        config = self.scripts[name].get('memory_trend', {})
+        defaults = self.settings.get('memory_trend', {})
+        if config is False or defaults is False or not PSUTIL_AVAILABLE:
+            return None
+        try:
+            return MemoryTrend({**defaults, **config})
+        except (ValueError, TypeError, AttributeError) as e:
+            self.logger.error(f"Speichertrend für '{name}' ist ungültig und wird ignoriert: {e}")
+            return None
 
+    def _check_memory_trend(self, name, rss):
+        """Leak watch, called with every RAM sample; the fit is evaluated once per completed minute."""
+        trend = self.runtimes[name].memory_trend
+        if trend is None or not trend.add(time.time(), rss):
+            return
+        if not trend.suspected and trend.growing():
+            trend.suspected = True
+            message = (f"'{name}': Verdacht auf Speicherleck, RAM wächst seit {trend.span_hours:.1f} Stunden um "
+                       f"{trend.slope():+.0f} MB/Stunde (R² {trend.r2():.2f}).")
+            if trend.restart_window is not None:
+                trend.restart_pending = True
+                start, end = trend.restart_window
+                message += f" Neustart im Wartungsfenster {start // 60:02d}:{start % 60:02d}-{end // 60:02d}:{end % 60:02d}."
+            self.logger.warning(message)
+            self._send_notification(f"Speicherleck-Verdacht: {name}", message, "memory_leak", "warning", name)
+        elif trend.suspected and trend.slope() < trend.growth_mb_per_hour / 2:
+            trend.suspected = trend.restart_pending = False
+            self.logger.info(f"'{name}': RAM wächst nicht mehr ({trend.slope():+.0f} MB/Stunde), Speicherleck-Verdacht aufgehoben.")
+        if trend.restart_pending and in_time_window(trend.restart_window, datetime.datetime.now()):
+            trend.restart_pending = False
+            self.logger.info(f"'{name}': Neustart wegen Speicherleck-Verdacht im Wartungsfenster.")
+            self.restart_script(name) # The new run starts with a fresh trend
+
+    def _set_tree_priority(self, name, priority):
+        """Sets the priority of every process in the script's tree; returns whether any call succeeded."""
+        changed = False
+        for pid in list(self.runtimes[name].psutil_processes):
+            try:
+                set_process_priority(pid, priority)
+                changed = True
+            except (OSError, ValueError, psutil.Error) as e:
+                self.logger.warning(f"Priorität von PID {pid} ('{name}') nicht geändert: {e}")
+        return changed
+
+    def _load_alert_rules(self, names=None):
+        """Builds the alert state per script from the global "alert_rules" and the script's own "alerts"."""
+        def parse(configs, origin):
+            rules = {}
+            for config in configs or ():
+                try:
+                    rule = AlertRule(config)
+                except (ValueError, TypeError, KeyError) as e:
+                    self.logger.error(f"Alarmregel {origin} ist ungültig und wird ignoriert: {e}")
+                    continue
+                rules[rule.name] = rule
+            return rules
+
+        global_rules = parse(self.settings.get('alert_rules'), "(global)")
+        alerts = {}
+        for name in self.scripts if names is None else names:
+            data = self.scripts[name]
+            rules = {**global_rules, **parse(data.get('alerts'), f"von '{name}'")} # Script rules override global ones of the same name
+            if rules:
+                alerts[name] = ScriptAlerts(list(rules.values()))
+        return alerts
+
+    def _fire_alerts(self, name, fired):
+        """Runs the actions of alert rules that fired on a line of the script (UI thread)."""
+        running = self.is_running(name)
+        for rule, count in fired:
+            message = f"Alarmregel '{rule.name}' für '{name}' ausgelöst ({count} Treffer"
+            message += f" in {rule.window_seconds:g} s)." if rule.threshold > 1 else ")."
+            self.logger.warning(message)
+            if "notify" in rule.actions:
+                self._send_notification(f"Alarm: {rule.name} ({name})", message, "alert", rule.severity, name)
+            if running and "restart" in rule.actions:
+                self.restart_script(name)
+                running = False # One restart/stop per batch of fired rules
+            elif running and "stop" in rule.actions:
+                self.stop_script(name)
+                running = False
+
+    def _create_jobs_tab(self):
+        jobs_tab = ttk.Frame(self.notebook, padding="10")
+        self.notebook.add(jobs_tab, text="Jobs")
+
+        submit_frame = ttk.Frame(jobs_tab)
+        submit_frame.pack(fill=tk.X, pady=(0, 5))
+
+        ttk.Label(submit_frame, text="Vorlage:", font=self.DEFAULT_FONT).pack(side=tk.LEFT)
+        self.job_template_var = tk.StringVar(value=next(iter(self.jobs.templates)))
+        template_box = ttk.Combobox(submit_frame, textvariable=self.job_template_var, values=list(self.jobs.templates),
+                                    state="readonly", width=20)
+        template_box.pack(side=tk.LEFT, padx=(5, 10))
+
+        ttk.Label(submit_frame, text="Parameter:", font=self.DEFAULT_FONT).pack(side=tk.LEFT)
+        self.job_params_entry = ttk.Entry(submit_frame, width=40)
+        self.job_params_entry.pack(side=tk.LEFT, padx=(5, 10))
+        Tooltip(self.job_params_entry, "name=wert, durch Leerzeichen getrennt (Werte mit Leerzeichen in Anführungszeichen)")
+
+        ttk.Label(submit_frame, text="Priorität:", font=self.DEFAULT_FONT).pack(side=tk.LEFT)
+        self.job_priority_var = tk.StringVar(value="")
+        priority_spinbox = ttk.Spinbox(submit_frame, from_=-100, to=100, width=5, textvariable=self.job_priority_var)
+        priority_spinbox.pack(side=tk.LEFT, padx=(5, 10))
+        Tooltip(priority_spinbox, "Höhere Priorität läuft zuerst; leer = Wert der Vorlage")
+
+        submit_button = ttk.Button(submit_frame, text="Einreihen", style="Success.TButton", command=self.submit_job_from_ui)
+        submit_button.pack(side=tk.LEFT, padx=5)
+        files_button = ttk.Button(submit_frame, text="Dateien einreihen...", command=self.submit_job_files)
+        files_button.pack(side=tk.LEFT, padx=5)
+        Tooltip(files_button, "Einen Job pro ausgewählter Datei einreihen (Parameter 'file')")
+        cancel_button = ttk.Button(submit_frame, text="Abbrechen", style="Danger.TButton", command=self.cancel_selected_jobs)
+        cancel_button.pack(side=tk.LEFT, padx=5)
+        Tooltip(cancel_button, "Ausgewählte Jobs abbrechen")
+
+        self.jobs_summary_label = ttk.Label(jobs_tab, text="", font=self.DEFAULT_FONT)
+        self.jobs_summary_label.pack(anchor='w', pady=(0, 5))
+
+        columns = ("template", "state", "priority", "attempts", "exit_code", "wait", "duration", "params")
+        headings = ("Vorlage", "Status", "Prio", "Versuche", "Exit-Code", "Wartezeit (s)", "Dauer (s)", "Parameter")
+        widths = (140, 110, 50, 70, 70, 90, 80, 300)
+        self.jobs_tree = ttk.Treeview(jobs_tab, columns=columns, height=12)
+        self.jobs_tree.heading("#0", text="Job")
+        self.jobs_tree.column("#0", width=70)
+        for column, heading, width in zip(columns, headings, widths):
+            self.jobs_tree.heading(column, text=heading)
+            self.jobs_tree.column(column, width=width, anchor="w" if column in ("template", "state", "params") else "e")
+        self.jobs_tree.pack(fill=tk.X, pady=(0, 5))
+        self.jobs_tree.bind("<<TreeviewSelect>>", lambda event: self._show_job_output())
+
+        ttk.Label(jobs_tab, text="Ausgabe des ausgewählten Jobs", font=(self.DEFAULT_FONT[0], self.DEFAULT_FONT[1], 'bold')).pack(anchor='w', pady=(5, 2))
+        self.job_output_text = scrolledtext.ScrolledText(jobs_tab, wrap=tk.WORD, height=12,
+                                                         bg=self.LOG_BG_COLOR, fg=self.LOG_FG_COLOR,
+                                                         font=self.actual_monospace_font)
+        self.job_output_text.pack(fill=tk.BOTH, expand=True)
+        self.job_output_text.configure(state='disabled')
+
+        # Rebuilt widgets start empty: show every job once, later refreshes only touch changed rows
+        for job in list(self.jobs.jobs.values()):
+            self._update_job_row(job)
+
+    def _update_job_row(self, job):
+        now = time.time()
+        wait = (job.started or now) - job.submitted
+        duration = ((job.finished or now) - job.started) if job.started else None
+        state = JOB_STATE_LABELS.get(job.state, job.state)
+        if job.error:
+            state += f" ({job.error})"
+        values = (job.template.name, state, job.priority, job.attempts, "" if job.exit_code is None else job.exit_code,
+                  f"{wait:.1f}", "" if duration is None else f"{duration:.1f}",
+                  " ".join(f"{key}={value}" for key, value in job.params.items()))
+        iid = str(job.id)
+        if self.jobs_tree.exists(iid):
+            self.jobs_tree.item(iid, values=values)
+        else:
+            self.jobs_tree.insert("", tk.END, iid=iid, text=f"#{job.id}", values=values)
+
+    def refresh_jobs(self):
+        changed, removed = self.jobs.drain_changes()
+        try:
+            if self.jobs_tree is not None:
+                for job_id in removed:
+                    if self.jobs_tree.exists(str(job_id)):
+                        self.jobs_tree.delete(str(job_id))
+                for job in changed:
+                    self._update_job_row(job)
+                for iid in self.jobs_tree.selection(): # Running jobs: keep duration and output current
+                    job = self.jobs.jobs.get(int(iid))
+                    if job is not None and job.state == 'running':
+                        self._update_job_row(job)
+                        self._show_job_output()
+                self.jobs_summary_label.config(text=_format_job_stats(self.jobs.stats()))
+        except tk.TclError:
+            pass # Widgets are being rebuilt by _reload_ui
+        self.instrumentation.schedule(self, 1000, self.refresh_jobs)
+
+    def _show_job_output(self):
+        selection = self.jobs_tree.selection()
+        job = self.jobs.jobs.get(int(selection[0])) if selection else None
+        self.job_output_text.configure(state='normal')
+        self.job_output_text.delete('1.0', tk.END)
+        if job is not None:
+            self.job_output_text.insert('1.0', ''.join(job.output))
+            self.job_output_text.see(tk.END)
+        self.job_output_text.configure(state='disabled')
+
+    def submit_job_from_ui(self):
+        try:
+            params = parse_job_params(shlex.split(self.job_params_entry.get()))
+            priority = self.job_priority_var.get().strip()
+            job = self.jobs.submit(self.job_template_var.get(), params, int(priority) if priority else None)
+        except ValueError as e:
+            messagebox.showerror("Fehler", str(e), parent=self)
+            return
+        self.logger.info(f"Job #{job.id} ({job.template.name}) eingereiht.")
+
+    def submit_job_files(self):
+        paths = filedialog.askopenfilenames(title="Dateien für Jobs auswählen", parent=self)
+        if not paths:
+            return
+        try:
+            base_params = parse_job_params(shlex.split(self.job_params_entry.get()))
+            priority = self.job_priority_var.get().strip()
+            for path in paths:
+                self.jobs.submit(self.job_template_var.get(), {**base_params, 'file': path}, int(priority) if priority else None)
+        except ValueError as e:
+            messagebox.showerror("Fehler", str(e), parent=self)
+            return
+        self.logger.info(f"{len(paths)} Jobs ({self.job_template_var.get()}) eingereiht.")
+
+    def cancel_selected_jobs(self):
+        for iid in self.jobs_tree.selection():
+            if self.jobs.cancel(int(iid)):
+                self.logger.info(f"Job #{iid} abgebrochen.")
+
+    def _create_history_tab(self):
+        history_tab = ttk.Frame(self.notebook, padding="10")
+        self.notebook.add(history_tab, text="History")
+
+        filter_frame = ttk.Frame(history_tab)
+        filter_frame.pack(fill=tk.X, pady=(0, 5))
+
+        ttk.Label(filter_frame, text="Skript:", font=self.DEFAULT_FONT).pack(side=tk.LEFT)
+        self.history_script_var = tk.StringVar(value="Alle")
+        ttk.Combobox(filter_frame, textvariable=self.history_script_var, values=["Alle"] + list(self.scripts),
+                     state="readonly", width=25).pack(side=tk.LEFT, padx=(5, 10))
+
+        ttk.Label(filter_frame, text="Zeitraum:", font=self.DEFAULT_FONT).pack(side=tk.LEFT)
+        self.history_range_var = tk.StringVar(value="7 Tage")
+        ttk.Combobox(filter_frame, textvariable=self.history_range_var, values=list(self.HISTORY_RANGES),
+                     state="readonly", width=10).pack(side=tk.LEFT, padx=(5, 10))
+
+        self.history_failures_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(filter_frame, text="Nur Fehler", variable=self.history_failures_var).pack(side=tk.LEFT, padx=(0, 10))
+
+        refresh_button = ttk.Button(filter_frame, text="Aktualisieren", command=self.refresh_history)
+        refresh_button.pack(side=tk.LEFT, padx=5)
+        for variable in (self.history_script_var, self.history_range_var, self.history_failures_var):
+            variable.trace_add("write", lambda *args: self.refresh_history())
+
+        columns = ("runs", "failures", "avg", "max", "last")
+        headings = ("Läufe", "Fehler", "Ø Laufzeit (s)", "Max. Laufzeit (s)", "Letzter Start")
+        self.history_stats_tree = ttk.Treeview(history_tab, columns=columns, height=6)
+        self.history_stats_tree.heading("#0", text="Skript")
+        self.history_stats_tree.column("#0", width=220)
+        for column, heading in zip(columns, headings):
+            self.history_stats_tree.heading(column, text=heading)
+            self.history_stats_tree.column(column, width=110, anchor="e")
+        self.history_stats_tree.pack(fill=tk.X, pady=(0, 5))
+
+        columns = ("script", "started", "runtime", "exit_code", "pid", "peak_cpu", "peak_rss", "lines")
+        headings = ("Skript", "Start", "Laufzeit (s)", "Exit-Code", "PID", "Max. CPU %", "Max. RAM", "Zeilen")
+        self.history_tree = ttk.Treeview(history_tab, columns=columns, show="headings", height=14)
+        for column, heading in zip(columns, headings):
+            self.history_tree.heading(column, text=heading)
+            self.history_tree.column(column, width=180 if column in ("script", "started") else 90,
+                                     anchor="w" if column in ("script", "started") else "e")
+        self.history_tree.pack(fill=tk.BOTH, expand=True)
+        self.history_tree.tag_configure('failed', foreground="darkred")
+        history_tab.bind("<Map>", lambda event: self.refresh_history()) # Re-query whenever the tab is shown
+
+    def _create_processes_tab(self):
+        processes_tab = ttk.Frame(self.notebook, padding="10")
+        self.notebook.add(processes_tab, text="Prozesse")
+
+        button_frame = ttk.Frame(processes_tab)
+        button_frame.pack(fill=tk.X, pady=(0, 5))
+        kill_button = ttk.Button(button_frame, text="Prozess beenden", style="Warning.TButton", command=self.kill_selected_process)
+        kill_button.pack(side=tk.LEFT)
+        Tooltip(kill_button, "Beendet nur den ausgewählten Prozess (ein Skript selbst wird über Stop beendet)")
+        ttk.Label(button_frame, text="Gelb: Prozesse, die den Baum ihres Skripts verlassen haben", font=self.DEFAULT_FONT).pack(side=tk.LEFT, padx=10)
+
+        columns = ("pid", "cpu", "rss", "uptime", "command")
+        headings = ("PID", "CPU %", "RAM", "Laufzeit", "Befehlszeile")
+        self.process_tree = ttk.Treeview(processes_tab, columns=columns, height=20)
+        self.process_tree.heading("#0", text="Skript / Prozess")
+        self.process_tree.column("#0", width=220)
+        for column, heading in zip(columns, headings):
+            self.process_tree.heading(column, text=heading)
+            self.process_tree.column(column, width=500 if column == "command" else 80, anchor="w" if column == "command" else "e")
+        self.process_tree.pack(fill=tk.BOTH, expand=True)
+        self.process_tree.tag_configure('script', font=(self.DEFAULT_FONT[0], self.DEFAULT_FONT[1], 'bold'))
+        self.process_tree.tag_configure('escaped', background="#fff3cd")
+        self.process_tree_items = {} # item id -> (parent item, text, values, tags) as last sent to Tk
+        processes_tab.bind("<Map>", lambda event: self._refresh_process_tree())
+
+    def _refresh_process_tree(self):
+        """
+        Mirrors the sampled process trees into the Prozesse tab, sending Tk only what
+        changed since the last sample: new and vanished processes, moves and new values.
+        """
+        table = self.process_table
+        now = time.time()
+        wanted = {} # Parents before children, so inserts always find their parent
+        shown = {name: runtime for name, runtime in self.runtimes.items()
+                 if runtime.process is not None and runtime.process.pid in runtime.samples}
+        for set_name, count in self.replica_counts.items(): # One aggregated row per replica set
+            instances = [shown[name] for name in self._replica_names(set_name) if name in shown]
+            if instances:
+                set_cpu = sum(runtime.last_sample[0] for runtime in instances)
+                set_rss = sum(runtime.last_sample[1] for runtime in instances)
+                wanted[f"replicas:{set_name}"] = ("", f"{set_name} ({len(instances)}/{count} laufen)",
+                                                  ("", f"{set_cpu:.1f}", _format_bytes(set_rss), "", ""), ('script',))
+        for name, runtime in shown.items():
+            samples = runtime.samples
+            process = runtime.process
+            script_item = f"script:{name}"
+            set_name = self.scripts.get(name, {}).get('replica_of', name)
+            total_cpu, total_rss = runtime.last_sample
+            wanted[script_item] = (f"replicas:{set_name}" if set_name in self.replica_counts else "", name,
+                                   ("", f"{total_cpu:.1f}", _format_bytes(total_rss), "", ""), ('script',))
+            escaped = runtime.escaped
+            escaped_item = f"escaped:{name}"
+            if escaped:
+                wanted[escaped_item] = (script_item, "Entkommen", ("", "", "", "", ""), ('escaped',))
+            pending = [process.pid] + [pid for pid in escaped if table.parents.get(pid) not in escaped]
+            while pending:
+                pid = pending.pop()
+                if pid not in samples:
+                    continue
+                parent_pid = table.parents.get(pid)
+                if pid == process.pid:
+                    parent = script_item
+                elif pid in escaped and parent_pid not in escaped:
+                    parent = escaped_item
+                else:
+                    parent = f"{name}:{parent_pid}"
+                cpu, rss = samples[pid]
+                created = table.create_times.get(pid)
+                process_name, command_line = table.describe(pid)
+                wanted[f"{name}:{pid}"] = (
+                    parent, process_name,
+                    (pid, f"{cpu:.1f}", _format_bytes(rss), _format_uptime(now - created) if created else "", command_line),
+                    ('escaped',) if pid in escaped else ()
+                )
+                pending.extend(table.children.get(pid, ()))
+        tree = self.process_tree
+        previous = self.process_tree_items
+        for item, (parent, text, values, tags) in wanted.items():
+            old = previous.get(item)
+            if old is None:
+                tree.insert(parent, tk.END, iid=item, text=text, values=values, tags=tags, open=True)
+            elif old != (parent, text, values, tags):
+                if old[0] != parent:
+                    tree.move(item, parent, tk.END)
+                tree.item(item, text=text, values=values, tags=tags)
+        for item in previous.keys() - wanted.keys():
+            if tree.exists(item):
+                tree.delete(item)
+        self.process_tree_items = wanted
+
+    def kill_selected_process(self):
+        """Kills the process selected in the Prozesse tab after a confirmation; scripts are stopped normally."""
+        selection = self.process_tree.selection()
+        if not selection or selection[0].startswith(("script:", "escaped:", "replicas:")):
+            return
+        name, pid = selection[0].rsplit(":", 1)
+        pid = int(pid)
+        runtime = self.runtimes.get(name)
+        if runtime is not None and runtime.process is not None and runtime.process.pid == pid:
+            self.stop_script(name)
+            return
+        command_line = self.process_table.command_line(pid)
+        if not messagebox.askyesno("Prozess beenden", f"Prozess {pid} von '{name}' beenden?\n\n{command_line}", parent=self):
+            return
+        try:
+            target = psutil.Process(pid)
+            if target.create_time() != self.process_table.create_times.get(pid):
+                raise psutil.NoSuchProcess(pid) # The PID now belongs to another process
+            target.kill()
+            self.logger.info(f"Prozess {pid} von '{name}' beendet ({command_line}).")
+        except psutil.NoSuchProcess:
+            self.logger.info(f"Prozess {pid} von '{name}' läuft nicht mehr.")
+        except psutil.Error as e:
+            self.logger.error(f"Prozess {pid} von '{name}' konnte nicht beendet werden: {e}")
+            messagebox.showerror("Fehler", f"Prozess {pid} konnte nicht beendet werden: {e}", parent=self)
+
+    def refresh_history(self):
+        """Re-runs the history queries for the current filters (newest 500 runs plus per-script figures)."""
+        if self.history_tree is None:
+            return
+        script = self.history_script_var.get()
+        script = None if script == "Alle" else script
+        days = self.HISTORY_RANGES.get(self.history_range_var.get())
+        since = time.time() - days * 86400 if days else None
+        try:
+            runs = self.history.runs(script, since, self.history_failures_var.get())
+            stats = self.history.script_stats(since)
+        except sqlite3.Error as e:
+            self.logger.error(f"Verlauf konnte nicht abgefragt werden: {e}")
+            return
+        self.history_stats_tree.delete(*self.history_stats_tree.get_children())
+        for row in stats:
+            if script and row['script'] != script:
+                continue
+            self.history_stats_tree.insert("", tk.END, text=row['script'], values=(
+                row['runs'], row['failures'], f"{row['avg_runtime']:.1f}", f"{row['max_runtime']:.1f}",
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row['last_started']))))
+        self.history_tree.delete(*self.history_tree.get_children())
+        for run in runs:
+            failed = run['exit_code'] not in (None, 0)
+            self.history_tree.insert("", tk.END, tags=('failed',) if failed else (), values=(
+                run['script'], time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run['started'])),
+                f"{run['ended'] - run['started']:.1f}", "" if run['exit_code'] is None else run['exit_code'], run['pid'],
+                f"{run['peak_cpu']:.1f}" if run['peak_cpu'] else "", _format_bytes(run['peak_rss']) if run['peak_rss'] else "",
+                run['output_lines']))
+
+    def _create_diagnostics_tab(self):
+        diagnostics_tab = ttk.Frame(self.notebook, padding="10")
+        self.notebook.add(diagnostics_tab, text="Diagnostics")
+
+        controls_frame = ttk.Frame(diagnostics_tab)
+        controls_frame.pack(fill=tk.X, pady=(0, 5))
+
+        self.profiler_button = ttk.Button(controls_frame, text="Profiler starten", style="Secondary.TButton", command=self.toggle_profiler)
+        self.profiler_button.pack(side=tk.LEFT, padx=(0, 5))
+        Tooltip(self.profiler_button, "Sampling-Profiler für den UI-Thread ein-/ausschalten")
+
+        export_button = ttk.Button(controls_frame, text="JSON exportieren", command=self.export_diagnostics_json)
+        export_button.pack(side=tk.LEFT, padx=5)
+        Tooltip(export_button, "Alle Diagnosedaten als JSON-Datei speichern")
+
+        self.diagnostics_summary_label = ttk.Label(controls_frame, text="", font=self.DEFAULT_FONT)
+        self.diagnostics_summary_label.pack(side=tk.LEFT, padx=(15, 0))
+
+        columns = ("count", "mean", "p50", "p95", "p99", "max", "total")
+        headings = ("Aufrufe", "Mittel (ms)", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Max (ms)", "Gesamt (s)")
+        self.diagnostics_tree = ttk.Treeview(diagnostics_tab, columns=columns, height=10)
+        self.diagnostics_tree.heading("#0", text="Hot Path / Callback")
+        self.diagnostics_tree.column("#0", width=260)
+        for column, heading in zip(columns, headings):
+            self.diagnostics_tree.heading(column, text=heading)
+            self.diagnostics_tree.column(column, width=90, anchor="e")
+        self.diagnostics_tree.pack(fill=tk.X, pady=(0, 5))
+        self.diagnostics_tree.insert("", tk.END, iid="timings", text="Laufzeit pro Aufruf", open=True)
+        self.diagnostics_tree.insert("", tk.END, iid="after_lag", text="after()-Verspätung", open=True)
+
+        ttk.Label(diagnostics_tab, text="Profiler (Top-Funktionen im UI-Thread)", font=(self.DEFAULT_FONT[0], self.DEFAULT_FONT[1], 'bold')).pack(anchor='w', pady=(5, 2))
+        self.profiler_text = scrolledtext.ScrolledText(diagnostics_tab, wrap=tk.NONE, height=12,
+                                                       bg=self.LOG_BG_COLOR, fg=self.LOG_FG_COLOR,
+                                                       font=self.actual_monospace_font)
+        self.profiler_text.pack(fill=tk.BOTH, expand=True)
+        self.profiler_text.configure(state='disabled')
+
+    def refresh_diagnostics(self):
+        instrumentation = self.instrumentation
+        instrumentation.sample_rates()
+        try:
+            tree = self.diagnostics_tree
+            for parent, histograms in (("timings", instrumentation.timings), ("after_lag", instrumentation.after_lag)):
+                for path, histogram in list(histograms.items()):
+                    data = histogram.snapshot()
+                    values = (data['count'], data['mean_ms'], data['p50_ms'], data['p95_ms'], data['p99_ms'], data['max_ms'], data['total_s'])
+                    iid = f"{parent}:{path}"
+                    if tree.exists(iid):
+                        tree.item(iid, values=values)
+                    else:
+                        tree.insert(parent, tk.END, iid=iid, text=path, values=values)
+
+            gauges = instrumentation.gauges
+            output_depth, output_max = gauges.get('output_queue', (0, 0))
+            log_depth, log_max = gauges.get('log_queue', (0, 0))
+            lines_per_second = instrumentation.rates().get('output_lines', 0.0)
+            self.diagnostics_summary_label.config(
+                text=f"Output-Queue: {output_depth} (max {output_max})   Log-Queue: {log_depth} (max {log_max})   Zeilen/s: {lines_per_second:.1f}")
+
+            profiler = instrumentation.profiler
+            if profiler.running or profiler.sample_count:
+                rows = [f"{'Self':>7} {'Kumuliert':>10}  Funktion  ({profiler.sample_count} Samples à {profiler.interval * 1000:.0f} ms)"]
+                for function, own, cumulative in profiler.top(40):
+                    rows.append(f"{own / profiler.sample_count:>7.1%} {cumulative / profiler.sample_count:>10.1%}  {function}")
+                self.profiler_text.configure(state='normal')
+                self.profiler_text.delete('1.0', tk.END)
+                self.profiler_text.insert('1.0', "\n".join(rows))
+                self.profiler_text.configure(state='disabled')
+        except tk.TclError:
+            pass # Widgets are being rebuilt by _reload_ui
+        instrumentation.schedule(self, 1000, self.refresh_diagnostics)
+
+    def toggle_profiler(self):
+        profiler = self.instrumentation.profiler
+        if profiler.running:
+            profiler.stop()
+            self.profiler_button.config(text="Profiler starten")
+            self.logger.info(f"Profiler gestoppt ({profiler.sample_count} Samples).")
+        else:
+            profiler.start()
+            self.profiler_button.config(text="Profiler stoppen")
+            self.logger.info("Profiler gestartet.")
+
+    def export_diagnostics_json(self):
+        path = filedialog.asksaveasfilename(
+            title="Diagnosedaten speichern",
+            defaultextension=".json",
+            initialfile=f"diagnostics_{time.strftime('%Y%m%d_%H%M%S')}.json",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.instrumentation.snapshot(), f, indent=2)
+            self.logger.info(f"Diagnosedaten gespeichert: {path}")
+        except Exception as e:
+            self.logger.error(f"Fehler beim Speichern der Diagnosedaten: {e}")
+            messagebox.showerror("Fehler", f"Diagnosedaten konnten nicht gespeichert werden: {e}")
 
     def _on_autostart_toggle(self):
         self.logger.info(f"Autostart-Einstellung auf {self.autostart_enabled_var.get()} geändert.")
@@ -907,169 +5208,464 @@ class BatchManager(tk.Tk):
             self.delay_entry.delete(0, tk.END)
             self.delay_entry.insert(0, str(self.global_start_delay))
 
-    def process_log_queue(self):
-        while not self.log_queue.empty():
-            try:
-                record = self.log_queue.get_nowait()
-                msg = self.log_formatter.format(record) # Use the stored formatter
-                
-                self.manager_log_text.configure(state='normal')
-                self.manager_log_text.insert(tk.END, msg + '\n')
-                self.manager_log_text.see(tk.END)
-                self.manager_log_text.configure(state='disabled')
-            except queue.Empty:
-                pass
-        self.after(100, self.process_log_queue)
+    @instrumented("process_log_queue")
+    def process_log_queue(self, records):
+        """UI bus handler: appends the log records of one frame to the manager log pane."""
+        self.instrumentation.set_gauge('log_queue', len(records))
+        max_lines = int(self.settings.get('manager_log_max_lines', DEFAULT_MANAGER_LOG_LINES))
+        batch = collections.deque(maxlen=max_lines) # A burst larger than the pane only keeps its tail
+        for (record,) in records[-max_lines:]: # Every record is at least one line
+            batch.extend(self.log_formatter.format(record).splitlines() or [""])
+        if batch:
+            widget = self.manager_log_text
+            widget.configure(state='normal')
+            widget.insert(tk.END, '\n'.join(batch) + '\n')
+            self.manager_log_lines += len(batch)
+            excess = self.manager_log_lines - max_lines
+            if excess > 0:
+                widget.delete('1.0', f"{excess + 1}.0")
+                self.manager_log_lines = max_lines
+            widget.see(tk.END)
+            widget.configure(state='disabled')
 
     def start_script(self, name):
-        if self.processes.get(name) and self.processes[name].poll() is None:
+        runtime = self.runtimes[name]
+        if runtime.is_running():
             self.logger.info(f"'{name}' läuft bereits.")
             return
 
         path = self.scripts[name]['path']
         script_dir = os.path.dirname(path)
-        output_widget = self.script_ui_widgets[name]['output_widget']
+        output_widget = runtime.widgets['output_widget']
         output_widget.configure(state='normal')
         output_widget.delete('1.0', tk.END)
         output_widget.configure(state='disabled')
-        self.script_raw_output[name].clear()
-        self.cpu_history[name] = [0.0] * 20 # Reset CPU history
+        runtime.output.clear()
+        self._output_channel(name).reset()
+        runtime.view_index = array('l')
+        if self.control_server:
+            self.control_server.forget(name)
+        self._close_fold(name)
+        self._update_level_counts(name)
+        runtime.cpu_history.extend([0.0] * CPU_HISTORY_LENGTH) # Reset CPU history
 
         try:
-            si = subprocess.STARTUPINFO()
-            si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            si.wShowWindow = subprocess.SW_HIDE
-            
-            process = subprocess.Popen(
-                ['cmd', '/c', path], 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.STDOUT, 
-                text=True, 
-                shell=False,
-                startupinfo=si,
-                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP,
-                cwd=script_dir
-            )
-            self.processes[name] = process
+            log_files = self.scripts[name].get('log_files')
+            if log_files: # Registered before the spawn so the script's first lines are not skipped
+                base = os.path.abspath(script_dir or ".")
+                patterns = [os.path.join(base, os.path.expandvars(os.path.expanduser(pattern)))
+                            for pattern in ([log_files] if isinstance(log_files, str) else log_files)]
+                self.log_tailer.add(name, patterns, base,
+                                    self.scripts[name].get('fold_repeats', self.settings.get('fold_repeats', True)))
+            process = self._spawn_script_process(path, script_dir, env=self._script_env(name))
+            if name in self.resource_limits:
+                for warning in apply_spawn_limits(process.pid, self.resource_limits[name],
+                                                  self.settings.get('cgroup_root', DEFAULT_CGROUP_ROOT), name):
+                    self.logger.warning(f"'{name}': {warning}")
+            runtime.process = process
+            runtime.started = time.time()
+            self.metrics.script(name).starts += 1
+            runtime.run = RunRecord(name, process.pid, self.metrics.script(name))
+            runtime.memory_trend = self._new_memory_trend(name)
             self.update_status(name, "Läuft", "green", process.pid)
             self.toggle_buttons(name, is_running=True)
             self.logger.info(f"'{name}' gestartet. PID: {process.pid}")
-            self._send_notification(f"Skript gestartet: {name}", f"'{name}' wurde erfolgreich gestartet. (PID: {process.pid})")
+            self._send_notification(f"Skript gestartet: {name}", f"'{name}' wurde erfolgreich gestartet. (PID: {process.pid})", "started", "info", name)
 
             if PSUTIL_AVAILABLE:
                 try:
                     p = psutil.Process(process.pid)
                     p.cpu_percent(interval=None)
-                    self.psutil_processes[name] = {process.pid: p}
+                    runtime.psutil_processes = {process.pid: p}
                 except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
                     self.logger.warning(f"Konnte psutil für PID {process.pid} nicht initialisieren: {e}")
 
-            thread = threading.Thread(target=self.enqueue_output, args=(process.stdout, name), daemon=True)
-            self.threads[name] = thread
+            thread = runtime.thread = threading.Thread(target=self.enqueue_output, args=(process.stdout, name, process), daemon=True)
             thread.start()
 
         except Exception as e:
             self.update_status(name, f"Fehler: {e}", "red")
             self.logger.error(f"Fehler beim Starten von '{name}': {e}")
-            self._send_notification(f"Fehler beim Starten: {name}", f"'{name}' konnte nicht gestartet werden: {e}")
+            if self.scripts[name].get('log_files'):
+                self.log_tailer.remove(name)
+            if name in self.activations:
+                self.activations[name].script_exited() # The next connection tries again
+            self._send_notification(f"Fehler beim Starten: {name}", f"'{name}' konnte nicht gestartet werden: {e}", "start_failed", "error", name)
+
+    def _script_env(self, name):
+        """Environment of a replica instance or on-demand script (index, set size, port), or None to inherit the manager's."""
+        data = self.scripts[name]
+        set_name = data.get('replica_of', name)
+        if set_name not in self.replica_counts and name not in self.activations:
+            return None
+        env = dict(os.environ)
+        if set_name in self.replica_counts:
+            env[REPLICA_INDEX_ENV] = str(data.get('replica_index', 0))
+            env[REPLICA_COUNT_ENV] = str(self.replica_counts[set_name])
+        port = self._process_port(name)
+        if port:
+            env[SCRIPT_PORT_ENV] = str(port)
+        return env
+
+    def _process_port(self, name):
+        """Port the script's own process listens on; for on-demand scripts the manager holds 'port'."""
+        if name in self.activations:
+            return self.activations[name].backend_port
+        return self.scripts.get(name, {}).get('port')
+
+    @staticmethod
+    def _spawn_script_process(path, script_dir, args=(), env=None):
+        """Starts a script hidden and in its own process group; POSIX shells are used outside Windows."""
+        if os.name != 'nt':
+            return subprocess.Popen(
+                ['sh', path, *args],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                start_new_session=True,
+                cwd=script_dir or None,
+                env=env
+            )
+        si = subprocess.STARTUPINFO()
+        si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        si.wShowWindow = subprocess.SW_HIDE
+        
+        return subprocess.Popen(
+            ['cmd', '/c', path, *args], 
+            stdout=subprocess.PIPE, 
+            stderr=subprocess.STDOUT, 
+            text=True, 
+            shell=False,
+            startupinfo=si,
+            creationflags=subprocess.CREATE_NEW_PROCESS_GROUP,
+            cwd=script_dir,
+            env=env
+        )
 
-    def enqueue_output(self, pipe, name):
+    def enqueue_output(self, pipe, name, process):
+        channel = self.runtimes[name].channel
+        stats = self.metrics.script(name)
+        alerts = self.alerts.get(name)
+        folder = RepeatFolder() if self.scripts.get(name, {}).get('fold_repeats', self.settings.get('fold_repeats', True)) else None
+        ansi = AnsiParser()
         try:
             buffer = ''
             while True:
                 char = pipe.read(1)
                 if not char:
                     if buffer:
-                        self.output_queue.put((name, buffer))
+                        self._ingest_line(channel, buffer, stats, alerts, folder, ansi)
                     break
                 buffer += char
                 if char == '\n':
-                    self.output_queue.put((name, buffer))
+                    self._ingest_line(channel, buffer, stats, alerts, folder, ansi)
                     buffer = ''
             pipe.close()
         except Exception as e:
             self.logger.error(f"Ausnahme im Output-Reader für {name}: {e}")
+        if folder is not None and folder.pending:
+            now = time.time()
+            channel.push((name, None, LEVEL_NONE, math.nan, folder.summary(now), STDOUT_SOURCE, now))
         
-        self.after(0, self.handle_process_exit, name)
+        self.bus.post('exited', (name, process))
+
+    def _ingest_file_line(self, name, source, line, folder, ansi):
+        """LogTailer callback: a line of one of the script's log files; None ends that file's stream."""
+        runtime = self.runtimes.get(name)
+        channel = runtime.channel if runtime is not None else None
+        if channel is None:
+            return # Replica instance removed; the tailer is already told to drop its files
+        if line is None:
+            if folder is not None and folder.pending:
+                now = time.time()
+                channel.push((name, None, LEVEL_NONE, math.nan, folder.summary(now), source, now))
+            return
+        self._ingest_line(channel, line, self.metrics.script(name), self.alerts.get(name), folder, ansi, source)
 
-    def handle_process_exit(self, name):
-        self.update_status(name, "Gestoppt", "red")
+    def _ingest_line(self, channel, raw_line, stats, alerts, folder, ansi, source=STDOUT_SOURCE):
+        """
+        Reader-thread handling of one output line: ingest time, counters, tail subscribers
+        (with the original escape sequences), ANSI parsing, alert rules and repeat folding.
+        """
+        name = channel.name
+        now = time.time()
+        stats.output_lines += 1
+        stats.output_bytes += len(raw_line.encode('utf-8', 'replace'))
+        if self.control_server:
+            self.control_server.publish(name, raw_line)
+        line, styles = ansi.parse(raw_line)
+        if alerts is not None:
+            fired = alerts.feed(line)
+            if fired:
+                self.bus.post('alert', (name, fired))
+        if folder is not None:
+            repeat, final = folder.push(line, now)
+            if repeat:
+                if folder.due(now):
+                    channel.push((name, None, LEVEL_NONE, math.nan, folder.summary(now), source, now))
+                return
+            if final is not None:
+                channel.push((name, None, LEVEL_NONE, math.nan, final, source, now))
+        if not channel.push((name, line) + parse_log_line(line) + (styles, source, now)):
+            stats.output_dropped += 1
+
+    def handle_process_exit(self, name, process=None):
+        """Cleans up after a run; with `process`, only if that is still the script's current run."""
+        runtime = self.runtimes.get(name)
+        if runtime is None:
+            return # Replica instance removed while it was still exiting; its run was recorded on removal
+        if process is not None and runtime.process is not process:
+            return # Late event of a run already handled (e.g. by the CPU sampler); a newer run may be going
+        if name in self.activations:
+            self.activations[name].script_exited()
+            self.update_status(name, "Bei Bedarf", "orange") # Stopped, but the listener starts it again
+        else:
+            self.update_status(name, "Gestoppt", "red")
         self.toggle_buttons(name, is_running=False)
-        if name in self.processes:
-            pid = self.processes[name].pid
-            self.processes.pop(name)
+        if self.scripts.get(name, {}).get('log_files'):
+            self.log_tailer.remove(name)
+        if runtime.process is not None:
+            pid = runtime.process.pid
+            stats = self.metrics.script(name)
+            stats.exits += 1
+            exit_code = runtime.process.poll()
+            if exit_code is not None:
+                stats.last_exit_code = exit_code
+            self._record_run_end(name, exit_code)
+            runtime.process = runtime.thread = None
             self.logger.info(f"'{name}' beendet. PID: {pid}")
-            self._send_notification(f"Skript beendet: {name}", f"'{name}' (PID: {pid}) wurde beendet.")
+            self._send_notification(f"Skript beendet: {name}", f"'{name}' (PID: {pid}) wurde beendet.", "exited",
+                                    "warning" if exit_code not in (None, 0) else "info", name)
+            if self.schedule_pending.get(name):
+                self.schedule_pending[name] -= 1
+                self.logger.info(f"Zeitplan: Starte wartenden Lauf von '{name}'.")
+                self.after(0, self.start_script, name)
+                self._update_schedule_label(name)
         
-        if PSUTIL_AVAILABLE and name in self.psutil_processes:
-            self.psutil_processes.pop(name)
-            if name in self.script_ui_widgets and 'cpu_label' in self.script_ui_widgets[name]:
-                self.script_ui_widgets[name]['cpu_label'].config(text="")
-            if name in self.script_ui_widgets and 'sparkline_canvas' in self.script_ui_widgets[name]: # Clear individual tab sparkline
-                self.script_ui_widgets[name]['sparkline_canvas'].delete("all")
-            if name in self.overview_script_widgets: # Clear overview sparkline
-                self.overview_script_widgets[name]['cpu_label'].config(text="")
-                self.overview_script_widgets[name]['sparkline_canvas'].delete("all")
-            self.cpu_history[name] = [0.0] * 20 # Reset CPU history
-
-    def process_queue(self):
-        while not self.output_queue.empty():
-            try:
-                name, line = self.output_queue.get_nowait()
-                if name in self.scripts:
-                    self.script_raw_output[name].append(line)
-                    
-                    widget = self.script_ui_widgets[name]['output_widget']
-                    search_term = self.script_ui_widgets[name]['search_entry'].get().strip()
-                    
-                    if not search_term or search_term.lower() in line.lower():
-                        widget.configure(state='normal')
-                        start_index = widget.index(tk.END)
-                        widget.insert(tk.END, line)
-                        end_index = widget.index(tk.END + "-1c")
-                        
-                        self._apply_keyword_highlighting(widget, start_index, end_index, line)
-                        
-                        if search_term:
-                            self._apply_search_highlighting(widget, start_index, end_index, line, search_term)
-                        
-                        if self.autoscroll_vars[name].get(): # Check autoscroll setting
-                            widget.see(tk.END)
-                        widget.configure(state='disabled')
-
-                    # Also update the new overview output widget (always unfiltered)
-                    if name in self.overview_script_widgets and 'overview_output_widget' in self.overview_script_widgets[name]:
-                        overview_widget = self.overview_script_widgets[name]['overview_output_widget']
-                        overview_widget.configure(state='normal')
+        sampled = bool(runtime.psutil_processes)
+        runtime.reset_samples()
+        limits = self.resource_limits.get(name)
+        if limits is not None and (limits.cgroup_cpu_percent or limits.cgroup_memory) and sys.platform.startswith('linux'):
+            self._remove_cgroup_when_empty(self.settings.get('cgroup_root', DEFAULT_CGROUP_ROOT), name)
+        if PSUTIL_AVAILABLE and sampled:
+            if 'cpu_label' in runtime.widgets:
+                runtime.widgets['cpu_label'].config(text="")
+            if 'sparkline_canvas' in runtime.widgets: # Clear individual tab sparkline
+                runtime.widgets['sparkline_canvas'].delete("all")
+            if runtime.overview_widgets: # Clear overview sparkline
+                runtime.overview_widgets['cpu_label'].config(text="")
+                runtime.overview_widgets['sparkline_canvas'].delete("all")
+
+    @instrumented("process_queue")
+    def process_queue(self, channels):
+        """
+        UI bus handler: stores the lines waiting in the signalled output channels, at most
+        OUTPUT_FRAME_LINES per channel and frame, and shows them within each script's rate limit.
+        """
+        updated_scripts = set()
+        taken = 0
+        for (channel,) in channels:
+            name = channel.name
+            batch = channel.take()
+            taken += len(batch)
+            runtime = self.runtimes.get(name)
+            if runtime is None or runtime.channel is not channel:
+                continue # Removed script, or a channel replaced by a reload
+            lines = sum(1 for item in batch if item[1] is not None)
+            shown = channel.bucket.take_up_to(lines) if channel.bucket is not None else lines
+            if shown < lines: # Over the rate limit: stored (filters, export, ctl) but not inserted into the widgets
+                channel.hidden += lines - shown
+                self.metrics.script(name).output_hidden += lines - shown
+            store = runtime.output
+            widgets = runtime.widgets
+            widget = widgets['output_widget']
+            search_term = widgets['search_entry'].get().strip()
+            min_level = LEVEL_FILTERS.get(widgets['level_filter_var'].get(), LEVEL_NONE)
+            source_filter = widgets['source_filter_var'].get()
+            overview_widget = runtime.overview_widgets.get('overview_output_widget')
+            autoscroll_var = runtime.autoscroll_var
+            for _, line, level, timestamp, styles, source, received in batch:
+                if line is None: # Repeat summary; the styles field carries the fold
+                    self._update_fold(name, styles, source)
+                    continue
+                if name in self.active_folds:
+                    self._close_fold(name)
+                known_sources = len(store.sources)
+                index = store.append(line, level, timestamp, styles, source, received)
+                if len(store.sources) != known_sources:
+                    self._update_source_filter(name)
+                if shown <= 0:
+                    continue
+                shown -= 1
+
+                if (level >= min_level and (not search_term or search_term.lower() in line.lower())
+                        and source_filter in (ALL_SOURCES, source)):
+                    runtime.view_index.append(index)
+                    widget.configure(state='normal')
+                    start_index = widget.index(tk.END + "-1c") # Text goes before the widget's final newline
+                    widget.insert(tk.END, line)
+                    end_index = widget.index(tk.END + "-1c")
+
+                    self._apply_keyword_highlighting(widget, start_index, end_index, line)
+                    if styles is not None:
+                        self._apply_ansi_styles(widget, start_index, styles)
+
+                    if search_term:
+                        self._apply_search_highlighting(widget, start_index, end_index, line, search_term)
+
+                    if autoscroll_var.get(): # Check autoscroll setting
+                        widget.see(tk.END)
+                    widget.configure(state='disabled')
+
+                # Also update the new overview output widget (always unfiltered)
+                if overview_widget is not None:
+                    overview_widget.configure(state='normal')
+                    if styles is not None:
+                        start_index = overview_widget.index(tk.END + "-1c")
                         overview_widget.insert(tk.END, line)
-                        overview_widget.see(tk.END) # Always autoscroll overview outputs
-                        overview_widget.configure(state='disabled')
-            except queue.Empty:
-                pass
-        self.after(100, self.process_queue)
+                        self._apply_ansi_styles(overview_widget, start_index, styles)
+                    else:
+                        overview_widget.insert(tk.END, line)
+                    overview_widget.see(tk.END) # Always autoscroll overview outputs
+                    overview_widget.configure(state='disabled')
+            updated_scripts.add(name)
+        for name in updated_scripts:
+            self._update_level_counts(name)
+        self.instrumentation.set_gauge('output_queue', taken + self.output_pending())
+        self.instrumentation.count('output_lines', taken)
+
+    def output_pending(self):
+        """Lines waiting in all output channels."""
+        return sum(len(runtime.channel.items) for runtime in list(self.runtimes.values()) if runtime.channel is not None)
+
+    def _output_channel(self, name):
+        """The script's output channel, created with its configured capacity, overflow policy and rate limit."""
+        runtime = self.runtimes[name]
+        channel = runtime.channel
+        if channel is None:
+            data = self.scripts.get(name, {})
+            setting = lambda key, default: data.get(key, self.settings.get(key, default))
+            overflow = setting('output_overflow', "drop")
+            if overflow not in OUTPUT_OVERFLOW_POLICIES:
+                self.logger.error(f"'{name}': Unbekannte output_overflow-Einstellung '{overflow}', verwende 'drop'.")
+                overflow = "drop"
+            try:
+                channel = OutputChannel(name, self.bus, int(setting('output_buffer_lines', DEFAULT_OUTPUT_CHANNEL_LINES)),
+                                        overflow, float(setting('output_rate_limit', DEFAULT_OUTPUT_RATE_LIMIT)))
+            except (TypeError, ValueError) as e:
+                self.logger.error(f"'{name}': Ungültige Ausgabe-Einstellung ({e}), verwende die Standardwerte.")
+                channel = OutputChannel(name, self.bus)
+            runtime.channel = channel
+        return channel
+
+    def _fold_widgets(self, name, index):
+        """Output widgets whose last line shows store line `index`: the script tab (if not filtered out) and the overview."""
+        runtime = self.runtimes[name]
+        widgets = []
+        view_index = runtime.view_index
+        if view_index and view_index[-1] == index:
+            widgets.append(runtime.widgets['output_widget'])
+        overview_widget = runtime.overview_widgets.get('overview_output_widget')
+        if overview_widget is not None:
+            widgets.append(overview_widget)
+        return widgets
+
+    def _update_fold(self, name, fold, source=STDOUT_SOURCE):
+        """
+        Attaches a repeat summary to the newest line of its source and refreshes the marker
+        in place while that line is still the last one shown.
+        """
+        store = self.runtimes[name].output
+        index = store.last_index.get(store.source_ids.get(source))
+        if index is None:
+            return
+        store.set_fold(index, fold)
+        if index != len(store) - 1:
+            return
+        marker = fold_marker(fold)
+        for widget in self._fold_widgets(name, index):
+            widget.configure(state='normal')
+            ranges = widget.tag_ranges('fold_active')
+            if ranges:
+                position = str(ranges[0])
+                widget.delete(ranges[0], ranges[-1])
+            else:
+                position = tk.END + ("-2c" if store[index].endswith('\n') else "-1c")
+            widget.insert(position, marker, ('fold', 'fold_active'))
+            widget.configure(state='disabled')
+        self.active_folds.add(name)
+
+    def _close_fold(self, name):
+        """The run ended: its marker stays but is no longer updated."""
+        self.active_folds.discard(name)
+        runtime = self.runtimes[name]
+        for widget in (runtime.widgets.get('output_widget'), runtime.overview_widgets.get('overview_output_widget')):
+            if widget is not None:
+                widget.tag_remove('fold_active', '1.0', tk.END)
+
+    def _show_fold_details(self, name, event):
+        """Click on a repeat marker: shows count, time range and the first and last line of the run."""
+        runtime = self.runtimes[name]
+        widget = runtime.widgets['output_widget']
+        line_number = int(widget.index(f"@{event.x},{event.y}").split('.')[0])
+        view_index = runtime.view_index
+        if not 0 < line_number <= len(view_index):
+            return
+        store = runtime.output
+        index = view_index[line_number - 1]
+        fold = store.folds.get(index)
+        if fold is None:
+            return
+        repeats, first_seen, last_seen, last_line = fold
+        messagebox.showinfo(
+            "Wiederholte Zeilen",
+            f"{repeats + 1:,} gleiche Zeilen".replace(",", ".")
+            + f" von {time.strftime('%H:%M:%S', time.localtime(first_seen))} bis {time.strftime('%H:%M:%S', time.localtime(last_seen))}"
+            + f" ({(repeats + 1) / max(last_seen - first_seen, 1.0):.1f}/s)\n\n"
+            + f"Erste Zeile:\n{store[index].rstrip()}\n\nLetzte Zeile:\n{last_line.rstrip()}",
+            parent=self
+        )
+
+    def _apply_ansi_styles(self, widget, start_index, styles):
+        """Tags the ANSI-styled runs of a line; tags are shared per distinct attribute set."""
+        line_number, column = start_index.split('.')
+        column = int(column)
+        for position in range(0, len(styles), 3):
+            widget.tag_add(self._ansi_tag(widget, styles[position + 2]),
+                           f"{line_number}.{column + styles[position]}", f"{line_number}.{column + styles[position + 1]}")
+
+    def _ansi_tag(self, widget, attr):
+        """Name of the tag for packed SGR attributes, configured on the widget the first time it is used."""
+        tag = f"ansi_{attr:x}"
+        configured = self.ansi_tags.setdefault(str(widget), set())
+        if tag in configured:
+            return tag
+        foreground = ANSI_PALETTE[(attr & ANSI_FG_MASK) - 1] if attr & ANSI_FG_MASK else None
+        background = ANSI_PALETTE[((attr >> ANSI_BG_SHIFT) & ANSI_FG_MASK) - 1] if (attr >> ANSI_BG_SHIFT) & ANSI_FG_MASK else None
+        if attr & ANSI_INVERSE:
+            foreground, background = background or self.LOG_BG_COLOR, foreground or self.LOG_FG_COLOR
+        font = self.actual_monospace_font[:2] + tuple(style for flag, style in ((ANSI_BOLD, 'bold'), (ANSI_ITALIC, 'italic')) if attr & flag)
+        options = {'font': font}
+        if foreground:
+            options['foreground'] = foreground
+        if background:
+            options['background'] = background
+        if attr & ANSI_UNDERLINE:
+            options['underline'] = True
+        widget.tag_config(tag, **options)
+        try:
+            widget.tag_lower(tag, 'filter_match') # Above keyword colours, below search matches and jump targets
+        except tk.TclError:
+            pass # The overview outputs have no search tags
+        configured.add(tag)
+        return tag
 
     def _apply_keyword_highlighting(self, widget, start_index, end_index, line):
-        keywords = {
-            'error': ['error', 'exception', 'failed', 'fatal'],
-            'warning': ['warn', 'warning'],
-            'success': ['success', 'completed', 'finished'],
-            'info': ['info', 'starting', 'running']
-        }
-        
-        for tag, words in keywords.items():
-            for word in words:
-                start_pos = 0
-                while True:
-                    start_pos = line.lower().find(word.lower(), start_pos)
-                    if start_pos == -1:
-                        break
-                    tag_start_char_idx = int(start_index.split('.')[1]) + start_pos
-                    tag_end_char_idx = int(start_index.split('.')[1]) + start_pos + len(word)
-                    
-                    tag_start = f"{start_index.split('.')[0]}.{tag_start_char_idx}"
-                    tag_end = f"{start_index.split('.')[0]}.{tag_end_char_idx}"
-                    widget.tag_add(tag, tag_start, tag_end)
-                    start_pos += len(word)
+        line_number, column = start_index.split('.')
+        column = int(column)
+        for match in KEYWORD_HIGHLIGHT_PATTERN.finditer(line):
+            widget.tag_add(KEYWORD_TAGS[match.lastgroup],
+                           f"{line_number}.{column + match.start()}", f"{line_number}.{column + match.end()}")
 
     def _apply_search_highlighting(self, widget, start_index, end_index, line, search_term):
         if search_term:
@@ -1087,70 +5683,218 @@ class BatchManager(tk.Tk):
                 start_pos += len(search_term)
 
     def apply_filter_and_highlight(self, name):
-        widget = self.script_ui_widgets[name]['output_widget']
-        search_term = self.script_ui_widgets[name]['search_entry'].get().strip().lower()
+        runtime = self.runtimes[name]
+        widgets = runtime.widgets
+        widget = widgets['output_widget']
+        search_term = widgets['search_entry'].get().strip().lower()
+        min_level = LEVEL_FILTERS.get(widgets['level_filter_var'].get(), LEVEL_NONE)
+        store = runtime.output
+        view_index = runtime.view_index = array('l')
         
         widget.configure(state='normal')
         widget.delete('1.0', tk.END)
         
-        for line in self.script_raw_output[name]:
+        source_filter = widgets['source_filter_var'].get()
+        source_id = store.source_ids.get(source_filter, -1) if source_filter != ALL_SOURCES else None
+        line_sources = store.line_sources
+        
+        for index in store.indexes_at_least(min_level):
+            if source_id is not None and line_sources[index] != source_id:
+                continue
+            line = store[index]
             if not search_term or search_term in line.lower():
-                start_index = widget.index(tk.END)
+                view_index.append(index)
+                start_index = widget.index(tk.END + "-1c")
                 widget.insert(tk.END, line)
                 end_index = widget.index(tk.END + "-1c")
                 
                 self._apply_keyword_highlighting(widget, start_index, end_index, line)
+                styles = store.styles.get(index)
+                if styles is not None:
+                    self._apply_ansi_styles(widget, start_index, styles)
                 
                 if search_term:
                     self._apply_search_highlighting(widget, start_index, end_index, line, search_term)
+                fold = store.folds.get(index)
+                if fold is not None:
+                    active = name in self.active_folds and index == len(store) - 1
+                    widget.insert(tk.END + ("-2c" if line.endswith('\n') else "-1c"), fold_marker(fold),
+                                  ('fold', 'fold_active') if active else ('fold',))
         
         widget.see(tk.END)
         widget.configure(state='disabled')
-        self.logger.info(f"Filter/Highlighting für '{name}' mit Suchbegriff '{search_term}' angewendet.")
+        self.logger.info(f"Filter/Highlighting für '{name}' mit Suchbegriff '{search_term}' und Level '{widgets['level_filter_var'].get()}' angewendet.")
 
     def clear_filter(self, name):
-        self.script_ui_widgets[name]['search_entry'].delete(0, tk.END)
+        widgets = self.runtimes[name].widgets
+        widgets['search_entry'].delete(0, tk.END)
+        widgets['level_filter_var'].set("Alle")
+        widgets['source_filter_var'].set(ALL_SOURCES)
         self.apply_filter_and_highlight(name)
         self.logger.info(f"Filter für '{name}' gelöscht.")
 
+    def _update_source_filter(self, name):
+        """Offers the sources seen so far (stdout and tailed log files) in the script tab's source filter."""
+        runtime = self.runtimes[name]
+        source_filter = runtime.widgets.get('source_filter')
+        if source_filter is not None:
+            source_filter.configure(values=[ALL_SOURCES] + runtime.output.sources)
+
+    def toggle_time_gutter(self, name):
+        widgets = self.runtimes[name].widgets
+        if widgets['time_gutter_var'].get() == TIME_GUTTER_MODES[0]:
+            widgets['time_gutter'].pack_forget()
+        else:
+            widgets['time_gutter'].pack(side=tk.LEFT, fill=tk.Y, before=widgets['output_widget'])
+            self._schedule_time_gutter(name)
+
+    def _schedule_time_gutter(self, name):
+        """Coalesces the scroll and insert events of one update into a single redraw."""
+        runtime = self.runtimes.get(name)
+        widgets = runtime.widgets if runtime is not None else {}
+        if name not in self.time_gutter_pending and widgets.get('time_gutter_var') is not None \
+                and widgets['time_gutter_var'].get() != TIME_GUTTER_MODES[0]:
+            self.time_gutter_pending.add(name)
+            self.after_idle(self._draw_time_gutter, name)
+
+    def _draw_time_gutter(self, name):
+        """Writes the ingest time (or the gap since the previous shown line) next to each visible line."""
+        self.time_gutter_pending.discard(name)
+        runtime = self.runtimes.get(name)
+        if runtime is None or not runtime.widgets:
+            return
+        widgets = runtime.widgets
+        widget, canvas = widgets['output_widget'], widgets['time_gutter']
+        canvas.delete("all")
+        mode = widgets['time_gutter_var'].get()
+        store = runtime.output
+        view_index = runtime.view_index
+        first = int(widget.index("@0,0").split('.')[0])
+        last = min(int(widget.index(f"@0,{widget.winfo_height()}").split('.')[0]), len(view_index))
+        x = canvas.winfo_width() - 4
+        for line_number in range(first, last + 1):
+            info = widget.dlineinfo(f"{line_number}.0")
+            if info is None:
+                continue
+            index = view_index[line_number - 1]
+            received = store.received_at(index)
+            color = self.ACCENT_SECONDARY
+            if mode == "Delta":
+                delta = received - store.received_at(view_index[line_number - 2]) if line_number > 1 else 0.0
+                text = f"+{delta:.3f}s" if delta < 60 else f"+{delta / 60:.1f}min"
+                if delta >= 1:
+                    color = self.ACCENT_COLOR # Gaps stand out
+            else:
+                text = time.strftime("%H:%M:%S", time.localtime(received)) + f".{round(received * 1000) % 1000:03d}"
+            canvas.create_text(x, info[1], text=text, anchor='ne', font=self.actual_monospace_font, fill=color)
+
+    def jump_to_time(self, name):
+        """Scrolls to the first shown line received at or after the time typed into the jump field."""
+        runtime = self.runtimes[name]
+        entry = runtime.widgets['jump_time_entry']
+        when = parse_jump_time(entry.get(), time.time())
+        if when is None:
+            self.logger.warning(f"Ungültige Zeitangabe für '{name}': '{entry.get()}'")
+            self.bell()
+            return
+        view_index = runtime.view_index
+        if not view_index:
+            return
+        store = runtime.output
+        position = min(bisect.bisect_left(view_index, store.index_at_time(when)), len(view_index) - 1)
+        widget = runtime.widgets['output_widget']
+        widget.tag_remove('jump_target', '1.0', tk.END)
+        widget.tag_add('jump_target', f"{position + 1}.0", f"{position + 2}.0")
+        runtime.autoscroll_var.set(False) # Keep the jump target in view
+        widget.see(f"{position + 1}.0")
+
+    def _update_level_counts(self, name):
+        runtime = self.runtimes[name]
+        store = runtime.output
+        label = runtime.widgets.get('level_count_label')
+        if label is not None:
+            text = f"Fehler: {store.count_at_least(LEVEL_ERROR)}  Warnungen: {store.level_counts[LEVEL_WARNING]}"
+            channel = runtime.channel
+            if channel is not None and channel.hidden:
+                text += f"  Nicht angezeigt: {channel.hidden}"
+            if channel is not None and channel.dropped:
+                text += f"  Verworfen: {channel.dropped}"
+            label.config(text=text)
+
+    def jump_to_error(self, name, forward=True):
+        """Scrolls the output tab to the next/previous error line using the store's level index."""
+        runtime = self.runtimes[name]
+        widget = runtime.widgets['output_widget']
+        store = runtime.output
+        view_index = runtime.view_index
+        if not view_index:
+            return
+        current_line = int(widget.index('jump_target.first' if widget.tag_ranges('jump_target') else '@0,0').split('.')[0])
+        current = view_index[min(current_line, len(view_index)) - 1]
+        target = current
+        while True:
+            target = store.next_at_least(LEVEL_ERROR, target + 1) if forward else store.previous_at_least(LEVEL_ERROR, target - 1)
+            if target is None:
+                self.bell()
+                return
+            position = bisect.bisect_left(view_index, target)
+            if position < len(view_index) and view_index[position] == target:
+                break # Skip errors hidden by the search filter
+        widget.tag_remove('jump_target', '1.0', tk.END)
+        widget.tag_add('jump_target', f"{position + 1}.0", f"{position + 2}.0")
+        runtime.autoscroll_var.set(False) # Keep the jump target in view
+        widget.see(f"{position + 1}.0")
+
+    @staticmethod
+    def _kill_process_tree(pid):
+        """Kills a script and its children; raises CalledProcessError if it no longer exists."""
+        if os.name != 'nt':
+            # Scripts run in their own session, so the process group id is the script's PID
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                raise subprocess.CalledProcessError(1, "killpg")
+        else:
+            si = subprocess.STARTUPINFO()
+            si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+            si.wShowWindow = subprocess.SW_HIDE
+            subprocess.run(
+                f"taskkill /F /T /PID {pid}", 
+                check=True, 
+                capture_output=True, 
+                text=True,
+                startupinfo=si
+            )
+
     def _execute_taskkill(self, pid, name):
         """Runs taskkill in a separate thread to avoid UI freeze. Tries to kill by PID, and if ein Port in config steht, sucht erst PID über Port."""
         def _kill():
             try:
-                port = self.scripts.get(name, {}).get('port')
+                port = self._process_port(name)
                 target_pid = pid
                 if port:
                     found_pid = self._find_pid_by_port(port)
                     if found_pid:
                         target_pid = found_pid
                         self.logger.info(f"Finde PID {target_pid} für Port {port} (Skript: {name})")
-                si = subprocess.STARTUPINFO()
-                si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                si.wShowWindow = subprocess.SW_HIDE
-                subprocess.run(
-                    f"taskkill /F /T /PID {target_pid}", 
-                    check=True, 
-                    capture_output=True, 
-                    text=True,
-                    startupinfo=si
-                )
+                self._kill_process_tree(target_pid)
                 self.logger.info(f"Prozess PID {target_pid} für '{name}' beendet.")
-                self._send_notification(f"Skript gestoppt: {name}", f"Prozess PID {target_pid} für '{name}' wurde beendet.")
+                self._send_notification(f"Skript gestoppt: {name}", f"Prozess PID {target_pid} für '{name}' wurde beendet.", "stopped", "info", name)
             except subprocess.CalledProcessError:
                 self.logger.info(f"Konnte Prozess PID {pid} für '{name}' nicht beenden (möglicherweise bereits beendet).")
-                self._send_notification(f"Skript Stopp-Info: {name}", f"Konnte Prozess PID {pid} für '{name}' nicht beenden (möglicherweise bereits beendet).")
+                self._send_notification(f"Skript Stopp-Info: {name}", f"Konnte Prozess PID {pid} für '{name}' nicht beenden (möglicherweise bereits beendet).", "stop_info", "info", name)
             except Exception as e:
                 self.logger.error(f"Fehler beim Beenden von '{name}': {e}")
-                self._send_notification(f"Fehler beim Stoppen: {name}", f"Fehler beim Beenden von PID {pid} für '{name}': {e}")
+                self._send_notification(f"Fehler beim Stoppen: {name}", f"Fehler beim Beenden von PID {pid} für '{name}': {e}", "stop_failed", "error", name)
         thread = threading.Thread(target=_kill, daemon=True)
         thread.start()
 
     def stop_script(self, name):
-        if name in self.processes:
-            process = self.processes[name]
+        process = self.runtimes[name].process
+        if process is not None:
             if process.poll() is None:
                 # Port aus config holen, falls vorhanden
-                port = self.scripts.get(name, {}).get('port')
+                port = self._process_port(name)
                 if port:
                     found_pid = self._find_pid_by_port(port)
                     if found_pid:
@@ -1159,33 +5903,141 @@ class BatchManager(tk.Tk):
                         kill_thread.start()
                         return
                 self.logger.info(f"Stoppe '{name}' (PID: {process.pid})...")
-                self._send_notification(f"Skript stoppt: {name}", f"Sende Stopp-Befehl an '{name}' (PID: {process.pid})...")
+                self._send_notification(f"Skript stoppt: {name}", f"Sende Stopp-Befehl an '{name}' (PID: {process.pid})...", "stopping", "info", name)
                 kill_thread = threading.Thread(target=self._execute_taskkill, args=(process.pid, name), daemon=True)
                 kill_thread.start()
             else:
-                self.handle_process_exit(name)
+                self.handle_process_exit(name, process)
 
     def restart_script(self, name):
         self.logger.info(f"Neustart von '{name}'...")
-        self._send_notification(f"Skript startet neu: {name}", f"'{name}' wird neu gestartet.")
+        self.metrics.script(name).restarts += 1
+        self._send_notification(f"Skript startet neu: {name}", f"'{name}' wird neu gestartet.", "restarting", "info", name)
         self.stop_script(name)
         # Warte immer 3 Sekunden nach dem Stoppen, bevor neu gestartet wird
         self.after(3000, lambda: self.start_script(name))
 
     def toggle_script_from_overview(self, name):
         """Starts or stops a script based on the overview toggle switch."""
-        if self.overview_switch_vars[name].get():
+        if self.runtimes[name].switch_var.get():
             self.start_script(name)
         else:
             self.stop_script(name)
 
+    def _on_replicas_changed(self, name):
+        replicas_var = self.runtimes[name].widgets['replicas_var']
+        try:
+            count = int(replicas_var.get())
+        except ValueError:
+            replicas_var.set(str(self.replica_counts[name]))
+            return
+        self.scale_replicas(name, count)
+
+    def is_running(self, name):
+        runtime = self.runtimes.get(name)
+        return runtime is not None and runtime.is_running()
+
+    def script_snapshots(self):
+        """name -> ScriptSnapshot of every script, for readers outside the UI thread."""
+        return {name: runtime.snapshot() for name, runtime in list(self.runtimes.items())}
+
+    def _expand_replicas(self):
+        """Rebuilds self.scripts with the instance entries of every replica set directly after their definition."""
+        scripts = {}
+        for name, data in self.scripts.items():
+            if 'replica_of' in data:
+                continue
+            scripts[name] = data
+            if 'replicas' not in data:
+                continue
+            try:
+                count = self.replica_counts.setdefault(name, min(MAX_REPLICAS, max(1, int(data['replicas']))))
+            except (TypeError, ValueError):
+                self.logger.error(f"'{name}': Ungültige Anzahl Replikate '{data['replicas']}', es läuft eine Instanz.")
+                count = self.replica_counts[name] = 1
+            for index in range(1, count):
+                scripts[replica_name(name, index)] = replica_entry(name, data, index)
+        self.scripts = scripts
+
+    def _replica_names(self, name):
+        return [replica_name(name, index) for index in range(self.replica_counts.get(name, 1))]
+
+    def _init_script_state(self, name):
+        """Per-script state of a script added at runtime (a new replica instance)."""
+        self.runtimes[name] = ScriptRuntime(name)
+        self.resource_limits.update(self._load_resource_limits([name]))
+        self.alerts.update(self._load_alert_rules([name]))
+        if self.activation_check_id is not None: # On-demand listeners are running
+            self._start_activation(name)
+
+    def _drop_script_state(self, name):
+        if self.runtimes[name].run is not None:
+            self._record_run_end(name, None) # Its exit is no longer handled; the exit code is not known
+        runtime = self.runtimes.pop(name)
+        if runtime.channel is not None:
+            runtime.channel.close()
+        limits = self.resource_limits.pop(name, None)
+        if limits is not None and (limits.cgroup_cpu_percent or limits.cgroup_memory) and sys.platform.startswith('linux'):
+            self._remove_cgroup_when_empty(self.settings.get('cgroup_root', DEFAULT_CGROUP_ROOT), name)
+        for state in (self.alerts, self.schedule_pending):
+            state.pop(name, None)
+        self.metrics.remove(name)
+        self.active_folds.discard(name)
+        self.log_tailer.remove(name) # Its exit is no longer handled, which would do this
+        if self.control_server:
+            self.control_server.forget(name)
+        activation = self.activations.pop(name, None)
+        if activation is not None:
+            activation.stop()
+
+    def _remove_cgroup_when_empty(self, cgroup_root, name, attempt=0):
+        # The last processes of an exited or killed script may still be in its group for a moment (EBUSY)
+        if _remove_cgroup(cgroup_root, name) or attempt + 1 >= CGROUP_REMOVE_ATTEMPTS:
+            return
+        if self.is_running(name):
+            return # Started again; the group is in use and removed after that run
+        self.after(CGROUP_REMOVE_RETRY_MS << attempt, self._remove_cgroup_when_empty, cgroup_root, name, attempt + 1)
+
+    def scale_replicas(self, name, count):
+        """
+        Sets the number of instances of the replica set `name` at runtime (config.json keeps
+        its 'replicas'). New instances start right away if any instance of the set is running;
+        surplus instances, the highest indexes first, are stopped and removed.
+        """
+        old_count = self.replica_counts[name]
+        count = min(MAX_REPLICAS, max(1, int(count)))
+        if count == old_count:
+            return
+        running = any(self.is_running(instance) for instance in self._replica_names(name))
+        for index in range(count, old_count):
+            instance = replica_name(name, index)
+            if self.is_running(instance):
+                self.stop_script(instance)
+            self._remove_script_widgets(instance)
+            self._drop_script_state(instance)
+        self.replica_counts[name] = count
+        self._expand_replicas()
+        for index in range(old_count, count):
+            instance = replica_name(name, index)
+            self._init_script_state(instance)
+            self._add_script_widgets(instance)
+        if name in self.schedules:
+            self._rescale_schedules(name, old_count, count)
+        widgets = self.runtimes[name].widgets
+        if 'replicas_var' in widgets:
+            widgets['replicas_var'].set(str(count))
+        self.logger.info(f"Replikate von '{name}': {old_count} -> {count}.")
+        if running:
+            for index in range(old_count, count):
+                self.start_script(replica_name(name, index))
+
     def start_all(self):
         self.logger.info("Starte alle Skripte...")
         
         # Starte Skripte mit Verzögerung in einem separaten Thread
         def _start_all_threaded():
             for name in self.scripts:
-                self.start_script(name)
+                self.bus.post('start', (name,))
                 # Pause between starting scripts
                 if self.global_start_delay > 0:
                     self.logger.info(f"Warte {self.global_start_delay} Sekunden vor dem Start des nächsten Skripts...")
@@ -1198,25 +6050,32 @@ class BatchManager(tk.Tk):
 
     def stop_all(self):
         self.logger.info("Stoppe alle Skripte...")
-        for name in list(self.processes.keys()):
-            self.stop_script(name)
+        self.schedule_pending.clear() # Queued scheduled runs must not start while everything is being stopped
+        for name, runtime in list(self.runtimes.items()):
+            if runtime.process is not None:
+                self.stop_script(name)
 
     def update_status(self, name, text, color, pid=None):
+        runtime = self.runtimes.get(name)
+        if runtime is None: # Replica instance removed while it was still exiting
+            return
+        runtime.status = text
         # Update status for individual script tab
-        if name in self.script_ui_widgets and 'status_label' in self.script_ui_widgets[name]:
-            self.script_ui_widgets[name]['status_label'].config(text=f"Status: {text}", foreground=color)
+        widgets = runtime.widgets
+        if 'status_label' in widgets:
+            widgets['status_label'].config(text=f"Status: {text}", foreground=color)
             indicator_color = "green" if text == "Läuft" else "red"
             if "Fehler" in text: indicator_color = "darkred"
-            self.script_ui_widgets[name]['status_indicator'].config(bg=indicator_color)
-            self.script_ui_widgets[name]['status_indicator'].delete("all")
-            self.script_ui_widgets[name]['status_indicator'].create_oval(2,2,8,8, fill=indicator_color, outline=indicator_color)
-            if PSUTIL_AVAILABLE and 'pid_label' in self.script_ui_widgets[name]:
+            widgets['status_indicator'].config(bg=indicator_color)
+            widgets['status_indicator'].delete("all")
+            widgets['status_indicator'].create_oval(2,2,8,8, fill=indicator_color, outline=indicator_color)
+            if PSUTIL_AVAILABLE and 'pid_label' in widgets:
                 pid_text = f"PID: {pid}" if pid else ""
-                self.script_ui_widgets[name]['pid_label'].config(text=pid_text)
+                widgets['pid_label'].config(text=pid_text)
         
         # Update status for overview tab
-        if name in self.overview_script_widgets:
-            overview_widgets = self.overview_script_widgets[name]
+        overview_widgets = runtime.overview_widgets
+        if overview_widgets:
             overview_widgets['status_label'].config(text=text, foreground=color) # Foreground can still be changed dynamically
             indicator_color = "green" if text == "Läuft" else "red"
             if "Fehler" in text: indicator_color = "darkred"
@@ -1228,48 +6087,171 @@ class BatchManager(tk.Tk):
                 overview_widgets['pid_label'].config(text=pid_text)
 
         # NEW: Update overview switch state
-        is_running = (text == "Läuft")
-        if name in self.overview_switch_vars:
-            self.overview_switch_vars[name].set(is_running)
+        runtime.switch_var.set(text == "Läuft")
 
 
     def toggle_buttons(self, name, is_running):
+        runtime = self.runtimes.get(name)
+        if runtime is None or not runtime.widgets: # Replica instance removed while it was still exiting
+            return
+        widgets = runtime.widgets
         state_if_running = tk.DISABLED if is_running else tk.NORMAL
         state_if_stopped = tk.NORMAL if is_running else tk.DISABLED
 
-        self.script_ui_widgets[name]['start_button'].config(state=state_if_running)
-        self.script_ui_widgets[name]['stop_button'].config(state=state_if_stopped)
-        self.script_ui_widgets[name]['restart_button'].config(state=state_if_stopped)
+        widgets['start_button'].config(state=state_if_running)
+        widgets['stop_button'].config(state=state_if_stopped)
+        widgets['restart_button'].config(state=state_if_stopped)
 
         # Edit/Delete buttons are always enabled unless explicitly disabled (e.g., during reload)
-        if 'edit_button' in self.script_ui_widgets[name]:
-            self.script_ui_widgets[name]['edit_button'].config(state=tk.NORMAL)
-        if 'delete_button' in self.script_ui_widgets[name]:
-            self.script_ui_widgets[name]['delete_button'].config(state=tk.NORMAL)
+        if 'edit_button' in widgets:
+            widgets['edit_button'].config(state=tk.NORMAL)
+        if 'delete_button' in widgets:
+            widgets['delete_button'].config(state=tk.NORMAL)
 
 
     def clear_output(self, name):
+        runtime = self.runtimes[name]
         # Clear individual tab widget
-        widget = self.script_ui_widgets[name]['output_widget']
+        widget = runtime.widgets['output_widget']
         widget.configure(state='normal')
         widget.delete('1.0', tk.END)
         widget.configure(state='disabled')
 
         # Also clear the overview tab widget
-        if name in self.overview_script_widgets and 'overview_output_widget' in self.overview_script_widgets[name]:
-            overview_widget = self.overview_script_widgets[name]['overview_output_widget']
+        if 'overview_output_widget' in runtime.overview_widgets:
+            overview_widget = runtime.overview_widgets['overview_output_widget']
             overview_widget.configure(state='normal')
             overview_widget.delete('1.0', tk.END)
             overview_widget.configure(state='disabled')
             
-        self.script_raw_output[name].clear()
+        runtime.output.clear()
+        runtime.view_index = array('l')
+        self.active_folds.discard(name)
+        if self.control_server:
+            self.control_server.forget(name)
+        self._update_level_counts(name)
         self.logger.info(f"Ausgabefenster für '{name}' geleert.")
 
     def copy_output(self, name):
-        widget = self.script_ui_widgets[name]['output_widget']
+        """Copies the selection, or without one the visible lines; whole outputs go through export_output_dialog."""
+        widget = self.runtimes[name].widgets['output_widget']
+        if widget.tag_ranges('sel'):
+            text = widget.get('sel.first', 'sel.last')
+        else:
+            text = widget.get('@0,0 linestart', f"@0,{widget.winfo_height()} lineend")
         self.clipboard_clear()
-        self.clipboard_append(widget.get('1.0', tk.END))
-        self.logger.info(f"Ausgabe von '{name}' in die Zwischenablage kopiert.")
+        self.clipboard_append(text)
+        self.logger.info(f"{text.count(chr(10)) + 1} Zeilen von '{name}' in die Zwischenablage kopiert.")
+
+    def export_output_dialog(self, name):
+        """Asks for time range, filters and format, then streams the export on a background thread."""
+        dialog = tk.Toplevel(self)
+        dialog.title(f"Ausgabe exportieren: {name}")
+        dialog.transient(self)
+
+        dialog_frame = ttk.Frame(dialog, padding="15")
+        dialog_frame.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(dialog_frame, text="Von:", font=self.DEFAULT_FONT).grid(row=0, column=0, sticky="w", pady=5)
+        from_entry = ttk.Entry(dialog_frame, width=20, font=self.DEFAULT_FONT)
+        from_entry.grid(row=0, column=1, sticky="ew", pady=5)
+        ttk.Label(dialog_frame, text="Bis:", font=self.DEFAULT_FONT).grid(row=1, column=0, sticky="w", pady=5)
+        to_entry = ttk.Entry(dialog_frame, width=20, font=self.DEFAULT_FONT)
+        to_entry.grid(row=1, column=1, sticky="ew", pady=5)
+        Tooltip(from_entry, "Leer = ab der ersten Zeile; HH:MM[:SS] oder JJJJ-MM-TT HH:MM[:SS]")
+        Tooltip(to_entry, "Leer = bis zur letzten Zeile; HH:MM[:SS] oder JJJJ-MM-TT HH:MM[:SS]")
+
+        ttk.Label(dialog_frame, text="Format:", font=self.DEFAULT_FONT).grid(row=2, column=0, sticky="w", pady=5)
+        format_var = tk.StringVar(value="Text")
+        ttk.Combobox(dialog_frame, textvariable=format_var, values=list(EXPORT_FORMATS), width=12, state="readonly").grid(row=2, column=1, sticky="w", pady=5)
+
+        use_filters_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(dialog_frame, text=" Filter des Tabs anwenden (Suche, Level, Quelle)", variable=use_filters_var).grid(row=3, column=0, columnspan=2, sticky="w", pady=5)
+
+        progress_bar = ttk.Progressbar(dialog_frame, mode='determinate', length=280)
+        progress_label = ttk.Label(dialog_frame, text="", font=self.DEFAULT_FONT)
+        button_frame = ttk.Frame(dialog_frame)
+        button_frame.grid(row=6, column=0, columnspan=2, pady=10)
+        cancel = threading.Event()
+
+        def start_export():
+            now = time.time()
+            bounds = []
+            for entry in (from_entry, to_entry):
+                text = entry.get().strip()
+                bounds.append(parse_jump_time(text, now) if text else None)
+                if text and bounds[-1] is None:
+                    messagebox.showerror("Fehler", f"Ungültige Zeitangabe: '{text}'", parent=dialog)
+                    return
+            export_format = format_var.get()
+            path = filedialog.asksaveasfilename(
+                parent=dialog,
+                title="Ausgabe exportieren",
+                defaultextension=EXPORT_FORMATS[export_format],
+                initialfile=f"{name}_{time.strftime('%Y%m%d_%H%M%S')}{EXPORT_FORMATS[export_format]}",
+                filetypes=[(export_format, f"*{EXPORT_FORMATS[export_format]}"), ("All files", "*.*")]
+            )
+            if not path:
+                return
+            runtime = self.runtimes[name]
+            store = runtime.output
+            start = store.index_at_time(bounds[0]) if bounds[0] is not None else 0
+            stop = store.index_at_time(bounds[1]) if bounds[1] is not None else len(store)
+            filters = {}
+            if use_filters_var.get():
+                widgets = runtime.widgets
+                source = widgets['source_filter_var'].get()
+                filters = {
+                    'min_level': LEVEL_FILTERS.get(widgets['level_filter_var'].get(), LEVEL_NONE),
+                    'source': None if source == ALL_SOURCES else source,
+                    'search': widgets['search_entry'].get().strip(),
+                }
+            snapshot = store.snapshot() # Later output does not change the export
+            for child in button_frame.winfo_children():
+                child.destroy()
+            progress_bar.grid(row=4, column=0, columnspan=2, sticky="ew", pady=(10, 2))
+            progress_label.grid(row=5, column=0, columnspan=2, sticky="w")
+            ttk.Button(button_frame, text=" Abbrechen", command=cancel.set).pack(side=tk.LEFT, padx=5)
+            dialog.protocol("WM_DELETE_WINDOW", cancel.set)
+            threading.Thread(target=self._run_export, args=(name, snapshot, path, export_format, start, stop, filters, cancel, dialog,
+                                                            progress_bar, progress_label), daemon=True).start()
+
+        ttk.Button(button_frame, text=" Exportieren...", command=start_export).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text=" Abbrechen", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+
+        dialog.update_idletasks()
+        x = self.winfo_x() + self.winfo_width() // 2 - dialog.winfo_width() // 2
+        y = self.winfo_y() + self.winfo_height() // 2 - dialog.winfo_height() // 2
+        dialog.geometry(f"+{x}+{y}")
+        from_entry.focus_set()
+
+    def _run_export(self, name, snapshot, path, export_format, start, stop, filters, cancel, dialog, progress_bar, progress_label):
+        """Export thread: writes the file and reports progress to the dialog through the UI bus."""
+        def progress(scanned, total):
+            self.bus.call(self._show_export_progress, dialog, progress_bar, progress_label, scanned, total)
+        try:
+            written = write_output_export(snapshot, path, export_format, start, stop, progress=progress, cancel=cancel, **filters)
+        except Exception as e:
+            self.logger.error(f"Fehler beim Exportieren der Ausgabe von '{name}': {e}")
+            self.bus.call(functools.partial(messagebox.showerror, "Fehler", f"Ausgabe konnte nicht exportiert werden: {e}", parent=dialog))
+            self.bus.call(dialog.destroy)
+            return
+        if cancel.is_set():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.logger.info(f"Export der Ausgabe von '{name}' abgebrochen.")
+        else:
+            self.logger.info(f"Ausgabe von '{name}' exportiert: {path} ({written} Zeilen)")
+        self.bus.call(dialog.destroy)
+
+    def _show_export_progress(self, dialog, progress_bar, progress_label, scanned, total):
+        try:
+            progress_bar.configure(maximum=max(total, 1), value=scanned)
+            progress_label.configure(text=f"{scanned:,} / {total:,} Zeilen".replace(",", "."))
+        except tk.TclError:
+            pass # Dialog already closed
 
     def open_config(self):
         if os.path.exists(self.full_config_path):
@@ -1282,12 +6264,13 @@ class BatchManager(tk.Tk):
     @staticmethod
     def _initial_config_load(path):
         """
-        Static method to load script configurations and global delay from config.json.
-        Creates an example config if none exists.
+        Static method to load script configurations, global delay and the remaining
+        settings from config.json. Creates an example config if none exists.
         """
         scripts = {}
         global_delay = 2 # Default value if not found
         autostart_enabled = True # Default to True to maintain old behavior
+        settings = {} # All other top-level keys (control_port, ...), preserved on save
         try:
             if os.path.exists(path):
                 with open(path, 'r', encoding='utf-8') as f:
@@ -1295,6 +6278,8 @@ class BatchManager(tk.Tk):
                     scripts = config_data.get('scripts', {})
                     global_delay = config_data.get('global_start_delay_seconds', 2)
                     autostart_enabled = config_data.get('autostart_enabled', True)
+                    settings = {key: value for key, value in config_data.items()
+                                if key not in ('scripts', 'global_start_delay_seconds', 'autostart_enabled')}
                 logging.getLogger("BatchManager").info(f"Konfigurationsdatei '{path}' erfolgreich geladen.")
             else:
                 logging.getLogger("BatchManager").warning(f"Konfigurationsdatei '{path}' nicht gefunden. Erstelle eine Beispielkonfiguration.")
@@ -1319,7 +6304,7 @@ class BatchManager(tk.Tk):
             logging.getLogger("BatchManager").error(f"Ein unerwarteter Fehler ist beim Laden oder Erstellen der Konfigurationsdatei aufgetreten: {e}")
             logging.getLogger("BatchManager").info("Verwende eine leere Skriptliste.")
             scripts = {}
-        return scripts, global_delay, autostart_enabled
+        return scripts, global_delay, autostart_enabled, settings
 
     def _load_config_from_file(self):
         """Instance method for loading config, delegates to the static method."""
@@ -1329,9 +6314,10 @@ class BatchManager(tk.Tk):
         """Saves the current scripts and global_start_delay to config.json."""
         try:
             config_data = {
-                'scripts': self.scripts,
+                'scripts': {name: data for name, data in self.scripts.items() if 'replica_of' not in data},
                 'global_start_delay_seconds': self.global_start_delay,
-                'autostart_enabled': self.autostart_enabled_var.get()
+                'autostart_enabled': self.autostart_enabled_var.get(),
+                **self.settings
             }
             with open(self.full_config_path, 'w', encoding='utf-8') as f:
                 json.dump(config_data, f, indent=4)
@@ -1351,7 +6337,7 @@ class BatchManager(tk.Tk):
         self.logger.info("Lade Skripte aus der Konfigurationsdatei neu...")
         
         # Load fresh configuration using the instance method which delegates to static loader
-        new_scripts, new_global_start_delay, new_autostart_enabled = self._load_config_from_file()
+        new_scripts, new_global_start_delay, new_autostart_enabled, new_settings = self._load_config_from_file()
 
         if not new_scripts:
             self.logger.warning("Keine Skripte in der Konfiguration gefunden. Manager bleibt im leeren Zustand.")
@@ -1363,7 +6349,18 @@ class BatchManager(tk.Tk):
             return
 
         # Update internal state with new configuration
+        self._stop_activations()
         self.scripts = new_scripts
+        self.replica_counts = {} # Replica counts changed at runtime fall back to config.json
+        self._expand_replicas()
+        self.settings = new_settings
+        self._start_log_file_listener()
+        self.notifications.stop()
+        self._start_notification_dispatcher()
+        self.jobs.configure(self.settings.get('jobs', {}))
+        self.resource_limits = self._load_resource_limits()
+        self.alerts = self._load_alert_rules()
+        self._open_history()
         self.global_start_delay = new_global_start_delay
         self.autostart_enabled_var.set(new_autostart_enabled)
         if hasattr(self, 'delay_entry') and self.delay_entry:
@@ -1371,22 +6368,40 @@ class BatchManager(tk.Tk):
             self.delay_entry.insert(0, str(self.global_start_delay))
 
         # Reset all dynamic states
-        self.processes = {}
-        self.threads = {}
-        self.script_raw_output = {name: [] for name in self.scripts}
-        self.cpu_history = {name: [0.0] * 20 for name in self.scripts}
-        self.autoscroll_vars = {name: tk.BooleanVar(value=True) for name in self.scripts} # Re-initialize autoscroll_vars
-        self.overview_switch_vars = {name: tk.BooleanVar(value=False) for name in self.scripts} # Re-initialize switch vars
-        self.overview_script_widgets = {} # Clear overview widgets before recreating
-        self.script_ui_widgets = {} # Clear script UI widgets before recreating
+        for runtime in list(self.runtimes.values()):
+            if runtime.run is not None:
+                self._record_run_end(runtime.name, None) # Still running after stop_all(); the exit code is not known
+            if runtime.channel is not None:
+                runtime.channel.close()
+        self.metrics.prune(self.scripts)
+        self.runtimes = {name: ScriptRuntime(name) for name in self.scripts} # Output channels are recreated with the new settings on the next start
+        self.active_folds = set()
+        self.ansi_tags = {}
 
         # Recreate all UI widgets to reflect new script list
         self.create_widgets()
+        self._init_schedules()
+        self._start_activations()
         self.autostart_scripts()
 
     def on_closing(self):
         if messagebox.askyesno("Beenden", "Möchten Sie wirklich beenden? Alle laufenden Skripte werden gestoppt."):
             self.stop_all()
+            self._stop_activations()
+            if self.control_server:
+                self.control_server.stop()
+            if self.metrics_exporter:
+                self.metrics_exporter.stop()
+            self.notifications.stop()
+            self.jobs.stop()
+            if self.history:
+                for runtime in list(self.runtimes.values()):
+                    if runtime.run is not None:
+                        self._record_run_end(runtime.name, None) # Killed with the manager; the exit code is not known
+                self.history.stop()
+            if self.log_file_listener:
+                self.log_file_listener.stop()
+            self.log_tailer.stop()
             time.sleep(0.1) # Give a short moment for termination attempts
             self.destroy()
         else:
@@ -1567,9 +6582,8 @@ class BatchManager(tk.Tk):
 
         try:
             # Update internal scripts dictionary
-            if new_name != old_name:
-                del self.scripts[old_name]
-            self.scripts[new_name] = {"path": new_path, "autostart": new_autostart}
+            old_data = self.scripts.pop(old_name) if new_name != old_name else self.scripts[old_name]
+            self.scripts[new_name] = {**old_data, "path": new_path, "autostart": new_autostart} # Keep schedule etc.
 
 
 
@@ -1585,7 +6599,7 @@ class BatchManager(tk.Tk):
             messagebox.showerror("Fehler", f"Fehler beim Speichern der Änderungen: {e}", parent=dialog)
 
     def delete_script(self, name):
-        if name in self.processes and self.processes[name].poll() is None:
+        if self.is_running(name):
             messagebox.showwarning("Warnung", f"'{name}' läuft noch. Bitte stoppen Sie es, bevor Sie es löschen.", parent=self)
             self.logger.warning(f"Versuch, laufendes Skript '{name}' zu löschen, abgelehnt.")
             return
@@ -1609,15 +6623,224 @@ class BatchManager(tk.Tk):
             self.logger.info(f"Löschvorgang für Skript '{name}' abgebrochen.")
 
 
+# --- Command-line client ("batch_manager.py ctl ...") ---
+def _format_bytes(value):
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+
+
+def _format_uptime(seconds):
+    seconds = int(seconds)
+    if seconds < 3600:
+        return f"{seconds // 60}:{seconds % 60:02d}"
+    if seconds < 86400:
+        return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 86400}d {seconds // 3600 % 24}h"
+
+
+def _format_script_table(rows):
+    scheduled = any(row.get('next_run') for row in rows)
+    lines = [f"{'NAME':<30} {'STATUS':<10} {'PID':>8} {'CPU%':>7} {'RSS':>10} {'UPTIME':>9}" + ("  NEXT RUN" if scheduled else "")]
+    for row in rows:
+        if 'replica_set' in row: # Replica set: summed CPU/RSS and running instances, its instances follow indented
+            name = f"{row['replica_set']} [{row['healthy']}/{row['replicas']}]"
+        else:
+            name = ("  " if 'replica_of' in row else "") + row['name']
+        status = 'läuft' if row['running'] else 'bei Bedarf' if 'activation' in row else 'gestoppt'
+        line = (
+            f"{name[:30]:<30} {status:<10} "
+            f"{row['pid'] or '':>8} {row['cpu']:>7.1f} {_format_bytes(row['rss']) if row['rss'] else '':>10} "
+            f"{time.strftime('%H:%M:%S', time.gmtime(row['uptime'])) if row['running'] and 'replica_set' not in row else '':>9}"
+        )
+        if row.get('next_run'):
+            line += "  " + time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row['next_run']))
+        if row.get('memory_growth_mb_per_hour') is not None:
+            line += f"  Speicherleck? {row['memory_growth_mb_per_hour']:+.0f} MB/h"
+        if row.get('activation') and row['activation']['first_request_ms'] is not None:
+            line += f"  Kaltstart {row['activation']['first_request_ms']:.0f} ms"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _format_history_runs(runs):
+    lines = [f"{'SKRIPT':<30} {'START':<19} {'LAUFZEIT':>9} {'EXIT':>5} {'MAX CPU%':>8} {'MAX RSS':>10} {'ZEILEN':>8}"]
+    for run in runs:
+        exit_code = '' if run['exit_code'] is None else run['exit_code']
+        lines.append(f"{run['script'][:30]:<30} {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run['started']))} "
+                     f"{run['ended'] - run['started']:>8.1f}s {exit_code:>5} {run['peak_cpu'] or 0:>8.1f} "
+                     f"{_format_bytes(run['peak_rss']) if run['peak_rss'] else '':>10} {run['output_lines'] or 0:>8}")
+    return "\n".join(lines)
+
+
+def _format_history_stats(stats):
+    lines = [f"{'SKRIPT':<30} {'LÄUFE':>8} {'FEHLER':>8} {'Ø LAUFZEIT':>11} {'MAX LAUFZEIT':>13}"]
+    for row in stats:
+        lines.append(f"{row['script'][:30]:<30} {row['runs']:>8} {row['failures']:>8} {row['avg_runtime']:>10.1f}s {row['max_runtime']:>12.1f}s")
+    return "\n".join(lines)
+
+
+def _format_job_table(jobs, stats):
+    lines = [f"{'ID':>6} {'VORLAGE':<20} {'STATUS':<15} {'PRIO':>5} {'VERS.':>5} {'EXIT':>5}  PARAMETER"]
+    for job in jobs:
+        params = " ".join(f"{key}={value}" for key, value in job['params'].items())
+        exit_code = '' if job['exit_code'] is None else job['exit_code']
+        lines.append(f"{job['id']:>6} {job['template'][:20]:<20} {JOB_STATE_LABELS.get(job['state'], job['state']):<15} "
+                     f"{job['priority']:>5} {job['attempts']:>5} {exit_code:>5}  {params}")
+    lines.append("")
+    lines.append(_format_job_stats(stats))
+    return "\n".join(lines)
+
+
+def _format_job_stats(stats):
+    return (f"Warteschlange: {stats['queued']}   Laufend: {stats['running']}/{stats['workers']}   "
+            f"Erfolgreich: {stats['succeeded']}   Fehlgeschlagen: {stats['failed']}   Abgebrochen: {stats['cancelled']}   "
+            f"Durchsatz: {stats['throughput_per_minute']:.1f}/min   "
+            f"Wartezeit p50/p95: {stats['wait_p50_seconds']:.1f} s / {stats['wait_p95_seconds']:.1f} s")
+
+
+def _ctl_request(sock, request):
+    _send_json_frame(sock, request)
+    frame = _recv_frame(sock)
+    if frame is None:
+        raise ConnectionError("Verbindung vom Manager geschlossen.")
+    return json.loads(frame[1].decode('utf-8'))
+
+
+def run_ctl(argv, config_path):
+    """Entry point for "batch_manager.py ctl"; returns the process exit code."""
+    parser = argparse.ArgumentParser(prog="batch_manager.py ctl", description="Steuert einen laufenden Batch Script Manager.")
+    parser.add_argument("--host", default=None, help="Adresse der Steuerungs-Schnittstelle (Standard: aus config.json)")
+    parser.add_argument("--port", type=int, default=None, help="Port der Steuerungs-Schnittstelle (Standard: aus config.json)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="Status aller Skripte anzeigen")
+    commands.add_parser("diag", help="Diagnosedaten (Hot Paths, Queues, Profiler) als JSON ausgeben")
+    for command in ("start", "stop", "restart"):
+        commands.add_parser(command, help=f"Skript {command}").add_argument("name")
+    scale_parser = commands.add_parser("scale", help="Anzahl der Instanzen eines Replikat-Sets ändern")
+    scale_parser.add_argument("name")
+    scale_parser.add_argument("replicas", type=int)
+    tail_parser = commands.add_parser("tail", help="Ausgabe eines Skripts anzeigen")
+    tail_parser.add_argument("-f", "--follow", action="store_true", help="Neue Ausgabe fortlaufend anzeigen")
+    tail_parser.add_argument("-n", "--lines", type=int, default=10, help="Anzahl der vorhandenen Zeilen (Standard: 10)")
+    tail_parser.add_argument("name")
+    top_parser = commands.add_parser("top", help="Live CPU/RAM aller Skripte anzeigen")
+    top_parser.add_argument("-i", "--interval", type=float, default=0.5, help="Aktualisierungsintervall in Sekunden (Standard: 0.5)")
+    submit_parser = commands.add_parser("submit", help="Job aus einer Vorlage in die Warteschlange stellen")
+    submit_parser.add_argument("-p", "--priority", type=int, default=None, help="Priorität (höher läuft zuerst; Standard: aus der Vorlage)")
+    submit_parser.add_argument("template")
+    submit_parser.add_argument("params", nargs="*", metavar="name=wert")
+    commands.add_parser("jobs", help="Jobs und Warteschlangen-Statistik anzeigen")
+    commands.add_parser("cancel-job", help="Job abbrechen").add_argument("id", type=int)
+    history_parser = commands.add_parser("history", help="Vergangene Läufe aus dem Verlauf anzeigen")
+    history_parser.add_argument("name", nargs="?", help="Nur dieses Skript")
+    history_parser.add_argument("-d", "--days", type=float, default=None, help="Nur die letzten N Tage")
+    history_parser.add_argument("--failures", action="store_true", help="Nur fehlgeschlagene Läufe (Exit-Code ungleich 0)")
+    history_parser.add_argument("--stats", action="store_true", help="Läufe, Fehler und Laufzeiten je Skript statt einzelner Läufe")
+    history_parser.add_argument("-n", "--limit", type=int, default=50, help="Maximale Anzahl Läufe (Standard: 50)")
+    args = parser.parse_args(argv)
+
+    _, _, _, settings = BatchManager._initial_config_load(config_path) if os.path.exists(config_path) else ({}, 0, False, {})
+    host = args.host or settings.get('control_host', "127.0.0.1")
+    port = args.port or settings.get('control_port', DEFAULT_CONTROL_PORT)
+
+    try:
+        sock = socket.create_connection((host, port), timeout=5)
+    except OSError as e:
+        print(f"Keine Verbindung zum Manager auf {host}:{port}: {e}", file=sys.stderr)
+        return 2
+    sock.settimeout(None)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    try:
+        if args.command == "status":
+            reply = _ctl_request(sock, {'op': 'status'})
+            if reply.get('ok'):
+                print(_format_script_table(reply['scripts']))
+        elif args.command == "diag":
+            reply = _ctl_request(sock, {'op': 'diagnostics'})
+            if reply.get('ok'):
+                print(json.dumps(reply['diagnostics'], indent=2))
+        elif args.command in ("start", "stop", "restart"):
+            reply = _ctl_request(sock, {'op': args.command, 'name': args.name})
+            if reply.get('ok'):
+                print(f"'{args.name}': {args.command} gesendet.")
+        elif args.command == "scale":
+            reply = _ctl_request(sock, {'op': 'scale', 'name': args.name, 'replicas': args.replicas})
+            if reply.get('ok'):
+                print(f"'{args.name}': {args.replicas} Replikate angefordert.")
+        elif args.command == "submit":
+            try:
+                params = parse_job_params(args.params)
+            except ValueError as e:
+                print(f"Fehler: {e}", file=sys.stderr)
+                return 1
+            reply = _ctl_request(sock, {'op': 'submit', 'template': args.template, 'params': params, 'priority': args.priority})
+            if reply.get('ok'):
+                print(f"Job #{reply['job']['id']} eingereiht.")
+        elif args.command == "jobs":
+            reply = _ctl_request(sock, {'op': 'jobs'})
+            if reply.get('ok'):
+                print(_format_job_table(reply['jobs'], reply['stats']))
+        elif args.command == "cancel-job":
+            reply = _ctl_request(sock, {'op': 'cancel_job', 'id': args.id})
+            if reply.get('ok'):
+                print(f"Job #{args.id} abgebrochen.")
+        elif args.command == "history":
+            reply = _ctl_request(sock, {'op': 'history', 'name': args.name, 'days': args.days, 'failures': args.failures,
+                                        'stats': args.stats, 'limit': args.limit})
+            if reply.get('ok'):
+                print(_format_history_stats(reply['stats']) if args.stats else _format_history_runs(reply['runs']))
+        elif args.command == "tail":
+            reply = _ctl_request(sock, {'op': 'tail', 'name': args.name, 'lines': args.lines, 'follow': args.follow})
+            if reply.get('ok'):
+                out = sys.stdout
+                while True:
+                    frame = _recv_frame(sock)
+                    if frame is None:
+                        break
+                    if frame[0] == FRAME_OUTPUT:
+                        out.write(_decode_output_frame(frame[1])[1])
+                        out.flush()
+        else: # top
+            reply = _ctl_request(sock, {'op': 'top', 'interval': args.interval})
+            if reply.get('ok'):
+                if not reply.get('psutil'):
+                    print("Hinweis: psutil ist im Manager nicht verfügbar, CPU/RAM bleiben leer.", file=sys.stderr)
+                while True:
+                    frame = _recv_frame(sock)
+                    if frame is None:
+                        break
+                    update = json.loads(frame[1].decode('utf-8'))
+                    sys.stdout.write("\x1b[H\x1b[2J" + time.strftime("%H:%M:%S") + "  " + BatchManager.APP_NAME + "\n\n"
+                                     + _format_script_table(update['top']) + "\n")
+                    sys.stdout.flush()
+        if not reply.get('ok'):
+            print(f"Fehler: {reply.get('error')}", file=sys.stderr)
+            return 1
+        return 0
+    except KeyboardInterrupt:
+        return 0
+    except (OSError, ConnectionError) as e:
+        print(f"Verbindungsfehler: {e}", file=sys.stderr)
+        return 2
+    finally:
+        sock.close()
+
+
 # --- Main Entry Point ---
 if __name__ == "__main__":
     # Determine the config file path
     script_directory = os.path.dirname(os.path.abspath(__file__))
     config_file_path = os.path.join(script_directory, "config.json")
+
+    if len(sys.argv) > 1 and sys.argv[1] == "ctl":
+        sys.exit(run_ctl(sys.argv[2:], config_file_path))
     
     # Load initial configuration
-    scripts_config, global_delay, autostart_enabled = BatchManager._initial_config_load(config_file_path)
+    scripts_config, global_delay, autostart_enabled, settings = BatchManager._initial_config_load(config_file_path)
     
     # Create and run the application
-    app = BatchManager(scripts_config, global_delay, autostart_enabled, config_file_path)
+    app = BatchManager(scripts_config, global_delay, autostart_enabled, config_file_path, settings)
     app.mainloop()
@@ -0,0 +1,207 @@
+"""
+Headless driver for the BatchManager supervision core.
+
+The real BatchManager is a tk.Tk subclass. For benchmarks we reuse its core methods
+unchanged on a plain object whose widgets are stubs that only count what would have
+been sent to Tk, and whose after() is a small timer heap driven by run().
+"""
+import collections
+import heapq
+import itertools
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch_manager # noqa: E402
+from batch_manager import BatchManager # noqa: E402
+
+# BatchManager methods that make up the supervision core and run without a display
+CORE_METHODS = (
+    '_init_supervisor_state', '_setup_logger', '_start_log_file_listener', '_start_notification_dispatcher', '_send_notification', '_spawn_script_process',
+    'start_script', 'enqueue_output', '_ingest_file_line', '_ingest_line', 'handle_process_exit', 'process_queue', 'output_pending', '_output_channel', 'process_log_queue',
+    '_update_source_filter', '_fold_widgets', '_update_fold', '_close_fold', '_apply_ansi_styles', '_ansi_tag', '_apply_keyword_highlighting', '_apply_search_highlighting', 'apply_filter_and_highlight',
+    '_update_level_counts', 'update_cpu_usage', '_sample_script_tree', '_draw_sparkline', 'stop_script', 'restart_script', 'stop_all',
+    '_history_path', '_open_history', '_record_run_end', '_load_resource_limits', '_check_resource_limits', '_set_tree_priority', '_load_alert_rules', '_fire_alerts', '_new_memory_trend', '_check_memory_trend',
+    '_execute_taskkill', '_kill_process_tree', '_find_pid_by_port', 'update_status', 'toggle_buttons', 'clear_output',
+    '_load_config_from_file', '_reload_ui', 'autostart_scripts',
+    '_init_schedules', '_schedule_state_path', '_load_schedule_state', '_save_schedule_state', '_push_schedule',
+    '_rescale_schedules', '_arm_schedule_timer', '_schedule_tick', '_run_scheduled', '_update_schedule_label',
+    'is_running', 'script_snapshots', '_expand_replicas', '_replica_names', '_script_env', '_process_port', '_start_activations', '_start_activation', '_stop_activations', '_check_activation_idle', '_init_script_state', '_drop_script_state', '_remove_cgroup_when_empty', 'scale_replicas',
+)
+
+
+class UISink:
+    """Collects what the stub widgets received instead of drawing it."""
+    def __init__(self):
+        self.calls = collections.Counter()
+        self.inserted_lines = 0
+        self.inserted_chars = 0
+        self.measure_latency = False
+        self.latencies = [] # Seconds between a line being printed and reaching its output widget
+
+
+class StubVar:
+    """Stand-in for tk.BooleanVar/StringVar."""
+    def __init__(self, master=None, value=None, name=None):
+        self._value = value
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        self._value = value
+
+    def trace_add(self, mode, callback):
+        return ""
+
+
+class StubWidget:
+    """Accepts any widget call and only counts it."""
+    def __init__(self, sink):
+        self._sink = sink
+
+    def __getattr__(self, attribute):
+        sink = self._sink
+
+        def call(*args, **kwargs):
+            sink.calls[attribute] += 1
+            if attribute.startswith('winfo_'):
+                return 0
+            if attribute.startswith('create_'):
+                return 1
+            return None
+        return call
+
+
+class StubEntry(StubWidget):
+    def __init__(self, sink, text=""):
+        super().__init__(sink)
+        self.text = text
+
+    def get(self):
+        return self.text
+
+    def delete(self, first, last=None):
+        self.text = ""
+
+
+class StubText(StubWidget):
+    """Minimal tk.Text: tracks the line count so index() answers are plausible."""
+    def __init__(self, sink):
+        super().__init__(sink)
+        self.lines = 0
+
+    def insert(self, index, text, *tags):
+        sink = self._sink
+        sink.calls['insert'] += 1
+        newlines = text.count('\n')
+        self.lines += newlines
+        sink.inserted_lines += newlines
+        sink.inserted_chars += len(text)
+        if sink.measure_latency:
+            now = time.time()
+            for line in text.splitlines():
+                try:
+                    sink.latencies.append(now - float(line.split(' ', 1)[0]))
+                except ValueError:
+                    pass
+
+    def delete(self, first, last=None):
+        self._sink.calls['delete'] += 1
+        if first in ('1.0', 1.0):
+            if isinstance(last, str) and last.endswith('.0'):
+                self.lines -= int(last.split('.')[0]) - 1
+            else:
+                self.lines = 0
+
+    def index(self, spec):
+        return f"{self.lines + 1}.0"
+
+    def get(self, first, last=None):
+        return ""
+
+
+class HeadlessManager:
+    """BatchManager core without Tk; call run() to process after() callbacks."""
+    def __init__(self, scripts, config_path, settings=None):
+        self.sink = UISink()
+        self._timers = []
+        self._timer_ids = itertools.count()
+        self._cancelled = set()
+        self._timers_lock = threading.Lock()
+        self.actual_monospace_font = self.DEFAULT_MONOSPACE_FONT
+        self._init_supervisor_state(scripts, 0, False, config_path, settings or {})
+        self.create_widgets()
+        self._init_schedules()
+
+    # --- Tk replacements ---
+    def after(self, ms, func=None, *args):
+        timer_id = next(self._timer_ids)
+        with self._timers_lock:
+            heapq.heappush(self._timers, (time.monotonic() + ms / 1000.0, timer_id, func, args))
+        return f"after#{timer_id}"
+
+    def after_cancel(self, after_id):
+        self._cancelled.add(int(after_id.split('#')[1]))
+
+    def run(self, seconds=None, until=None):
+        """Runs due callbacks until `until()` is true or `seconds` elapsed. Returns whether `until` was met."""
+        deadline = time.monotonic() + seconds if seconds is not None else None
+        while True:
+            if until is not None and until():
+                return True
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                return until is None
+            with self._timers_lock:
+                due = self._timers[0][0] if self._timers else now + 0.005
+                entry = heapq.heappop(self._timers) if due <= now else None
+            if entry is None:
+                time.sleep(min(max(due - now, 0.0), 0.005))
+                continue
+            _, timer_id, func, args = entry
+            if timer_id in self._cancelled:
+                self._cancelled.discard(timer_id)
+                continue
+            func(*args)
+
+    def create_widgets(self):
+        for name in self.scripts:
+            self._add_script_widgets(name)
+        self.manager_log_text = StubText(self.sink)
+        self.process_tree = None
+
+    def _add_script_widgets(self, name):
+        sink = self.sink
+        runtime = self.runtimes[name]
+        runtime.widgets = {
+            'output_widget': StubText(sink), 'search_entry': StubEntry(sink),
+            'level_filter_var': StubVar(value="Alle"), 'level_count_label': StubWidget(sink),
+            'source_filter_var': StubVar(value="Alle"), 'source_filter': StubWidget(sink),
+            'status_label': StubWidget(sink), 'status_indicator': StubWidget(sink),
+            'pid_label': StubWidget(sink), 'cpu_label': StubWidget(sink),
+            'sparkline_canvas': StubWidget(sink), 'start_button': StubWidget(sink),
+            'stop_button': StubWidget(sink), 'restart_button': StubWidget(sink),
+        }
+        runtime.overview_widgets = {
+            'status_indicator': StubWidget(sink), 'status_label': StubWidget(sink),
+            'pid_label': StubWidget(sink), 'cpu_label': StubWidget(sink),
+            'sparkline_canvas': StubWidget(sink), 'overview_output_widget': StubText(sink),
+        }
+
+    def _remove_script_widgets(self, name):
+        runtime = self.runtimes[name]
+        runtime.widgets, runtime.overview_widgets = {}, {}
+
+
+for _name in CORE_METHODS:
+    setattr(HeadlessManager, _name, BatchManager.__dict__[_name])
+for _name, _value in vars(BatchManager).items():
+    if _name.isupper():
+        setattr(HeadlessManager, _name, _value)
+
+# Variables are created inside the shared state initializer; there is no Tk root here.
+batch_manager.tk.BooleanVar = StubVar
@@ -0,0 +1,145 @@
+"""
+Benchmark runner for the Batch Script Manager supervision core.
+
+    python benchmarks/run_benchmarks.py                      # run all, compare with baseline.json
+    python benchmarks/run_benchmarks.py -s output_flood      # run selected scenarios
+    python benchmarks/run_benchmarks.py --save-baseline      # store the results as the new baseline
+    python benchmarks/run_benchmarks.py --threshold 0.1      # fail on >10% regressions
+
+Every scenario runs in a fresh interpreter so peak RSS and CPU time belong to that
+scenario alone. The exit code is 1 if any metric regressed beyond the threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+# Metrics that describe the workload rather than its performance
+INFORMATIONAL_METRICS = {'lines', 'records', 'jobs', 'runs', 'pane_lines', 'scripts', 'cycles', 'processes', 'distinct_ports', 'scripts_after', 'requests', 'activations', 'failures', 'flood_hidden', 'flood_dropped', 'samples', 'wall_seconds', 'skipped'}
+
+
+def peak_rss_mb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+    except (ImportError, AttributeError):
+        return None
+
+
+def run_child(name, scale):
+    """Runs one scenario in this process and prints its metrics as JSON."""
+    sys.path.insert(0, BENCHMARK_DIR)
+    from scenarios import run_scenario
+    metrics = run_scenario(name, scale)
+    if 'skipped' not in metrics:
+        metrics['peak_rss_mb'] = peak_rss_mb()
+    print(json.dumps(metrics))
+
+
+def run_isolated(name, scale):
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", name, "--scale", str(scale)],
+        capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        return {'error': completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else f"exit {completed.returncode}"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline, threshold):
+    """Returns a list of (scenario, metric, baseline, current, change) that regressed beyond threshold."""
+    regressions = []
+    for scenario, metrics in results.items():
+        reference = baseline.get('scenarios', {}).get(scenario, {})
+        for metric, value in metrics.items():
+            old = reference.get(metric)
+            if metric in INFORMATIONAL_METRICS or not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            change = (value - old) / old
+            worse = -change if metric.endswith('_per_second') else change
+            if worse > threshold:
+                regressions.append((scenario, metric, old, value, change))
+    return regressions
+
+
+def main(argv=None):
+    sys.path.insert(0, BENCHMARK_DIR)
+    from scenarios import SCENARIOS
+    scenario_names = list(SCENARIOS)
+    parser = argparse.ArgumentParser(description="Benchmarks für den Batch Script Manager")
+    parser.add_argument("-s", "--scenario", action="append", choices=scenario_names, help="Nur dieses Szenario (mehrfach möglich)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Skaliert die Arbeitsmenge aller Szenarien (Standard: 1.0)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline-JSON für den Vergleich")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Erlaubte Verschlechterung je Metrik (Standard: 0.25 = 25%%)")
+    parser.add_argument("--output", help="Ergebnisse zusätzlich in diese JSON-Datei schreiben")
+    parser.add_argument("--save-baseline", action="store_true", help="Ergebnisse als neue Baseline speichern")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args.child, args.scale)
+        return 0
+
+    results = {}
+    for name in args.scenario or scenario_names:
+        print(f"[{name}] läuft...", flush=True)
+        results[name] = run_isolated(name, args.scale)
+        print(f"[{name}] {json.dumps(results[name])}", flush=True)
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'scale': args.scale,
+        },
+        'scenarios': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        baseline = {'meta': report['meta'], 'scenarios': {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+            baseline['meta'] = report['meta']
+        baseline['scenarios'].update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline gespeichert: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("Keine Baseline vorhanden, Vergleich übersprungen (--save-baseline legt eine an).")
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('meta', {}).get('scale') != args.scale:
+        print(f"Warnung: Baseline wurde mit scale={baseline.get('meta', {}).get('scale')} erstellt, aktuell scale={args.scale}.")
+    regressions = compare(results, baseline, args.threshold)
+    errors = [name for name, metrics in results.items() if 'error' in metrics]
+    for scenario, metric, old, new, change in regressions:
+        print(f"REGRESSION {scenario}.{metric}: {old} -> {new} ({change:+.1%})")
+    for name in errors:
+        print(f"FEHLER {name}: {results[name]['error']}")
+    if regressions or errors:
+        return 1
+    print(f"Keine Regressionen über {args.threshold:.0%} gegenüber {os.path.basename(args.baseline)}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,778 @@
+"""
+Benchmark scenarios for the supervision core. Each scenario returns a flat dict of
+metrics; names ending in "_per_second" are better when higher, all others when lower.
+"""
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+import headless
+from headless import HeadlessManager
+import batch_manager
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def latency_metrics(prefix, seconds):
+    return {
+        f"{prefix}_p50_ms": round(percentile(seconds, 0.50) * 1000, 3),
+        f"{prefix}_p95_ms": round(percentile(seconds, 0.95) * 1000, 3),
+        f"{prefix}_p99_ms": round(percentile(seconds, 0.99) * 1000, 3),
+    }
+
+
+def histogram_metrics(prefix, histogram):
+    return {
+        f"{prefix}_p50_ms": round(histogram.percentile(0.50) * 1000, 3),
+        f"{prefix}_p95_ms": round(histogram.percentile(0.95) * 1000, 3),
+    }
+
+
+def write_script(directory, name, python_code):
+    """Writes a .bat (Windows) or .sh script that runs python_code with this interpreter."""
+    code_path = os.path.join(directory, f"{name}.py")
+    with open(code_path, 'w', encoding='utf-8') as f:
+        f.write(python_code)
+    extension = ".bat" if os.name == 'nt' else ".sh"
+    script_path = os.path.join(directory, f"{name}{extension}")
+    with open(script_path, 'w', encoding='utf-8') as f:
+        if os.name == 'nt':
+            f.write("@echo off\n")
+        f.write(f'"{sys.executable}" "{code_path}"\n')
+    return script_path
+
+
+def make_manager(directory, scripts):
+    return HeadlessManager(scripts, os.path.join(directory, "config.json"),
+                           {'control_port': 0, 'metrics_port': 0})
+
+
+def wait_stopped(manager, names, timeout):
+    return manager.run(timeout, until=lambda: not any(manager.runtimes[n].process is not None for n in names))
+
+
+def scenario_output_flood(directory, scale):
+    """One script prints a large burst of lines; measures ingest throughput and end-to-end latency."""
+    line_count = int(50000 * scale)
+    path = write_script(directory, "flood", (
+        "import sys, time\n"
+        f"for i in range({line_count}):\n"
+        "    sys.stdout.write(f'{time.time():.6f} flood line {i} status=ok value={i * 7}\\n')\n"
+    ))
+    # Lines differ only in numbers; folding is off so every line takes the full ingest path
+    manager = make_manager(directory, {"flood": {"path": path, "autostart": False, "fold_repeats": False}})
+    manager.sink.measure_latency = True
+
+    started = time.perf_counter()
+    manager.start_script("flood")
+    manager.run(120, until=lambda: len(manager.runtimes["flood"].output) >= line_count and not manager.bus.pending())
+    elapsed = time.perf_counter() - started
+    received = len(manager.runtimes["flood"].output)
+    metrics = {
+        'lines': received,
+        'lines_per_second': round(received / elapsed, 1),
+        'ui_calls_per_line': round(sum(manager.sink.calls.values()) / max(received, 1), 2),
+    }
+    metrics.update(latency_metrics('line_latency', manager.sink.latencies))
+    metrics.update(histogram_metrics('ui_tick', manager.instrumentation.timings['process_queue']))
+    metrics.update(histogram_metrics('ui_wakeup_lag', manager.instrumentation.after_lag['ui_bus']))
+    wait_stopped(manager, ["flood"], 10)
+    return metrics
+
+
+def scenario_idle_scripts(directory, scale):
+    """Many running but silent scripts; measures the cost of the periodic UI and sampling ticks."""
+    count = max(2, int(40 * scale))
+    path = write_script(directory, "idle", "import time\ntime.sleep(600)\n")
+    scripts = {f"idle-{i}": {"path": path, "autostart": False} for i in range(count)}
+    manager = make_manager(directory, scripts)
+    for name in scripts:
+        manager.start_script(name)
+    if batch_manager.PSUTIL_AVAILABLE:
+        manager.after(500, manager.update_cpu_usage)
+
+    cpu_before = time.process_time()
+    duration = 5.0
+    manager.run(duration)
+    cpu_used = time.process_time() - cpu_before
+
+    metrics = {'scripts': count, 'manager_cpu_percent': round(cpu_used / duration * 100, 2)}
+    metrics.update(histogram_metrics('ui_tick', manager.instrumentation.timings['process_queue']))
+    if batch_manager.PSUTIL_AVAILABLE:
+        metrics.update(histogram_metrics('cpu_sample', manager.instrumentation.timings['update_cpu_usage']))
+    manager.stop_all()
+    wait_stopped(manager, scripts, 10)
+    return metrics
+
+
+def scenario_start_stop_churn(directory, scale):
+    """Starts and stops a script as fast as possible; measures start and stop-to-exit latency."""
+    cycles = max(3, int(30 * scale))
+    path = write_script(directory, "churn", "import time\nprint('ready', flush=True)\ntime.sleep(600)\n")
+    manager = make_manager(directory, {"churn": {"path": path, "autostart": False}})
+
+    start_latencies, stop_latencies = [], []
+    started = time.perf_counter()
+    for _ in range(cycles):
+        t0 = time.perf_counter()
+        manager.start_script("churn")
+        start_latencies.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        manager.stop_script("churn")
+        wait_stopped(manager, ["churn"], 10)
+        stop_latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    metrics = {'cycles': cycles, 'cycles_per_second': round(cycles / elapsed, 2)}
+    metrics.update(latency_metrics('start', start_latencies))
+    metrics.update(latency_metrics('stop_to_exit', stop_latencies))
+    return metrics
+
+
+def scenario_repeat_flood(directory, scale):
+    """A script spins on an error and prints near-identical lines; measures ingest with repeat folding."""
+    line_count = int(200000 * scale)
+    path = write_script(directory, "spin", (
+        "import sys, time\n"
+        f"for i in range({line_count}):\n"
+        "    sys.stdout.write(f'{time.time():.6f} ERROR connection refused, retrying (attempt {i})\\n')\n"
+        "print('gave up')\n"
+    ))
+    manager = make_manager(directory, {"spin": {"path": path, "autostart": False}})
+    stats = manager.metrics.script("spin")
+    started = time.perf_counter()
+    manager.start_script("spin")
+    manager.run(120, until=lambda: stats.output_lines >= line_count + 1 and not manager.bus.pending() and manager.runtimes["spin"].process is None)
+    elapsed = time.perf_counter() - started
+    store = manager.runtimes["spin"].output
+    metrics = {
+        'lines': stats.output_lines,
+        'lines_per_second': round(stats.output_lines / elapsed, 1),
+        'stored_lines': len(store),
+        'ui_calls_per_line': round(sum(manager.sink.calls.values()) / max(stats.output_lines, 1), 5),
+    }
+    metrics.update(histogram_metrics('ui_tick', manager.instrumentation.timings['process_queue']))
+    return metrics
+
+
+def scenario_deep_process_tree(directory, scale):
+    """A script with a deep chain of child processes; measures update_cpu_usage tree walks."""
+    if not batch_manager.PSUTIL_AVAILABLE:
+        return {'skipped': "psutil nicht installiert"}
+    depth = max(2, int(30 * scale))
+    code_path = os.path.join(directory, "tree.py")
+    path = write_script(directory, "tree", (
+        "import subprocess, sys, time\n"
+        "depth = int(sys.argv[1]) if len(sys.argv) > 1 else " + str(depth) + "\n"
+        "if depth > 0:\n"
+        f"    subprocess.Popen([sys.executable, {code_path!r}, str(depth - 1)])\n"
+        "time.sleep(600)\n"
+    ))
+    manager = make_manager(directory, {"tree": {"path": path, "autostart": False}})
+    manager.start_script("tree")
+    manager.run(2.0 + depth * 0.05) # Let the chain build up
+    samples = max(5, int(20 * scale))
+    timings = []
+    for _ in range(samples):
+        t0 = time.perf_counter()
+        manager.update_cpu_usage()
+        timings.append(time.perf_counter() - t0)
+    processes = len(manager.runtimes["tree"].psutil_processes)
+    manager.stop_all()
+    wait_stopped(manager, ["tree"], 10)
+    metrics = {'processes': processes}
+    metrics.update(latency_metrics('cpu_sample', timings))
+    return metrics
+
+
+def scenario_process_fanout(directory, scale):
+    """Several scripts with many children each; compares one shared process-table scan with one tree scan per script."""
+    if not batch_manager.PSUTIL_AVAILABLE:
+        return {'skipped': "psutil nicht installiert"}
+    script_count = max(2, int(10 * scale))
+    children = max(2, int(20 * scale))
+    path = write_script(directory, "fanout", (
+        "import subprocess, sys, time\n"
+        f"workers = [subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(600)']) for _ in range({children})]\n"
+        "time.sleep(600)\n"
+    ))
+    names = [f"fanout-{i}" for i in range(script_count)]
+    manager = make_manager(directory, {name: {"path": path, "autostart": False} for name in names})
+    for name in names:
+        manager.start_script(name)
+    manager.run(2.0 + script_count * children * 0.01) # Let the workers start
+    samples = max(5, int(20 * scale))
+    shared = []
+    for _ in range(samples):
+        t0 = time.perf_counter()
+        manager.update_cpu_usage()
+        shared.append(time.perf_counter() - t0)
+    caches = {name: {} for name in names}
+    per_script = []
+    for _ in range(samples):
+        t0 = time.perf_counter()
+        for name in names:
+            batch_manager._sample_process_tree(caches[name], manager.runtimes[name].process.pid)
+        per_script.append(time.perf_counter() - t0)
+    processes = sum(len(manager.runtimes[name].samples) for name in names)
+    manager.stop_all()
+    wait_stopped(manager, names, 10)
+    metrics = {'scripts': script_count, 'processes': processes}
+    metrics.update(latency_metrics('shared_table', shared))
+    metrics.update(latency_metrics('per_script_scan', per_script))
+    return metrics
+
+
+def scenario_config_reload(directory, scale):
+    """Reloads a large config.json repeatedly; measures load plus state/UI rebuild time."""
+    count = max(10, int(500 * scale))
+    config_path = os.path.join(directory, "config.json")
+    scripts = {f"script-{i}": {"path": os.path.join(directory, f"s{i}.bat"), "autostart": False} for i in range(count)}
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump({'scripts': scripts, 'global_start_delay_seconds': 0, 'autostart_enabled': False,
+                   'control_port': 0, 'metrics_port': 0}, f)
+    manager = make_manager(directory, {})
+    reloads = max(3, int(10 * scale))
+    timings = []
+    for _ in range(reloads):
+        t0 = time.perf_counter()
+        manager._reload_ui()
+        timings.append(time.perf_counter() - t0)
+    metrics = {'scripts': len(manager.scripts), 'reloads_per_second': round(reloads / sum(timings), 2)}
+    metrics.update(latency_metrics('reload', timings))
+    return metrics
+
+
+def scenario_manager_log_burst(directory, scale):
+    """Floods the manager logger like a mass start does; measures how fast the log pane drains."""
+    records = int(20000 * scale)
+    manager = make_manager(directory, {})
+    manager.run(0.2)
+    pane = manager.manager_log_text
+    calls_before = sum(manager.sink.calls.values())
+    started = time.perf_counter()
+    for i in range(records):
+        manager.logger.info(f"Autostart: Starte 'script-{i}' in 0 Sekunden...")
+    manager.run(60, until=lambda: not manager.bus.pending())
+    elapsed = time.perf_counter() - started
+    metrics = {
+        'records': records,
+        'records_per_second': round(records / elapsed, 1),
+        'ui_calls_per_record': round((sum(manager.sink.calls.values()) - calls_before) / max(records, 1), 4),
+        'pane_lines': pane.lines,
+    }
+    metrics.update(histogram_metrics('log_tick', manager.instrumentation.timings['process_log_queue']))
+    return metrics
+
+
+def scenario_job_fanout(directory, scale):
+    """Fans out many short one-shot jobs over a small worker pool; measures job throughput and queue wait."""
+    count = max(10, int(200 * scale))
+    workers = 4
+    path = write_script(directory, "job", "print('done')\n")
+    settings = {'control_port': 0, 'metrics_port': 0,
+                'jobs': {'workers': workers, 'templates': {'job': {'path': path, 'args': ["{n}"]}}}}
+    manager = HeadlessManager({}, os.path.join(directory, "config.json"), settings)
+    started = time.perf_counter()
+    for i in range(count):
+        manager.jobs.submit('job', {'n': i})
+    manager.run(120, until=lambda: manager.jobs.stats()['succeeded'] + manager.jobs.stats()['failed'] >= count)
+    elapsed = time.perf_counter() - started
+    stats = manager.jobs.stats()
+    manager.jobs.stop()
+    return {
+        'jobs': count,
+        'jobs_per_second': round(count / elapsed, 2),
+        'failed_jobs': stats['failed'],
+        'wait_p50_ms': round(stats['wait_p50_seconds'] * 1000, 1),
+        'wait_p95_ms': round(stats['wait_p95_seconds'] * 1000, 1),
+    }
+
+
+def scenario_history_queries(directory, scale):
+    """Fills the run history with many runs; measures batched insert rate and the History/API query times."""
+    import logging
+    import random
+    count = max(1000, int(200000 * scale))
+    scripts = [f"script-{i}" for i in range(50)]
+    history = batch_manager.RunHistory(os.path.join(directory, "history.db"), logging.getLogger("bench"))
+    history.start()
+    rng = random.Random(1)
+    now = time.time()
+    started = time.perf_counter()
+    for i in range(count):
+        run_start = now - rng.random() * 365 * 86400
+        history._queue.put((scripts[i % len(scripts)], i, run_start, run_start + rng.random() * 600,
+                            0 if rng.random() < 0.9 else 1, 12.5, 50 * 1024 * 1024, 100, 8000))
+    history.stop(timeout=600)
+    insert_seconds = time.perf_counter() - started
+
+    queries = {
+        'failures_7d': lambda: history.failures("script-7", 7),
+        'recent_runs': lambda: history.runs(limit=500),
+        'stats_all_time': lambda: history.script_stats(),
+        'stats_7d': lambda: history.script_stats(now - 7 * 86400),
+    }
+    metrics = {'runs': history.written, 'inserts_per_second': round(history.written / insert_seconds, 1)}
+    for name, query in queries.items():
+        timings = []
+        for _ in range(20):
+            t0 = time.perf_counter()
+            query()
+            timings.append(time.perf_counter() - t0)
+        metrics[f"{name}_p50_ms"] = round(percentile(timings, 0.5) * 1000, 3)
+    return metrics
+
+
+def scenario_alert_rules(directory, scale):
+    """Evaluates 200 alert rules against a line stream; compares the prefiltered engine with one search per rule."""
+    import random
+    rng = random.Random(1)
+    terms = ["connection refused", "out of memory", "disk full", "segmentation fault", "deadlock detected",
+             "permission denied", "certificate expired", "broken pipe", "too many open files", "quota exceeded"]
+    configs = [{'name': f"rule-{i}", 'pattern': f"{terms[i % len(terms)]} \\(code {i}\\)", 'ignore_case': i % 2 == 0,
+                'cooldown_seconds': 0} for i in range(190)]
+    configs += [{'name': f"regex-{i}", 'pattern': f"status={500 + i}\\b|\\bE{i:03d}\\d+"} for i in range(10)]
+    rules = [batch_manager.AlertRule(config) for config in configs]
+    line_count = int(100000 * scale)
+    lines = []
+    for i in range(line_count):
+        if rng.random() < 0.01:
+            lines.append(f"2024-05-01 12:00:00 ERROR worker {terms[i % len(terms)]} (code {rng.randrange(190)})\n")
+        else:
+            lines.append(f"2024-05-01 12:00:{i % 60:02d} INFO worker-{i % 7} processed request id={i} status=200 value={i * 7}\n")
+
+    alerts = batch_manager.ScriptAlerts(rules)
+    started = time.perf_counter()
+    for line in lines:
+        alerts.feed(line)
+    engine_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    naive_matches = 0
+    for line in lines:
+        for rule in rules:
+            if rule.regex.search(line) is not None:
+                naive_matches += 1
+    naive_seconds = time.perf_counter() - started
+    return {
+        'lines': line_count,
+        'lines_per_second': round(line_count / engine_seconds, 1),
+        'per_rule_lines_per_second': round(line_count / naive_seconds, 1),
+        'missed_matches': naive_matches - sum(alerts.matches.values()),
+    }
+
+
+def service_log_lines(count, seed=1):
+    """Synthetic but realistic service output: access log lines, app log lines and occasional stack traces."""
+    import random
+    rng = random.Random(seed)
+    paths = ["/api/v1/orders", "/api/v1/orders/{id}", "/api/v1/users/{id}", "/health", "/static/app.js", "/login"]
+    agents = ["Mozilla/5.0 (Windows NT 10.0; Win64; x64)", "curl/8.4.0", "python-requests/2.31", "kube-probe/1.28"]
+    started = 1714560000.0
+    lines = []
+    for i in range(count):
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(started + i * 0.05)) + f",{i % 1000:03d}"
+        roll = rng.random()
+        if roll < 0.6:
+            path = rng.choice(paths).replace("{id}", str(rng.randrange(100000)))
+            lines.append(f'10.0.{rng.randrange(4)}.{rng.randrange(255)} - - [{stamp}] "GET {path} HTTP/1.1" '
+                         f'{rng.choice((200, 200, 200, 304, 404, 500))} {rng.randrange(20000)} "{rng.choice(agents)}" {rng.random():.3f}\n')
+        elif roll < 0.95:
+            lines.append(f"{stamp} INFO  [worker-{rng.randrange(16)}] order.service - Processed order id={rng.randrange(10**6)} "
+                         f"items={rng.randrange(1, 20)} total={rng.random() * 500:.2f} duration_ms={rng.randrange(400)}\n")
+        elif roll < 0.99:
+            lines.append(f"{stamp} WARN  [worker-{rng.randrange(16)}] db.pool - Slow query took {rng.randrange(500, 5000)} ms: "
+                         f"SELECT * FROM orders WHERE customer_id = {rng.randrange(10**5)}\n")
+        else:
+            lines.append(f"{stamp} ERROR [worker-{rng.randrange(16)}] order.service - Payment failed\n")
+            lines.append("Traceback (most recent call last):\n")
+            lines.append('  File "/srv/app/payment.py", line 118, in charge\n')
+            lines.append("ConnectionError: upstream timed out\n")
+    return lines[:count]
+
+
+def scenario_output_store(directory, scale):
+    """Stores a long service log; compares memory with plain strings and measures random/sequential access and time seeks."""
+    import random
+    import tracemalloc
+    line_count = int(300000 * scale)
+    lines = service_log_lines(line_count)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    plain = [line.encode('utf-8').decode('utf-8') for line in lines] # Fresh copies, as read from a pipe
+    plain_bytes = tracemalloc.get_traced_memory()[0] - before
+    del plain
+    before = tracemalloc.get_traced_memory()[0]
+    store = batch_manager.OutputStore()
+    first_received = time.time()
+    for i, line in enumerate(lines):
+        store.append(line, received=first_received + i * 0.05) # 20 lines per second
+    store_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    # Throughput is timed on a second store: tracemalloc slows down every allocation
+    started = time.perf_counter()
+    timed = batch_manager.OutputStore()
+    for line in lines:
+        timed.append(line)
+    append_seconds = time.perf_counter() - started
+    del timed
+
+    rng = random.Random(2)
+    timings = []
+    for _ in range(2000):
+        index = rng.randrange(line_count)
+        t0 = time.perf_counter()
+        store[index]
+        timings.append(time.perf_counter() - t0)
+    started = time.perf_counter()
+    scanned = sum(1 for _ in store)
+    scan_seconds = time.perf_counter() - started
+    t0 = time.perf_counter()
+    store.tail(1000)
+    tail_seconds = time.perf_counter() - t0
+    seek_timings = []
+    for _ in range(2000):
+        when = first_received + rng.uniform(0, line_count * 0.05)
+        t0 = time.perf_counter()
+        store.index_at_time(when)
+        seek_timings.append(time.perf_counter() - t0)
+
+    metrics = {
+        'lines': scanned,
+        'plain_mb': round(plain_bytes / (1024 * 1024), 2),
+        'store_mb': round(store_bytes / (1024 * 1024), 2),
+        'appends_per_second': round(line_count / append_seconds, 1),
+        'scan_lines_per_second': round(scanned / scan_seconds, 1),
+        'tail_1000_ms': round(tail_seconds * 1000, 3),
+    }
+    metrics['random_access_p50_us'] = round(percentile(timings, 0.50) * 1e6, 2)
+    metrics['random_access_p99_us'] = round(percentile(timings, 0.99) * 1e6, 2)
+    metrics['time_seek_p50_us'] = round(percentile(seek_timings, 0.50) * 1e6, 2)
+    metrics['time_seek_p99_us'] = round(percentile(seek_timings, 0.99) * 1e6, 2)
+    return metrics
+
+
+def scenario_ansi_parse(directory, scale):
+    """Parses coloured build-tool output (npm/gradle/pytest style); measures the ANSI stage and the tag count."""
+    line_count = int(200000 * scale)
+    templates = [
+        "\x1b[2K\x1b[1G\x1b[32m✔\x1b[39m compiled \x1b[1mmodule-{i}\x1b[22m in \x1b[33m{ms} ms\x1b[39m\n",
+        "\x1b[1m> Task :app:compileJava\x1b[m {i}\n",
+        "tests/test_{i}.py \x1b[32m.\x1b[0m\x1b[32m.\x1b[0m\x1b[31mF\x1b[0m \x1b[38;5;{c}m[{ms}%]\x1b[0m\n",
+        "\x1b[38;2;{c};128;64mtruecolor\x1b[0m line {i}\n",
+    ]
+    lines = [templates[i % len(templates)].format(i=i, ms=i % 1000, c=i % 256) for i in range(line_count)]
+    plain = [f"2024-05-01 12:00:00 INFO plain line {i}\n" for i in range(line_count)]
+    parser = batch_manager.AnsiParser()
+    attrs = set()
+    started = time.perf_counter()
+    for line in lines:
+        _, styles = parser.parse(line)
+        if styles is not None:
+            attrs.update(styles[2::3])
+    ansi_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    for line in plain:
+        parser.parse(line)
+    plain_seconds = time.perf_counter() - started
+    return {
+        'lines': line_count,
+        'ansi_lines_per_second': round(line_count / ansi_seconds, 1),
+        'plain_lines_per_second': round(line_count / plain_seconds, 1),
+        'distinct_tags': len(attrs),
+    }
+
+
+def scenario_log_tail(directory, scale):
+    """
+    Like output_flood, but the script writes to a log file that is tailed. A file gives the
+    writer no backpressure, so the line latency includes the whole UI backlog of the burst.
+    """
+    line_count = int(50000 * scale)
+    path = write_script(directory, "writer", (
+        "import time\n"
+        "with open('service.log', 'a', buffering=1) as f:\n"
+        f"    for i in range({line_count}):\n"
+        "        f.write(f'{time.time():.6f} flood line {i} status=ok value={i * 7}\\n')\n"
+    ))
+    manager = make_manager(directory, {"writer": {"path": path, "autostart": False, "log_files": ["service.log"], "fold_repeats": False}})
+    manager.sink.measure_latency = True
+    store = manager.runtimes["writer"].output
+
+    started = time.perf_counter()
+    manager.start_script("writer")
+    manager.run(120, until=lambda: len(store) >= line_count and not manager.bus.pending())
+    elapsed = time.perf_counter() - started
+    metrics = {
+        'lines': len(store),
+        'lines_per_second': round(len(store) / elapsed, 1),
+    }
+    metrics.update(latency_metrics('line_latency', manager.sink.latencies))
+    wait_stopped(manager, ["writer"], 10)
+    manager.log_tailer.stop()
+    return metrics
+
+def scenario_output_export(directory, scale):
+    """Exports a long service log in every format; measures the UI-thread snapshot and the export thread's throughput."""
+    line_count = int(300000 * scale)
+    store = batch_manager.OutputStore()
+    for line in service_log_lines(line_count):
+        store.append(line, *batch_manager.parse_log_line(line))
+    started = time.perf_counter()
+    snapshot = store.snapshot()
+    metrics = {'lines': line_count, 'snapshot_ms': round((time.perf_counter() - started) * 1000, 3)}
+    for export_format, key in (("Text", 'text'), ("gzip", 'gzip'), ("JSON Lines", 'jsonl')):
+        path = os.path.join(directory, "export" + batch_manager.EXPORT_FORMATS[export_format])
+        started = time.perf_counter()
+        batch_manager.write_output_export(snapshot, path, export_format)
+        metrics[f'{key}_lines_per_second'] = round(line_count / (time.perf_counter() - started), 1)
+        metrics[f'{key}_mb'] = round(os.path.getsize(path) / (1024 * 1024), 2)
+    started = time.perf_counter()
+    batch_manager.write_output_export(snapshot, os.path.join(directory, "errors.log"), "Text", min_level=batch_manager.LEVEL_ERROR)
+    metrics['filtered_lines_per_second'] = round(line_count / (time.perf_counter() - started), 1)
+    return metrics
+
+
+def scenario_replica_scale(directory, scale):
+    """Scales a replica set of idle workers up and back down at runtime; measures how fast all instances run and stop."""
+    count = max(2, int(20 * scale))
+    path = write_script(directory, "worker", (
+        "import os, time\n"
+        "print('replica', os.environ['BATCH_MANAGER_REPLICA_INDEX'], 'port', os.environ['BATCH_MANAGER_PORT'], flush=True)\n"
+        "time.sleep(600)\n"
+    ))
+    manager = make_manager(directory, {"worker": {"path": path, "autostart": False, "replicas": 1, "port": 8000}})
+    manager.start_script("worker")
+    started = time.perf_counter()
+    manager.scale_replicas("worker", count)
+    instances = manager._replica_names("worker")
+    manager.run(30, until=lambda: all(len(manager.runtimes[name].output) for name in instances))
+    scale_up = time.perf_counter() - started
+    ports = {manager.runtimes[name].output[0].split()[3] for name in instances}
+    processes = [manager.runtimes[name].process for name in instances[1:]]
+    started = time.perf_counter()
+    manager.scale_replicas("worker", 1)
+    manager.run(30, until=lambda: all(process.poll() is not None for process in processes)) # Removed instances have no runtime left
+    scale_down = time.perf_counter() - started
+    manager.stop_script("worker")
+    wait_stopped(manager, ["worker"], 10)
+    return {
+        'processes': count,
+        'scale_up_ms': round(scale_up * 1000, 1),
+        'scale_down_ms': round(scale_down * 1000, 1),
+        'distinct_ports': len(ports),
+        'scripts_after': len(manager.scripts),
+    }
+
+
+class LatencyText(headless.StubText):
+    """Output widget stub that records the latency of the lines inserted into this widget only."""
+    def __init__(self, sink):
+        super().__init__(sink)
+        self.latencies = []
+
+    def insert(self, index, text, *tags):
+        super().insert(index, text, *tags)
+        now = time.time()
+        self.latencies.append(now - float(text.split(' ', 1)[0]))
+
+
+def scenario_output_fairness(directory, scale):
+    """
+    A quiet script prints a line every 20 ms while another script floods its output;
+    measures how fast the quiet script's lines reach its widget and what the flood costs.
+    """
+    flood_lines = int(200000 * scale)
+    quiet_lines = max(10, int(100 * scale))
+    flood = write_script(directory, "flood", (
+        "import sys, time\n"
+        f"for i in range({flood_lines}):\n"
+        "    sys.stdout.write(f'{time.time():.6f} flood line {i} status=ok value={i * 7}\\n')\n"
+    ))
+    quiet = write_script(directory, "quiet", (
+        "import time\n"
+        f"for i in range({quiet_lines}):\n"
+        "    print(f'{time.time():.6f} quiet line {i}', flush=True)\n"
+        "    time.sleep(0.02)\n"
+    ))
+    manager = make_manager(directory, {"flood": {"path": flood, "autostart": False, "fold_repeats": False},
+                                       "quiet": {"path": quiet, "autostart": False, "fold_repeats": False}})
+    quiet_widget = manager.runtimes["quiet"].widgets['output_widget'] = LatencyText(manager.sink)
+    flood_stats = manager.metrics.script("flood")
+    started = time.perf_counter()
+    manager.start_script("quiet")
+    manager.start_script("flood")
+    manager.run(120, until=lambda: len(manager.runtimes["quiet"].output) >= quiet_lines
+                and flood_stats.output_lines >= flood_lines and not manager.bus.pending())
+    elapsed = time.perf_counter() - started
+    metrics = {
+        'lines': flood_stats.output_lines,
+        'flood_lines_per_second': round(flood_stats.output_lines / elapsed, 1),
+        'flood_hidden': flood_stats.output_hidden,
+        'flood_dropped': flood_stats.output_dropped,
+    }
+    metrics.update(latency_metrics('quiet_latency', quiet_widget.latencies))
+    metrics.update(histogram_metrics('ui_tick', manager.instrumentation.timings['process_queue']))
+    wait_stopped(manager, ["flood", "quiet"], 10)
+    return metrics
+
+
+def scenario_memory_trend(directory, scale):
+    """
+    Feeds simulated 2-second RSS samples of a leaking, a flat, a stepping and a sawtooth
+    service into MemoryTrend; measures the per-sample cost, how long the leak takes to be
+    flagged and whether any of the healthy patterns is flagged.
+    """
+    hours = 12
+    interval = 2.0
+    mb = 1024 * 1024
+    rng = random.Random(42)
+    patterns = {
+        'leak': lambda h: 200 + max(0.0, h - 2) * 120 + rng.uniform(-20, 20), # +120 MB/hour from hour 2
+        'flat': lambda h: 300 + rng.uniform(-40, 40),
+        'step': lambda h: (800 if h >= 4 else 200) + rng.uniform(-10, 10), # Cache warm-up: one jump
+        'sawtooth': lambda h: 200 + (h % 1.0) * 400, # Grows for an hour, then freed
+    }
+    copies = max(1, int(10 * scale))
+    samples = int(hours * 3600 / interval)
+    flagged = {name: None for name in patterns}
+    elapsed = 0.0
+    for name, pattern in patterns.items():
+        for _ in range(copies):
+            trend = batch_manager.MemoryTrend({'window_hours': 6, 'growth_mb_per_hour': 50})
+            values = [pattern(i * interval / 3600) * mb for i in range(samples)]
+            started = time.perf_counter()
+            for i, rss in enumerate(values):
+                if trend.add(i * interval, rss) and flagged[name] is None and trend.growing():
+                    flagged[name] = i * interval / 3600
+            elapsed += time.perf_counter() - started
+    total = len(patterns) * copies * samples
+    return {
+        'samples': total,
+        'samples_per_second': round(total / elapsed, 1),
+        'leak_detect_hours': round(flagged['leak'] - 2, 2) if flagged['leak'] is not None else None,
+        'false_positives': sum(1 for name in ('flat', 'step', 'sawtooth') if flagged[name] is not None),
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def echo_request(port, payload=b"ping"):
+    """One request/reply over a fresh connection; returns (seconds, reply)."""
+    started = time.perf_counter()
+    with socket.create_connection(("127.0.0.1", port), timeout=30) as sock:
+        sock.sendall(payload)
+        sock.shutdown(socket.SHUT_WR)
+        reply = b""
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            reply += chunk
+    return time.perf_counter() - started, reply
+
+
+def scenario_on_demand(directory, scale):
+    """
+    Cold start of a socket-activated echo service on its first connection, relayed requests
+    while it runs, and the idle stop afterwards; repeated for a few cycles.
+    """
+    cycles = max(2, int(3 * scale))
+    requests = max(10, int(200 * scale))
+    port, backend_port = free_port(), free_port()
+    path = write_script(directory, "echo", (
+        "import os, socket\n"
+        "server = socket.socket()\n"
+        "server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)\n"
+        "server.bind(('127.0.0.1', int(os.environ['BATCH_MANAGER_PORT'])))\n"
+        "server.listen(16)\n"
+        "while True:\n"
+        "    client, _ = server.accept()\n"
+        "    with client:\n"
+        "        while True:\n"
+        "            data = client.recv(65536)\n"
+        "            if not data:\n"
+        "                break\n"
+        "            client.sendall(data)\n"
+    ))
+    manager = make_manager(directory, {"echo": {"path": path, "autostart": True, "port": port,
+                                                "activation": {"backend_port": backend_port, "idle_seconds": 0.5}}})
+    manager._start_activations()
+    cold, warm, idle_stops = [], [], []
+    for _ in range(cycles):
+        results = []
+
+        def client():
+            results.append(echo_request(port))
+            for _ in range(requests):
+                results.append(echo_request(port))
+
+        thread = threading.Thread(target=client, daemon=True)
+        thread.start()
+        manager.run(60, until=lambda: not thread.is_alive())
+        assert all(reply == b"ping" for _, reply in results), "Antwort des Echo-Dienstes fehlt"
+        cold.append(results[0][0])
+        warm.extend(seconds for seconds, _ in results[1:])
+        idle_started = time.perf_counter()
+        wait_stopped(manager, ["echo"], 30)
+        idle_stops.append(time.perf_counter() - idle_started)
+    activation = manager.activations["echo"]
+    manager._stop_activations()
+    return {
+        'cycles': cycles,
+        'requests': len(warm),
+        **latency_metrics('cold_request', cold),
+        **latency_metrics('warm_request', warm),
+        'idle_stop_p50_ms': round(percentile(idle_stops, 0.5) * 1000, 1),
+        'activations': activation.activations,
+        'failures': activation.failures,
+    }
+
+
+SCENARIOS = {
+    'output_flood': scenario_output_flood,
+    'repeat_flood': scenario_repeat_flood,
+    'idle_scripts': scenario_idle_scripts,
+    'start_stop_churn': scenario_start_stop_churn,
+    'deep_process_tree': scenario_deep_process_tree,
+    'process_fanout': scenario_process_fanout,
+    'config_reload': scenario_config_reload,
+    'manager_log_burst': scenario_manager_log_burst,
+    'job_fanout': scenario_job_fanout,
+    'history_queries': scenario_history_queries,
+    'alert_rules': scenario_alert_rules,
+    'output_store': scenario_output_store,
+    'output_export': scenario_output_export,
+    'ansi_parse': scenario_ansi_parse,
+    'log_tail': scenario_log_tail,
+    'replica_scale': scenario_replica_scale,
+    'on_demand': scenario_on_demand,
+    'output_fairness': scenario_output_fairness,
+    'memory_trend': scenario_memory_trend,
+}
+
+
+def run_scenario(name, scale):
+    with tempfile.TemporaryDirectory(prefix="bm_bench_") as directory:
+        cpu_before = time.process_time()
+        wall_before = time.perf_counter()
+        metrics = SCENARIOS[name](directory, scale)
+        metrics['wall_seconds'] = round(time.perf_counter() - wall_before, 3)
+        metrics['cpu_seconds'] = round(time.process_time() - cpu_before, 3)
+    return metrics
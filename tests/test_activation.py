@@ -0,0 +1,41 @@
+import logging
+import socket
+
+import batch_manager
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_proxy(requests):
+    return batch_manager.ActivationProxy('web', free_port(), {'backend_port': free_port(), 'ready_seconds': 0.2},
+                                         lambda: requests.append(1), lambda: False, logging.getLogger('test'))
+
+
+def connect(proxy):
+    client, peer = socket.socketpair()
+    with client, peer:
+        proxy.serve(peer)
+
+
+def test_start_is_requested_again_after_the_backend_never_became_ready():
+    requests = []
+    proxy = make_proxy(requests)
+    connect(proxy)
+    assert proxy.failures == 1
+    connect(proxy)
+    assert len(requests) == 2
+    assert proxy.activations == 2
+
+
+def test_script_exit_clears_a_pending_start():
+    requests = []
+    proxy = make_proxy(requests)
+    with proxy.lock:
+        proxy._start_requested = 0.0 # A start is on its way
+    proxy.script_exited()
+    connect(proxy)
+    assert len(requests) == 1
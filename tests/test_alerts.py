@@ -0,0 +1,86 @@
+import pytest
+
+import batch_manager
+from batch_manager import AlertRule, ScriptAlerts
+
+
+def literals(pattern, **config):
+    return AlertRule({'pattern': pattern, **config}).literals
+
+
+@pytest.mark.parametrize('pattern, expected', [
+    ("Connection refused", ["connection refused"]),
+    (r"ERROR \d+: disk", ["error "]),
+    (r"(?:timeout|timed out) after \d+s", [" after "]),
+    (r"(timeout|deadline exceeded)", ["timeout", "deadline exceeded"]),
+    (r"\d+ (retries)+ left", ["retries"]),
+    (r"x(abc)?yz", None), # The only long literal is optional
+    (r"(abc|d)ef", None), # A two-letter literal alone is not selective enough
+    (r"[Ee]rror", ["rror"]),
+    (r"Überlauf", ["berlauf"]),
+    (r".*", None),
+])
+def test_required_literals(pattern, expected):
+    assert literals(pattern) == expected
+
+
+def test_prefilter_never_hides_a_match():
+    patterns = ["Connection refused", r"ERROR \d+", r"(timeout|deadline exceeded)", r"[Ee]rror", r"^\s*$",
+                r"OutOfMemory(Error)?", r"disk (full|quota)"]
+    rules = [AlertRule({'pattern': pattern, 'cooldown_seconds': 0}) for pattern in patterns]
+    rules.append(AlertRule({'pattern': "Fatal", 'ignore_case': True, 'name': "fatal", 'cooldown_seconds': 0}))
+    alerts = ScriptAlerts(rules)
+    lines = ["connection refused\n", "Connection refused by peer\n", "ERROR 42 boom\n", "deadline exceeded\n",
+             "Error: x\n", "   \n", "java.lang.OutOfMemoryError\n", "disk quota\n", "FATAL\n", "fatal error\n",
+             "nothing to see\n", "TIMEOUT\n", "FAİL fatal\n"]
+    for line in lines:
+        fired = {rule.name for rule, _ in alerts.feed(line)}
+        assert fired == {rule.name for rule in rules if rule.regex.search(line)}, line
+
+
+def test_ignore_case_matches_dotless_i():
+    rule = AlertRule({'pattern': "fail", 'ignore_case': True})
+    assert rule.literals == ["fail"]
+    assert rule.regex.search("FAıL")
+    assert [fired.name for fired, _ in ScriptAlerts([rule]).feed("FAıL\n")] == ["fail"]
+
+
+def test_trie_pattern_matches_any_literal():
+    pattern = batch_manager._literal_trie_pattern(["error", "errors", "err.x", "warn"])
+    for text, found in (("an errors list", "error"), ("err.x", "err.x"), ("errax", None), ("warning", "warn")):
+        match = pattern.search(text)
+        assert (match.group() if match else None) == found
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(batch_manager.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_threshold_within_window_and_cooldown(clock):
+    rule = AlertRule({'pattern': "timeout", 'threshold': 3, 'window_seconds': 10, 'cooldown_seconds': 30})
+    alerts = ScriptAlerts([rule])
+
+    def feed(at):
+        clock[0] = at
+        return [count for _, count in alerts.feed("timeout\n")]
+
+    assert feed(1000) == [] and feed(1005) == []
+    assert feed(1011) == [] # The first match left the window
+    assert feed(1012) == [3]
+    assert feed(1013) == [] and feed(1014) == [] and feed(1015) == [] # Cooling down
+    assert feed(1020) == [] # Four hits in the window, still cooling down
+    assert feed(1040) == [] and feed(1041) == [] # The hits before the cooldown ended have left the window
+    assert feed(1042) == [3] # Cooldown of 30 seconds is over
+    assert alerts.matches == {'timeout': 11} and alerts.fired == {'timeout': 2}
+
+
+def test_unknown_action_severity_and_bad_regex_are_rejected():
+    for config in ({'pattern': "x", 'action': "reboot"}, {'pattern': "x", 'action': ["notify", "mail"]},
+                   {'pattern': "x", 'severity': "panic"}, {'pattern': "(x"}):
+        with pytest.raises(ValueError):
+            AlertRule(config)
+    rule = AlertRule({'pattern': "x", 'threshold': 0, 'action': ["notify", "count"]})
+    assert rule.threshold == 1 and rule.actions == ("notify", "count") and rule.name == "x"
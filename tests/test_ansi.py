@@ -0,0 +1,96 @@
+import pytest
+
+import batch_manager
+from batch_manager import (ANSI_BG_SHIFT, ANSI_BOLD, ANSI_FG_MASK, ANSI_INVERSE, ANSI_ITALIC, ANSI_PALETTE,
+                           ANSI_UNDERLINE, AnsiParser)
+
+RED = 1 + 1 # Palette index 1, stored + 1
+GREEN = 2 + 1
+
+
+def triples(runs):
+    return None if runs is None else [tuple(runs[position:position + 3]) for position in range(0, len(runs), 3)]
+
+
+def parse(*lines):
+    parser = AnsiParser()
+    return [(text, triples(runs)) for text, runs in map(parser.parse, lines)]
+
+
+def fg(attr):
+    return ANSI_PALETTE[(attr & ANSI_FG_MASK) - 1]
+
+
+def bg(attr):
+    return ANSI_PALETTE[((attr >> ANSI_BG_SHIFT) & ANSI_FG_MASK) - 1]
+
+
+def test_plain_text_has_no_runs():
+    assert parse("hello\n", "") == [("hello\n", None), ("", None)]
+
+
+def test_escapes_are_stripped_and_runs_point_into_the_clean_text():
+    [(text, runs)] = parse("a \x1b[31mred\x1b[0m b \x1b[1;32mok\x1b[m\n")
+    assert text == "a red b ok\n"
+    assert runs == [(2, 5, RED), (8, 10, ANSI_BOLD | GREEN)]
+    assert text[2:5] == "red" and text[8:10] == "ok"
+
+
+def test_attributes_carry_over_line_ends():
+    assert parse("\x1b[4mstart\n", "middle\n", "end\x1b[24m\n", "after\n") == [
+        ("start\n", [(0, 6, ANSI_UNDERLINE)]), ("middle\n", [(0, 7, ANSI_UNDERLINE)]),
+        ("end\n", [(0, 3, ANSI_UNDERLINE)]), ("after\n", None)]
+
+
+def test_adjacent_chunks_with_the_same_attributes_are_merged():
+    [(text, runs)] = parse("\x1b[31mab\x1b[Kcd\x1b]0;title\x07ef\x1b[31mgh\x1b[0m")
+    assert text == "abcdefgh"
+    assert runs == [(0, 8, RED)]
+
+
+def test_non_sgr_sequences_are_dropped():
+    [(text, runs)] = parse("\x1b[2J\x1b[1;1H\x1b[?25lprogress\x1b7 50%\x1b8\x1b]8;;http://x\x1b\\link\x1b]8;;\x1b\\\r\n")
+    assert text == "progress 50%link\r\n"
+    assert runs is None
+
+
+@pytest.mark.parametrize('params, expected', [
+    ("", 0), ("0", 0), ("1;3;4;7", ANSI_BOLD | ANSI_ITALIC | ANSI_UNDERLINE | ANSI_INVERSE),
+    ("30", 1), ("37", 8), ("90", 9), ("97", 16), ("40", 1 << ANSI_BG_SHIFT), ("107", 16 << ANSI_BG_SHIFT),
+    ("38;5;0", 1), ("38;5;255", 256), ("48;5;196", 197 << ANSI_BG_SHIFT), ("38;5;999", 256),
+    ("38;2;255;0;0", 197), ("38:2:250:10:5", 197), ("48;2;0;0;0", 17 << ANSI_BG_SHIFT),
+    ("31;1;22", RED), ("1;31;0;32", GREEN),
+])
+def test_sgr_codes(params, expected):
+    assert batch_manager._apply_sgr(0, params) == expected
+
+
+def test_defaults_and_resets_keep_the_other_attributes():
+    attr = batch_manager._apply_sgr(0, "1;3;4;7;31;42")
+    assert batch_manager._apply_sgr(attr, "39") == attr & ~ANSI_FG_MASK
+    assert batch_manager._apply_sgr(attr, "49") == attr & ~(ANSI_FG_MASK << ANSI_BG_SHIFT)
+    assert batch_manager._apply_sgr(attr, "22;23;24;27") == RED | (GREEN << ANSI_BG_SHIFT)
+
+
+def test_incomplete_extended_colours_are_ignored():
+    assert batch_manager._apply_sgr(RED, "38") == RED
+    assert batch_manager._apply_sgr(RED, "38;5") == RED
+    assert batch_manager._apply_sgr(RED, "38;2;1;2") == RED
+    assert batch_manager._apply_sgr(RED, "38;7;1") == RED
+
+
+def test_packed_colours_map_to_the_palette():
+    assert fg(batch_manager._apply_sgr(0, "38;5;21")) == "#0000ff"
+    assert fg(batch_manager._apply_sgr(0, "38;2;0;0;250")) == "#0000ff" # Nearest cube colour
+    assert bg(batch_manager._apply_sgr(0, "48;5;232")) == "#080808" # Grey ramp
+    assert fg(batch_manager._apply_sgr(0, "91")) == ANSI_PALETTE[9]
+    assert len(ANSI_PALETTE) == 256
+    highest = batch_manager._apply_sgr(0, "1;3;4;7;38;5;255;48;5;255")
+    assert (highest >> ANSI_BG_SHIFT) & ANSI_FG_MASK == 256 and highest & ANSI_FG_MASK == 256
+    assert highest < 1 << 32 # Fits the unsigned runs array
+
+
+def test_tput_reset_and_charset_designations_are_dropped():
+    [(text, runs)] = parse("\x1b[1mbold\x1b(B\x1b[m plain\x1b)0\x1bc\n")
+    assert text == "bold plain\n"
+    assert runs == [(0, 4, ANSI_BOLD)]
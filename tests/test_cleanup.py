@@ -0,0 +1,39 @@
+import os
+
+import batch_manager
+from benchmarks import headless
+
+
+def test_remove_cgroup_reports_a_group_that_still_has_processes(tmp_path):
+    group = batch_manager._cgroup_path(str(tmp_path), 'Worker #2')
+    os.makedirs(group)
+    open(os.path.join(group, 'cgroup.procs'), 'w').close() # rmdir of a non-empty directory fails like a busy group
+    assert not batch_manager._remove_cgroup(str(tmp_path), 'Worker #2')
+    os.remove(os.path.join(group, 'cgroup.procs'))
+    assert batch_manager._remove_cgroup(str(tmp_path), 'Worker #2')
+    assert not os.path.exists(group)
+    assert batch_manager._remove_cgroup(str(tmp_path), 'Worker #2') # Already gone
+
+
+def test_metrics_remove_drops_the_series_of_a_script():
+    metrics = batch_manager.MetricsRegistry(manager=None)
+    metrics.script('Worker #1').output_lines += 1
+    metrics.script('Worker #2').output_lines += 1
+    metrics.remove('Worker #2')
+    metrics.remove('Worker #3')
+    assert list(metrics.scripts) == ['Worker #1']
+
+
+def test_busy_cgroup_is_removed_once_its_processes_are_gone(tmp_path):
+    manager = headless.HeadlessManager({'job': {'path': str(tmp_path / "job.bat")}}, str(tmp_path / "config.json"),
+                                       {'control_port': 0, 'metrics_port': 0})
+    root = str(tmp_path / "cgroups")
+    group = batch_manager._cgroup_path(root, 'job')
+    os.makedirs(group)
+    busy = os.path.join(group, 'cgroup.procs')
+    open(busy, 'w').close()
+    manager._remove_cgroup_when_empty(root, 'job')
+    assert os.path.isdir(group)
+    manager.run(0.2)
+    os.remove(busy) # Last process reaped
+    assert manager.run(5, until=lambda: not os.path.exists(group))
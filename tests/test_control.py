@@ -0,0 +1,60 @@
+import socket
+import threading
+import types
+
+import batch_manager
+
+
+def read_output(sock, expected_lines):
+    text = ''
+    while text.count('\n') < expected_lines:
+        kind, payload = batch_manager._recv_frame(sock)
+        if kind == batch_manager.FRAME_OUTPUT:
+            text += batch_manager._decode_output_frame(payload)[1]
+    return text.splitlines()
+
+
+def test_follow_backlog_and_stream_neither_repeat_nor_skip_lines():
+    manager = types.SimpleNamespace(scripts={'worker': {}}, runtimes={})
+    server = batch_manager.ControlServer(manager)
+    total = 20000
+    published = threading.Event()
+
+    def publish():
+        for number in range(total):
+            server.publish('worker', f"{number}\n")
+            if number == total // 2:
+                published.set()
+
+    publisher = threading.Thread(target=publish)
+    publisher.start()
+    published.wait(5) # Subscribe while lines are being published
+    client, peer = socket.socketpair()
+    streamer = threading.Thread(target=server.stream_output, args=(peer, {'name': 'worker', 'follow': True, 'lines': 100}))
+    streamer.start()
+    kind, _ = batch_manager._recv_frame(client)
+    assert kind == batch_manager.FRAME_JSON
+    publisher.join()
+    lines = []
+    while not lines or int(lines[-1]) != total - 1:
+        lines += read_output(client, 1)
+    client.close()
+    streamer.join(5)
+    numbers = [int(line) for line in lines]
+    assert numbers == list(range(numbers[0], total))
+    assert len(numbers) >= 100
+
+
+def test_forget_drops_the_follow_backlog():
+    manager = types.SimpleNamespace(scripts={'worker': {}}, runtimes={})
+    server = batch_manager.ControlServer(manager)
+    server.publish('worker', "old run\n")
+    server.forget('worker')
+    server.publish('worker', "new run\n")
+    client, peer = socket.socketpair()
+    streamer = threading.Thread(target=server.stream_output, args=(peer, {'name': 'worker', 'follow': True, 'lines': 10}))
+    streamer.start()
+    batch_manager._recv_frame(client)
+    assert read_output(client, 1) == ["new run"]
+    client.close()
+    streamer.join(5)
@@ -0,0 +1,72 @@
+import time
+
+import batch_manager
+from batch_manager import FOLD_UPDATE_SECONDS, RepeatFolder
+
+
+def feed(folder, lines, start=1000.0, step=0.01):
+    """(line, repeat, final) for each line pushed at start, start + step, ..."""
+    results = []
+    for number, line in enumerate(lines):
+        repeat, final = folder.push(line, start + number * step)
+        results.append((line, repeat, final))
+    return results
+
+
+def test_lines_differing_only_in_numbers_fold_into_the_first():
+    folder = RepeatFolder()
+    results = feed(folder, ["retry 1 of 5\n", "retry 2 of 5\n", "retry 3 of 5\n", "giving up\n"])
+    assert [repeat for _, repeat, _ in results] == [False, True, True, False]
+    assert results[3][2] == (2, 1000.0, 1000.02, "retry 3 of 5\n") # The run ended by "giving up"
+    assert not folder.pending
+
+
+def test_different_text_starts_a_new_run_without_summary():
+    folder = RepeatFolder()
+    results = feed(folder, ["a 1\n", "b 1\n", "a 1\n"])
+    assert [(repeat, final) for _, repeat, final in results] == [(False, None)] * 3
+
+
+def test_numbers_in_different_places_do_not_fold():
+    folder = RepeatFolder()
+    results = feed(folder, ["id 12 ok\n", "id ok 12\n"])
+    assert [repeat for _, repeat, _ in results] == [False, False]
+
+
+def test_summaries_are_throttled_and_only_report_news():
+    folder = RepeatFolder()
+    folder.push("tick 0\n", 1000.0)
+    folder.push("tick 1\n", 1000.1)
+    assert folder.pending
+    assert not folder.due(1000.1)
+    assert folder.due(1000.0 + FOLD_UPDATE_SECONDS)
+    assert folder.summary(1000.0 + FOLD_UPDATE_SECONDS) == (1, 1000.0, 1000.1, "tick 1\n")
+    assert not folder.pending and not folder.due(1000.0 + 10 * FOLD_UPDATE_SECONDS)
+    folder.push("tick 2\n", 1001.0)
+    assert not folder.due(1000.0 + FOLD_UPDATE_SECONDS + 0.1) # Reported recently
+    repeat, final = folder.push("done\n", 1001.1)
+    assert not repeat and final == (2, 1000.0, 1001.0, "tick 2\n") # Cumulative count of the run
+
+
+def test_no_final_summary_when_everything_was_reported():
+    folder = RepeatFolder()
+    feed(folder, ["tick 0\n", "tick 1\n"])
+    folder.summary(1001.0)
+    assert folder.push("done\n", 1002.0) == (False, None)
+
+
+def test_fold_marker_counts_all_lines_with_german_grouping():
+    first = time.mktime((2024, 5, 1, 12, 0, 1, 0, 0, -1))
+    marker = batch_manager.fold_marker((12344, first, first + 8, "x\n"))
+    assert marker == "  ⟳ ×12.345 (12:00:01–12:00:09)"
+
+
+def test_store_shows_the_marker_on_the_folded_line():
+    store = batch_manager.OutputStore()
+    store.append("retry 1\n")
+    store.append("plain")
+    fold = (3, 1000.0, 1001.0, "retry 4\n")
+    store.set_fold(0, fold)
+    store.set_fold(1, fold)
+    assert store.display_line(0) == "retry 1" + batch_manager.fold_marker(fold) + "\n"
+    assert store.display_line(1) == "plain" + batch_manager.fold_marker(fold)
@@ -0,0 +1,92 @@
+import logging
+import threading
+import time
+import types
+
+import pytest
+
+from batch_manager import RunHistory, RunRecord
+
+
+def make_run(script, started, runtime, exit_code, lines=0):
+    stats = types.SimpleNamespace(output_lines=100, output_bytes=1000)
+    run = RunRecord(script, 4242, stats)
+    run.sample(12.34, 5000)
+    run.sample(3.0, 9000)
+    stats.output_lines += lines
+    stats.output_bytes += lines * 10
+    run.finish(exit_code, stats)
+    run.started, run.ended = started, started + runtime
+    return run
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = RunHistory(str(tmp_path / "history.db"), logging.getLogger('test'))
+    history.start()
+    yield history
+
+
+def write(history, runs):
+    for run in runs:
+        history.record(run)
+    history.stop()
+
+
+def test_runs_are_written_with_their_peaks_and_output(history):
+    write(history, [make_run('a', 1000.0, 5.0, 0, lines=7)])
+    [row] = history.runs()
+    assert row == {'script': 'a', 'pid': 4242, 'started': 1000.0, 'ended': 1005.0, 'exit_code': 0,
+                   'peak_cpu': 12.3, 'peak_rss': 9000, 'output_lines': 7, 'output_bytes': 70}
+    assert history.written == 1
+
+
+def test_run_queries_filter_and_order_newest_first(history):
+    write(history, [make_run('a', 1000.0, 1, 0), make_run('a', 2000.0, 1, 3), make_run('b', 3000.0, 1, 1),
+                    make_run('a', 4000.0, 1, None), make_run('a', 5000.0, 1, -9)])
+    assert [row['started'] for row in history.runs()] == [5000.0, 4000.0, 3000.0, 2000.0, 1000.0]
+    assert [row['started'] for row in history.runs('a', since=2000.0)] == [5000.0, 4000.0, 2000.0]
+    assert [row['started'] for row in history.runs('a', failures_only=True)] == [5000.0, 2000.0] # Unknown exit codes are no failures
+    assert [row['started'] for row in history.runs(limit=2)] == [5000.0, 4000.0]
+    assert history.runs('c') == []
+
+
+def test_failures_of_the_last_days(history):
+    now = time.time()
+    write(history, [make_run('a', now - 8 * 86400, 1, 1), make_run('a', now - 3600, 1, 2), make_run('a', now - 60, 1, 0)])
+    assert [row['exit_code'] for row in history.failures('a')] == [2]
+    assert [row['exit_code'] for row in history.failures('a', days=10)] == [2, 1]
+
+
+def test_all_time_stats_match_the_runs(history):
+    write(history, [make_run('a', 1000.0, 10, 0), make_run('a', 2000.0, 30, 1), make_run('b', 1500.0, 4, None)])
+    assert history.script_stats() == [
+        {'script': 'a', 'runs': 2, 'failures': 1, 'avg_runtime': 20.0, 'max_runtime': 30.0, 'last_started': 2000.0},
+        {'script': 'b', 'runs': 1, 'failures': 0, 'avg_runtime': 4.0, 'max_runtime': 4.0, 'last_started': 1500.0}]
+
+
+def test_stats_since_a_time_skip_scripts_without_runs(history):
+    write(history, [make_run('a', 1000.0, 10, 0), make_run('a', 2000.0, 30, 1), make_run('a', 3000.0, 20, 0),
+                    make_run('b', 1500.0, 4, None), make_run('c', 2500.0, 2, None)])
+    assert history.script_stats(since=2000.0) == [
+        {'script': 'a', 'runs': 2, 'failures': 1, 'avg_runtime': 25.0, 'max_runtime': 30.0, 'last_started': 3000.0},
+        {'script': 'c', 'runs': 1, 'failures': 0, 'avg_runtime': 2.0, 'max_runtime': 2.0, 'last_started': 2500.0}]
+
+
+def test_totals_add_up_over_several_batches(tmp_path):
+    path = str(tmp_path / "history.db")
+    for batch in range(3):
+        history = RunHistory(path, logging.getLogger('test'))
+        history.start()
+        write(history, [make_run('a', batch * 100.0 + index, 1, index % 2) for index in range(10)])
+    [stats] = RunHistory(path, logging.getLogger('test')).script_stats()
+    assert (stats['runs'], stats['failures'], stats['last_started']) == (30, 15, 209.0)
+
+
+def test_queries_from_other_threads_use_their_own_connection(history):
+    write(history, [make_run('a', 1000.0, 1, 0)])
+    results = []
+    thread = threading.Thread(target=lambda: results.append(len(history.runs())))
+    thread.start()
+    thread.join()
+    assert results == [1]
@@ -0,0 +1,122 @@
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import batch_manager
+
+
+def make_template():
+    return batch_manager.JobTemplate('convert', {'path': 'C:\\jobs\\convert.bat', 'args': ['{file}', '--mode', '{mode}']})
+
+
+@pytest.mark.parametrize('value', ['a & calc', 'a | more', 'a > out.txt', 'a < in.txt', 'a ^& b', '%PATH%',
+                                   '!x!', '"quoted"', '(a)', 'line\nbreak'])
+def test_command_args_rejects_cmd_metacharacters(value):
+    with pytest.raises(ValueError):
+        make_template().command_args({'file': value, 'mode': 'fast'})
+
+
+def test_command_args_accepts_paths_and_words():
+    args = make_template().command_args({'file': 'C:\\data\\in put-1.csv', 'mode': 'a=b,c;d@e+f~g#h_i'})
+    assert args == ['C:\\data\\in put-1.csv', '--mode', 'a=b,c;d@e+f~g#h_i']
+
+
+def test_submit_rejects_unsafe_params():
+    queue = batch_manager.JobQueue(spawn=None, kill=None, logger=logging.getLogger('test'))
+    queue.templates = {'convert': make_template()}
+    with pytest.raises(ValueError):
+        queue.submit('convert', {'file': 'x.csv & del /q C:\\', 'mode': 'fast'})
+    assert not queue.jobs
+
+
+def test_cancel_before_spawn_counts_job_once():
+    spawning, release = threading.Event(), threading.Event()
+    killed = []
+
+    def spawn(path, cwd, args):
+        spawning.set()
+        release.wait(5)
+        return subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(5)'], stdout=subprocess.PIPE, text=True)
+
+    def kill(pid):
+        killed.append(lock_is_free(queue))
+        os.kill(pid, signal.SIGTERM)
+
+    queue = batch_manager.JobQueue(spawn, kill, logging.getLogger('test'))
+    queue.configure({'templates': {'convert': {'path': 'convert.bat', 'args': ['{file}']}}, 'workers': 1})
+    job = queue.submit('convert', {'file': 'a.csv'})
+    assert spawning.wait(5)
+    assert queue.cancel(job.id) # Running, but no pid yet
+    assert job.state == 'running'
+    release.set()
+    deadline = time.time() + 5
+    while job.state != 'cancelled' and time.time() < deadline:
+        time.sleep(0.01)
+    queue.stop()
+    assert job.state == 'cancelled'
+    assert killed == [True]
+    stats = queue.stats()
+    assert stats['cancelled'] == 1
+    assert stats['throughput_per_minute'] == 1.0
+
+
+def lock_is_free(queue):
+    """Whether another thread could take the queue's lock right now (kill() must not run under it)."""
+    free = []
+
+    def probe():
+        acquired = queue._condition.acquire(blocking=False)
+        free.append(acquired)
+        if acquired:
+            queue._condition.release()
+    prober = threading.Thread(target=probe)
+    prober.start()
+    prober.join()
+    return free[0]
+
+
+def sleeper(seconds):
+    return lambda path, cwd, args: subprocess.Popen([sys.executable, '-c', f'import time; time.sleep({seconds})'],
+                                                    stdout=subprocess.PIPE, text=True)
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_timeout_kills_the_job_outside_the_lock():
+    lock_free = []
+
+    def kill(pid):
+        lock_free.append(lock_is_free(queue))
+        os.kill(pid, signal.SIGTERM)
+
+    queue = batch_manager.JobQueue(sleeper(5), kill, logging.getLogger('test'))
+    queue.configure({'templates': {'slow': {'path': 'slow.bat', 'timeout_seconds': 0.2}}, 'workers': 1})
+    job = queue.submit('slow', {})
+    assert wait_for(lambda: job.state == 'failed')
+    queue.stop()
+    assert job.error.startswith("Zeitüberschreitung")
+    assert lock_free == [True]
+
+
+def test_timeout_after_the_job_finished_neither_kills_nor_marks_it():
+    killed = []
+    queue = batch_manager.JobQueue(sleeper(0), killed.append, logging.getLogger('test'))
+    queue.configure({'templates': {'quick': {'path': 'quick.bat', 'timeout_seconds': 60}}, 'workers': 1})
+    job = queue.submit('quick', {})
+    assert wait_for(lambda: job.state == 'succeeded')
+    queue.stop()
+    queue._kill_on_timeout(job, 12345) # A timer that fires late
+    assert killed == []
+    assert job.error is None
+    assert job.state == 'succeeded'
@@ -0,0 +1,43 @@
+import pytest
+
+import batch_manager
+from batch_manager import LEVEL_DEBUG, LEVEL_ERROR, LEVEL_FATAL, LEVEL_INFO, LEVEL_NONE, LEVEL_TRACE, LEVEL_WARNING
+
+
+def level(line):
+    return batch_manager.parse_log_line(line)[0]
+
+
+@pytest.mark.parametrize('line', ['no error occurred', 'all info was sent', 'Error handling enabled',
+                                  'retrying after a debug build'])
+def test_bare_lower_case_words_carry_no_level(line):
+    assert level(line) == LEVEL_NONE
+
+
+@pytest.mark.parametrize('line, expected', [
+    ('ERROR could not open file', LEVEL_ERROR),
+    ('2024-05-01 10:00:00 WARN disk almost full', LEVEL_WARNING),
+    ('[info] started', LEVEL_INFO),
+    ('<Debug> cache miss', LEVEL_DEBUG),
+    ('Warning: deprecated option', LEVEL_WARNING),
+    ('error: file not found', LEVEL_ERROR),
+    ('level=warn msg="slow request"', LEVEL_WARNING),
+])
+def test_explicit_level_tokens(line, expected):
+    assert level(line) == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    (5, LEVEL_TRACE), (10, LEVEL_DEBUG), (20, LEVEL_INFO), (30, LEVEL_WARNING), (40, LEVEL_ERROR), (50, LEVEL_FATAL),
+])
+def test_json_numeric_levels_follow_python_logging(value, expected):
+    assert level('{"level": %d, "message": "x"}' % value) == expected
+    assert level('{"levelno": %d, "message": "x"}' % value) == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    (10, LEVEL_TRACE), (20, LEVEL_DEBUG), (30, LEVEL_INFO), (40, LEVEL_WARNING), (50, LEVEL_ERROR), (60, LEVEL_FATAL),
+])
+def test_json_numeric_levels_of_bunyan_and_pino(value, expected):
+    assert level('{"v": 0, "level": %d, "msg": "x"}' % value) == expected
+    assert level('{"level": %d, "time": 1714557600000, "pid": 1, "hostname": "h", "msg": "x"}' % value) == expected
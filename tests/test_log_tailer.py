@@ -0,0 +1,121 @@
+import logging
+import os
+import threading
+import time
+
+import pytest
+
+import batch_manager
+from batch_manager import LogTailer
+
+
+class Collector:
+    """ingest() target that records (source, line) and the folder/parser objects per source."""
+    def __init__(self):
+        self.lines = []
+        self.ended = []
+        self.lock = threading.Lock()
+
+    def __call__(self, name, source, line, folder, ansi):
+        with self.lock:
+            if line is None:
+                self.ended.append(source)
+            else:
+                self.lines.append((source, line))
+
+    def texts(self):
+        with self.lock:
+            return [line for _, line in self.lines]
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+def no_inotify():
+    raise OSError("disabled for the test")
+
+
+@pytest.fixture(params=['inotify', 'polling'])
+def tailer(request, monkeypatch):
+    if request.param == 'polling':
+        monkeypatch.setattr(batch_manager, '_Inotify', no_inotify)
+    collector = Collector()
+    tailer = LogTailer(collector, logging.getLogger('test'))
+    tailer.collector = collector
+    yield tailer
+    tailer.stop()
+
+
+def append(path, data):
+    with open(path, 'ab') as handle:
+        handle.write(data)
+
+
+def test_existing_content_is_skipped_and_new_lines_follow(tailer, tmp_path):
+    log = tmp_path / "app.log"
+    log.write_bytes(b"old 1\nold 2\n")
+    tailer.add('job', [str(log)], str(tmp_path))
+    append(log, b"new 1\r\nnew 2\n")
+    assert wait_for(lambda: len(tailer.collector.lines) == 2)
+    assert tailer.collector.lines == [("app.log", "new 1\n"), ("app.log", "new 2\n")]
+
+
+def test_partial_line_waits_for_its_newline_and_is_flushed_on_remove(tailer, tmp_path):
+    log = tmp_path / "app.log"
+    tailer.add('job', [str(log)], str(tmp_path)) # Created later: read from the start
+    append(log, b"first\nsec")
+    assert wait_for(lambda: tailer.collector.texts() == ["first\n"])
+    append(log, b"ond\nthi")
+    assert wait_for(lambda: tailer.collector.texts() == ["first\n", "second\n"])
+    tailer.remove('job')
+    assert wait_for(lambda: tailer.collector.ended == ["app.log"])
+    assert tailer.collector.texts() == ["first\n", "second\n", "thi\n"]
+
+
+def test_rotation_finishes_the_old_file_then_reads_the_new_one(tailer, tmp_path):
+    log = tmp_path / "app.log"
+    log.write_bytes(b"")
+    tailer.add('job', [str(log)], str(tmp_path))
+    append(log, b"a\n")
+    assert wait_for(lambda: tailer.collector.texts() == ["a\n"])
+    writer = open(log, 'ab') # The script still holds the old file open
+    os.rename(log, tmp_path / "app.log.1")
+    writer.write(b"b\n")
+    writer.close()
+    append(log, b"c\nd\n")
+    assert wait_for(lambda: len(tailer.collector.lines) == 4)
+    assert tailer.collector.texts() == ["a\n", "b\n", "c\n", "d\n"]
+
+
+def test_truncation_restarts_at_the_beginning(tailer, tmp_path):
+    log = tmp_path / "app.log"
+    log.write_bytes(b"")
+    tailer.add('job', [str(log)], str(tmp_path))
+    append(log, b"a long first line\n")
+    assert wait_for(lambda: len(tailer.collector.lines) == 1)
+    with open(log, 'wb') as handle: # copytruncate-style rotation, then new output
+        handle.write(b"short\n")
+    assert wait_for(lambda: len(tailer.collector.lines) == 2)
+    assert tailer.collector.texts() == ["a long first line\n", "short\n"]
+
+
+def test_glob_picks_up_new_files_with_relative_sources(tailer, tmp_path):
+    (tmp_path / "logs").mkdir()
+    tailer.add('job', [str(tmp_path / "logs" / "*.log")], str(tmp_path))
+    time.sleep(0.2)
+    append(tmp_path / "logs" / "worker-1.log", b"one\n")
+    append(tmp_path / "logs" / "ignored.txt", b"nope\n")
+    assert wait_for(lambda: tailer.collector.lines == [(os.path.join("logs", "worker-1.log"), "one\n")])
+
+
+def test_invalid_utf8_is_replaced(tailer, tmp_path):
+    log = tmp_path / "app.log"
+    tailer.add('job', [str(log)], str(tmp_path))
+    append(log, "grün \xff\n".encode('latin-1'))
+    assert wait_for(lambda: tailer.collector.texts() == ["gr�n �\n"])
@@ -0,0 +1,120 @@
+import datetime
+import math
+import statistics
+import time
+
+import pytest
+
+import batch_manager
+from batch_manager import MEMORY_TREND_BUCKET_SECONDS, MemoryTrend
+from benchmarks import headless
+
+MB = 1024 * 1024
+
+
+def feed(trend, start, hours, rss_mb, step=20):
+    """Samples every step seconds for the given hours; rss_mb(hours since start) gives the RSS in MB."""
+    timestamp = start
+    for _ in range(int(hours * 3600 / step)):
+        trend.add(timestamp, rss_mb((timestamp - start) / 3600.0) * MB)
+        timestamp += step
+    return timestamp
+
+
+def test_steady_growth_is_measured_and_flagged_once_the_window_is_full():
+    trend = MemoryTrend({'window_hours': 2, 'growth_mb_per_hour': 50})
+    end = feed(trend, 1000.0, 1, lambda hours: 300 + 80 * hours)
+    assert trend.slope() == pytest.approx(80, rel=1e-6)
+    assert trend.r2() == pytest.approx(1.0)
+    assert not trend.growing() # Only half the window seen
+    feed(trend, end, 1.1, lambda hours: 380 + 80 * hours)
+    assert trend.span_hours <= 2
+    assert trend.growing()
+
+
+def test_points_are_per_minute_means():
+    trend = MemoryTrend({})
+    assert not trend.add(0.0, 100 * MB)
+    assert not trend.add(30.0, 200 * MB)
+    assert trend.add(60.0, 999 * MB) # Completes the first minute; this sample starts the next one
+    assert list(trend.points) == [(pytest.approx(30 / 3600.0), pytest.approx(150.0))]
+    assert trend.slope() == 0.0 and trend.r2() == 0.0 # Too few points for a fit
+
+
+def test_single_step_up_is_not_a_leak():
+    trend = MemoryTrend({'window_hours': 6, 'growth_mb_per_hour': 50})
+    feed(trend, 0.0, 6.1, lambda hours: 400 if hours < 3.05 else 900)
+    assert trend.slope() > 50 # Steep, but a line fits a step badly
+    assert trend.r2() < batch_manager.DEFAULT_MEMORY_MIN_R2
+    assert not trend.growing()
+
+
+def test_noisy_growth_still_fits():
+    trend = MemoryTrend({'window_hours': 3})
+    feed(trend, 0.0, 3.1, lambda hours: 500 + 60 * hours + 40 * ((hours * 12) % 1)) # GC sawtooth on top of the leak
+    assert trend.slope() == pytest.approx(60, rel=0.1)
+    assert trend.growing()
+
+
+def test_old_growth_leaves_the_window():
+    trend = MemoryTrend({'window_hours': 1})
+    end = feed(trend, 0.0, 2, lambda hours: 100 + 200 * hours)
+    assert trend.growing()
+    feed(trend, end, 1.1, lambda hours: 500)
+    assert trend.slope() == pytest.approx(0.0, abs=1e-6)
+    assert not trend.growing()
+
+
+def test_running_sums_match_a_direct_fit():
+    trend = MemoryTrend({'window_hours': 1})
+    feed(trend, 1_700_000_000.0, 5.3, lambda hours: 4000 + 30 * hours + 5 * math.sin(hours * 50)) # Large RSS, many rebuilds
+    xs, ys = zip(*trend.points)
+    expected = statistics.linear_regression(xs, ys)
+    correlation = statistics.correlation(xs, ys)
+    assert trend.n == len(trend.points)
+    assert trend.slope() == pytest.approx(expected.slope, rel=1e-6)
+    assert trend.r2() == pytest.approx(correlation * correlation, rel=1e-6)
+
+
+def test_flat_memory_has_no_fit():
+    trend = MemoryTrend({})
+    feed(trend, 0.0, 1, lambda hours: 250)
+    assert trend.slope() == pytest.approx(0.0, abs=1e-6)
+    assert trend.r2() == 0.0
+
+
+@pytest.mark.parametrize('config', [{'window_hours': 0}, {'growth_mb_per_hour': -1}, {'window_hours': "lang"},
+                                    {'restart_window': "03:00"}, {'restart_window': "25:00-26:00"}])
+def test_invalid_config(config):
+    with pytest.raises(ValueError):
+        MemoryTrend(config)
+
+
+def test_restart_window_may_wrap_past_midnight():
+    window = MemoryTrend({'restart_window': "23:30-02:00"}).restart_window
+    assert window == (23 * 60 + 30, 120)
+    assert batch_manager.in_time_window(window, datetime.datetime(2024, 1, 1, 23, 45))
+    assert batch_manager.in_time_window(window, datetime.datetime(2024, 1, 2, 1, 59))
+    assert not batch_manager.in_time_window(window, datetime.datetime(2024, 1, 2, 2, 0))
+    assert not batch_manager.in_time_window(window, datetime.datetime(2024, 1, 2, 23, 29))
+
+
+def test_manager_warns_once_and_lifts_the_suspicion(tmp_path, monkeypatch):
+    manager = headless.HeadlessManager({'job': {'path': str(tmp_path / "job.bat")}}, str(tmp_path / "config.json"),
+                                       {'control_port': 0, 'metrics_port': 0})
+    sent = []
+    monkeypatch.setattr(manager, '_send_notification', lambda title, message, event, *args: sent.append(event))
+    clock = [1_700_000_000.0]
+    monkeypatch.setattr(batch_manager.time, 'time', lambda: clock[0])
+    trend = manager.runtimes['job'].memory_trend = MemoryTrend({'window_hours': 1})
+
+    def sample(minutes, rss_mb):
+        for _ in range(minutes * 3):
+            manager._check_memory_trend('job', rss_mb(clock[0]) * MB)
+            clock[0] += 20
+
+    start = clock[0]
+    sample(70, lambda now: 200 + 100 * (now - start) / 3600)
+    assert trend.suspected and sent == ['memory_leak'] # Warned once, not every minute after
+    sample(65, lambda now: 320)
+    assert not trend.suspected and sent == ['memory_leak']
@@ -0,0 +1,112 @@
+import logging
+import time
+
+import pytest
+
+import batch_manager
+from batch_manager import Notification, NotificationDispatcher
+
+
+class ListSink:
+    def __init__(self):
+        self.received = []
+
+    def send(self, notification):
+        self.received.append(notification)
+
+
+class FailingSink:
+    def send(self, notification):
+        raise OSError("unreachable")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(batch_manager.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def make_dispatcher(**settings):
+    dispatcher = NotificationDispatcher(logging.getLogger('test'), {'sinks': [], **settings}, "test")
+    sink = ListSink()
+    dispatcher.sinks.append((sink, 0, None))
+    return dispatcher, sink
+
+
+def started(script):
+    return Notification('started', "Skript gestartet", f"'{script}' läuft", "info", script)
+
+
+def test_token_bucket_refills_at_its_rate(clock):
+    bucket = batch_manager._TokenBucket(6) # One token every ten seconds, six at most
+    assert [bucket.take() for _ in range(7)] == [True] * 6 + [False]
+    clock[0] += 9.9
+    assert not bucket.take()
+    clock[0] += 0.1
+    assert bucket.take() and not bucket.take()
+    clock[0] += 3600
+    assert bucket.take_up_to(10) == 6 # Refill stops at the capacity
+
+
+def test_burst_is_coalesced_into_one_summary():
+    dispatcher, sink = make_dispatcher()
+    dispatcher._flush([started(f"Worker {number}") for number in range(7)])
+    [summary] = sink.received
+    assert (summary.event, summary.title, summary.script) == ('started', "Skripte gestartet", None)
+    assert summary.message == "7 Skripte gestartet: Worker 0, Worker 1, Worker 2, Worker 3, Worker 4 (+2 weitere)"
+    assert (dispatcher.sent, dispatcher.coalesced, dispatcher.suppressed) == (1, 6, 0)
+
+
+def test_identical_notifications_collapse_to_the_original():
+    dispatcher, sink = make_dispatcher()
+    notifications = [started("Worker 1") for _ in range(3)]
+    dispatcher._flush(notifications)
+    assert sink.received == [notifications[0]]
+    assert dispatcher.coalesced == 2
+
+
+def test_per_script_limit_applies_to_single_notifications_only(clock):
+    dispatcher, sink = make_dispatcher(per_script_per_minute=2, global_per_minute=100)
+    for _ in range(4):
+        dispatcher._flush([started("Worker 1")])
+    dispatcher._flush([started("Worker 2")])
+    dispatcher._flush([started("Worker 1"), started("Worker 3")]) # Summaries only count against the global limit
+    assert [n.script for n in sink.received] == ["Worker 1", "Worker 1", "Worker 2", None]
+    assert dispatcher.suppressed == 2
+    clock[0] += 30
+    dispatcher._flush([started("Worker 1")])
+    assert len(sink.received) == 5
+
+
+def test_global_limit(clock):
+    dispatcher, sink = make_dispatcher(global_per_minute=3)
+    for number in range(5):
+        dispatcher._flush([started(f"Worker {number}")])
+    assert len(sink.received) == 3 and dispatcher.suppressed == 2
+
+
+def test_sinks_filter_by_severity_and_event_and_failures_are_contained():
+    dispatcher, sink = make_dispatcher()
+    errors, alerts = ListSink(), ListSink()
+    dispatcher.sinks[:0] = [(FailingSink(), 0, None), (errors, 2, None), (alerts, 0, {'alert'})]
+    dispatcher._flush([Notification('alert', "Alarm", "x", "error", "a")])
+    dispatcher._flush([Notification('started', "Start", "y", "warning", "a")])
+    dispatcher._flush([Notification('exited', "Ende", "z", "bogus", "b")]) # Unknown severities count as info
+    assert [n.message for n in sink.received] == ["x", "y", "z"]
+    assert [n.message for n in errors.received] == ["x"]
+    assert [n.message for n in alerts.received] == ["x"]
+
+
+def test_worker_coalesces_per_event_and_severity_within_the_window():
+    dispatcher, sink = make_dispatcher(coalesce_seconds=0.2)
+    dispatcher.start()
+    for number in range(3):
+        dispatcher.submit(started(f"Worker {number}"))
+    dispatcher.submit(Notification('started', "Skript gestartet", "w", "warning", "Worker 9"))
+    time.sleep(0.5)
+    dispatcher.submit(started("Worker 5")) # After the window: on its own
+    dispatcher.stop() # Flushes what is pending
+    dispatcher._thread.join(5)
+    assert sorted(n.message for n in sink.received) == [
+        "'Worker 5' läuft", "3 Skripte gestartet: Worker 0, Worker 1, Worker 2", "w"]
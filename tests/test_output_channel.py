@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+
+import batch_manager
+from batch_manager import OUTPUT_FRAME_LINES, OutputChannel
+from benchmarks import headless
+
+
+class RecordingBus:
+    def __init__(self):
+        self.posts = []
+
+    def post(self, kind, payload=()):
+        self.posts.append((kind, payload))
+
+
+def item(line):
+    return ('job', line)
+
+
+def test_one_post_per_drain_and_again_while_lines_remain():
+    bus = RecordingBus()
+    channel = OutputChannel('job', bus, capacity=100, rate_limit=0)
+    for number in range(10):
+        channel.push(item(f"{number}\n"))
+    assert bus.posts == [('output', (channel,))]
+    assert [line for _, line in channel.take(4)] == ["0\n", "1\n", "2\n", "3\n"]
+    assert len(bus.posts) == 2 # Six lines left for the next frame
+    assert len(channel.take(100)) == 6
+    assert len(bus.posts) == 2 and not channel.signalled
+    channel.push(item("again\n"))
+    assert len(bus.posts) == 3
+
+
+def test_full_channel_drops_and_counts_but_keeps_repeat_summaries():
+    channel = OutputChannel('job', RecordingBus(), capacity=3, rate_limit=0)
+    assert [channel.push(item(f"{number}\n")) for number in range(5)] == [True, True, True, False, False]
+    assert channel.push(item(None)) # Repeat summary
+    assert channel.dropped == 2
+    assert [line for _, line in channel.take()] == ["0\n", "1\n", "2\n", None]
+    channel.reset()
+    assert channel.dropped == 0 and channel.hidden == 0
+
+
+def test_block_policy_waits_for_the_ui_and_close_releases():
+    channel = OutputChannel('job', RecordingBus(), capacity=2, overflow="block", rate_limit=0)
+    channel.push(item("a\n"))
+    channel.push(item("b\n"))
+    pushed = threading.Event()
+    threading.Thread(target=lambda: (channel.push(item("c\n")), pushed.set()), daemon=True).start()
+    assert not pushed.wait(0.2)
+    channel.take(1)
+    assert pushed.wait(2)
+    blocked = threading.Event()
+    threading.Thread(target=lambda: (channel.push(item("d\n")), blocked.set()), daemon=True).start()
+    assert not blocked.wait(0.2)
+    channel.close()
+    assert blocked.wait(2)
+    assert channel.dropped == 0 and len(channel.items) == 3
+
+
+@pytest.fixture
+def manager(tmp_path):
+    scripts = {name: {'path': str(tmp_path / f"{name}.bat"), 'fold_repeats': False} for name in ('flood', 'quiet')}
+    return headless.HeadlessManager(scripts, str(tmp_path / "config.json"),
+                                    {'control_port': 0, 'metrics_port': 0, 'output_rate_limit': 0})
+
+
+def ingest(manager, name, lines):
+    channel = manager._output_channel(name)
+    stats = manager.metrics.script(name)
+    ansi = batch_manager.AnsiParser()
+    for line in lines:
+        manager._ingest_line(channel, line, stats, None, None, ansi)
+
+
+def test_flood_does_not_delay_other_scripts(manager):
+    ingest(manager, 'flood', [f"{number}\n" for number in range(3 * OUTPUT_FRAME_LINES)])
+    ingest(manager, 'quiet', ["hello\n"])
+    manager.bus.drain()
+    assert len(manager.runtimes['quiet'].output) == 1
+    assert len(manager.runtimes['flood'].output) == OUTPUT_FRAME_LINES
+    assert manager.run(5, until=lambda: len(manager.runtimes['flood'].output) == 3 * OUTPUT_FRAME_LINES)
+
+
+def test_dropped_lines_reach_the_metrics(manager):
+    manager.scripts['flood']['output_buffer_lines'] = 10
+    ingest(manager, 'flood', [f"{number}\n" for number in range(25)])
+    assert manager.runtimes['flood'].channel.dropped == 15
+    assert manager.metrics.script('flood').output_dropped == 15
+    assert manager.metrics.script('flood').output_lines == 25
+
+
+def test_rate_limit_stores_everything_but_shows_a_burst(manager):
+    manager.scripts['flood']['output_rate_limit'] = 100
+    ingest(manager, 'flood', [f"{number}\n" for number in range(300)])
+    manager.bus.drain()
+    runtime = manager.runtimes['flood']
+    assert len(runtime.output) == 300
+    assert runtime.channel.hidden == 200 and manager.metrics.script('flood').output_hidden == 200
+    assert list(runtime.view_index) == list(range(100))
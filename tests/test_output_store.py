@@ -0,0 +1,149 @@
+import datetime
+import sys
+import time
+
+import pytest
+
+import batch_manager
+from batch_manager import OutputStore
+
+
+def fill(store, count, width=60):
+    lines = [f"{index:08d} " + "äx€\U0001f600"[index % 4] * (width - 10) + "\n" for index in range(count)]
+    for line in lines:
+        store.append(line)
+    return lines
+
+
+@pytest.fixture
+def big_store():
+    store = OutputStore()
+    lines = fill(store, 20000) # About 1.2 MB: several compressed blocks plus the hot tail
+    return store, lines
+
+
+def test_round_trip_through_compressed_blocks(big_store):
+    store, lines = big_store
+    assert len(store.blocks) > 3
+    assert store.hot_start == store.block_starts[-1] + len(store._unpack(len(store.blocks) - 1))
+    assert len(store) == len(lines)
+    assert list(store) == lines
+    assert [store[index] for index in (0, 1, store.hot_start - 1, store.hot_start, len(lines) - 1)] == \
+        [lines[index] for index in (0, 1, store.hot_start - 1, store.hot_start, len(lines) - 1)]
+    assert store[-1] == lines[-1]
+    assert store.hot_chars <= batch_manager.OUTPUT_HOT_CHARS + batch_manager.OUTPUT_BLOCK_CHARS
+
+
+def test_compression_saves_memory(big_store):
+    store, lines = big_store
+    assert store.memory_bytes * 2 < sum(map(sys.getsizeof, lines)) # Against the same lines as plain strings
+
+
+def test_slices_across_block_boundaries(big_store):
+    store, lines = big_store
+    boundary = store.block_starts[2]
+    assert list(store.lines(boundary - 3, boundary + 3)) == lines[boundary - 3:boundary + 3]
+    assert list(store.lines(store.hot_start - 2, store.hot_start + 2)) == lines[store.hot_start - 2:store.hot_start + 2]
+    assert list(store.lines(5, 5)) == []
+    assert list(store.lines(len(lines) - 1)) == lines[-1:]
+
+
+def test_tail_reaches_into_compressed_blocks(big_store):
+    store, lines = big_store
+    assert store.tail(0) == []
+    assert store.tail(3) == lines[-3:]
+    count = len(lines) - store.block_starts[1] + 5
+    assert store.tail(count) == lines[-count:]
+    assert store.tail(len(lines) + 100) == lines
+
+
+def test_decompressed_block_cache_is_bounded(big_store):
+    store, lines = big_store
+    for number in range(len(store.blocks)):
+        assert store[store.block_starts[number]] == lines[store.block_starts[number]]
+    assert len(store._cache) == batch_manager.OUTPUT_CACHED_BLOCKS
+
+
+def test_full_scans_leave_the_cache_alone(big_store):
+    store, _ = big_store
+    store[0]
+    cached = list(store._cache)
+    for _ in store.lines():
+        pass
+    assert list(store._cache) == cached
+
+
+def test_lone_surrogates_survive_compression():
+    store = OutputStore()
+    lines = ["bad byte \udcff\n"] + ["x" * 100 + "\n"] * 8000
+    for line in lines:
+        store.append(line)
+    assert store.blocks
+    assert store[0] == lines[0]
+
+
+def test_snapshot_is_not_affected_by_later_appends(big_store):
+    store, lines = big_store
+    snapshot = store.snapshot()
+    fill(store, 10000)
+    store.clear()
+    assert len(snapshot) == len(lines)
+    assert list(snapshot) == lines
+
+
+def test_clear_starts_over(big_store):
+    store, _ = big_store
+    store.clear()
+    assert len(store) == 0 and store.blocks == [] and store.tail(5) == []
+    store.append("again\n")
+    assert list(store) == ["again\n"]
+
+
+def test_received_times_round_trip_with_millisecond_resolution():
+    store = OutputStore()
+    base = 1_700_000_000.0
+    times = [base + index * 0.0375 for index in range(3 * batch_manager.TIME_INDEX_LINES + 10)] # Spans several index chunks
+    for index, when in enumerate(times):
+        store.append(f"{index}\n", received=when)
+    assert len(store.time_bases) == 4
+    for index in (0, 1, batch_manager.TIME_INDEX_LINES - 1, batch_manager.TIME_INDEX_LINES, len(times) - 1):
+        assert store.received_at(index) == pytest.approx(times[index], abs=0.0005)
+
+
+def test_index_at_time_finds_the_first_line_at_or_after():
+    store = OutputStore()
+    base = 1_700_000_000.0
+    count = 2 * batch_manager.TIME_INDEX_LINES + 100
+    for index in range(count):
+        store.append(f"{index}\n", received=base + index // 2) # Two lines per second
+    assert store.index_at_time(base - 10) == 0
+    assert store.index_at_time(base) == 0
+    assert store.index_at_time(base + 0.5) == 2
+    assert store.index_at_time(base + 1) == 2
+    boundary = batch_manager.TIME_INDEX_LINES
+    assert store.index_at_time(base + boundary // 2) == boundary # First line of the second chunk
+    assert store.index_at_time(base + boundary // 2 - 0.001) == boundary
+    assert store.index_at_time(base + count) == count
+
+
+def test_out_of_order_times_are_kept_sorted():
+    store = OutputStore()
+    for when in (100.0, 101.0, 100.5, 102.0):
+        store.append("x\n", received=when)
+    assert [store.received_at(index) for index in range(4)] == [100.0, 101.0, 101.0, 102.0]
+    assert store.index_at_time(101.0) == 1
+
+
+def test_parse_jump_time():
+    now = time.time()
+    assert batch_manager.parse_jump_time("2024-05-01 03:12", now) == batch_manager._parse_timestamp("2024-05-01 03:12:00")
+    today = datetime.date.today()
+    earlier = datetime.datetime.fromtimestamp(now - 60)
+    if earlier.date() == today: # Not right after midnight
+        text = earlier.strftime("%H:%M:%S")
+        assert batch_manager.parse_jump_time(text, now) == pytest.approx(now - 60, abs=1)
+    later = datetime.datetime.fromtimestamp(now + 120)
+    if later.date() == today:
+        assert batch_manager.parse_jump_time(later.strftime("%H:%M"), now) < now # A time of day after now means yesterday
+    assert batch_manager.parse_jump_time("", now) is None
+    assert batch_manager.parse_jump_time("soon", now) is None
@@ -0,0 +1,41 @@
+import batch_manager
+from benchmarks import headless
+from batch_manager import replica_name
+
+
+def make_manager(tmp_path, scripts):
+    return headless.HeadlessManager(scripts, str(tmp_path / "config.json"), {'control_port': 0, 'metrics_port': 0})
+
+
+def scheduled_names(manager):
+    return sorted(name for _, _, name in manager.schedule_heap)
+
+
+def test_scaling_a_set_keeps_the_schedules_of_other_scripts(tmp_path):
+    manager = make_manager(tmp_path, {
+        'worker': {'path': str(tmp_path / "worker.bat"), 'replicas': 2, 'schedule': {'interval_seconds': 3600}},
+        'nightly': {'path': str(tmp_path / "nightly.bat"), 'schedule': {'cron': "0 3 * * *", 'overlap': "queue"}},
+    })
+    manager.schedule_pending['nightly'] = 2 # Runs queued behind a long run
+    nightly_next = manager.schedule_next_run['nightly']
+
+    manager.scale_replicas('worker', 4)
+    assert manager.schedule_pending == {'nightly': 2}
+    assert manager.schedule_next_run['nightly'] == nightly_next
+    assert scheduled_names(manager) == sorted(['nightly'] + [replica_name('worker', index) for index in range(4)])
+
+    manager.scale_replicas('worker', 1)
+    assert manager.schedule_pending == {'nightly': 2}
+    assert manager.schedule_next_run['nightly'] == nightly_next
+    assert scheduled_names(manager) == ['nightly', 'worker']
+    assert set(manager.schedules) == set(manager.schedule_next_run) == {'nightly', 'worker'}
+
+
+def test_status_rows_name_each_instance_once(tmp_path):
+    manager = make_manager(tmp_path, {'worker': {'path': str(tmp_path / "worker.bat"), 'replicas': 3}})
+    rows = batch_manager.ControlServer(manager)._script_rows()
+    assert [row.get('replica_set') for row in rows] == ['worker', None, None, None]
+    assert [row.get('name') for row in rows[1:]] == [replica_name('worker', index) for index in range(3)]
+    assert 'name' not in rows[0]
+    assert all(row['replica_of'] == 'worker' for row in rows[1:])
+    assert batch_manager._format_script_table(rows).splitlines()[1].startswith("worker [0/3]")
@@ -0,0 +1,60 @@
+import pytest
+
+import batch_manager
+from batch_manager import ResourceLimits
+from benchmarks import headless
+
+
+def test_full_config_is_converted_to_bytes_and_numbers():
+    limits = ResourceLimits({'cpu_affinity': ["0", 2], 'priority': "below_normal", 'max_rss_mb': 1.5,
+                             'max_cpu_percent': "80", 'max_open_files': 1024,
+                             'cgroup': {'cpu_max_percent': 150, 'memory_max_mb': 512},
+                             'on_breach': "throttle", 'breach_seconds': 3})
+    assert limits.cpu_affinity == [0, 2]
+    assert limits.max_rss == 1536 * 1024
+    assert limits.max_cpu_percent == 80.0
+    assert limits.max_open_files == 1024
+    assert (limits.cgroup_cpu_percent, limits.cgroup_memory) == (150.0, 512 * 1024 * 1024)
+    assert (limits.on_breach, limits.breach_seconds) == ("throttle", 3.0)
+    assert limits.watched
+    assert limits.nice_value() == 10 and limits.nice_value("idle") == 19 and limits.nice_value(-3) == -3
+
+
+def test_empty_config_limits_nothing():
+    limits = ResourceLimits({'max_rss_mb': 0, 'cgroup': None})
+    assert (limits.cpu_affinity, limits.priority, limits.max_rss, limits.max_cpu_percent, limits.max_open_files,
+            limits.cgroup_cpu_percent, limits.cgroup_memory) == (None,) * 7
+    assert not limits.watched
+    assert (limits.on_breach, limits.breach_seconds) == ("warn", 10.0)
+
+
+@pytest.mark.parametrize('priority', [-20, 0, 19, "idle", "high"])
+def test_valid_priorities(priority):
+    assert ResourceLimits({'priority': priority}).priority == priority
+
+
+@pytest.mark.parametrize('config', [{'priority': "realtime"}, {'priority': 20}, {'priority': -21}, {'priority': True},
+                                    {'priority': 1.5}, {'on_breach': "reboot"}, {'max_rss_mb': "viel"},
+                                    {'cpu_affinity': ["x"]}])
+def test_invalid_config(config):
+    with pytest.raises(ValueError):
+        ResourceLimits(config)
+
+
+def test_manager_ignores_invalid_limits(tmp_path, caplog):
+    scripts = {'good': {'path': str(tmp_path / "a.bat"), 'limits': {'priority': "idle"}},
+               'bad': {'path': str(tmp_path / "b.bat"), 'limits': {'priority': 99}},
+               'broken': {'path': str(tmp_path / "c.bat"), 'limits': {'cgroup': ["x"]}},
+               'none': {'path': str(tmp_path / "d.bat")}}
+    manager = headless.HeadlessManager(scripts, str(tmp_path / "config.json"), {'control_port': 0, 'metrics_port': 0})
+    assert list(manager.resource_limits) == ['good']
+    assert "'bad'" in caplog.text and "'broken'" in caplog.text
+
+
+def test_cgroup_files_are_written(tmp_path):
+    limits = ResourceLimits({'cgroup': {'cpu_max_percent': 50, 'memory_max_mb': 64}})
+    batch_manager._attach_cgroup(str(tmp_path), "Worker #1", 4242, limits)
+    group = tmp_path / "Worker__1"
+    assert (group / "cpu.max").read_text() == "50000 100000"
+    assert (group / "memory.max").read_text() == str(64 * 1024 * 1024)
+    assert (group / "cgroup.procs").read_text() == "4242"
@@ -0,0 +1,153 @@
+import datetime
+import time
+
+import pytest
+
+import batch_manager
+from batch_manager import CronExpression, Schedule
+from benchmarks import headless
+
+
+@pytest.fixture
+def berlin(monkeypatch):
+    if not hasattr(time, 'tzset'):
+        pytest.skip("time.tzset() is not available on this platform")
+    monkeypatch.setenv('TZ', "Europe/Berlin")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def at(*args, fold=0):
+    return datetime.datetime(*args, fold=fold).timestamp()
+
+
+def local(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp)
+
+
+def runs(expression, start, count):
+    cron = CronExpression(expression)
+    moments = []
+    timestamp = start
+    for _ in range(count):
+        timestamp = cron.next_after(timestamp)
+        moments.append(local(timestamp))
+    return moments
+
+
+def test_day_of_month_or_weekday_when_both_are_restricted(berlin):
+    # 13th of the month or any Friday
+    days = [moment.date() for moment in runs("0 0 13 * 5", at(2024, 9, 1), 6)]
+    assert days == [datetime.date(2024, 9, day) for day in (6, 13, 20, 27)] + [datetime.date(2024, 10, 4), datetime.date(2024, 10, 11)]
+
+
+def test_stepped_wildcard_day_field_is_combined_with_and(berlin):
+    # Odd days that are Mondays, not every Monday plus every odd day
+    days = [moment.date() for moment in runs("0 0 */2 * 1", at(2024, 9, 1), 3)]
+    assert days == [datetime.date(2024, 9, 9), datetime.date(2024, 9, 23), datetime.date(2024, 10, 7)]
+    assert all(day.weekday() == 0 and day.day % 2 == 1 for day in days)
+    days = [moment.date() for moment in runs("0 0 1 * */3", at(2024, 9, 1, 12), 2)] # First of the month on Sun, Wed or Sat
+    assert days == [datetime.date(2024, 12, 1), datetime.date(2025, 1, 1)]
+
+
+def test_month_and_weekday_names_and_macros(berlin):
+    moments = runs("30 9 * jan,mar mon-fri", at(2024, 1, 30, 10, 0), 3)
+    assert moments == [datetime.datetime(2024, 1, 31, 9, 30), datetime.datetime(2024, 3, 1, 9, 30), datetime.datetime(2024, 3, 4, 9, 30)]
+    assert runs("@weekly", at(2024, 9, 4), 1) == [datetime.datetime(2024, 9, 8)]
+    assert runs("0 12 * * 7", at(2024, 9, 4), 1) == [datetime.datetime(2024, 9, 8, 12)] # 7 is Sunday as well
+
+
+def test_month_ends_and_leap_days(berlin):
+    assert runs("0 0 31 * *", at(2024, 4, 1), 3) == [datetime.datetime(2024, 5, 31), datetime.datetime(2024, 7, 31), datetime.datetime(2024, 8, 31)]
+    assert runs("0 0 29 2 *", at(2024, 3, 1), 1) == [datetime.datetime(2028, 2, 29)]
+    assert runs("59 23 * * *", at(2024, 12, 31, 23, 59), 1) == [datetime.datetime(2025, 1, 1, 23, 59)]
+
+
+def test_next_after_is_strictly_later_and_minute_aligned(berlin):
+    cron = CronExpression("*/15 * * * *")
+    assert local(cron.next_after(at(2024, 9, 1, 10, 15))) == datetime.datetime(2024, 9, 1, 10, 30)
+    assert local(cron.next_after(at(2024, 9, 1, 10, 14, 59))) == datetime.datetime(2024, 9, 1, 10, 15)
+
+
+def test_spring_forward_runs_a_skipped_time_once(berlin):
+    # 02:00-03:00 does not exist on 31 March 2024
+    assert runs("30 2 * * *", at(2024, 3, 30, 12), 2) == [datetime.datetime(2024, 3, 31, 3, 30), datetime.datetime(2024, 4, 1, 2, 30)]
+    assert runs("0 * * * *", at(2024, 3, 31, 1, 30), 2) == [datetime.datetime(2024, 3, 31, 3), datetime.datetime(2024, 3, 31, 4)]
+
+
+def test_fall_back_does_not_repeat_or_go_backwards(berlin):
+    # 02:00-03:00 happens twice on 27 October 2024
+    assert runs("30 2 * * *", at(2024, 10, 26, 12), 2) == [datetime.datetime(2024, 10, 27, 2, 30), datetime.datetime(2024, 10, 28, 2, 30)]
+    cron = CronExpression("*/20 * * * *")
+    inside_repeat = at(2024, 10, 27, 2, 10, fold=1)
+    following = cron.next_after(inside_repeat)
+    assert following > inside_repeat
+    assert following - inside_repeat == 50 * 60 # 03:00, the repeated hour's slots already ran in its first pass
+    timestamp = at(2024, 10, 27, 1, 0)
+    for _ in range(12):
+        following = cron.next_after(timestamp)
+        assert following > timestamp
+        timestamp = following
+
+
+@pytest.mark.parametrize('expression', ["* * * *", "60 * * * *", "* 24 * * *", "* * 0 * *", "* * * 13 *", "* * * * 8",
+                                        "5-1 * * * *", "*/0 * * * *", "* * * foo *", "0 0 31 2 *"])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression).next_after(time.time())
+
+
+@pytest.mark.parametrize('config', [{}, {'cron': "* * * * *", 'interval_seconds': 60}, {'interval_seconds': 0},
+                                    {'interval_seconds': -5}, {'interval_seconds': 60, 'overlap': "wait"},
+                                    {'interval_seconds': 60, 'catch_up': "never"}])
+def test_invalid_schedules(config):
+    with pytest.raises(ValueError):
+        Schedule(config)
+
+
+def test_missed_runs_are_counted_and_capped():
+    schedule = Schedule({'interval_seconds': 60})
+    assert schedule.missed_between(1000, 1000) == (1, 1060)
+    assert schedule.missed_between(1000, 1179) == (3, 1180) # Due at 1000, 1060 and 1120
+    missed, following = schedule.missed_between(1000, 1000 + 60 * 1000)
+    assert missed == batch_manager.SCHEDULE_MAX_CATCH_UP
+    assert 1000 + 60 * 1000 < following <= 1000 + 60 * 1001
+
+
+def make_manager(tmp_path, schedule):
+    return headless.HeadlessManager({'job': {'path': str(tmp_path / "job.bat"), 'schedule': schedule}},
+                                    str(tmp_path / "config.json"), {'control_port': 0, 'metrics_port': 0})
+
+
+@pytest.mark.parametrize('catch_up, expected', [("skip", []), ("once", [1]), ("all", [5])])
+def test_catch_up_after_downtime(tmp_path, catch_up, expected):
+    manager = make_manager(tmp_path, {'interval_seconds': 60, 'catch_up': catch_up, 'overlap': "queue"})
+    started = []
+    manager._run_scheduled = lambda name, count: started.append(count)
+    now = time.time()
+    manager.schedule_heap = [(now - 290, now - 290, 'job')] # Down for almost five minutes
+    manager._schedule_tick()
+    assert started == expected
+    assert now < manager.schedule_next_run['job'] <= now + 60
+
+
+def test_run_on_time_is_not_a_catch_up(tmp_path):
+    manager = make_manager(tmp_path, {'interval_seconds': 60, 'catch_up': "skip"})
+    started = []
+    manager._run_scheduled = lambda name, count: started.append(count)
+    now = time.time()
+    manager.schedule_heap = [(now - 1, now - 1, 'job')]
+    manager._schedule_tick()
+    assert started == [1]
+
+
+def test_jitter_delays_within_bounds(tmp_path):
+    manager = make_manager(tmp_path, {'interval_seconds': 3600, 'jitter_seconds': 30})
+    nominal = time.time() + 3600
+    for _ in range(200):
+        manager._push_schedule('job', nominal)
+        assert nominal <= manager.schedule_next_run['job'] <= nominal + 30
+    fire_times = {fire_time for fire_time, _, _ in manager.schedule_heap}
+    assert len(fire_times) > 1 # Actually random